@@ -3,6 +3,8 @@
 # Command sequence class
 #
 #===========================================================================
+import functools
+from . import clock
 from . import log
 from . import util
 
@@ -18,16 +20,21 @@ class CommandSeq:
 
     This type of class is needed because we need to send series of commands.
     And each one needs to return so that the event loop can process the
-    network activity to actually run the command.  In the future, this is
-    probably a good case for switching to asyncio type processing.
+    network activity to actually run the command.
 
-    Ideally there is a better way to this but I couldn't come up with any.
-    Since each call is via callback, the stack grows longer and longer so
-    this shouldn't be used for 100+ calls but for the small number of calls
-    this library needs, it works ok.
+    The sequence is run as a state machine so the stack doesn't grow with
+    the number of commands.  If a command calls on_done before it returns
+    (i.e. it didn't need to send anything), the result is stored and the run
+    loop in _loop() starts the next command instead of calling it from
+    inside the callback.  Commands that send messages call on_done later
+    from the event loop which restarts the run loop.
+
+    Sequences can be cancelled (see cancel()), can use a time out for each
+    command, and can report progress as each command finishes.
     """
     #-----------------------------------------------------------------------
-    def __init__(self, protocol, msg=None, on_done=None, error_stop=True):
+    def __init__(self, protocol, msg=None, on_done=None, error_stop=True,
+                 time_out=None, on_progress=None):
         """Constructor
 
         Args:
@@ -38,18 +45,44 @@ class CommandSeq:
                    when there is an error or when all the commands finish.
           error_stop (bool): True to stop the sequence if a command fails.
                      False to continue on with the sequence.
+          time_out (float):  Optional time in seconds that each command has
+                   to finish in.  If a command takes longer, it's treated as
+                   a failure.  The Protocol.signal_poll signal is used to
+                   check the time.  If protocol is a device, the device
+                   protocol is used for this.
+          on_progress:  Optional callback to run when each command finishes.
+                        Signature is: on_progress(step, total)
         """
         self.protocol = protocol
 
         self._on_done = util.make_callback(on_done)
+        self._on_progress = on_progress
         self.msg = msg
         self.error_stop = error_stop
+        self.time_out = time_out
         self.total = 0
 
         # List of Entry objects (see class below) to call for each step in
         # the sequence.
         self.calls = []
 
+        # Number of the step that is currently running.  Callbacks from any
+        # other step (i.e. one that timed out) are ignored.
+        self._step = 0
+
+        # Result of the last step (success, msg, data) waiting to be handled
+        # by the run loop.
+        self._result = None
+
+        # True while the run loop is active.
+        self._looping = False
+
+        # True once the sequence on_done callback has been called.
+        self._finished = False
+
+        # Time that the running step must finish by if time_out is set.
+        self._expire_time = None
+
     #-----------------------------------------------------------------------
     def add(self, func, *args, **kwargs):
         """Add a function call to the sequence.
@@ -99,14 +132,29 @@ class CommandSeq:
         """
         self.on_done(True, None, None)
 
+    #-----------------------------------------------------------------------
+    def cancel(self):
+        """Cancel the sequence.
+
+        No more commands are started and the sequence on_done callback is
+        called with a failure.  A command that is already running will
+        finish but it's result is ignored.
+        """
+        if self._finished:
+            return
+
+        LOG.debug("Command sequence cancelled at %d of %d", self._step,
+                  self.total)
+        self.calls = []
+        self._finish(False, "Command sequence cancelled", None)
+
     #-----------------------------------------------------------------------
     def on_done(self, success, msg, data):
         """Finished callback.
 
-        This method is passed as the on_done callback to to all the commands.
-        When the command finishes, it calls this method.  If there is another
-        command in the sequence, it will execute.  Otherwise, the on_done
-        callback passed to the constructor is called to complete the
+        This is called when the running command finishes.  If there is
+        another command in the sequence, it will execute.  Otherwise, the
+        on_done callback passed to the constructor is called to complete the
         sequence.
 
         If any command fails, it stops the sequence.
@@ -116,21 +164,110 @@ class CommandSeq:
           msg (str):  str) Message result.
           data:  Arbitrary callback data.
         """
-        # Last function failed with an error.
-        if not success and self.error_stop:
-            self._on_done(success, msg, data)
+        self._step_done(self._step, success, msg, data)
 
-        # No more calls - success.
-        elif not self.calls:
-            self._on_done(success, self.msg, data)
+    #-----------------------------------------------------------------------
+    def _step_done(self, step, success, msg, data):
+        """Step finished callback.
 
-        # Otherwise run the next command.
-        else:
-            LOG.debug("Running command %d of %d", self.total + 1 -
-                      len(self.calls), self.total)
+        This is passed to each command (with the step number bound) as the
+        on_done callback.  The result is stored and the run loop is started
+        if it's not already running.
+
+        Args:
+          step (int):  The step number that finished.
+          success (bool):  True for success, False for failure.
+          msg (str):  str) Message result.
+          data:  Arbitrary callback data.
+        """
+        # Ignore callbacks from steps that timed out or were cancelled.
+        if self._finished or step != self._step:
+            LOG.debug("Ignoring stale command sequence step %d", step)
+            return
+
+        self._result = (success, msg, data)
+
+        # If the command finished before returning, the run loop is still
+        # active further up the stack and will handle the result.
+        if not self._looping:
+            self._loop()
 
-            entry = self.calls.pop(0)
-            entry.run(self.protocol, self.on_done)
+    #-----------------------------------------------------------------------
+    def _loop(self):
+        """Run commands until one of them has to wait for the event loop.
+        """
+        self._looping = True
+        try:
+            while self._result is not None and not self._finished:
+                success, msg, data = self._result
+                self._result = None
+                self._expire_time = None
+
+                if self._step and self._on_progress:
+                    self._on_progress(self._step, self.total)
+
+                # Last function failed with an error.
+                if not success and self.error_stop:
+                    self._finish(success, msg, data)
+
+                # No more calls - success.
+                elif not self.calls:
+                    self._finish(success, self.msg, data)
+
+                # Otherwise run the next command.
+                else:
+                    self._step += 1
+                    LOG.debug("Running command %d of %d", self._step,
+                              self.total)
+
+                    if self.time_out is not None:
+                        self._expire_time = clock.time() + self.time_out
+                        self._signal_poll().connect(self._poll)
+
+                    entry = self.calls.pop(0)
+                    entry.run(self.protocol, functools.partial(
+                        self._step_done, self._step))
+        finally:
+            self._looping = False
+
+    #-----------------------------------------------------------------------
+    def _finish(self, success, msg, data):
+        """Finish the sequence and call the on_done callback.
+
+        Args:
+          success (bool):  True for success, False for failure.
+          msg (str):  str) Message result.
+          data:  Arbitrary callback data.
+        """
+        self._finished = True
+        if self.time_out is not None:
+            self._signal_poll().disconnect(self._poll)
+
+        self._on_done(success, msg, data)
+
+    #-----------------------------------------------------------------------
+    def _signal_poll(self):
+        """Return the Protocol poll signal for step time outs.
+
+        Returns:
+          Signal:  Returns the signal_poll of the Protocol.  If self.protocol
+          is a device, it's protocol is used.
+        """
+        protocol = getattr(self.protocol, "protocol", self.protocol)
+        return protocol.signal_poll
+
+    #-----------------------------------------------------------------------
+    def _poll(self, t):
+        """Periodic poll callback to check for step time outs.
+
+        Args:
+           t (float):  Current Unix clock time tag.
+        """
+        if self._expire_time is not None and t > self._expire_time:
+            LOG.warning("Command sequence step %d of %d timed out",
+                        self._step, self.total)
+            self._expire_time = None
+            self._step_done(self._step, False, "Command timed out", None)
 
     #-----------------------------------------------------------------------
 
@@ -3,10 +3,12 @@
 # Insteon modem class.
 #
 #===========================================================================
+import functools
 import json
 import os
 from .Address import Address
 from .CommandSeq import CommandSeq
+from . import clock
 from . import config
 from . import db
 from . import handler
@@ -26,6 +28,12 @@ class Modem:
     input).  This allows devices to be looked up by address to send commands
     to those devices.
     """
+    # Time out in seconds for each device in the refresh_all() sweep.  The
+    # ping uses a short time out (see DeviceRefresh.sweep_time_out) but
+    # some devices send more than one message when refreshed.  This stops
+    # a device that never finishes from holding up the sweep.
+    sweep_step_time_out = 30
+
     def __init__(self, protocol):
         """Constructor
 
@@ -43,15 +51,30 @@ class Modem:
 
         self.save_path = None
 
+        # Devices skip refresh() if their state was confirmed by Insteon
+        # traffic less than this many seconds ago.  0 to always refresh.
+        self.refresh_window = 0
+
         # Map of Address.id -> Device and name -> Device.  name is optional
         # so devices might not be in that map.
         self.devices = {}
         self.device_names = {}
         self.db = db.Modem()
 
+        # Map of Address.id -> config file device type (switch, etc).  Used
+        # to find changed devices when the config is reloaded.
+        self._device_types = {}
+
         # Signal to emit when a new device is added.
         self.signal_new_device = Signal()  # emit(modem, device)
 
+        # Signal to emit when a device is removed by a config reload.
+        self.signal_remove_device = Signal()  # emit(modem, device)
+
+        # Signal to emit when a config reload is requested.  The start
+        # command handles this.  emit(modem, on_done)
+        self.signal_reload = Signal()
+
         # Remove (mqtt) commands mapped to methods calls.  These are handled
         # in run_command().  Commands should all be lower case (inputs are
         # lowered).
@@ -61,12 +84,15 @@ class Modem:
             'db_del_ctrl_of' : self.db_del_ctrl_of,
             'db_del_resp_of' : self.db_del_resp_of,
             'get_devices' : self.get_devices,
+            'get_stats' : self.get_stats,
             'print_db' : self.print_db,
             'refresh' : self.refresh,
             'refresh_all' : self.refresh_all,
             'linking' : self.linking,
             'scene' : self.scene,
             'factory_reset' : self.factory_reset,
+            'reload' : self.reload,
+            'dump_recorder' : self.dump_recorder,
             }
 
         # Add a generic read handler for any broadcast messages initiated by
@@ -104,6 +130,11 @@ class Modem:
         - storage   Path to store database records in.
         - startup_refresh    True if device databases should be checked for
                              new entries on start up.
+        - refresh_window     Optional time in seconds.  Device refreshes are
+                             skipped if the device state was confirmed by
+                             Insteon traffic inside this window.
+        - background_idle    Optional time in seconds the modem must be idle
+                             before background tasks are run.
         - devices   List of devices.  Each device is a type and insteon
                     address of the device.
 
@@ -133,6 +164,10 @@ class Modem:
                      len(self.db))
             LOG.debug(str(self.db))
 
+        # Window to skip device refreshes in.  This must be set before the
+        # devices are created so they can be given the value.
+        self.refresh_window = data.get('refresh_window', self.refresh_window)
+
         # Read the device definitions and scenes.
         self._load_devices(data.get('devices', []))
         #FUTURE: self.scenes = self._load_scenes(data.get('scenes', []))
@@ -144,6 +179,58 @@ class Modem:
             for device in self.devices.values():
                 device.refresh()
 
+    #-----------------------------------------------------------------------
+    def reload_config(self, data):
+        """Reload the configuration after it changed.
+
+        This is the insteon key in the configuration data.  Devices that are
+        new in the config are created and devices that are no longer in it
+        are removed.  Devices with a new type or name are replaced.  Every
+        other device is kept so its state and any commands in progress
+        aren't affected.
+
+        The modem port and address can't be changed without a restart.
+
+        Args:
+          data (dict):  Configuration data to load.
+        """
+        LOG.info("Reloading configuration data")
+
+        if Address(data['address']) != self.addr:
+            LOG.error("Modem address changes require a restart")
+
+        self.refresh_window = data.get('refresh_window', self.refresh_window)
+
+        # Map of Address.id -> (device type, name, config entry).
+        entries = {}
+        for device_type, values in data.get('devices', {}).items():
+            dev_class, _kwargs = config.find(device_type)
+            for entry in values or []:
+                addr, name = dev_class.parse_config(entry)
+                entries[Address(addr).id] = (device_type, name, entry)
+
+        num_removed = num_added = 0
+        for id, dev in list(self.devices.items()):
+            new_entry = entries.get(id, None)
+            if new_entry and new_entry[:2] == (self._device_types.get(id),
+                                               dev.name):
+                dev.refresh_window = self.refresh_window
+                del entries[id]
+                continue
+
+            LOG.info("Removing %s", dev.label)
+            self.remove(dev)
+            self._device_types.pop(id, None)
+            self.signal_remove_device.emit(self, dev)
+            num_removed += 1
+
+        for device_type, _name, entry in entries.values():
+            self._create_devices(device_type, [entry])
+            num_added += 1
+
+        LOG.ui("Configuration reloaded: %d devices added, %d removed",
+               num_added, num_removed)
+
     #-----------------------------------------------------------------------
     def refresh(self, force=False, on_done=None):
         """Load the all link database from the modem.
@@ -300,28 +387,149 @@ class Modem:
         the database sizes.  So it usually should only be called if no other
         activity is expected on the network.
 
+        The refresh runs as a two phase sweep.  Phase one sends a refresh
+        ping (with a short time out) to every device to get the current
+        state and database delta.  Database downloads found to be needed are
+        deferred.  Phase two then downloads the modem database and the out
+        of date device databases one at a time as a background task (see
+        Scheduler) so the downloads only run when the modem is otherwise
+        idle.
+
+        Devices whose state was confirmed by Insteon traffic and whose
+        database delta was checked inside the refresh window are skipped
+        unless force is set.
+
         Args:
           force (bool):  Force flag passed to devices.  If True, devices
                 will refresh their Insteon db's even if they think the db
                 is up to date.
           on_done:  Finished callback.  This is called when the command has
                     completed.  Signature is: on_done(success, msg, data)
+                    The data is a dict with the time in seconds until all
+                    the device states were known ('states_time') and the
+                    total time of the sweep ('total_time').
         """
-        # Set the error stop to false so a failed refresh doesn't stop the
-        # sequence from trying to refresh other devices.
-        seq = CommandSeq(self.protocol, "Refresh all complete", on_done,
-                         error_stop=False)
-
-        # Reload the modem database.
-        seq.add(self.refresh, force)
-
-        # Reload all the device databases.
-        for device in self.devices.values():
-            seq.add(device.refresh, force)
+        on_done = util.make_callback(on_done)
+        start = clock.time()
+
+        # Devices with a recently confirmed state would skip the ping anyway
+        # so don't add them to the sweep at all.  Passive traffic doesn't
+        # carry the db delta so the database must also have been checked
+        # inside the window.
+        devices = [i for i in self.devices.values()
+                   if force or not i.is_state_current() or
+                   not i.is_db_current()]
+        LOG.ui("Refresh all: pinging %d of %d devices", len(devices),
+               len(self.devices))
+
+        # Phase two: download the modem db and any device db's that phase
+        # one found to be out of date.
+        def download(success, msg, data):
+            states_time = clock.time() - start
+            LOG.ui("Refresh all: device states known after %.1f sec",
+                   states_time)
+
+            # The downloads run as a background task so they only use the
+            # modem when nothing else is.  A failed download doesn't stop
+            # the task from trying the other devices.
+            task = self.protocol.background.add(
+                "Refresh all complete", functools.partial(finished,
+                                                          states_time))
+
+            # Reload the modem database.
+            task.add(self.refresh, force)
+
+            for device in devices:
+                if device.has_deferred_db():
+                    task.add(device.download_deferred_db)
+
+            LOG.ui("Refresh all: queued %d database downloads", task.total)
+
+        def finished(states_time, success, msg, data):
+            total_time = clock.time() - start
+            LOG.ui("Refresh all: complete in %.1f sec", total_time)
+            data = {"states_time" : states_time, "total_time" : total_time}
+            on_done(success, msg, data)
+
+        def progress(step, total):
+            LOG.ui("Refresh all: pinged %d of %d devices", step, total)
+
+        # Phase one: ping each device.  Set the error stop to false so a
+        # failed refresh doesn't stop the sequence from trying to refresh
+        # other devices.
+        seq = CommandSeq(self.protocol, "Device states refreshed", download,
+                         error_stop=False, time_out=self.sweep_step_time_out,
+                         on_progress=progress)
+
+        for device in devices:
+            seq.add(self._sweep_refresh, device, force)
 
         # Start the command sequence.
         seq.run()
 
+    #-----------------------------------------------------------------------
+    def _sweep_refresh(self, device, force, on_done):
+        """Refresh a device as part of the refresh_all() sweep.
+
+        The device refresh uses a short time out and defers any database
+        download until the sweep calls device.download_deferred_db().
+
+        Args:
+          device:  The device to refresh.
+          force (bool):  Force flag passed to the device refresh.
+          on_done:  Finished callback.  This is called when the command has
+                    completed.  Signature is: on_done(success, msg, data)
+        """
+        def done(success, msg, data):
+            device.refresh_sweep = False
+            on_done(success, msg, data)
+
+        device.refresh_sweep = True
+        device.refresh(force, on_done=done)
+
+    #-----------------------------------------------------------------------
+    def get_stats(self, on_done=None):
+        """Print the modem message statistics to the log UI.
+
+        This reports the number of messages dropped from the write queue
+        because they expired or were cancelled.
+
+        Args:
+          on_done:  Finished callback.  This is called when the command has
+                    completed.  Signature is: on_done(success, msg, data)
+                    The data is the statistics dict.
+        """
+        on_done = util.make_callback(on_done)
+        stats = dict(self.protocol.stats)
+        LOG.ui(json.dumps(stats))
+        on_done(True, "Complete", stats)
+
+    #-----------------------------------------------------------------------
+    def dump_recorder(self, file=None, on_done=None):
+        """Write the recent PLM traffic to a file.
+
+        See recorder.Recorder for details.  Use the decode_recorder.py script
+        to print the file.
+
+        Args:
+          file (str):  The file name to write on the server.  This is always
+               written to the recorder directory and any directory in the
+               name is ignored.  If this is None, a time stamped file name
+               is used.
+          on_done:  Finished callback.  This is called when the command has
+                    completed.  Signature is: on_done(success, msg, data)
+                    The data is the path to the file.
+        """
+        on_done = util.make_callback(on_done)
+        try:
+            path = self.protocol.recorder.dump(name=file)
+        except (OSError, ValueError) as e:
+            on_done(False, "Recorder dump failed: %s" % e, None)
+            return
+
+        LOG.ui("PLM traffic written to %s", path)
+        on_done(True, "Complete", path)
+
     #-----------------------------------------------------------------------
     def get_devices(self, on_done=None):
         """"Print all the devices the modem knows about to the log UI.
@@ -545,6 +753,27 @@ class Modem:
         msg_handler = handler.ModemReset(self, on_done)
         self.protocol.send(msg, msg_handler)
 
+    #-----------------------------------------------------------------------
+    def reload(self, on_done=None):
+        """Reload the configuration file.
+
+        The reload is done by the server after the current network events
+        are handled (see cmd_line.start).  Devices that were added, removed,
+        or changed in the config are updated.  The modem port and broker
+        settings require a restart.
+
+        Args:
+          on_done:  Finished callback.  This is called when the command has
+                    completed.  Signature is: on_done(success, msg, data)
+        """
+        on_done = util.make_callback(on_done)
+        if not self.signal_reload.slots:
+            on_done(False, "Configuration reload is not available", None)
+            return
+
+        LOG.ui("Configuration reload requested")
+        self.signal_reload.emit(self, on_done)
+
     #-----------------------------------------------------------------------
     def linking(self, group=0x01, on_done=None):
         """Enable linking mode on the modem.
@@ -664,6 +893,7 @@ class Modem:
             if device:
                 LOG.info("%s broadcast to %s for group %s", self.label,
                          device.addr, group)
+                device.track_state(msg, device.responder_group(msg))
                 device.handle_group_cmd(self.addr, msg)
             else:
                 LOG.warning("%s broadcast - device %s not found", self.label,
@@ -748,6 +978,8 @@ class Modem:
         self.devices.clear()
         self.device_names.clear()
 
+        self._device_types.clear()
+
         for device_type in data:
             # Use a default list so that if the config field is empty, the
             # loop below will still work.
@@ -755,23 +987,35 @@ class Modem:
             if not values:
                 values = []
 
-            # Look up the device type in the configuration data and call the
-            # constructor to build the device object.
-            dev_class, kwargs = config.find(device_type)
+            self._create_devices(device_type, values)
+
+    #-----------------------------------------------------------------------
+    def _create_devices(self, device_type, values):
+        """Create the devices for one device type in the configuration.
+
+        Args:
+          device_type (str):  The config file device type (switch, etc).
+          values (list):  The device configuration entries.
+        """
+        # Look up the device type in the configuration data and call the
+        # constructor to build the device object.
+        dev_class, kwargs = config.find(device_type)
 
-            # Have the device type parse the config values below here and
-            # return us a list of devices.
-            devices = dev_class.from_config(values, self.protocol, self,
-                                            **kwargs)
+        # Have the device type parse the config values below here and
+        # return us a list of devices.
+        devices = dev_class.from_config(values, self.protocol, self,
+                                        **kwargs)
 
-            for dev in devices:
-                LOG.info("Created %s at %s", device_type, dev.label)
+        for dev in devices:
+            LOG.info("Created %s at %s", device_type, dev.label)
+            dev.refresh_window = self.refresh_window
 
-                # Store the device by ID in the map.
-                self.add(dev)
+            # Store the device by ID in the map.
+            self.add(dev)
+            self._device_types[dev.addr.id] = device_type
 
-                # Notify anyone else that new device is available.
-                self.signal_new_device.emit(self, dev)
+            # Notify anyone else that new device is available.
+            self.signal_new_device.emit(self, dev)
 
     #-----------------------------------------------------------------------
     def _load_scenes(self, data):
@@ -5,9 +5,11 @@
 #===========================================================================
 import collections
 import enum
-import time
+from . import clock
 from . import log
 from . import message as Msg
+from . import recorder
+from .Scheduler import Scheduler
 from .Signal import Signal
 #from . import util
 
@@ -26,8 +28,10 @@ class WriteStatus(enum.Enum):
     WAIT_FOR_REPLY = 2
 
 
-# Output message and handler stored together.
-OutputMsg = collections.namedtuple('OutputMsg', ['msg', 'handler'])
+# Output message and handler stored together.  Deadline is the Unix clock
+# time after which the message is dropped if it hasn't been sent (or None).
+OutputMsg = collections.namedtuple('OutputMsg', ['msg', 'handler',
+                                                 'deadline'])
 
 
 class Protocol:
@@ -81,6 +85,11 @@ class Protocol:
         self._linkPoll = self.link.poll
         self.link.poll = self._poll
 
+        # Forward poll_dt() calls the same way so the network manager knows
+        # when the next time out or timed message is due.
+        self._linkPollDt = self.link.poll_dt
+        self.link.poll_dt = self._poll_dt
+
         # Connect the link read/write signals to our callback methods.
         link.signal_read.connect(self._data_read)
         link.signal_wrote.connect(self._msg_written)
@@ -88,6 +97,10 @@ class Protocol:
         # Message received signal.  Every read message is passed to this.
         self.signal_received = Signal()  # (Message)
 
+        # Poll signal.  This is emitted each time the network link is polled
+        # so other objects can check for time outs.
+        self.signal_poll = Signal()  # (float time)
+
         # Inbound message buffer.
         self._buf = bytearray()
 
@@ -134,6 +147,22 @@ class Protocol:
         # we try and avoid that.
         self._next_write_time = 0
 
+        # Last time that a message was read or a write transaction finished.
+        # This is used to find how long the modem has been idle for.
+        self._last_activity = 0
+
+        # Number of messages dropped from the write queue because they
+        # passed their deadline or were cancelled.
+        self.stats = {"expired" : 0, "cancelled" : 0}
+
+        # Idle time background task scheduler.  This runs maintenance tasks
+        # when there is no other traffic.
+        self.background = Scheduler(self)
+
+        # Ring buffer of the raw data read and written.  This is written to
+        # a file on request or when a write handler times out.
+        self.recorder = recorder.Recorder()
+
     #-----------------------------------------------------------------------
     def add_handler(self, handler):
         """Add a universal message handler.
@@ -170,15 +199,42 @@ class Protocol:
           config (dict): Configuration data to load.
         """
         self.link.load_config(config)
+        self.background.load_config(config)
+        self.recorder.load_config(config)
 
     #-----------------------------------------------------------------------
-    def send(self, msg, msg_handler, high_priority=False, after=None):
+    def idle_time(self, t):
+        """Return the time the modem has been idle for.
+
+        The modem is idle if there are no messages in the write queue and no
+        messages have been read recently.
+
+        Args:
+           t (float):  Current Unix clock time tag.
+
+        Returns:
+          float:  Returns the idle time in seconds.  This is 0 if the modem
+                  is busy.
+        """
+        if self._write_queue or t < self._next_write_time:
+            return 0
+
+        return max(0, t - self._last_activity)
+
+    #-----------------------------------------------------------------------
+    def send(self, msg, msg_handler, high_priority=False, after=None,
+             deadline=None):
         """Write a message to the PLM modem.
 
         If there are no other messages in the queue, the message gets written
         immediately.  Otherwise the message is added to the write queue and
         will be written after other messages are finished.
 
+        If the message is still in the queue after it's deadline, it's
+        dropped and the handler handle_expired() method is called which
+        fails the command.  If deadline is None, the handler max_queue_time
+        is used to set the deadline.
+
         The handler is responsible for reading replies.  Each handler returns
         message.UNKNOWN if it can't process the message, message.CONTINUE if
         the message was handled and more replies are expected, or
@@ -198,17 +254,28 @@ class Protocol:
           after (float):  Unix clock time tag to send the message after. If
                 None, the message is sent as soon as possible.  Exact time is
                 not guaranteed - the message will be send no earlier than this.
+          deadline (float):  Unix clock time tag to drop the message after
+                   if it hasn't been sent yet.  If None, the handler default
+                   is used.
+
+        Returns:
+          Returns a handle that can be passed to cancel() to remove the
+          message from the queue.
         """
         # If the time is input, append the inputs to the timer list and sort
         # the list by the times field.
         if after is not None:
-            timed = Msg.Timed(msg, msg_handler, high_priority, after)
+            timed = Msg.Timed(msg, msg_handler, high_priority, after,
+                              deadline)
             self._timed_messages.append(timed)
             self._timed_messages.sort(key=lambda i: i.time)
-            return
+            return timed
+
+        if deadline is None and msg_handler.max_queue_time is not None:
+            deadline = clock.time() + msg_handler.max_queue_time
 
         # Normal message queue.
-        output = OutputMsg(msg, msg_handler)
+        output = OutputMsg(msg, msg_handler, deadline)
         if not high_priority:
             self._write_queue.append(output)
 
@@ -221,6 +288,84 @@ class Protocol:
         if self._write_status == WriteStatus.READY_TO_WRITE:
             self._send_next_msg()
 
+        return output
+
+    #-----------------------------------------------------------------------
+    def cancel(self, handle):
+        """Cancel a message that hasn't been sent yet.
+
+        The message is removed from the queue and the handler
+        handle_cancel() method is called which fails the command.  A message
+        that has already been written can't be cancelled.
+
+        Args:
+          handle:  The handle returned by send().  A timed message handle
+                   stays valid after the message moves to the write queue.
+
+        Returns:
+          bool:  Returns True if the message was cancelled.
+        """
+        # Timed messages that are due have moved to the write queue.
+        if isinstance(handle, Msg.Timed) and handle.output is not None:
+            handle = handle.output
+
+        if handle in self._timed_messages:
+            self._timed_messages.remove(handle)
+            handler = handle.msg_handler
+
+        else:
+            # Compare by identity since OutputMsg tuples compare by value.
+            idx = [i for i, out in enumerate(self._write_queue)
+                   if out is handle]
+            if not idx:
+                return False
+
+            # The first message is in the process of being sent.
+            if idx[0] == 0 and \
+               self._write_status != WriteStatus.READY_TO_WRITE:
+                return False
+
+            del self._write_queue[idx[0]]
+            handler = handle.handler
+
+        self.stats["cancelled"] += 1
+        LOG.info("Cancelled message (%d cancelled): %s",
+                 self.stats["cancelled"], handle.msg)
+        handler.handle_cancel(self)
+        return True
+
+    #-----------------------------------------------------------------------
+    def _poll_dt(self, t):
+        """Return the time in seconds until _poll() has work to do.
+
+        This is the earliest of the link's own poll time, the next timed
+        message, the next write queue deadline, the write handler time out,
+        and the next background task.
+
+        Args:
+           t (float):  Current Unix clock time tag.
+
+        Returns:
+          float:  Returns the time in seconds or None if nothing is
+          scheduled.
+        """
+        times = [self._linkPollDt(t), self.background.poll_dt(t)]
+
+        if self._timed_messages:
+            times.append(self._timed_messages[0].time - t)
+
+        # The message being sent can't expire (see _remove_expired_write) so
+        # it's deadline doesn't matter.
+        start = 0 if self._write_status == WriteStatus.READY_TO_WRITE else 1
+        times.extend(out.deadline - t for out in self._write_queue[start:]
+                     if out.deadline is not None)
+
+        if self._write_status == WriteStatus.WAIT_FOR_REPLY:
+            times.append(self._write_queue[0].handler.poll_dt(t))
+
+        times = [i for i in times if i is not None]
+        return max(0, min(times)) if times else None
+
     #-----------------------------------------------------------------------
     def _poll(self, t):
         """Periodic polling function.
@@ -241,13 +386,22 @@ class Protocol:
             LOG.info("Moving timer based message to queue: %s", timed.msg)
             timed.send(self)
 
+        # Drop any queued messages that have passed their deadline.
+        self._remove_expired_write(t)
+
         # If we're waiting for a reply, ask the write handler if it's past
         # the time out in which case we'll mark this message as finished and
         # move on.
         if (self._write_status == WriteStatus.WAIT_FOR_REPLY and
                 self._write_queue[0].handler.is_expired(self, t)):
+            self.recorder.auto_dump(t)
             self._write_finished()
 
+        # Run any background tasks if we're idle.
+        self.background.poll(t)
+
+        self.signal_poll.emit(t)
+
     #-----------------------------------------------------------------------
     def _data_read(self, link, data):
         """PLM modem data read callback.
@@ -261,6 +415,7 @@ class Protocol:
           data (bytes): bytes: The data that was read.
         """
         # Append the read data to the inbound message buffer.
+        self.recorder.add(recorder.READ, data)
         self._buf.extend(data)
 
         # Keep processing until there are no more messages to handle.  There
@@ -343,7 +498,7 @@ class Protocol:
         if not isinstance(msg, Msg.InpStandard):  # Also matches InpExtended
             return False
 
-        current = time.time()
+        current = clock.time()
 
         # Remove any expired messages first.
         self._remove_expired_read(current)
@@ -381,6 +536,37 @@ class Protocol:
         for i in reversed(expired_idx):
             del self._read_history[i]
 
+    #-----------------------------------------------------------------------
+    def _remove_expired_write(self, t):
+        """Drop messages that are past their deadline from the write queue.
+
+        The message currently being sent is never removed.
+
+        Args:
+          t (float): The current time.
+        """
+        start = 0 if self._write_status == WriteStatus.READY_TO_WRITE else 1
+
+        keep = self._write_queue[:start]
+        expired = []
+        for out in self._write_queue[start:]:
+            if out.deadline is not None and t > out.deadline:
+                expired.append(out)
+            else:
+                keep.append(out)
+
+        if not expired:
+            return
+
+        # Update the queue before calling the handlers since they can send
+        # new messages.
+        self._write_queue = keep
+        for out in expired:
+            self.stats["expired"] += 1
+            LOG.warning("Dropping expired message (%d expired): %s",
+                        self.stats["expired"], out.msg)
+            out.handler.handle_expired(self)
+
     #-----------------------------------------------------------------------
     def _process_msg(self, msg):
         """Process a read message by passing it to the handlers.
@@ -392,6 +578,8 @@ class Protocol:
         Args:
           msg:  Insteon message object to process.
         """
+        self._last_activity = clock.time()
+
         # Send the general message received notification.
         self.signal_received.emit(msg)
 
@@ -399,8 +587,10 @@ class Protocol:
         # a reply to the write so see if it can handle the message.  If the
         # status is FINISHED, then the handler has seen all the messages it
         # expects. If it's CONTINUE, it processed the message but expects
-        # more.  If it's UNKNOWN, the handler ignored that message.
-        if self._write_queue:
+        # more.  If it's UNKNOWN, the handler ignored that message.  The
+        # handler only sees messages once its message has been written so a
+        # late reply to an earlier attempt can't finish it before then.
+        if self._write_status == WriteStatus.WAIT_FOR_REPLY:
             handler = self._write_queue[0].handler
             LOG.debug("Passing msg to write handler: %s", handler)
             status = handler.msg_received(self, msg)
@@ -451,6 +641,7 @@ class Protocol:
 
         self._write_queue.pop(0)
         self._write_status = WriteStatus.READY_TO_WRITE
+        self._last_activity = clock.time()
 
         if self._write_queue:
             self._send_next_msg()
@@ -486,6 +677,13 @@ class Protocol:
         This grabs the first message in the queue and sets it into the
         write_data field for later processing of replies.
         """
+        # Drop messages that waited too long.  The expired handlers can send
+        # other messages so only continue if that didn't start a write.
+        self._remove_expired_write(clock.time())
+        if not self._write_queue or \
+           self._write_status != WriteStatus.READY_TO_WRITE:
+            return
+
         # Get the next output message and handler from the write queue.
         out = self._write_queue[0]
         msg_bytes = out.msg.to_bytes()
@@ -496,6 +694,7 @@ class Protocol:
         # Write the message to the PLM modem.  The message will only be sent
         # when the current time is after the next write time as tracked by
         # the link.
+        self.recorder.add(recorder.WRITE, msg_bytes)
         self.link.write(msg_bytes, self._next_write_time)
         self._write_status = WriteStatus.PENDING_WRITE
 
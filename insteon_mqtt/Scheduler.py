@@ -0,0 +1,337 @@
+#===========================================================================
+#
+# Idle time background task scheduler.
+#
+#===========================================================================
+import functools
+from . import log
+from . import util
+from .CommandSeq import Entry
+from .Signal import Signal
+
+LOG = log.get_logger()
+
+
+class Scheduler:
+    """Background task scheduler for the PLM.
+
+    Maintenance work (database downloads, scans, model queries, etc) competes
+    with interactive traffic for the modem.  This class queues that work and
+    only runs it when the Protocol has been idle for a while: nothing is in
+    the write queue and no messages have been read for idle_time seconds.
+
+    Each task is a series of steps (see Task below).  The scheduler runs one
+    step at a time and waits for the protocol to become idle again before
+    starting the next step.  So any interactive commands that arrive while a
+    task is running are sent before the next step of the task.  Steps that
+    send more than one message (like database downloads) use yield_step()
+    between messages so they give way to interactive commands as well.
+
+    The scheduler is owned by the Protocol (Protocol.background) which calls
+    poll() periodically.  The signal_changed signal is emitted any time the
+    task queue changes so it can be observed (see mqtt.Modem).
+    """
+    def __init__(self, protocol, idle_time=0.5):
+        """Constructor
+
+        Args:
+          protocol (Protocol):  The Protocol object to use.
+          idle_time (float):  Time in seconds that the protocol must be idle
+                    before a task step will be run.
+        """
+        self.protocol = protocol
+        self.idle_time = idle_time
+
+        # Emitted when the task queue changes.
+        self.signal_changed = Signal()  # (Scheduler)
+
+        # List of Task objects from oldest to newest.  [0] is the task that
+        # is currently being run.
+        self._tasks = []
+
+        # True if the current step of _tasks[0] is running.
+        self._running = False
+
+    #-----------------------------------------------------------------------
+    def load_config(self, config):
+        """Load a configuration dictionary.
+
+        This should be the insteon key in the configuration data.  Key inputs
+        are:
+
+        - background_idle   Optional time in seconds that the modem must be
+                            idle before background tasks are run.
+
+        Args:
+          config (dict): Configuration data to load.
+        """
+        self.idle_time = config.get('background_idle', self.idle_time)
+
+    #-----------------------------------------------------------------------
+    def add(self, label, on_done=None, error_stop=False):
+        """Add a new task to the end of the queue.
+
+        The returned Task has the same add() and add_msg() methods as
+        CommandSeq which should be used to add the steps to the task.  The
+        task will be started the next time the protocol is idle.
+
+        Args:
+          label (str):  Description of the task.  This is also passed to the
+                on_done callback as the message if the task works.
+          on_done:  Finished callback.  This is called when the task has
+                    completed.  Signature is: on_done(success, msg, data)
+          error_stop (bool): True to stop the task if a step fails.  False to
+                     continue on with the next step.
+
+        Returns:
+          Task:  Returns the created task.
+        """
+        task = Task(label, on_done, error_stop)
+        self._tasks.append(task)
+        LOG.info("Background task queued: %s", label)
+        self.signal_changed.emit(self)
+        return task
+
+    #-----------------------------------------------------------------------
+    def cancel(self, task):
+        """Remove a task from the queue.
+
+        If the task is currently running, the current step will finish but
+        no more steps will be run.  The task on_done callback is called with
+        a failure.
+
+        Args:
+          task (Task):  The task to cancel.  If this isn't in the queue,
+               nothing is done.
+        """
+        if task not in self._tasks:
+            return
+
+        if task is self._tasks[0] and self._running:
+            # _step_done() will remove the task when the step finishes.
+            task.calls.clear()
+            task.cancelled = True
+            return
+
+        self._tasks.remove(task)
+        LOG.info("Background task cancelled: %s", task.label)
+        self.signal_changed.emit(self)
+        task.on_done(False, "Task cancelled", None)
+
+    #-----------------------------------------------------------------------
+    def yield_step(self, func, *args, **kwargs):
+        """Pause the running task step until the protocol is idle again.
+
+        Steps that send a series of messages call this between messages
+        instead of sending the next message directly.  The function is
+        called with the input arguments by poll() once the protocol has been
+        idle for idle_time so any interactive commands are sent first.  The
+        step still finishes when it calls the on_done callback it was
+        given.
+
+        Args:
+          func: The function or method to call to continue the step.
+          args: Arguments to pass to the function.
+          kwargs: Keyword arguments to pass to the function.
+        """
+        assert self._running and self._tasks
+
+        task = self._tasks[0]
+        task.resume = functools.partial(func, *args, **kwargs)
+        self._running = False
+        self.signal_changed.emit(self)
+
+    #-----------------------------------------------------------------------
+    def status(self):
+        """Return the current task queue state.
+
+        Returns:
+          list:  Returns a list of dicts (one per task in queue order) with
+                 the keys 'label', 'step', 'total', and 'running'.
+        """
+        return [{"label" : i.label, "step" : i.total - len(i.calls),
+                 "total" : i.total, "running" : idx == 0 and self._running}
+                for idx, i in enumerate(self._tasks)]
+
+    #-----------------------------------------------------------------------
+    def __len__(self):
+        """Return the number of tasks in the queue.
+        """
+        return len(self._tasks)
+
+    #-----------------------------------------------------------------------
+    def poll_dt(self, t):
+        """Return the time in seconds until poll() may start a task step.
+
+        Args:
+           t (float):  Current Unix clock time tag.
+
+        Returns:
+          float:  Returns the time in seconds or None if there is nothing to
+          run.  If the protocol is busy, this is the idle time since that's
+          the soonest a step could start.
+        """
+        if self._running or not self._tasks:
+            return None
+
+        idle = self.protocol.idle_time(t)
+        return max(0, self.idle_time - idle) if idle else self.idle_time
+
+    #-----------------------------------------------------------------------
+    def poll(self, t):
+        """Periodic polling function.
+
+        The Protocol calls this periodically.  If the protocol has been idle
+        long enough, the next task step is started.
+
+        Args:
+           t (float):  Current Unix clock time tag.
+        """
+        if self._running or not self._tasks:
+            return
+
+        if self.protocol.idle_time(t) < self.idle_time:
+            return
+
+        task = self._tasks[0]
+        if task.resume:
+            LOG.debug("Resuming background task %s step %d of %d",
+                      task.label, task.total - len(task.calls), task.total)
+            func, task.resume = task.resume, None
+            self._run(task, func)
+
+        elif task.calls:
+            LOG.debug("Running background task %s step %d of %d", task.label,
+                      task.total + 1 - len(task.calls), task.total)
+            entry = task.calls.pop(0)
+            self._run(task, functools.partial(entry.run, self.protocol,
+                                              self._step_done))
+
+        # Task had no steps.
+        else:
+            self._task_done(True, task.label, None)
+
+    #-----------------------------------------------------------------------
+    def _run(self, task, func):
+        """Run a task step or the continuation of a step.
+
+        Args:
+          task (Task):  The running task.
+          func:  The function to call.  It takes no arguments.
+        """
+        self._running = True
+        self.signal_changed.emit(self)
+        try:
+            func()
+        except Exception as e:  # pylint: disable=broad-except
+            LOG.exception("Background task %s step failed", task.label)
+
+            # Fail the step unless it already finished before raising.
+            if self._running or task.resume:
+                task.resume = None
+                self._step_done(False, "Task step error: %s" % e, None)
+
+    #-----------------------------------------------------------------------
+    def _step_done(self, success, msg, data):
+        """Task step finished callback.
+
+        If the task is complete, it's removed and it's callback is run.
+        Otherwise the next step is run by poll() once the protocol is idle.
+
+        Args:
+          success (bool):  True for success, False for failure.
+          msg (str):  Message result.
+          data:  Arbitrary callback data.
+        """
+        self._running = False
+        task = self._tasks[0]
+
+        if task.cancelled:
+            self._task_done(False, "Task cancelled", None)
+
+        elif not success and task.error_stop:
+            self._task_done(success, msg, data)
+
+        elif not task.calls:
+            self._task_done(success, task.label, data)
+
+        else:
+            self.signal_changed.emit(self)
+
+    #-----------------------------------------------------------------------
+    def _task_done(self, success, msg, data):
+        """Remove the current task and call it's finished callback.
+
+        Args:
+          success (bool):  True for success, False for failure.
+          msg (str):  Message result.
+          data:  Arbitrary callback data.
+        """
+        task = self._tasks.pop(0)
+        LOG.info("Background task finished: %s", task.label)
+        self.signal_changed.emit(self)
+        task.on_done(success, msg, data)
+
+    #-----------------------------------------------------------------------
+
+
+#===========================================================================
+class Task:
+    """Background task.
+
+    This stores a series of steps to run like a CommandSeq.  Each step is a
+    function call or message to send and is run by the Scheduler.  Tasks
+    should be split into as many steps as possible (ideally one message per
+    step) since the scheduler can only give way to interactive traffic
+    between steps.
+    """
+    def __init__(self, label, on_done=None, error_stop=False):
+        """Constructor
+
+        Args:
+          label (str):  Description of the task.
+          on_done:  Finished callback.  This is called when the task has
+                    completed.  Signature is: on_done(success, msg, data)
+          error_stop (bool): True to stop the task if a step fails.
+        """
+        self.label = label
+        self.on_done = util.make_callback(on_done)
+        self.error_stop = error_stop
+        self.cancelled = False
+        self.total = 0
+
+        # Continuation of the running step set by Scheduler.yield_step().
+        self.resume = None
+
+        # List of CommandSeq Entry objects to call for each step.
+        self.calls = []
+
+    #-----------------------------------------------------------------------
+    def add(self, func, *args, **kwargs):
+        """Add a function call step to the task.
+
+        Args:
+          func: The function or method to call.  Must take an on_done
+                callback argument.
+          args: Arguments to pass to the function.
+          kwargs: Keyword arguments to pass to the function.
+        """
+        if "on_done" in kwargs:
+            del kwargs["on_done"]
+        self.calls.append(Entry.from_func(func, args, kwargs))
+        self.total += 1
+
+    #-----------------------------------------------------------------------
+    def add_msg(self, msg, handler):
+        """Add a message and handler step to the task.
+
+        NOTE: the on_done callback in the handler will NOT be called.
+
+        Args:
+          msg:  The message object to send.
+          handler:  The handler to use for the message.
+        """
+        self.calls.append(Entry.from_msg(msg, handler))
+        self.total += 1
+
+    #-----------------------------------------------------------------------
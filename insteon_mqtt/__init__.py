@@ -14,18 +14,29 @@ __version__ = "0.6.8"
 
 #===========================================================================
 
-from . import cmd_line
-from . import db
-from . import device
-from . import log
-from . import message
-from . import mqtt
-from . import network
-from . import on_off
-from . import util
+# Sub-packages and classes are imported when they're first used so the
+# command line tool only imports what the command needs.
+from .util import lazy_import
 
-from .Address import Address
-from .CommandSeq import CommandSeq
-from .Modem import Modem
-from .Protocol import Protocol
-from .Signal import Signal
+lazy_import(__name__, {
+    "aio"        : "aio",
+    "clock"      : "clock",
+    "cmd_line"   : "cmd_line",
+    "config"     : "config",
+    "db"         : "db",
+    "device"     : "device",
+    "handler"    : "handler",
+    "log"        : "log",
+    "message"    : "message",
+    "mqtt"       : "mqtt",
+    "network"    : "network",
+    "on_off"     : "on_off",
+    "recorder"   : "recorder",
+    "sim"        : "sim",
+    "Address"    : "Address:Address",
+    "CommandSeq" : "CommandSeq:CommandSeq",
+    "Modem"      : "Modem:Modem",
+    "Protocol"   : "Protocol:Protocol",
+    "Scheduler"  : "Scheduler:Scheduler",
+    "Signal"     : "Signal:Signal",
+    })
@@ -0,0 +1,125 @@
+#===========================================================================
+#
+# asyncio wrappers for the callback based command API.
+#
+# Device and modem commands take an on_done(success, msg, data) callback.
+# These wrap the commands so they can be awaited from asyncio code.  The
+# network links must be run by an asyncio event loop (see
+# network.AsyncioManager) so the callbacks run in the same loop.
+#
+#    result = await aio.call(device.on, level=128)
+#
+#    # Commands to multiple devices are queued in the Protocol right away
+#    # and sent one after the other.
+#    results = await asyncio.gather(*[aio.wrap(i).refresh() for i in devs])
+#
+#===========================================================================
+import asyncio
+import collections
+import functools
+
+# Result of a command.  These are the arguments passed to on_done.
+Result = collections.namedtuple('Result', ['success', 'msg', 'data'])
+
+
+#===========================================================================
+class CommandError(Exception):
+    """A command called with check=True failed.
+
+    The Result object is stored in the result attribute.
+    """
+    def __init__(self, result):
+        """Constructor
+
+        Args:
+          result (Result):  The failed command result.
+        """
+        super().__init__(result.msg)
+        self.result = result
+
+
+#===========================================================================
+async def call(func, *args, check=False, **kwargs):
+    """Call a function that takes an on_done callback and wait for it.
+
+    The function is called right away so any messages it sends are queued
+    before this waits for the result.
+
+    Args:
+      func:  The function or method to call.  Must take an on_done callback
+             keyword argument.
+      args:  Arguments to pass to the function.
+      check (bool):  If True, a CommandError is raised if the command fails.
+      kwargs:  Keyword arguments to pass to the function.
+
+    Returns:
+      Result:  Returns the on_done success, msg, and data values.
+    """
+    future = asyncio.get_running_loop().create_future()
+
+    def on_done(success, msg, data):
+        # Commands that time out can call on_done more than once.
+        if not future.done():
+            future.set_result(Result(success, msg, data))
+
+    kwargs.pop("on_done", None)
+    func(*args, on_done=on_done, **kwargs)
+
+    result = await future
+    if check and not result.success:
+        raise CommandError(result)
+
+    return result
+
+
+#===========================================================================
+def wrap(obj, check=False):
+    """Create an awaitable proxy for a device or modem.
+
+    Args:
+      obj:  The device or modem object to wrap.
+      check (bool):  If True, a CommandError is raised if a command fails.
+
+    Returns:
+      Proxy:  Returns the proxy object.
+    """
+    return Proxy(obj, check)
+
+
+#===========================================================================
+class Proxy:
+    """Awaitable proxy for a device or modem.
+
+    Methods looked up on the proxy return coroutine functions that call the
+    object method with call().  Other attributes are returned unchanged.
+
+        result = await aio.wrap(device).set(level=50)
+    """
+    def __init__(self, obj, check=False):
+        """Constructor
+
+        Args:
+          obj:  The device or modem object to wrap.
+          check (bool):  If True, a CommandError is raised if a command
+                fails.
+        """
+        self._obj = obj
+        self._check = check
+
+    #-----------------------------------------------------------------------
+    def __getattr__(self, name):
+        """Look up an attribute on the wrapped object.
+
+        Args:
+          name (str):  The attribute name.
+
+        Returns:
+          Returns a coroutine function for methods or the attribute value.
+        """
+        attr = getattr(self._obj, name)
+        if not callable(attr):
+            return attr
+
+        return functools.partial(call, attr, check=self._check)
+
+    #-----------------------------------------------------------------------
@@ -0,0 +1,121 @@
+#===========================================================================
+#
+# Clock used for all time stamps and time outs.
+#
+# Code that needs the current time calls clock.time() instead of time.time()
+# so the time source can be replaced.  The default is the wall clock.  For
+# simulations and tests, set a VirtualClock with clock.set() and use the
+# network.VirtualManager which advances the virtual time straight to the
+# next deadline instead of waiting for it.
+#
+#===========================================================================
+import time as _time
+
+
+class Clock:
+    """Wall clock time source.
+    """
+    #-----------------------------------------------------------------------
+    def time(self):
+        """Return the current time.
+
+        Returns:
+          float:  Returns the Unix clock time in seconds.
+        """
+        return _time.time()
+
+    #-----------------------------------------------------------------------
+    def is_virtual(self):
+        """Return True if the time only changes when it's advanced.
+        """
+        return False
+
+    #-----------------------------------------------------------------------
+
+
+#===========================================================================
+class VirtualClock(Clock):
+    """Virtual time source.
+
+    The time only changes when advance() is called so a simulation can skip
+    the time between events.
+    """
+    #-----------------------------------------------------------------------
+    def __init__(self, t=0.0):
+        """Constructor
+
+        Args:
+          t (float):  The starting time.
+        """
+        self.t = t
+
+    #-----------------------------------------------------------------------
+    def time(self):
+        """Return the current time.
+
+        Returns:
+          float:  Returns the virtual time in seconds.
+        """
+        return self.t
+
+    #-----------------------------------------------------------------------
+    def is_virtual(self):
+        """Return True if the time only changes when it's advanced.
+        """
+        return True
+
+    #-----------------------------------------------------------------------
+    def advance(self, dt):
+        """Move the time forward.
+
+        Args:
+          dt (float):  The time in seconds to advance by.  Negative values
+             are ignored.
+        """
+        if dt > 0:
+            self.t += dt
+
+    #-----------------------------------------------------------------------
+
+
+#===========================================================================
+
+# The active clock.
+_clock = Clock()
+
+
+def time():
+    """Return the current time from the active clock.
+
+    Returns:
+      float:  Returns the current time in seconds.
+    """
+    return _clock.time()
+
+
+#===========================================================================
+def get():
+    """Return the active clock.
+
+    Returns:
+      Clock:  Returns the active clock object.
+    """
+    return _clock
+
+
+#===========================================================================
+def set(clock=None):
+    """Set the active clock.
+
+    Args:
+      clock (Clock):  The clock to use.  None to use the wall clock.
+
+    Returns:
+      Clock:  Returns the previous clock so it can be restored.
+    """
+    global _clock
+    previous = _clock
+    _clock = clock if clock is not None else Clock()
+    return previous
+
+#===========================================================================
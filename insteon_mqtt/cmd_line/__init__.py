@@ -12,8 +12,15 @@ or send a variety of commands to a running server process.
 """
 
 #===========================================================================
-from . import device
-from . import modem
-from . import util
+from ..util import lazy_import
 
-from .main import main
+# Command modules are imported when they're used so each command only
+# imports what it needs.
+lazy_import(__name__, {
+    "batch"  : "batch",
+    "device" : "device",
+    "main"   : "main:main",
+    "modem"  : "modem",
+    "start"  : "start",
+    "util"   : "util",
+    })
@@ -0,0 +1,229 @@
+#===========================================================================
+#
+# Batch command mode
+#
+#===========================================================================
+import collections
+import json
+import random
+import sys
+import time
+from ..mqtt import Reply
+from . import util
+
+
+#===========================================================================
+def batch(args, config):
+    """Run a file of commands over a single connection.
+
+    The server's local control socket is used if there is one.  Otherwise
+    the commands are sent over a single MQTT connection.
+
+    Each input line is a JSON object with the device address or name in the
+    'address' key and the same keys as the command topic payload.  Use
+    'modem' as the address for modem commands.  Blank lines and lines
+    starting with '#' are skipped.
+
+      {"address" : "kitchen", "cmd" : "on", "level" : 128}
+      {"address" : "modem", "cmd" : "get_devices"}
+
+    A JSON result line is printed for each command as it finishes.
+    """
+    if args.file == "-":
+        lines = sys.stdin.readlines()
+    else:
+        with open(args.file) as f:
+            lines = f.readlines()
+
+    sock = util.connect_local(config)
+    if sock:
+        client = util.LocalClient(sock)
+    else:
+        client = util.connect(config)
+
+    runner = Batch(client, args.topic, args.jobs)
+    runner.load(lines)
+    return runner.run()
+
+
+#===========================================================================
+class Batch:
+    """Runs a list of commands using one MQTT or control socket client.
+
+    Up to jobs commands are sent at the same time.  Each command gets its
+    own session ID so the replies can be matched to the command and one
+    wildcard subscription receives the replies for all of them.
+
+    The server sends every status message to all the sessions that are
+    running when it's logged so with more than one job, a command may also
+    report messages from the other commands.  The command status comes from
+    the result in the END reply so it's always correct.
+    """
+    def __init__(self, client, topic, jobs=1, out=None,
+                 time_out=util.TIME_OUT):
+        """Constructor
+
+        Args:
+          client (paho.Client):  The connected MQTT client.
+          topic (str):  The command topic prefix.
+          jobs (int):  Maximum number of commands to run at the same time.
+          out:  Stream to write the JSON result lines to.  Defaults to
+                sys.stdout.
+          time_out (float):  Time in seconds to wait for a reply before the
+                   command is marked as timed out.
+        """
+        self.client = client
+        self.topic = topic
+        self.jobs = max(1, jobs)
+        self.out = out if out is not None else sys.stdout
+        self.time_out = time_out
+
+        # Random batch ID.  Command sessions are 'ID/line'.
+        self.id = str(random.getrandbits(32))
+
+        # Commands waiting to be sent and map of line number to the running
+        # command result dicts.
+        self._queue = collections.deque()
+        self._active = {}
+
+        self.num_failed = 0
+
+    #-----------------------------------------------------------------------
+    def load(self, lines):
+        """Read the commands to run.
+
+        Lines that can't be parsed are reported as failed right away.
+
+        Args:
+          lines (list):  The input lines.
+        """
+        for num, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+
+            try:
+                payload = json.loads(line)
+                address = payload.pop("address")
+                if "cmd" not in payload:
+                    raise ValueError("Command has no 'cmd' key")
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                self._finish({"line" : num, "status" : "error",
+                              "errors" : ["Invalid command: %s" % e]})
+                continue
+
+            self._queue.append((num, str(address), payload))
+
+    #-----------------------------------------------------------------------
+    def run(self):
+        """Send the commands and wait for them to finish.
+
+        Returns:
+          int:  Returns 0 if every command worked, -1 otherwise.
+        """
+        sub_topic = "%s/+/session/%s/+" % (self.topic, self.id)
+        self.client.message_callback_add(sub_topic, self.handle_reply)
+        self.client.subscribe(sub_topic)
+
+        while self._queue or self._active:
+            self._send()
+            self.client.loop(timeout=0.1)
+            self._check_time_out(time.time())
+
+        self.client.disconnect()
+        return -1 if self.num_failed else 0
+
+    #-----------------------------------------------------------------------
+    def handle_reply(self, client, data, message):
+        """MQTT session reply callback.
+
+        Args:
+          client (paho.Client):  The MQTT client.
+          data:  Optional user data (unused).
+          message:  The incoming message.
+        """
+        try:
+            num = int(message.topic.split("/")[-1])
+        except ValueError:
+            return
+
+        result = self._active.get(num, None)
+        if result is None:
+            return
+
+        result["end_time"] = time.time() + self.time_out
+        reply = Reply.from_json(message.payload.decode("utf-8"))
+
+        if reply.type == Reply.Type.END:
+            del self._active[num]
+
+            # The END reply has the command result.  Older servers don't
+            # send it so fall back to checking for errors.
+            success = reply.data
+            if success is None:
+                success = not result["errors"]
+
+            result["status"] = "ok" if success else "error"
+            self._finish(result)
+
+        elif reply.type == Reply.Type.MESSAGE:
+            result["messages"].append(reply.data)
+
+        elif reply.type == Reply.Type.ERROR:
+            result["errors"].append(reply.data)
+
+    #-----------------------------------------------------------------------
+    def _send(self):
+        """Send queued commands until jobs commands are running.
+        """
+        while self._queue and len(self._active) < self.jobs:
+            num, address, payload = self._queue.popleft()
+            payload["session"] = "%s/%d" % (self.id, num)
+
+            topic = "%s/%s" % (self.topic, address)
+            self.client.publish(topic, json.dumps(payload), qos=2)
+
+            t = time.time()
+            self._active[num] = {
+                "line" : num,
+                "address" : address,
+                "cmd" : payload["cmd"],
+                "status" : None,
+                "messages" : [],
+                "errors" : [],
+                "start_time" : t,
+                "end_time" : t + self.time_out,
+                }
+
+    #-----------------------------------------------------------------------
+    def _check_time_out(self, t):
+        """Finish any commands that haven't had a reply in time.
+
+        Args:
+          t (float):  The current time.
+        """
+        for num, result in list(self._active.items()):
+            if t >= result["end_time"]:
+                del self._active[num]
+                result["status"] = "timeout"
+                self._finish(result)
+
+    #-----------------------------------------------------------------------
+    def _finish(self, result):
+        """Write the result line for a finished command.
+
+        Args:
+          result (dict):  The command result.
+        """
+        if result["status"] != "ok":
+            self.num_failed += 1
+
+        result.pop("end_time", None)
+        start_time = result.pop("start_time", None)
+        if start_time is not None:
+            result["time"] = round(time.time() - start_time, 3)
+
+        self.out.write(json.dumps(result) + "\n")
+        self.out.flush()
+
+    #-----------------------------------------------------------------------
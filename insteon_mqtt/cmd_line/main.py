@@ -6,9 +6,9 @@
 import argparse
 import sys
 from .. import config
+from . import batch
 from . import device
 from . import modem
-from . import start
 
 
 def parse_args(args):
@@ -19,6 +19,9 @@ def parse_args(args):
                                 description="Inseton<->MQTT tool")
     p.add_argument("config", metavar="config.yaml", help="Configuration "
                    "file to use.")
+    p.add_argument("--cache-dir", default=config.default_cache_dir(),
+                   help="Directory to cache the parsed configuration in.  "
+                   "Use '' to turn off the cache.  Default is %(default)s")
     sub = p.add_subparsers(help="Command help")
 
     #---------------------------------------
@@ -31,7 +34,21 @@ def parse_args(args):
     sp.add_argument("--level", metavar="log_level", type=int,
                     help="Logging level to use.  10=debug, 20=info,"
                     "30=warn, 40=error, 50=critical")
-    sp.set_defaults(func=start.start)
+    sp.set_defaults(func=start)
+
+    #---------------------------------------
+    # batch command
+    sp = sub.add_parser("batch", help="Run a file of commands using one "
+                        "connection to the server control socket or the "
+                        "broker.  Each line is a JSON "
+                        "command payload with the device in the 'address' "
+                        "key.  A JSON result line is printed for each "
+                        "command.")
+    sp.add_argument("-j", "--jobs", type=int, default=1,
+                    help="Number of commands to run at the same time.")
+    sp.add_argument("file", nargs="?", default="-",
+                    help="Command file to read.  Default is stdin.")
+    sp.set_defaults(func=batch.batch)
 
     #---------------------------------------
     # modem.refresh_all command
@@ -59,6 +76,25 @@ def parse_args(args):
                     help="Don't print any command results to the screen.")
     sp.set_defaults(func=modem.get_devices)
 
+    #---------------------------------------
+    # modem.get_stats command
+    sp = sub.add_parser("get-stats", help="Return the modem message "
+                        "statistics.")
+    sp.add_argument("-q", "--quiet", action="store_true",
+                    help="Don't print any command results to the screen.")
+    sp.set_defaults(func=modem.get_stats)
+
+    #---------------------------------------
+    # modem.dump_recorder command
+    sp = sub.add_parser("dump-recorder", help="Write the recent PLM traffic "
+                        "to a file on the server.  Use the decode_recorder.py "
+                        "script to print it.")
+    sp.add_argument("-f", "--file", help="File name to write in the "
+                    "recorder directory.  Default is a time stamped name.")
+    sp.add_argument("-q", "--quiet", action="store_true",
+                    help="Don't print any command results to the screen.")
+    sp.set_defaults(func=modem.dump_recorder)
+
     #---------------------------------------
     # device.linking command
     sp = sub.add_parser("linking", help="Turn on device or modem linking.  "
@@ -206,17 +242,6 @@ def parse_args(args):
     sp.add_argument("address", help="Device address or name.")
     sp.set_defaults(func=device.pair)
 
-    #---------------------------------------
-    # device.pair command
-    sp = sub.add_parser("refresh", help="Refresh device/modem state and "
-                        "all link database.")
-    sp.add_argument("-f", "--force", action="store_true",
-                    help="Force the device database to be downloaded.")
-    sp.add_argument("-q", "--quiet", action="store_true",
-                    help="Don't print any command results to the screen.")
-    sp.add_argument("address", help="Device address or name.")
-    sp.set_defaults(func=device.refresh)
-
     #---------------------------------------
     # device.db_add add ctrl/rspdr command
     sp = sub.add_parser("db-add", help="Add the device/modem as the "
@@ -298,12 +323,25 @@ def parse_args(args):
     return p.parse_args(args)
 
 
+#===========================================================================
+def start(args, cfg):
+    """Start the server.
+
+    The server modules are only imported when this command is run so the
+    other commands start quickly.
+    """
+    from . import start as start_cmd  # pylint: disable=import-outside-toplevel
+    return start_cmd.start(args, cfg)
+
+
 #===========================================================================
 def main(mqtt_converter=None):
     args = parse_args(sys.argv[1:])
 
-    # Load the configuration file.
-    cfg = config.load(args.config)
+    # Load the configuration file.  The other commands only need the MQTT
+    # settings.
+    section = None if args.func is start else "mqtt"
+    cfg = config.load(args.config, section=section, cache=args.cache_dir)
 
     topic = cfg.get("mqtt", {}).get("cmd_topic", None)
     if topic:
@@ -29,6 +29,19 @@ def factory_reset(args, config):
     return reply["status"]
 
 
+#===========================================================================
+def dump_recorder(args, config):
+    topic = "%s/modem" % (args.topic)
+    payload = {
+        "cmd" : "dump_recorder",
+        }
+    if args.file:
+        payload["file"] = args.file
+
+    reply = util.send(config, topic, payload, args.quiet)
+    return reply["status"]
+
+
 #===========================================================================
 def get_devices(args, config):
     topic = "%s/modem" % (args.topic)
@@ -40,4 +53,15 @@ def get_devices(args, config):
     return reply["status"]
 
 
+#===========================================================================
+def get_stats(args, config):
+    topic = "%s/modem" % (args.topic)
+    payload = {
+        "cmd" : "get_stats",
+        }
+
+    reply = util.send(config, topic, payload, args.quiet)
+    return reply["status"]
+
+
 #===========================================================================
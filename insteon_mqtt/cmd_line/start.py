@@ -3,13 +3,18 @@
 # Start the main server
 #
 #===========================================================================
+import signal
+from .. import clock
 from .. import config
 from .. import log
 from .. import mqtt
 from .. import network
+from .. import recorder
 from ..Modem import Modem
 from ..Protocol import Protocol
 
+LOG = log.get_logger(__name__)
+
 
 def start(args, cfg):
     """Main start command
@@ -32,11 +37,22 @@ def start(args, cfg):
     # Create the network event loop and MQTT and serial modem clients.
     loop = network.Manager()
     mqtt_link = network.Mqtt()
-    plm_link = network.Serial()
 
-    # Add the clients to the event loop.
+    # A replay:// port plays back a recorded file instead of using a modem.
+    if str(cfg['insteon'].get('port', '')).startswith("replay://"):
+        plm_link = network.Replay()
+    else:
+        plm_link = network.Serial()
+
+    # Optional capture of all the modem traffic to a file.
+    capture = None
+    if cfg['insteon'].get('capture_file', None):
+        capture = recorder.Capture(cfg['insteon']['capture_file'])
+        capture.attach(plm_link)
+
+    # Add the MQTT client to the event loop.  The modem is added after the
+    # configuration is loaded.
     loop.add(mqtt_link, connected=False)
-    loop.add(plm_link, connected=False)
 
     # Create the insteon message protocol, modem, and MQTT handler and
     # link them together.
@@ -47,6 +63,76 @@ def start(args, cfg):
     # Load the configuration data into the objects.
     config.apply(cfg, mqtt_handler, modem)
 
-    # Start the network event loop.
-    while loop.active():
-        loop.select()
+    # Optional local command socket.  New clients are added to the event
+    # loop and their commands are run by the MQTT handler.
+    if cfg['mqtt'].get('control_socket', None):
+        ctl_link = network.Unix(cfg['mqtt']['control_socket'],
+                                mode=cfg['mqtt'].get('control_socket_mode',
+                                                     0o600))
+        ctl_link.signal_new_client.connect(loop.add)
+        ctl_link.signal_command.connect(mqtt_handler.handle_local_cmd)
+        loop.add(ctl_link, connected=False)
+
+    # If enabled, restore the device states from the retained MQTT state
+    # messages before talking to the modem so Insteon messages always win.
+    boot = None
+    if mqtt_handler.bootstrap_time_out:
+        boot = mqtt.Bootstrap(mqtt_handler, mqtt_handler.bootstrap_time_out)
+        boot.start(lambda *args: loop.add(plm_link, connected=False))
+    else:
+        loop.add(plm_link, connected=False)
+
+    # Config reload requests from the modem reload command or SIGHUP.  These
+    # are on_done callbacks (or None) and are handled in the event loop so
+    # the reload doesn't happen in the middle of processing a message.
+    reloads = []
+
+    def request_reload(modem, on_done):
+        reloads.append(on_done)
+
+    modem.signal_reload.connect(request_reload)
+    if hasattr(signal, "SIGHUP"):
+        signal.signal(signal.SIGHUP, lambda *args: reloads.append(None))
+
+    # Start the network event loop.  The capture file is closed on the way
+    # out so the last traffic is written.
+    try:
+        while loop.active():
+            loop.select()
+            if boot:
+                boot.poll(clock.time())
+
+            if capture:
+                capture.poll(clock.time())
+
+            if reloads:
+                callbacks = reloads[:]
+                del reloads[:]
+                reload(args, mqtt_handler, modem, callbacks)
+    finally:
+        if capture:
+            capture.close()
+
+
+#===========================================================================
+def reload(args, mqtt_handler, modem, callbacks):
+    """Load the config file again and apply any changes.
+
+    Args:
+      args:  The command line arguments.
+      mqtt_handler (mqtt.Mqtt):  The main MQTT handler.
+      modem (Modem):  The PLM modem object.
+      callbacks (list):  The on_done callbacks (or None) for the reload
+                requests.
+    """
+    try:
+        cfg = config.load(args.config, cache=args.cache_dir)
+        config.reload(cfg, mqtt_handler, modem)
+        success, msg = True, "Configuration reloaded"
+    except Exception as e:
+        LOG.exception("Configuration reload failed")
+        success, msg = False, "Configuration reload failed: %s" % e
+
+    for on_done in callbacks:
+        if on_done:
+            on_done(success, msg, None)
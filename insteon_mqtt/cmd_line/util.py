@@ -4,9 +4,11 @@
 #
 #===========================================================================
 import json
+import os
 import random
+import select
+import socket
 import time
-import paho.mqtt.client as mqtt
 from ..mqtt import Reply
 
 # Time between messages before we decide that the something went wrong and
@@ -38,16 +40,12 @@ def send(config, topic, payload, quiet=False):
         "quiet" : int(quiet),
         }
 
-    client = mqtt.Client(userdata=session)
+    # Use the server's local command socket if there is one.
+    sock = connect_local(config)
+    if sock:
+        return send_local(sock, topic, payload, session)
 
-    # Add user/password if the config file has them set.
-    if config["mqtt"].get("username", None):
-        user = config["mqtt"]["username"]
-        password = config["mqtt"].get("password", None)
-        client.username_pw_set(user, password)
-
-    # Connect to the broker.
-    client.connect(config["mqtt"]["broker"], config["mqtt"]["port"])
+    client = connect(config, session)
 
     # Generate a random session ID to use so the server can reply directly to
     # us via MQTT.
@@ -76,6 +74,197 @@ def send(config, topic, payload, quiet=False):
     return session
 
 
+#===========================================================================
+def connect_local(config):
+    """Connect to the server's local command socket.
+
+    Args:
+      config:   (dict) Configuration dictionary.  The control socket file
+                is read from this.
+
+    Returns:
+      Returns the connected socket or None if the server doesn't have a
+      control socket or it can't be connected to.
+    """
+    path = config["mqtt"].get("control_socket", None)
+    if not path or not os.path.exists(path):
+        return None
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except (ConnectionRefusedError, FileNotFoundError, PermissionError):
+        sock.close()
+        return None
+
+    return sock
+
+
+#===========================================================================
+def send_local(sock, topic, payload, session):
+    """Send a message to the server's local command socket.
+
+    This is used by send() when the server has a control socket.  Replies
+    are handled the same way as MQTT replies.
+
+    Args:
+      sock:     (socket) The connected control socket (see connect_local).
+      topic:    (str) The MQTT command topic.  The device address or name is
+                read from the end of the topic.
+      payload:  (dict) Message payload dictionary.
+      session:  (dict) The session data.  See send().
+
+    Returns:
+      Returns the session reply object.
+    """
+    sock.settimeout(TIME_OUT)
+
+    payload = dict(payload, address=topic.split("/")[-1])
+    sock.sendall(json.dumps(payload).encode("utf-8") + b"\n")
+
+    buf = b""
+    try:
+        while not session["done"]:
+            data = sock.recv(4096)
+            if not data:
+                break
+
+            *lines, buf = (buf + data).split(b"\n")
+            for line in lines:
+                callback(None, session, LocalMessage(topic, line))
+
+    except socket.timeout:
+        pass
+
+    if not session["done"]:
+        print("Reply timed out")
+
+    sock.close()
+    return session
+
+
+#===========================================================================
+class LocalMessage:
+    """Control socket reply with the same attributes as an MQTT message.
+    """
+    def __init__(self, topic, payload):
+        self.topic = topic
+        self.payload = payload
+
+
+#===========================================================================
+class LocalClient:
+    """Control socket client with the paho client API used by batch mode.
+
+    Commands are written with their session ID and the server tags each
+    reply with it (see mqtt.Reply) so replies to commands that are running
+    at the same time can be matched.  The replies are passed to the message
+    callback with the same session topic the MQTT broker would use.
+    """
+    def __init__(self, sock):
+        """Constructor
+
+        Args:
+          sock (socket):  The connected control socket (see connect_local).
+        """
+        self.sock = sock
+        self._callback = None
+        self._buf = b""
+
+        # Map of session ID to the command topic it was sent to.
+        self._topics = {}
+
+    #-----------------------------------------------------------------------
+    def message_callback_add(self, sub, callback):
+        """Set the reply callback.
+
+        Args:
+          sub (str):  The reply topic filter (unused).
+          callback:  The callback.  Signature: callback(client, data, msg)
+        """
+        self._callback = callback
+
+    #-----------------------------------------------------------------------
+    def subscribe(self, topic):
+        """Subscribe to replies.
+
+        The server always sends the replies so this does nothing.
+
+        Args:
+          topic (str):  The reply topic filter (unused).
+        """
+
+    #-----------------------------------------------------------------------
+    def publish(self, topic, payload, qos=0):
+        """Send a command.
+
+        Args:
+          topic (str):  The command topic.  The device address or name is
+                read from the end of the topic.
+          payload (str):  The JSON command payload.
+          qos (int):  The MQTT quality of service (unused).
+        """
+        data = json.loads(payload)
+        self._topics[data.get("session", None)] = topic
+        data["address"] = topic.split("/")[-1]
+        self.sock.sendall(json.dumps(data).encode("utf-8") + b"\n")
+
+    #-----------------------------------------------------------------------
+    def loop(self, timeout=0.1):
+        """Read any replies and pass them to the callback.
+
+        Args:
+          timeout (float):  Maximum time in seconds to wait for a reply.
+        """
+        readable, _, _ = select.select([self.sock], [], [], timeout)
+        if not readable:
+            return
+
+        data = self.sock.recv(4096)
+        if not data:
+            raise ConnectionError("Control socket closed")
+
+        *lines, self._buf = (self._buf + data).split(b"\n")
+        for line in lines:
+            reply = Reply.from_json(line.decode("utf-8"))
+            topic = "%s/session/%s" % (self._topics.get(reply.session, ""),
+                                       reply.session)
+            self._callback(self, None, LocalMessage(topic, line))
+
+    #-----------------------------------------------------------------------
+    def disconnect(self):
+        """Close the socket.
+        """
+        self.sock.close()
+
+
+#===========================================================================
+def connect(config, userdata=None):
+    """Create an MQTT client and connect it to the broker.
+
+    Args:
+      config:    (dict) Configuration dictionary.  The MQTT broker and
+                 connection information is read from this.
+      userdata:  User data to pass to the client callbacks.
+
+    Returns:
+      Returns the connected paho MQTT client.
+    """
+    # Paho is only imported when the broker is used.
+    import paho.mqtt.client as mqtt  # pylint: disable=import-outside-toplevel
+    client = mqtt.Client(userdata=userdata)
+
+    # Add user/password if the config file has them set.
+    if config["mqtt"].get("username", None):
+        user = config["mqtt"]["username"]
+        password = config["mqtt"].get("password", None)
+        client.username_pw_set(user, password)
+
+    # Connect to the broker.
+    client.connect(config["mqtt"]["broker"], config["mqtt"]["port"])
+    return client
+
+
 #===========================================================================
 def callback(client, session, message):
     """MQTT message callback
@@ -8,43 +8,131 @@ __doc__ = """Configuration file utilties
 """
 
 #===========================================================================
+import hashlib
 import os.path
+import pickle
 import yaml
 from . import device
 
-# Configuration file input description to class map.
+# Configuration file input description to class map.  The classes are
+# looked up by name when they're used (see find()) so loading the config
+# doesn't import every device class.
 devices = {
-    # Key is config file input.  Value is tuple of (class, **kwargs) of the
-    # class to use and any extra keyword args to pass to the constructor.
-    'dimmer' : (device.Dimmer, {}),
-    'battery_sensor' : (device.BatterySensor, {}),
-    'fan_linc' : (device.FanLinc, {}),
-    'io_linc' : (device.IOLinc, {}),
-    'keypad_linc' : (device.KeypadLinc, {'dimmer' : True}),
-    'keypad_linc_sw' : (device.KeypadLinc, {'dimmer' : False}),
-    'leak' : (device.Leak, {}),
-    'mini_remote4' : (device.Remote, {'num_button' : 4}),
-    'mini_remote8' : (device.Remote, {'num_button' : 8}),
-    'motion' : (device.Motion, {}),
-    'outlet' : (device.Outlet, {}),
-    'smoke_bridge' : (device.SmokeBridge, {}),
-    'switch' : (device.Switch, {}),
-    'thermostat' : (device.Thermostat, {}),
+    # Key is config file input.  Value is tuple of (class name, **kwargs) of
+    # the device class to use and any extra keyword args to pass to the
+    # constructor.
+    'dimmer' : ('Dimmer', {}),
+    'battery_sensor' : ('BatterySensor', {}),
+    'fan_linc' : ('FanLinc', {}),
+    'io_linc' : ('IOLinc', {}),
+    'keypad_linc' : ('KeypadLinc', {'dimmer' : True}),
+    'keypad_linc_sw' : ('KeypadLinc', {'dimmer' : False}),
+    'leak' : ('Leak', {}),
+    'mini_remote4' : ('Remote', {'num_button' : 4}),
+    'mini_remote8' : ('Remote', {'num_button' : 8}),
+    'motion' : ('Motion', {}),
+    'outlet' : ('Outlet', {}),
+    'smoke_bridge' : ('SmokeBridge', {}),
+    'switch' : ('Switch', {}),
+    'thermostat' : ('Thermostat', {}),
     }
 
 
 #===========================================================================
-def load(path):
+def default_cache_dir():
+    """Return the default directory for the config cache.
+
+    This is $XDG_CACHE_HOME/insteon-mqtt (~/.cache/insteon-mqtt if that
+    isn't set).
+
+    Returns:
+      str:  Returns the cache directory.
+    """
+    root = os.environ.get("XDG_CACHE_HOME", None) or \
+        os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(root, "insteon-mqtt")
+
+
+#===========================================================================
+def load(path, section=None, cache=None):
     """Load the configuration file.
 
+    If a cache directory is passed in, the resolved configuration is saved
+    to a cache file in that directory and used on the next load if the
+    config file and every included file are unchanged.  Files are checked
+    by size and modification time and then by hash if those changed.  If
+    the directory can't be written to, the config is loaded without the
+    cache.
+
+    Full loads are checked with validate() before they're cached so cached
+    loads don't need to check them again.
+
     Args:
       path:  The file to load
+      section (str):  Optional top level section to load.  If this is set,
+              only that section is loaded and files included by other
+              sections aren't read.
+      cache (str):  Directory to store the cache file in.  None to not use
+            the cache.
 
     Returns:
       dict: Returns the configuration dictionary.
     """
+    cache_path = None
+    if cache:
+        # Name the cache by the full config path so that different configs
+        # with the same file name can share the cache directory.
+        path_id = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()
+        cache_path = os.path.join(cache, "%s.%s.cache" % (
+            os.path.basename(path), path_id[:12]))
+        data = _read_cache(cache_path)
+        if data is not None:
+            return data if section is None else _section(data, section)
+
+    files = []
     with open(path, "r") as f:
-        return yaml.load(f, Loader)
+        loader = Loader(f, files)
+        try:
+            if section is None:
+                data = loader.get_single_data()
+            else:
+                return _load_section(loader, section)
+        finally:
+            loader.dispose()
+
+    validate(data)
+    if cache_path:
+        _write_cache(cache_path, files, data)
+
+    return data
+
+
+#===========================================================================
+def validate(data):
+    """Check the configuration data.
+
+    The config has no schema so this only checks the structure that the
+    rest of the code depends on: the top level is a dictionary and every
+    device type in insteon.devices is known (see find()).
+
+    Raises:
+      Exception if the configuration is invalid.
+
+    Args:
+      data:  The configuration data to check.
+    """
+    if data is None:
+        return
+
+    if not isinstance(data, dict):
+        raise Exception("Configuration must be a dictionary of sections, "
+                        "not %s." % type(data).__name__)
+
+    insteon = data.get("insteon", None) or {}
+    for name in insteon.get("devices", None) or {}:
+        if name.lower() not in devices:
+            raise Exception("Unknown device name '%s'.  Valid names are "
+                            "%s." % (name, devices.keys()))
 
 
 #===========================================================================
@@ -63,6 +151,22 @@ def apply(config, mqtt, modem):
     modem.load_config(config['insteon'])
 
 
+#===========================================================================
+def reload(config, mqtt, modem):
+    """Apply a changed configuration to the running MQTT and modem objects.
+
+    Args:
+      config:  The configuration dictionary.
+      mqtt (mqtt.Mqtt):  The main MQTT handler.
+      modem (Modem):  The PLM modem object.
+    """
+    # This is the reverse of apply().  The modem creates and removes the
+    # changed devices first so that the MQTT reload can load the new config
+    # into every device and update the subscriptions once.
+    modem.reload_config(config['insteon'])
+    mqtt.reload_config(config['mqtt'])
+
+
 #===========================================================================
 def find(name):
     """Find a device class from a description.
@@ -84,7 +188,125 @@ def find(name):
         raise Exception("Unknown device name '%s'.  Valid names are "
                         "%s." % (name, devices.keys()))
 
-    return dev
+    class_name, kwargs = dev
+    return (getattr(device, class_name), kwargs)
+
+
+#===========================================================================
+def _section(data, section):
+    """Return a config dict with only one top level section.
+
+    Args:
+      data (dict):  The configuration data.
+      section (str):  The section to keep.
+
+    Returns:
+      dict:  Returns the new configuration dictionary.
+    """
+    return {section : data[section]} if section in data else {}
+
+
+#===========================================================================
+def _load_section(loader, section):
+    """Load one top level section from a config file.
+
+    The file is composed into YAML nodes and only the section value is
+    constructed so !include tags in other sections aren't loaded.
+
+    Args:
+      loader (Loader):  The loader for the config file.
+      section (str):  The section to load.
+
+    Returns:
+      dict:  Returns the configuration dictionary with the section.
+    """
+    node = loader.get_single_node()
+    if not isinstance(node, yaml.MappingNode):
+        return {}
+
+    for key_node, value_node in node.value:
+        if loader.construct_object(key_node) == section:
+            return {section : loader.construct_object(value_node, deep=True)}
+
+    return {}
+
+
+#===========================================================================
+def _file_hash(path):
+    """Return the SHA1 hash of a file.
+
+    Args:
+      path (str):  The file to read.
+
+    Returns:
+      str:  Returns the hex digest of the file contents.
+    """
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+#===========================================================================
+def _read_cache(cache_path):
+    """Read a config cache file.
+
+    Args:
+      cache_path (str):  The cache file to read.
+
+    Returns:
+      dict:  Returns the cached configuration or None if there is no cache
+      or any of the loaded files have changed.
+    """
+    try:
+        with open(cache_path, "rb") as f:
+            files, data = pickle.load(f)
+
+        for path, mtime, size, digest in files:
+            st = os.stat(path)
+            if st.st_mtime_ns == mtime and st.st_size == size:
+                continue
+
+            # Files that are touched but unchanged are still valid.
+            if st.st_size != size or _file_hash(path) != digest:
+                return None
+
+        return data
+
+    except Exception:  # pylint: disable=broad-except
+        # Missing, old, or corrupt caches are just reloaded.
+        return None
+
+
+#===========================================================================
+def _write_cache(cache_path, files, data):
+    """Write a config cache file.
+
+    The cache directory is created if needed.  Errors (like a read only
+    directory) are ignored since the cache is optional.
+
+    Args:
+      cache_path (str):  The cache file to write.
+      files (list):  The loaded file paths.
+      data (dict):  The configuration data.
+    """
+    try:
+        cache_dir = os.path.dirname(cache_path)
+        os.makedirs(cache_dir, exist_ok=True)
+        if not os.access(cache_dir, os.W_OK):
+            return
+
+        info = []
+        for path in files:
+            st = os.stat(path)
+            info.append((path, st.st_mtime_ns, st.st_size, _file_hash(path)))
+
+        temp_path = cache_path + ".tmp"
+        with open(temp_path, "wb") as f:
+            pickle.dump((info, data), f, pickle.HIGHEST_PROTOCOL)
+
+        os.replace(temp_path, cache_path)
+
+    except (OSError, pickle.PicklingError):
+        pass
 
 
 #===========================================================================
@@ -92,17 +314,22 @@ def find(name):
 # https://davidchall.github.io/yaml-includes.html (with no license so I'm
 # assuming it's in the public domain).
 class Loader(yaml.Loader):
-    def __init__(self, file):
+    def __init__(self, file, files=None):
         """Constructor
 
         Args:
           file (file):  File like object to read from.
+          files (list):  Optional list to add the absolute path of the file
+                and every included file to.
         """
         yaml.Loader.add_constructor('!include', Loader.include)
 
         super().__init__(file)
         self._base_dir = os.path.split(file.name)[0]
 
+        self._files = files if files is not None else []
+        self._files.append(os.path.abspath(file.name))
+
     #-----------------------------------------------------------------------
     def include(self, node):
         """!include file command.  Supports:
@@ -138,6 +365,10 @@ class Loader(yaml.Loader):
         """
         path = os.path.join(self._base_dir, filename)
         with open(path, 'r') as f:
-            return yaml.load(f, Loader)
+            loader = Loader(f, self._files)
+            try:
+                return loader.get_single_data()
+            finally:
+                loader.dispose()
 
 #===========================================================================
@@ -37,8 +37,13 @@ class DeviceScanManagerI1:
        This class will cache all of the bytes received until a full link record
        has been received, at which point it will pass the record onto the db
        handler.
+
+       If the scan is run by a background task, pass the Scheduler
+       yield_step method in.  Each message is then sent once the modem is
+       idle so interactive commands aren't stuck behind the whole scan.
     """
-    def __init__(self, device, device_db, on_done=None, num_retry=3):
+    def __init__(self, device, device_db, on_done=None, num_retry=3,
+                 yield_step=None):
         """Constructor
 
         Args
@@ -52,6 +57,8 @@ class DeviceScanManagerI1:
                      handler times out without returning Msg.FINISHED.
                      This count does include the initial sending so a
                      retry of 3 will send once and then retry 2 more times.
+          yield_step: Optional function to call with the send function and
+                     arguments for each message (Scheduler.yield_step).
         """
         self.db = device_db
         self.device = device
@@ -60,6 +67,7 @@ class DeviceScanManagerI1:
         self.lsb = 0xF8
         self.on_done = util.make_callback(on_done)
         self._num_retry = num_retry
+        self._yield_step = yield_step
 
     #-------------------------------------------------------------------
     def start_scan(self):
@@ -80,7 +88,7 @@ class DeviceScanManagerI1:
         msg_handler = handler.StandardCmd(db_msg, self.handle_set_msb,
                                           on_done=on_done,
                                           num_retry=self._num_retry)
-        self.device.send(db_msg, msg_handler)
+        self._send(db_msg, msg_handler)
 
     #-------------------------------------------------------------------
     def handle_set_msb(self, msg, on_done):
@@ -105,7 +113,7 @@ class DeviceScanManagerI1:
                                               self.handle_get_lsb,
                                               on_done=on_done,
                                               num_retry=self._num_retry)
-            self.device.send(db_msg, msg_handler)
+            self._send(db_msg, msg_handler)
         else:
             LOG.warning("%s device ACK Set MSB had wrong value: %02x",
                         msg.from_addr, msg.cmd2)
@@ -171,4 +179,17 @@ class DeviceScanManagerI1:
                                               self.handle_get_lsb,
                                               on_done=on_done,
                                               num_retry=self._num_retry)
-            self.device.send(db_msg, msg_handler)
+            self._send(db_msg, msg_handler)
+
+    #-------------------------------------------------------------------
+    def _send(self, msg, msg_handler):
+        """Send the next scan message.
+
+        Args
+          msg:          The message to send.
+          msg_handler:  The handler for the message.
+        """
+        if self._yield_step:
+            self._yield_step(self.device.send, msg, msg_handler)
+        else:
+            self.device.send(msg, msg_handler)
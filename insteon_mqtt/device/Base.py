@@ -8,11 +8,14 @@ import os.path
 from .MsgHistory import MsgHistory
 from ..Address import Address
 from ..CommandSeq import CommandSeq
+from .. import clock
 from .. import db
 from .. import handler
 from .. import log
 from .. import message as Msg
+from .. import on_off
 from .. import util
+from ..db.Device import START_MEM_LOC
 
 LOG = log.get_logger()
 
@@ -57,17 +60,7 @@ class Base:
 
         # Loop over the configuration data.
         for config in values:
-            # If it's a dict, it's got a nice name set.
-            if isinstance(config, dict):
-                assert len(config) == 1
-                addr, name = next(iter(config.items()))
-                if name:
-                    name = name.lower()
-
-            # Otherwise it's just the address
-            else:
-                addr = config
-                name = None
+            addr, name = cls.parse_config(config)
 
             # Create the device using the class constructor.  Use kwargs
             # syntax so any extra keyword args don't have to be at the end of
@@ -78,6 +71,31 @@ class Base:
 
         return devices
 
+    #-----------------------------------------------------------------------
+    @staticmethod
+    def parse_config(config):
+        """Read the address and name from a device configuration entry.
+
+        Args:
+          config:  The configuration entry.  This is either the address or
+                   a dict of {address : name}.
+
+        Returns:
+          (addr, str):  Returns the address input and the lower case name or
+          None if there is no name.
+        """
+        # If it's a dict, it's got a nice name set.
+        if isinstance(config, dict):
+            assert len(config) == 1
+            addr, name = next(iter(config.items()))
+            if name:
+                name = name.lower()
+
+            return addr, name
+
+        # Otherwise it's just the address
+        return config, None
+
     #-----------------------------------------------------------------------
     def __init__(self, protocol, modem, address, name=None):
         """Constructor
@@ -133,7 +151,29 @@ class Base:
         # Device database delta.  The delta tells us if the database is
         # current.  The only way to get this is by sending a refresh message
         # out and getting the response - not by downloading the database.
+        # If the refresh happens during a refresh sweep (see
+        # Modem.refresh_all), the database download is deferred and the new
+        # delta is stored here until download_deferred_db() is called.
         self._next_db_delta = None
+        self.refresh_sweep = False
+
+        # Background task that is querying the device model (see
+        # addRefreshData()).
+        self._model_task = None
+
+        # Map of group -> time (clock.time()) that the state of that part of
+        # the device was last confirmed by Insteon traffic (broadcasts,
+        # group commands, ACK's and refresh replies).  If every group in
+        # state_groups() was confirmed less than refresh_window seconds ago,
+        # refresh() will skip sending the ping.  The modem sets the window
+        # from the configuration.  0 disables the check.
+        self._state_times = {}
+        self.refresh_window = 0
+
+        # Time (clock.time()) of the last refresh reply that checked the
+        # database delta.  Only the refresh ping returns the delta so this
+        # can't be confirmed by other traffic.
+        self._db_time = None
 
     #-----------------------------------------------------------------------
     def type(self):
@@ -157,7 +197,8 @@ class Base:
             }}
 
     #-----------------------------------------------------------------------
-    def send(self, msg, msg_handler, high_priority=False, after=None):
+    def send(self, msg, msg_handler, high_priority=False, after=None,
+             deadline=None):
         """Send a message to the device.
 
         This will use the history of messages received from the device to set
@@ -179,11 +220,18 @@ class Base:
                 If None, the message is sent as soon as possible.  Exact time
                 is not guaranteed - the message will be send no earlier than
                 this.
+          deadline (float):  Unix clock time tag to drop the message after
+                   if it hasn't been sent yet.  If None, the handler default
+                   is used.  See Protocol.send().
+
+        Returns:
+          Returns a handle that can be passed to Protocol.cancel().
         """
         if isinstance(msg, Msg.OutStandard):  # handles OutExtended as well
             msg.flags.set_hops(self.history.avg_hops())
 
-        self.protocol.send(msg, msg_handler, high_priority, after)
+        return self.protocol.send(msg, msg_handler, high_priority, after,
+                                  deadline)
 
     #-----------------------------------------------------------------------
     def db_path(self):
@@ -363,6 +411,8 @@ class Base:
                    completed.  Signature is: on_done(success, msg, data)
         """
         LOG.info("Device %s cmd: status refresh", self.label)
+        if self.refresh_skipped(force, on_done):
+            return
 
         # Use a sequence
         seq = CommandSeq(self.protocol, "Device refreshed", on_done)
@@ -382,6 +432,307 @@ class Base:
         # Run all the commands.
         seq.run()
 
+    #-----------------------------------------------------------------------
+    def refresh_skipped(self, force, on_done):
+        """Check if a refresh can be skipped because the state is current.
+
+        If the state of every part of the device (see state_groups()) was
+        confirmed by Insteon traffic within the refresh window, there is no
+        need to ping the device.  In that case the on_done callback is
+        called and True is returned.  During a refresh sweep, the database
+        delta must have been checked inside the window as well.  Derived
+        classes that override refresh() should call this first.
+
+        Args:
+          force (bool):  If true, the refresh is never skipped.
+          on_done: Finished callback.  This is called if the refresh is
+                   skipped.  Signature is: on_done(success, msg, data)
+
+        Returns:
+          bool:  Returns True if the refresh was skipped.
+        """
+        if force or not self.is_state_current():
+            return False
+
+        # A refresh sweep (Modem.refresh_all) is also checking the database
+        # delta which passive traffic doesn't confirm.
+        if self.refresh_sweep and not self.is_db_current():
+            return False
+
+        oldest = min(self._state_times[i] for i in self.state_groups())
+        LOG.ui("Device %s state confirmed %.1f sec ago, skipping refresh",
+               self.label, clock.time() - oldest)
+        on_done = util.make_callback(on_done)
+        on_done(True, "Device state is current", None)
+        return True
+
+    #-----------------------------------------------------------------------
+    def state_groups(self):
+        """Return the groups that make up the device state.
+
+        A refresh queries the state of all of these so it can only be
+        skipped if every one of them has been confirmed.  Derived classes
+        with more than one part (outlets, fans, LED's) should override this.
+
+        Returns:
+          list:  Returns the list of groups that refresh() queries.
+        """
+        return [0x01]
+
+    #-----------------------------------------------------------------------
+    def is_state_current(self):
+        """Return True if the state was confirmed inside the refresh window.
+
+        Returns:
+          bool:  Returns True if the state of every group in state_groups()
+          is known to be current.
+        """
+        return all(self._is_current(self._state_times.get(i))
+                   for i in self.state_groups())
+
+    #-----------------------------------------------------------------------
+    def is_db_current(self):
+        """Return True if the db delta was checked inside the refresh window.
+
+        Passive traffic doesn't carry the database delta so this is only
+        set by refresh replies.
+
+        Returns:
+          bool:  Returns True if the database delta was recently checked.
+        """
+        return self._is_current(self._db_time)
+
+    #-----------------------------------------------------------------------
+    def confirm_state(self, group=None):
+        """Record that the current device state was just confirmed.
+
+        This is called when a message arrives that carries the authoritative
+        state of the device (refresh replies, ACK's of on/off commands).
+
+        Args:
+          group (int):  The group whose state was confirmed.  If this is
+                None, the state of all the groups in state_groups() was
+                confirmed (a completed refresh).
+        """
+        groups = self.state_groups() if group is None else [group]
+        now = clock.time()
+        for i in groups:
+            self._state_times[i] = now
+
+    #-----------------------------------------------------------------------
+    def confirm_db(self):
+        """Record that the database delta was just checked.
+
+        This is called by the refresh handler when the reply with the
+        database delta arrives.
+        """
+        self._db_time = clock.time()
+
+    #-----------------------------------------------------------------------
+    def clear_state(self):
+        """Drop all state and database confirmations.
+
+        This insures the next refresh isn't skipped.
+        """
+        self._state_times.clear()
+        self._db_time = None
+
+    #-----------------------------------------------------------------------
+    def can_restore_state(self):
+        """Return True if a saved state can be used as the device state.
+
+        Saved state (e.g. retained MQTT state messages, see mqtt.Bootstrap)
+        is only used to seed the state at start up.  If the device has
+        already reported it's state, that is always used instead.
+
+        Returns:
+          bool:  Returns True if the device state hasn't been confirmed.
+        """
+        return not self._state_times
+
+    #-----------------------------------------------------------------------
+    def track_state(self, msg, group=0x01):
+        """Update the state confirmation time from an on/off message.
+
+        On/off commands (broadcasts from the device, group commands from a
+        scene, and ACK's of direct commands) set the device state of one
+        group so they confirm it.  Manual mode changes (holding a button
+        down) mean the final state isn't known until the device is
+        refreshed so any prior confirmation of the group is dropped.
+
+        Args:
+          msg:  The message with the on/off command code in msg.cmd1.
+          group (int):  The group the message changed.  If this is None,
+                the message doesn't change any part of the state that a
+                refresh queries and nothing is done.
+        """
+        if group is None:
+            return
+
+        if on_off.Mode.is_valid(msg.cmd1):
+            self.confirm_state(group)
+        elif on_off.Manual.is_valid(msg.cmd1):
+            self._state_times.pop(group, None)
+
+    #-----------------------------------------------------------------------
+    def responder_group(self, msg):
+        """Return the group changed by a scene group command.
+
+        This is used to track the state confirmation when the device is a
+        responder to a scene (see handle_group_cmd()).  Most devices only
+        have a single load which every scene changes.
+
+        Args:
+          msg (InpStandard):  Broadcast message from the scene controller.
+
+        Returns:
+          int:  Returns the group whose state the scene sets or None if the
+          scene doesn't change any state that refresh() queries.
+        """
+        return 0x01
+
+    #-----------------------------------------------------------------------
+    def _is_current(self, confirm_time):
+        """Return True if a confirmation time is inside the refresh window.
+
+        Args:
+          confirm_time (float):  The clock.time() of the confirmation or
+                None if there hasn't been one.
+
+        Returns:
+          bool:  Returns True if the time is inside the window.
+        """
+        if not self.refresh_window or confirm_time is None:
+            return False
+
+        return clock.time() - confirm_time < self.refresh_window
+
+    #-----------------------------------------------------------------------
+    def download_db(self, delta, on_done=None):
+        """Download the all link database from the device.
+
+        This is called by the refresh handler when the database delta
+        reported by the device doesn't match the current database.  During
+        a refresh sweep, the download is deferred: the delta is saved and
+        on_done is called right away.
+
+        Args:
+          delta (int):  The database delta reported by the device.  This is
+                set into the database once the download completes.
+          on_done: Finished callback.  This is called when the command has
+                   completed.  Signature is: on_done(success, msg, data)
+        """
+        on_done = util.make_callback(on_done)
+
+        if self.refresh_sweep:
+            LOG.info("Device %s db download deferred", self.label)
+            self._next_db_delta = delta
+            on_done(True, "Database download deferred", None)
+            return
+
+        # The download is database maintenance so it runs as a background
+        # task once the modem is idle.
+        task = self.protocol.background.add(
+            "Device %s db download" % self.label, on_done)
+        task.add(self._download_db, delta)
+
+    #-----------------------------------------------------------------------
+    def has_deferred_db(self):
+        """Return True if a refresh sweep deferred a database download.
+        """
+        return self._next_db_delta is not None
+
+    #-----------------------------------------------------------------------
+    def download_deferred_db(self, on_done=None):
+        """Run a database download that was deferred by a refresh sweep.
+
+        This must be run as a step of a background task (see
+        Modem.refresh_all) since the download gives way to interactive
+        commands between messages.
+
+        Args:
+          on_done: Finished callback.  This is called when the command has
+                   completed.  Signature is: on_done(success, msg, data)
+        """
+        if self._next_db_delta is None:
+            on_done = util.make_callback(on_done)
+            on_done(True, "Database is current", None)
+            return
+
+        self._download_db(self._next_db_delta, on_done)
+
+    #-----------------------------------------------------------------------
+    def _download_db(self, delta, on_done):
+        """Download the all link database as a background task step.
+
+        Each message of the download is sent with the scheduler yield_step()
+        so interactive commands that arrive during the download are sent
+        before the next database message.
+
+        Args:
+          delta (int):  The database delta reported by the device.  This is
+                set into the database once the download completes.
+          on_done: Finished callback.  This is called when the command has
+                   completed.  Signature is: on_done(success, msg, data)
+        """
+        self._next_db_delta = None
+
+        # Clear the current database values.
+        self.db.clear()
+
+        # When the download ends, update the db delta w/ the current value
+        # and save the database.
+        def on_download(success, message, data):
+            if success:
+                self.db.set_delta(delta)
+                LOG.ui("%s database download complete\n%s", self.addr,
+                       self.db)
+            on_done(success, message, data)
+
+        # i1 devices are scanned a byte at a time.  i2 devices are read one
+        # record at a time instead of streaming the whole database so the
+        # download can give way between records.
+        yield_step = self.protocol.background.yield_step
+        if self.db.engine == 0:
+            scan_manager = db.DeviceScanManagerI1(self, self.db,
+                                                  on_done=on_download,
+                                                  num_retry=3,
+                                                  yield_step=yield_step)
+            scan_manager.start_scan()
+        else:
+            yield_step(self._download_db_record, START_MEM_LOC, on_download)
+
+    #-----------------------------------------------------------------------
+    def _download_db_record(self, mem_loc, on_done):
+        """Request a single database record from an i2 device.
+
+        When the record arrives, the next record is requested (once the
+        modem is idle) until the last record is read.
+
+        Args:
+          mem_loc (int):  The memory location of the record to read.
+          on_done: Finished callback.  This is called when the last record
+                   is read or on an error.  Signature is:
+                   on_done(success, msg, data)
+        """
+        def on_record(success, msg, entry):
+            if not success or entry.db_flags.is_last_rec:
+                on_done(success, msg, entry)
+                return
+
+            self.protocol.background.yield_step(
+                self._download_db_record, mem_loc - 0x08, on_done)
+
+        # Read request for one record at the memory location.  We need a
+        # retry count here because battery powered devices don't always
+        # respond right away.
+        data = bytes([0x00, 0x00, mem_loc >> 8, mem_loc & 0xff, 0x01] +
+                     [0x00] * 9)
+        msg = Msg.OutExtended.direct(self.addr, 0x2f, 0x00, data)
+        msg_handler = handler.DeviceDbGet(self.db, on_record, num_retry=3,
+                                          single=True)
+        self.send(msg, msg_handler)
+
     #-----------------------------------------------------------------------
     def addRefreshData(self, seq, force=False):
         """Add commands to refresh any internal data required.
@@ -398,10 +749,26 @@ class Base:
                 even if the delta value matches as well as a re-query of the
                 device model information even if it is already known.
         """
-        # If model number is not known, or force true, run get_model
+        # If model number is not known, or force true, run get_model.  The
+        # query is maintenance so it runs as a background task once the
+        # modem is idle instead of as part of the sequence.
         if self.db.dev_cat is None or self.db.sub_cat is None or \
            self.db.firmware is None or force:
-            seq.add(self.get_model)
+            if self._model_task is None:
+                self._model_task = self.protocol.background.add(
+                    "Device %s get model" % self.label, self._model_done)
+                self._model_task.add(self.get_model)
+
+    #-----------------------------------------------------------------------
+    def _model_done(self, success, msg, data):
+        """Background model query finished callback.
+
+        Args:
+          success (bool):  True for success, False for failure.
+          msg (str):  Message result.
+          data:  Arbitrary callback data.
+        """
+        self._model_task = None
 
     #-----------------------------------------------------------------------
     def get_flags(self, on_done=None):
@@ -727,6 +1094,14 @@ class Base:
         """
         self.history.add(msg)
 
+        # Broadcasts (and their cleanup messages) carry the state of the
+        # group they were sent for.  This runs before the handlers see the
+        # message so a manual mode change clears the confirmation before any
+        # refresh is triggered by it.
+        if msg.flags.type in (Msg.Flags.Type.ALL_LINK_BROADCAST,
+                              Msg.Flags.Type.ALL_LINK_CLEANUP):
+            self.track_state(msg, msg.group)
+
     #-----------------------------------------------------------------------
     def handle_refresh(self, msg):
         """Handle replies to the refresh command.
@@ -842,6 +1217,11 @@ class Base:
             if device:
                 LOG.info("%s broadcast to %s for group %s", self.label,
                          device.addr, group)
+
+                # The modem can be a responder but has no state to track.
+                if device is not self.modem:
+                    device.track_state(msg, device.responder_group(msg))
+
                 device.handle_group_cmd(self.addr, msg)
             else:
                 LOG.warning("%s broadcast - device %s not found", self.label,
@@ -906,7 +1286,10 @@ class Base:
         # Check for a db update - otherwise we could be out of date and not
         # know it in which case the memory addresses to add the record in
         # will be wrong.
+        # Only the ping returns the db delta so drop any state confirmation
+        # to insure the refresh isn't skipped.
         if refresh:
+            self.clear_state()
             seq.add(self.refresh)
 
         # Get the data array to use.  See Github issue #7 for discussion.
@@ -970,7 +1353,10 @@ class Base:
         # Check for a db update - otherwise we could be out of date and not
         # know it in which case the memory addresses to add the record in
         # will be wrong.
+        # Only the ping returns the db delta so drop any state confirmation
+        # to insure the refresh isn't skipped.
         if refresh:
+            self.clear_state()
             seq.add(self.refresh)
 
         seq.add(self.db.delete_on_device, self, entry)
@@ -562,6 +562,7 @@ class Dimmer(Base):
 
             _is_on, mode = on_off.Mode.decode(msg.cmd1)
             self._set_level(msg.cmd2, mode)
+            self.track_state(msg)
             on_done(True, "Dimmer state updated to %s" % self._level,
                     msg.cmd2)
 
@@ -684,6 +685,25 @@ class Dimmer(Base):
             LOG.warning("Dimmer %s unknown group cmd %#04x", self.addr,
                         msg.cmd1)
 
+    #-----------------------------------------------------------------------
+    def restore_state(self, level):
+        """Restore the level from a saved state.
+
+        No signals are emitted and the state is not marked as confirmed.
+
+        Args:
+          level (int):  The device level in the range [0,255].  0 is off.
+
+        Returns:
+          bool:  Returns True if the state was restored.  See
+          Base.can_restore_state().
+        """
+        if not self.can_restore_state():
+            return False
+
+        self._level = level
+        return True
+
     #-----------------------------------------------------------------------
     def _set_level(self, level, mode=on_off.Mode.NORMAL):
         """Update the device level state.
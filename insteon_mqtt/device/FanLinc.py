@@ -143,6 +143,8 @@ class FanLinc(Dimmer):
                    completed.  Signature is: on_done(success, msg, data)
         """
         LOG.info("Device %s cmd: fan status refresh", self.addr)
+        if self.refresh_skipped(force, on_done):
+            return
 
         seq = CommandSeq(self.protocol, "Refresh complete", on_done)
 
@@ -163,6 +165,31 @@ class FanLinc(Dimmer):
         seq.add(Dimmer.refresh, self, force)
         seq.run()
 
+    #-----------------------------------------------------------------------
+    def state_groups(self):
+        """Return the groups that make up the device state.
+
+        The refresh queries both the light and the fan speed so it can only
+        be skipped if both of them have been confirmed.
+
+        Returns:
+          list:  Returns the light (1) and fan (2) groups.
+        """
+        return [0x01, 0x02]
+
+    #-----------------------------------------------------------------------
+    def responder_group(self, msg):
+        """Return the group changed by a scene group command.
+
+        Args:
+          msg (InpStandard):  Broadcast message from the scene controller.
+
+        Returns:
+          int:  Returns the light group for group 1 scenes and the fan group
+          for everything else.  See handle_group_cmd().
+        """
+        return 0x01 if msg.group == 0x01 else 0x02
+
     #-----------------------------------------------------------------------
     def fan_on(self, speed=None, on_done=None):
         """Turn the fan on.
@@ -326,6 +353,7 @@ class FanLinc(Dimmer):
             LOG.debug("FanLinc fan %s ACK: %s", self.addr, msg)
 
             self._set_fan_speed(msg.cmd2)
+            self.track_state(msg, 0x02)
             on_done(True, "Fan %s state updated to %s" %
                     (self.addr, self._fan_speed), msg.cmd2)
 
@@ -376,6 +404,26 @@ class FanLinc(Dimmer):
             LOG.warning("FanLink %s unknown group cmd %#04x", self.addr,
                         msg.cmd1)
 
+    #-----------------------------------------------------------------------
+    def restore_fan_speed(self, speed):
+        """Restore the fan speed from a saved state.
+
+        Args:
+          speed (Speed):  The fan speed.
+
+        Returns:
+          bool:  Returns True if the state was restored.  See
+          Base.can_restore_state().
+        """
+        if not self.can_restore_state():
+            return False
+
+        self._fan_speed = speed
+        if speed != FanLinc.Speed.OFF:
+            self._last_speed = speed
+
+        return True
+
     #-----------------------------------------------------------------------
     def _set_fan_speed(self, speed):
         """Update the device fan speed.
@@ -334,6 +334,8 @@ class IOLinc(Base):
                    completed.  Signature is: on_done(success, msg, data)
         """
         LOG.info("Device %s cmd: status refresh", self.label)
+        if self.refresh_skipped(force, on_done):
+            return
 
         # NOTE: IOLinc cmd1=0x00 will report the relay state.  cmd2=0x01
         # reports the sensor state which is what we want.
@@ -354,6 +356,19 @@ class IOLinc(Base):
         # Run all the commands.
         seq.run()
 
+    #-----------------------------------------------------------------------
+    def responder_group(self, msg):
+        """Return the group changed by a scene group command.
+
+        Args:
+          msg (InpStandard):  Broadcast message from the scene controller.
+
+        Returns:
+          None:  Scenes trip the relay but the refresh queries the sensor
+          so they don't confirm any state.
+        """
+        return None
+
     #-----------------------------------------------------------------------
     def is_on(self):
         """Return if the device is on or not.
@@ -695,6 +710,23 @@ class IOLinc(Base):
         # relay state was tripped.
         LOG.debug("IOLinc %s cmd %#04x", self.addr, msg.cmd1)
 
+    #-----------------------------------------------------------------------
+    def restore_state(self, is_on):
+        """Restore the sensor on/off state from a saved state.
+
+        Args:
+          is_on (bool):  True if the sensor is on, False if it isn't.
+
+        Returns:
+          bool:  Returns True if the state was restored.  See
+          Base.can_restore_state().
+        """
+        if not self.can_restore_state():
+            return False
+
+        self._is_on = bool(is_on)
+        return True
+
     #-----------------------------------------------------------------------
     def _set_is_on(self, is_on):
         """Update the device on/off state.
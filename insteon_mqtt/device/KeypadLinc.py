@@ -180,6 +180,8 @@ class KeypadLinc(Base):
         """
         # Send a 0x19 0x01 command to get the LED light on/off flags.
         LOG.info("KeypadLinc %s cmd: keypad status refresh", self.addr)
+        if self.refresh_skipped(force, on_done):
+            return
 
         seq = CommandSeq(self.protocol, "Refresh complete", on_done)
 
@@ -211,6 +213,32 @@ class KeypadLinc(Base):
         # Run all the commands.
         seq.run()
 
+    #-----------------------------------------------------------------------
+    def state_groups(self):
+        """Return the groups that make up the device state.
+
+        The refresh queries the LED bit flags and the load.  The LED's can
+        change without any message being sent (detached loads, radio button
+        groups) so only a refresh reply confirms them.
+
+        Returns:
+          list:  Returns the load group (1) and the LED state key.
+        """
+        return [0x01, "led"]
+
+    #-----------------------------------------------------------------------
+    def responder_group(self, msg):
+        """Return the group changed by a scene group command.
+
+        Args:
+          msg (InpStandard):  Broadcast message from the scene controller.
+
+        Returns:
+          int:  Returns the load group for group 1 scenes.  Other buttons
+          only change the LED's which aren't confirmed by scenes.
+        """
+        return 0x01 if msg.group == 0x01 else None
+
     #-----------------------------------------------------------------------
     def addRefreshData(self, seq, force=False):
         """Add commands to refresh any internal data required.
@@ -837,6 +865,7 @@ class KeypadLinc(Base):
 
             _is_on, mode = on_off.Mode.decode(msg.cmd1)
             self._set_level(1, msg.cmd2, mode)
+            self.track_state(msg)
             on_done(True, "KeypadLinc state updated to %s" % self._level,
                     msg.cmd2)
 
@@ -960,6 +989,31 @@ class KeypadLinc(Base):
             LOG.warning("KeypadLinc %s unknown cmd %#04x", self.addr,
                         msg.cmd1)
 
+    #-----------------------------------------------------------------------
+    def restore_state(self, group, level):
+        """Restore a button level from a saved state.
+
+        Only the load (button 1) level is stored so other buttons just
+        update the LED bits.
+
+        Args:
+          group (int):  The group number to update [1,8].
+          level (int):  The level in the range [0,255].  0 is off.
+
+        Returns:
+          bool:  Returns True if the state was restored.  See
+          Base.can_restore_state().
+        """
+        if not self.can_restore_state():
+            return False
+
+        if group == 0x01:
+            self._level = level
+
+        self._led_bits = util.bit_set(self._led_bits, group - 1,
+                                      1 if level else 0)
+        return True
+
     #-----------------------------------------------------------------------
     def _set_level(self, group, level, mode=on_off.Mode.NORMAL):
         """Update the device level state for a group.
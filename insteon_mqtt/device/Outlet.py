@@ -141,6 +141,8 @@ class Outlet(Base):
                    completed.  Signature is: on_done(success, msg, data)
         """
         LOG.info("Outlet %s cmd: status refresh", self.label)
+        if self.refresh_skipped(force, on_done):
+            return
 
         seq = CommandSeq(self.protocol, "Device refreshed", on_done)
 
@@ -160,6 +162,31 @@ class Outlet(Base):
         # Run all the commands.
         seq.run()
 
+    #-----------------------------------------------------------------------
+    def state_groups(self):
+        """Return the groups that make up the device state.
+
+        The refresh reply has the state of both outlets so a refresh can
+        only be skipped if both of them have been confirmed.
+
+        Returns:
+          list:  Returns the top (1) and bottom (2) outlet groups.
+        """
+        return [0x01, 0x02]
+
+    #-----------------------------------------------------------------------
+    def responder_group(self, msg):
+        """Return the group changed by a scene group command.
+
+        Args:
+          msg (InpStandard):  Broadcast message from the scene controller.
+
+        Returns:
+          int:  Returns the outlet group the scene sets.  See
+          handle_group_cmd().
+        """
+        return msg.group
+
     #-----------------------------------------------------------------------
     def on(self, group=0x01, level=None, mode=on_off.Mode.NORMAL,
            on_done=None):
@@ -541,6 +568,7 @@ class Outlet(Base):
 
             is_on, mode = on_off.Mode.decode(msg.cmd1)
             self._set_is_on(group, is_on, mode)
+            self.track_state(msg, group)
             on_done(True, "Outlet state updated to on=%s" % self._is_on,
                     self._is_on)
 
@@ -609,6 +637,24 @@ class Outlet(Base):
             LOG.warning("Outlet %s unknown group cmd %#04x", self.addr,
                         msg.cmd1)
 
+    #-----------------------------------------------------------------------
+    def restore_state(self, group, is_on):
+        """Restore a socket on/off state from a saved state.
+
+        Args:
+          group (int):  The group to update (1 for upper outlet, 2 for lower).
+          is_on (bool):  True if the socket is on, False if it isn't.
+
+        Returns:
+          bool:  Returns True if the state was restored.  See
+          Base.can_restore_state().
+        """
+        if not self.can_restore_state():
+            return False
+
+        self._is_on[group - 1] = bool(is_on)
+        return True
+
     #-----------------------------------------------------------------------
     def _set_is_on(self, group, is_on, mode=on_off.Mode.NORMAL):
         """Update the device on/off state.
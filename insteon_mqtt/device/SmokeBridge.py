@@ -129,6 +129,8 @@ class SmokeBridge(Base):
                    completed.  Signature is: on_done(success, msg, data)
         """
         LOG.info("Smoke bridge %s cmd: status refresh", self.addr)
+        if self.refresh_skipped(force, on_done):
+            return
 
         seq = CommandSeq(self.protocol, "Device refreshed", on_done)
 
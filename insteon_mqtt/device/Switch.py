@@ -454,6 +454,7 @@ class Switch(Base):
 
             is_on, mode = on_off.Mode.decode(msg.cmd1)
             self._set_is_on(is_on, mode)
+            self.track_state(msg)
             on_done(True, "Switch state updated to on=%s" % self._is_on,
                     self._is_on)
 
@@ -526,6 +527,26 @@ class Switch(Base):
             LOG.warning("Switch %s unknown group cmd %#04x", self.addr,
                         msg.cmd1)
 
+    #-----------------------------------------------------------------------
+    def restore_state(self, is_on):
+        """Restore the on/off state from a saved state.
+
+        No signals are emitted and the state is not marked as confirmed so
+        the next refresh still queries the device.
+
+        Args:
+          is_on (bool):  True if the switch is on, False if it isn't.
+
+        Returns:
+          bool:  Returns True if the state was restored.  See
+          Base.can_restore_state().
+        """
+        if not self.can_restore_state():
+            return False
+
+        self._is_on = bool(is_on)
+        return True
+
     #-----------------------------------------------------------------------
     def _set_is_on(self, is_on, mode=on_off.Mode.NORMAL):
         """Update the device on/off state.
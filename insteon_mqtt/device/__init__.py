@@ -25,18 +25,21 @@ first (hold the modem set button, then the device.
 """
 
 #===========================================================================
+from ..util import lazy_import
 
-from .Base import Base
-from .BatterySensor import BatterySensor
-from .Dimmer import Dimmer
-from .FanLinc import FanLinc
-from .IOLinc import IOLinc
-from .KeypadLinc import KeypadLinc
-from .Leak import Leak
-from .MsgHistory import MsgHistory
-from .Motion import Motion
-from .Outlet import Outlet
-from .Remote import Remote
-from .SmokeBridge import SmokeBridge
-from .Switch import Switch
-from .Thermostat import Thermostat
+lazy_import(__name__, {
+    "Base"          : "Base:Base",
+    "BatterySensor" : "BatterySensor:BatterySensor",
+    "Dimmer"        : "Dimmer:Dimmer",
+    "FanLinc"       : "FanLinc:FanLinc",
+    "IOLinc"        : "IOLinc:IOLinc",
+    "KeypadLinc"    : "KeypadLinc:KeypadLinc",
+    "Leak"          : "Leak:Leak",
+    "Motion"        : "Motion:Motion",
+    "MsgHistory"    : "MsgHistory:MsgHistory",
+    "Outlet"        : "Outlet:Outlet",
+    "Remote"        : "Remote:Remote",
+    "SmokeBridge"   : "SmokeBridge:SmokeBridge",
+    "Switch"        : "Switch:Switch",
+    "Thermostat"    : "Thermostat:Thermostat",
+    })
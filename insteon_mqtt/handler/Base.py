@@ -3,7 +3,7 @@
 # Message handler API definition
 #
 #===========================================================================
-import time
+from .. import clock
 from .. import log
 from .. import message as Msg
 from .. import util
@@ -30,7 +30,16 @@ class Base:
     callback is stored in the base class.  The API for the callback is
     always:
        on_done( bool success, str message, data )
+
+    Deadlines: max_queue_time is the default time a message can wait in the
+    Protocol write queue.  If the message isn't sent by then, the Protocol
+    drops it and calls handle_expired().  Messages removed with
+    Protocol.cancel() call handle_cancel().
     """
+    # Default time in seconds that a message can wait in the write queue.
+    # None to never drop the message.
+    max_queue_time = None
+
     #-----------------------------------------------------------------------
     def __init__(self, on_done=None, num_retry=0, time_out=5):
         """Constructor
@@ -84,7 +93,23 @@ class Base:
 
         This resets the time out time to record that we saw a valid message.
         """
-        self._expire_time = time.time() + self._time_out
+        self._expire_time = clock.time() + self._time_out
+
+    #-----------------------------------------------------------------------
+    def poll_dt(self, t):
+        """Return the time in seconds until the handler times out.
+
+        Args:
+          t (float):  Current time tag as a Unix clock time.
+
+        Returns:
+          float:  Returns the time until is_expired() should be checked or
+          None if the message hasn't been sent yet.
+        """
+        if self._expire_time is None:
+            return None
+
+        return max(0, self._expire_time - t)
 
     #-----------------------------------------------------------------------
     def is_expired(self, protocol, t):
@@ -162,6 +187,27 @@ class Base:
         """
         self.on_done(False, "Command timed out", None)
 
+    #-----------------------------------------------------------------------
+    def handle_expired(self, protocol):
+        """Handle the message being dropped before it was sent.
+
+        This is called when the message waited in the Protocol write queue
+        past it's deadline.
+
+        Args:
+          protocol (Protocol):  The Insteon Protocol object.
+        """
+        self.on_done(False, "Command expired", None)
+
+    #-----------------------------------------------------------------------
+    def handle_cancel(self, protocol):
+        """Handle the message being cancelled before it was sent.
+
+        Args:
+          protocol (Protocol):  The Insteon Protocol object.
+        """
+        self.on_done(False, "Command cancelled", None)
+
     #-----------------------------------------------------------------------
     def __str__(self):
         return "%s handler" % type(self).__name__
@@ -21,8 +21,11 @@ class DeviceDbGet(Base):
 
     Each reply is passed to the callback function set in the constructor
     which is usually a method on the device to update it's database.
+
+    The request can also be for a single record in which case the handler
+    finishes when that record arrives.
     """
-    def __init__(self, device_db, on_done, num_retry=0):
+    def __init__(self, device_db, on_done, num_retry=0, single=False):
         """Constructor
 
         The on_done callback has the signature on_done(success, msg, entry)
@@ -38,9 +41,11 @@ class DeviceDbGet(Base):
                     handler times out without returning Msg.FINISHED.
                     This count does include the initial sending so a
                     retry of 3 will send once and then retry 2 more times.
+          single (bool):  True if a single record was requested.
         """
         super().__init__(on_done, num_retry)
         self.db = device_db
+        self.single = single
 
     #-----------------------------------------------------------------------
     def msg_received(self, protocol, msg):
@@ -116,6 +121,10 @@ class DeviceDbGet(Base):
                 self.on_done(True, "Database received", entry)
                 return Msg.FINISHED
 
+            elif self.single:
+                self.on_done(True, "Database record received", entry)
+                return Msg.FINISHED
+
             # Otherwise keep processing records as they arrive.
             else:
                 return Msg.CONTINUE
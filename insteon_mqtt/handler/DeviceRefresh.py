@@ -5,9 +5,7 @@
 #===========================================================================
 from .. import log
 from .. import message as Msg
-from .. import db
 from .Base import Base
-from .DeviceDbGet import DeviceDbGet
 
 
 LOG = log.get_logger()
@@ -24,8 +22,15 @@ class DeviceRefresh(Base):
     the current state of the device (on/off, dimmer level, etc).
     Additionally, we'll check the device's database delta version to see if
     the database needs to re-downloaded from the device.  If it does, the
-    handler will send a new message to request the database.
+    handler will call device.download_db() to request the database.
+
+    While the device is part of a refresh sweep (see Modem.refresh_all),
+    the handler uses a short time out so unresponsive devices don't hold up
+    the rest of the sweep.
     """
+    # Time out in seconds to use during a refresh sweep.
+    sweep_time_out = 2
+
     def __init__(self, device, callback, force, on_done=None, num_retry=3,
                  skip_db=False):
         """Constructor
@@ -45,7 +50,8 @@ class DeviceRefresh(Base):
           skip_db (bool):  If True, ignore the database version and don't
                   download the database.
         """
-        super().__init__(on_done, num_retry)
+        time_out = self.sweep_time_out if device.refresh_sweep else 5
+        super().__init__(on_done, num_retry, time_out)
 
         self.device = device
         self.callback = callback
@@ -94,41 +100,23 @@ class DeviceRefresh(Base):
             # state which is usually stored in cmd2.
             self.callback(msg)
 
+            # The main (non skip_db) refresh reply is the last one in a
+            # device refresh so all of the device state and the db delta
+            # have been confirmed.
+            if not self.skip_db:
+                self.device.confirm_state()
+                self.device.confirm_db()
+
             if not need_refresh:
                 self.on_done(True, "Refresh complete", None)
             else:
                 LOG.ui("Device %s db out of date (got %s vs %s), refreshing",
                        self.addr, msg.cmd1, self.device.db.delta)
 
-                # Clear the current database values.
-                self.device.db.clear()
-
-                # When the update message below ends, update the db delta w/
-                # the current value and save the database.
-                def on_done(success, message, data):
-                    if success:
-                        self.device.db.set_delta(msg.cmd1)
-                        LOG.ui("%s database download complete\n%s",
-                               self.addr, self.device.db)
-                    self.on_done(success, message, data)
-
                 # Request that the device send us all of it's database
-                # records.  These will be streamed as fast as possible to us
-                # and the handler will update the database.  We need a retry
-                # count here because battery powered devices don't always
-                # respond right away.
-                if self.device.db.engine == 0:
-                    scan_manager = db.DeviceScanManagerI1(self.device,
-                                                          self.device.db,
-                                                          on_done=on_done,
-                                                          num_retry=3)
-                    scan_manager.start_scan()
-                else:
-                    db_msg = Msg.OutExtended.direct(self.addr, 0x2f, 0x00,
-                                                    bytes(14))
-                    msg_handler = DeviceDbGet(self.device.db, on_done,
-                                              num_retry=3)
-                    self.device.send(db_msg, msg_handler)
+                # records.  If the device is part of a refresh sweep, this
+                # will record the delta and the download happens later.
+                self.device.download_db(msg.cmd1, self.on_done)
 
             # Either way - this transaction is complete.
             return Msg.FINISHED
@@ -16,6 +16,10 @@ class ModemScene(Base):
     This handles the callbacks when simulated modem scene is sent using the
     OutModemScene message.  Calls modem.handle_scene when complete.
     """
+    # Commands that haven't been sent in this many seconds are dropped
+    # since they're probably not useful anymore.
+    max_queue_time = 30
+
     def __init__(self, modem, msg, on_done=None, num_retry=3):
         """Constructor
 
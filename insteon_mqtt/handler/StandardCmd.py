@@ -26,6 +26,10 @@ class StandardCmd(Base):
     to the callback set in the constructor which is usually a method on the
     device to handle the result (or the ACK that the command went through).
     """
+    # Commands that haven't been sent in this many seconds are dropped
+    # since they're probably not useful anymore.
+    max_queue_time = 30
+
     def __init__(self, msg, callback, on_done=None, num_retry=3):
         """Constructor
 
@@ -3,8 +3,11 @@
 # Logging utilities
 #
 #===========================================================================
+import atexit
+import copy
 import logging
 import logging.handlers
+import queue
 
 # Add a custom logging level.  This lets us do some filtering for sending
 # user interface messages to the command line tool about command status and
@@ -12,6 +15,16 @@ import logging.handlers
 UI_LEVEL = 21
 logging.addLevelName(UI_LEVEL, "UI")
 
+# Default maximum number of records waiting to be written by the logging
+# thread.  See initialize().
+QUEUE_SIZE = 10000
+
+# Formats exceptions in DropQueueHandler.prepare().
+_EXC_FORMATTER = logging.Formatter()
+
+# The running QueueListener thread (if any).
+_listener = None
+
 
 #===========================================================================
 def get_logger(name="insteon_mqtt"):
@@ -39,6 +52,12 @@ def get_logger(name="insteon_mqtt"):
 def initialize(level=None, screen=None, file=None, config=None):
     """Initialize the logging settings.
 
+    The screen and file handlers are run in a separate thread so writing the
+    log doesn't block the network event loop.  Records are put in a bounded
+    queue and if the writer falls behind, new records are dropped and
+    counted (see DropQueueHandler).  Set the logging config 'queue_size' to
+    0 to write records in the calling thread instead.
+
     Args:
       level (int):  The logging level to set.
       screen (bool):  True to turn on logging to the screen.  False to turn it
@@ -60,6 +79,9 @@ def initialize(level=None, screen=None, file=None, config=None):
             screen = data.get("screen", None)
         if file is None:
             file = data.get("file", None)
+        queue_size = data.get("queue_size", QUEUE_SIZE)
+    else:
+        queue_size = QUEUE_SIZE
 
     # Apply defaults if none were set.
     level = level if level is not None else logging.INFO
@@ -75,17 +97,52 @@ def initialize(level=None, screen=None, file=None, config=None):
     datefmt = '%Y-%m-%d %H:%M:%S'
     formatter = logging.Formatter(fmt, datefmt)
 
+    handlers = []
     if screen:
         handler = logging.StreamHandler()
         handler.setFormatter(formatter)
-        log_obj.addHandler(handler)
+        handlers.append(handler)
 
     if file:
         # Use a watched file handler - that way LINUX system log
         # rotation works properly.
         handler = logging.handlers.WatchedFileHandler(file)
         handler.setFormatter(formatter)
-        log_obj.addHandler(handler)
+        handlers.append(handler)
+
+    if not handlers or queue_size <= 0:
+        for handler in handlers:
+            log_obj.addHandler(handler)
+        return
+
+    # The UI callback handler is added directly to the logger (see
+    # Logger.set_ui_callback) so UI messages are still sent synchronously.
+    global _listener
+    shutdown()
+
+    log_queue = queue.Queue(queue_size)
+    log_obj.addHandler(DropQueueHandler(log_queue))
+    _listener = logging.handlers.QueueListener(log_queue, *handlers)
+    _listener.start()
+
+
+#===========================================================================
+def shutdown():
+    """Stop the logging thread.
+
+    Any records in the queue are written and the handlers are closed
+    before this returns.  This is registered to run when the program exits.
+    """
+    global _listener
+    if _listener:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+
+        _listener = None
+
+
+atexit.register(shutdown)
 
 
 #===========================================================================
@@ -104,7 +161,9 @@ class Logger(logging.getLoggerClass()):
           name (str):  The logging objecst name.
         """
         super().__init__(name)
-        self._ui_handler = None
+
+        # CallbackHandler objects for each UI callback that is set.
+        self._ui_handlers = []
 
     #-----------------------------------------------------------------------
     def ui(self, msg, *args, **kwargs):
@@ -125,22 +184,129 @@ class Logger(logging.getLoggerClass()):
         """Add a callback for UI messages.
 
         The callback will be passed the logging module Record object to
-        process when a UI message is logged.  Only one UI callback can be
-        added at a time.
+        process when a UI message is logged.  More than one callback can be
+        added (one per command session) and each one gets every UI message.
 
         Args:
           callback:  The callback function to use.
+
+        Returns:
+          CallbackHandler:  Returns the handler to pass to
+          del_ui_callback().
+        """
+        handler = CallbackHandler(callback)
+        self._ui_handlers.append(handler)
+        self.addHandler(handler)
+        return handler
+
+    #-----------------------------------------------------------------------
+    def del_ui_callback(self, handler=None):
+        """Remove a UI callback handler.
+
+        Args:
+          handler (CallbackHandler):  The handler returned by
+                  set_ui_callback().  If this is None, the last callback
+                  that was added is removed.
+        """
+        if handler is None:
+            if not self._ui_handlers:
+                return
+            handler = self._ui_handlers[-1]
+
+        if handler in self._ui_handlers:
+            self._ui_handlers.remove(handler)
+            self.removeHandler(handler)
+
+    #-----------------------------------------------------------------------
+
+#===========================================================================
+
+
+class DropQueueHandler(logging.handlers.QueueHandler):
+    """Logging handler that passes records to a bounded queue.
+
+    The records are written by a logging.handlers.QueueListener thread.  If
+    the queue is full, the record is dropped instead of blocking the caller.
+    The number of dropped records is logged as a warning once there is room
+    in the queue again.
+
+    The message text is built before the record is queued because the
+    logged objects (device databases, etc) keep changing in the event loop
+    and formatting them in another thread isn't safe.  Records only reach
+    this handler after passing the level check so debug messages that
+    aren't logged are still never formatted.  The listener thread only does
+    the final formatting and the file I/O.
+    """
+    def __init__(self, log_queue):
+        """Constructor
+
+        Args:
+          log_queue (queue.Queue):  The bounded queue to put records in.
         """
-        self._ui_handler = CallbackHandler(callback)
-        self.addHandler(self._ui_handler)
+        super().__init__(log_queue)
+
+        # Total number of records dropped and the number dropped since the
+        # last warning was queued.
+        self.dropped = 0
+        self._unreported = 0
 
     #-----------------------------------------------------------------------
-    def del_ui_callback(self):
-        """Remove the UI callback handler.
+    def prepare(self, record):
+        """Prepare a record for queuing.
+
+        The message arguments and any exception are formatted into text so
+        the record doesn't refer to any objects that could change before
+        the listener writes it.  The listener formatters still add the time
+        stamp, level, etc.
+
+        Args:
+           record:  The logging record.
+
+        Returns:
+           Returns a copy of the record with the message formatted.
         """
-        self.removeHandler(self._ui_handler)
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = _EXC_FORMATTER.formatException(
+                    record.exc_info)
+            record.exc_info = None
+
+        return record
 
     #-----------------------------------------------------------------------
+    def enqueue(self, record):
+        """Put a record in the queue or drop it if the queue is full.
+
+        Args:
+           record:  The logging record.
+        """
+        try:
+            if self._unreported:
+                self.queue.put_nowait(self._drop_record(record))
+                self._unreported = 0
+
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            self._unreported += 1
+
+    #-----------------------------------------------------------------------
+    def _drop_record(self, record):
+        """Create a warning record for the records that were dropped.
+
+        Args:
+           record:  The logging record being queued.
+
+        Returns:
+           Returns the warning record.
+        """
+        return logging.LogRecord(
+            record.name, logging.WARNING, __file__, 0,
+            "Logging queue full: %d messages dropped", (self._unreported,),
+            None)
 
 #===========================================================================
 
@@ -4,7 +4,7 @@
 #
 #===========================================================================
 import io
-import time
+from .. import clock
 from ..Address import Address
 from .Base import Base
 from .Flags import Flags
@@ -80,7 +80,7 @@ class InpStandard(Base):
         # detect duplicates.  87 msec is empirical and was found to be an OK
         # value to use with standard length messages in other Insteon
         # software (misterhouse?)
-        self.expire_time = time.time() + self.flags.hops_left * 0.087
+        self.expire_time = clock.time() + self.flags.hops_left * 0.087
 
     #-----------------------------------------------------------------------
     def nak_str(self):
@@ -219,7 +219,7 @@ class InpExtended(Base):
         # detect duplicates.  183 msec is empirical and was found to be an OK
         # value to use with extended length messages in other Insteon
         # software (misterhouse?)
-        self.expire_time = time.time() + self.flags.hops_left * 0.183
+        self.expire_time = clock.time() + self.flags.hops_left * 0.183
 
     #-----------------------------------------------------------------------
     def __str__(self):
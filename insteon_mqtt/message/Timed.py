@@ -14,7 +14,8 @@ class Timed:
     """
 
     #-----------------------------------------------------------------------
-    def __init__(self, msg, msg_handler, high_priority, after):
+    def __init__(self, msg, msg_handler, high_priority, after,
+                 deadline=None):
         """Constructor
 
         Args:
@@ -30,11 +31,17 @@ class Timed:
           after (float):  Unix clock time tag to send the message after. If
                 None, the message is sent as soon as possible.  Exact time is
                 not guaranteed - the message will be send no earlier than this.
+          deadline (float):  Unix clock time tag to drop the message after
+                   if it hasn't been sent.  None to use the handler default.
         """
         self.msg = msg
         self.msg_handler = msg_handler
         self.high_priority = high_priority
         self.time = after
+        self.deadline = deadline
+
+        # Write queue entry once the message is sent to the protocol.
+        self.output = None
 
     #-----------------------------------------------------------------------
     def is_active(self, t):
@@ -51,7 +58,14 @@ class Timed:
 
         Args:
           protocol (Protocol):  The Protocol class to use.
+
+        Returns:
+          Returns the write queue handle from Protocol.send().  This is also
+          stored in the output attribute.
         """
-        protocol.send(self.msg, self.msg_handler, self.high_priority)
+        self.output = protocol.send(self.msg, self.msg_handler,
+                                    self.high_priority,
+                                    deadline=self.deadline)
+        return self.output
 
 #===========================================================================
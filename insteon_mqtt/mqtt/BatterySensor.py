@@ -35,7 +35,7 @@ class BatterySensor:
             payload='{{on_str.lower()}}')
         self.msg_battery = MsgTemplate(
             topic='insteon/{{address}}/low_battery',
-            payload='{{is_low_str.lower()}}')
+            payload='{{is_low_str.lower()}}', dedup=True)
 
         # Connect the signals from the insteon device so we get notified of
         # changes.
@@ -83,6 +83,15 @@ class BatterySensor:
         """
         pass
 
+    #-----------------------------------------------------------------------
+    def subscriptions(self):
+        """Return the (topic, handler) input subscriptions.
+
+        Returns:
+          list:  Returns an empty list since there are no inputs.
+        """
+        return []
+
     #-----------------------------------------------------------------------
     def template_data(self, is_on=None, is_low=None):
         """Create the Jinja templating data variables.
@@ -0,0 +1,180 @@
+#===========================================================================
+#
+# Restore device states from retained MQTT state messages.
+#
+#===========================================================================
+from .. import clock
+from .. import log
+from .. import util
+
+LOG = log.get_logger()
+
+
+class Bootstrap:
+    """Seed the device states from the retained MQTT state topics.
+
+    When the bridge starts, the device states are unknown until each device
+    is refreshed.  The last states that were published are usually retained
+    by the broker though.  This subscribes to the device state topics once
+    the MQTT link connects, decodes each retained payload back into a state
+    (see util.state_restorer()), and sets the device state with it.
+
+    Restored states are only a starting point.  They don't emit signals, so
+    nothing is published again, and they don't count as confirmed by the
+    Insteon network.  Once a device reports a state, later retained messages
+    are ignored (see device.Base.can_restore_state()).
+
+    Bootstrapping finishes when every state topic has been seen or when the
+    time out runs out, whichever is first.  The time out starts when
+    start() is called so a broker that can't be reached doesn't hold up the
+    caller.  The state topics are then unsubscribed and the on_done callback
+    is called.
+    """
+    def __init__(self, mqtt, time_out):
+        """Constructor
+
+        Args:
+          mqtt (mqtt.Mqtt):  The MQTT handler with the devices to restore.
+          time_out (float):  Maximum time in seconds to wait for the link
+                   to connect and the retained messages to arrive.
+        """
+        self.mqtt = mqtt
+        self.link = mqtt.link
+        self.time_out = time_out
+
+        # Map of state topic to restore function.  Topics are removed as
+        # they're seen.
+        self._topics = {}
+
+        # List of the topics subscribed to.
+        self._subscribed = []
+
+        # Time to stop waiting for retained messages.  None until start()
+        # is called.
+        self._end_time = None
+
+        # True once the state topics have been subscribed to.
+        self._started = False
+
+        self._on_done = None
+        self._done = False
+        self.stats = {"topics" : 0, "restored" : 0}
+
+    #-----------------------------------------------------------------------
+    def start(self, on_done=None):
+        """Start restoring the device states.
+
+        If the MQTT link isn't connected yet, this waits for it to connect.
+
+        Args:
+          on_done:  Finished callback.  Signature is on_done(success, msg,
+                    data).  It's always called with success=True once the
+                    restore is finished.
+        """
+        self._on_done = util.make_callback(on_done)
+        self._end_time = clock.time() + self.time_out
+        if self.link.connected:
+            self.handle_connected(self.link, True)
+        else:
+            self.link.signal_connected.connect(self.handle_connected)
+
+    #-----------------------------------------------------------------------
+    def poll(self, t):
+        """Periodic polling function.
+
+        This should be called from the main loop.  It finishes the restore
+        when the time out runs out even if the MQTT link never connected.
+
+        Args:
+          t (float):  The current time.
+        """
+        if not self._done and self._end_time is not None and \
+           t >= self._end_time:
+            self._finish()
+
+    #-----------------------------------------------------------------------
+    def handle_connected(self, link, connected):
+        """MQTT (dis)connection callback.
+
+        Subscribes to the device state topics the first time the link
+        connects.
+
+        Args:
+          link (network.Mqtt):  The MQTT network link.
+          connected (bool):  True if connected, False if disconnected.
+        """
+        if not connected or self._done or self._started:
+            return
+
+        self._started = True
+
+        # Skip state topics that are also input topics so unsubscribing
+        # when finished doesn't remove the device subscription.
+        inputs = set()
+        topics = {}
+        for device in self.mqtt.devices.values():
+            inputs.update(topic for topic, _ in device.subscriptions())
+
+            retained_states = getattr(device, "retained_states", None)
+            if retained_states:
+                topics.update(retained_states())
+
+        self._topics = {k: v for k, v in topics.items() if k not in inputs}
+        self.stats["topics"] = len(self._topics)
+
+        if not self._topics:
+            self._finish()
+            return
+
+        LOG.info("MQTT restoring device states from %d topics",
+                 len(self._topics))
+        self._subscribed = sorted(self._topics.keys())
+        self.link.subscribe_list([(topic, self.mqtt.qos, self.handle_state)
+                                  for topic in self._subscribed])
+
+    #-----------------------------------------------------------------------
+    def handle_state(self, client, data, message):
+        """Handle a retained state message.
+
+        Messages that aren't retained are live publishes of the current
+        state, not the restored state, so they're ignored.
+
+        Args:
+          client (paho.Client):  The paho mqtt client (self.link).
+          data:  Optional user data (unused).
+          message:  MQTT message - has attrs: topic, payload, qos, retain.
+        """
+        if self._done or not message.retain:
+            return
+
+        restore = self._topics.pop(message.topic, None)
+        if restore is None:
+            return
+
+        payload = message.payload.decode("utf-8")
+        if restore(payload):
+            self.stats["restored"] += 1
+        else:
+            LOG.debug("MQTT state not restored %s: %r", message.topic,
+                      payload)
+
+        if not self._topics:
+            self._finish()
+
+    #-----------------------------------------------------------------------
+    def _finish(self):
+        """Stop restoring states and notify the on_done callback.
+        """
+        self._done = True
+        self.link.signal_connected.disconnect(self.handle_connected)
+
+        self.link.unsubscribe_list(self._subscribed)
+        self._subscribed = []
+        self._topics = {}
+
+        msg = "MQTT restored %d of %d device states" % (
+            self.stats["restored"], self.stats["topics"])
+        LOG.info(msg)
+        self._on_done(True, msg, None)
+
+    #-----------------------------------------------------------------------
@@ -31,6 +31,9 @@ class Dimmer:
         self.mqtt = mqtt
         self.device = device
 
+        # Cached (topic, handler) input subscriptions.  See subscriptions().
+        self._subscriptions = None
+
         # Output state change reporting template.
         self.msg_state = MsgTemplate(
             topic='insteon/{{address}}/state',
@@ -70,6 +73,9 @@ class Dimmer:
                  config is stored in config['dimmer'].
           qos (int):  The default quality of service level to use.
         """
+        # Input topics are rendered again with the new templates.
+        self._subscriptions = None
+
         data = config.get("dimmer", None)
         if not data:
             return
@@ -94,17 +100,8 @@ class Dimmer:
           link (network.Mqtt):  The MQTT network client to use.
           qos (int):  The quality of service to use.
         """
-        # On/off command messages.
-        topic = self.msg_on_off.render_topic(self.template_data())
-        link.subscribe(topic, qos, self._input_on_off)
-
-        # Level changing command messages.
-        topic = self.msg_level.render_topic(self.template_data())
-        link.subscribe(topic, qos, self._input_set_level)
-
-        # Scene triggering messages.
-        topic = self.msg_scene.render_topic(self.template_data())
-        link.subscribe(topic, qos, self._input_scene)
+        for topic, handler in self.subscriptions():
+            link.subscribe(topic, qos, handler)
 
     #-----------------------------------------------------------------------
     def unsubscribe(self, link):
@@ -113,14 +110,41 @@ class Dimmer:
         Args:
           link (network.Mqtt):  The MQTT network client to use.
         """
-        topic = self.msg_on_off.render_topic(self.template_data())
-        link.unsubscribe(topic)
+        for topic, _handler in self.subscriptions():
+            link.unsubscribe(topic)
 
-        topic = self.msg_level.render_topic(self.template_data())
-        link.unsubscribe(topic)
+    #-----------------------------------------------------------------------
+    def subscriptions(self):
+        """Return the cached (topic, handler) input subscriptions.
+
+        See Switch.subscriptions() for details.
+        """
+        if self._subscriptions is None:
+            data = self.template_data()
+            topics = [
+                (self.msg_on_off.render_topic(data), self._input_on_off),
+                (self.msg_level.render_topic(data), self._input_set_level),
+                (self.msg_scene.render_topic(data), self._input_scene),
+                ]
+            self._subscriptions = [i for i in topics if i[0]]
+
+        return self._subscriptions
+
+    #-----------------------------------------------------------------------
+    def retained_states(self):
+        """Return the state topics to restore the dimmer level from.
+
+        Returns:
+          list:  Returns a list of (topic, restore) tuples.  See
+          Switch.retained_states().
+        """
+        topic = self.msg_state.render_topic(self.template_data())
+        if not topic:
+            return []
 
-        topic = self.msg_scene.render_topic(self.template_data())
-        link.unsubscribe(topic)
+        states = [(self.template_data(i), i) for i in util.RESTORE_LEVELS]
+        return [(topic, util.state_restorer(self.msg_state, states,
+                                            self.device.restore_state))]
 
     #-----------------------------------------------------------------------
     # pylint: disable=arguments-differ
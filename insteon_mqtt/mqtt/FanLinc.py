@@ -8,6 +8,7 @@ from .. import log
 from .. import device as Dev
 from .Dimmer import Dimmer
 from .MsgTemplate import MsgTemplate
+from . import util
 
 LOG = log.get_logger()
 
@@ -38,10 +39,13 @@ class FanLinc(Dimmer):
         # Initialize the dimmer.
         super().__init__(mqtt, device)
 
+        # Cached fan input subscriptions.  See subscriptions().
+        self._fan_subscriptions = None
+
         # Output fan state change reporting template.
         self.msg_fan_state = MsgTemplate(
             topic='insteon/{{address}}/fan/state',
-            payload='{{level_str}}')
+            payload='{{level_str}}', dedup=True)
 
         # Input fan on/off command template.
         self.msg_fan_on_off = MsgTemplate(
@@ -50,7 +54,8 @@ class FanLinc(Dimmer):
 
         # Output fan speed state change reporting template.  Default is to
         # report speeds via the state topic.
-        self.msg_fan_speed_state = MsgTemplate(topic='', payload='')
+        self.msg_fan_speed_state = MsgTemplate(topic='', payload='',
+                                               dedup=True)
 
         # Input fan speed level command template.
         self.msg_fan_speed = MsgTemplate(topic='', payload='')
@@ -71,6 +76,7 @@ class FanLinc(Dimmer):
         super().load_config(config, qos)
 
         # Now load the fan control configuration.
+        self._fan_subscriptions = None
         data = config.get("fan_linc", None)
         if not data:
             return
@@ -85,53 +91,49 @@ class FanLinc(Dimmer):
                                        'fan_speed_set_payload', qos)
 
     #-----------------------------------------------------------------------
-    def subscribe(self, link, qos):
-        """Subscribe to any MQTT topics the object needs.
+    def subscriptions(self):
+        """Return the cached dimmer and fan input subscriptions.
 
-        Subscriptions are used when the object has things that can be
-        commanded to change.
+        The base class subscribe() and unsubscribe() use this so the fan
+        topics are handled along with the dimmer topics.
 
-        Args:
-          link (network.Mqtt):  The MQTT network client to use.
-          qos (int):  The quality of service to use.
+        Returns:
+          list:  Returns a list of (topic, handler) tuples.  See
+          Switch.subscriptions().
         """
-        # Subscribe to the dimmer topics.
-        super().subscribe(link, qos)
+        if self._fan_subscriptions is None:
+            data = self.fan_template_data()
 
-        # Subscribe to the FanLinc topics.
-        data = self.template_data()
-
-        topic = self.msg_fan_on_off.render_topic(data)
-        if topic:
             handler = functools.partial(self._input_set_fan_speed,
                                         is_speed=False)
-            link.subscribe(topic, qos, handler)
+            topics = [(self.msg_fan_on_off.render_topic(data), handler)]
 
-        topic = self.msg_fan_speed.render_topic(data)
-        if topic:
             handler = functools.partial(self._input_set_fan_speed,
                                         is_speed=True)
-            link.subscribe(topic, qos, handler)
+            topics.append((self.msg_fan_speed.render_topic(data), handler))
+
+            self._fan_subscriptions = [i for i in topics if i[0]]
+
+        return super().subscriptions() + self._fan_subscriptions
 
     #-----------------------------------------------------------------------
-    def unsubscribe(self, link):
-        """Unsubscribe to any MQTT topics the object was subscribed to.
+    def retained_states(self):
+        """Return the state topics to restore the light level and fan speed.
 
-        Args:
-          link (network.Mqtt):  The MQTT network client to use.
+        Returns:
+          list:  Returns a list of (topic, restore) tuples.  See
+          Switch.retained_states().
         """
-        # Unsubscribe from the dimmer topics.
-        super().unsubscribe(link)
-
-        data = self.fan_template_data()
+        restores = super().retained_states()
 
-        topic = self.msg_fan_on_off.render_topic(data)
+        topic = self.msg_fan_state.render_topic(self.fan_template_data())
         if topic:
-            link.unsubscribe(topic)
+            states = [(self.fan_template_data(i), i)
+                      for i in self.level_map]
+            restores.append((topic, util.state_restorer(
+                self.msg_fan_state, states, self.device.restore_fan_speed)))
 
-        topic = self.msg_fan_speed.render_topic(data)
-        if topic:
-            link.unsubscribe(topic)
+        return restores
 
     #-----------------------------------------------------------------------
     # pylint: disable=arguments-differ
@@ -0,0 +1,221 @@
+#===========================================================================
+#
+# Fast path renderer for simple MQTT templates.
+#
+#===========================================================================
+import jinja2
+from jinja2 import nodes
+from jinja2.defaults import DEFAULT_NAMESPACE
+
+
+class FastTemplate:
+    """Direct Python renderer for simple templates.
+
+    Most topic and payload templates are plain variable substitutions like
+    'insteon/{{address}}/state' or '{{on_str.upper()}}'.  Rendering those
+    through jinja costs a lot more than it needs to.  This class parses the
+    template with jinja and, if it only uses the features below, builds a
+    list of functions that render the template directly.  Otherwise
+    from_source() returns None and the jinja template should be used.
+
+    Supported features:
+      - text and constants
+      - variables and attribute/item lookups: {{json.state}}
+      - no argument string methods: {{value.lower()}}
+      - no argument filters: {{value|lower}}
+
+    Rendering matches jinja's default behavior: undefined variables render
+    as an empty string and using an attribute or method of an undefined
+    variable raises an error.
+    """
+    # Allowed no argument methods and filters.  The filters are applied to
+    # the string form of the value like jinja does.
+    methods = set(["lower", "upper", "strip"])
+    filters = {
+        "lower" : lambda s: s.lower(),
+        "upper" : lambda s: s.upper(),
+        "trim" : lambda s: s.strip(),
+        "string" : lambda s: s,
+        }
+
+    #-----------------------------------------------------------------------
+    @classmethod
+    def from_source(cls, env, source):
+        """Build a fast template from a template string.
+
+        Args:
+          env (jinja2.Environment):  The environment to parse the template
+              with.
+          source (str):  The template string.
+
+        Returns:
+          FastTemplate:  Returns the template or None if the template uses
+          features that aren't supported.
+        """
+        try:
+            tree = env.parse(source)
+        except jinja2.TemplateSyntaxError:
+            return None
+
+        parts = []
+        for node in tree.body:
+            if not isinstance(node, nodes.Output):
+                return None
+
+            for item in node.nodes:
+                part = cls._compile(item)
+                if part is None:
+                    return None
+
+                parts.append(part)
+
+        return FastTemplate(parts)
+
+    #-----------------------------------------------------------------------
+    @classmethod
+    def _compile(cls, node):
+        """Compile an output node into a render function.
+
+        Args:
+          node:  The jinja output node.
+
+        Returns:
+          Returns a function that takes the data dict and returns the string
+          to output.  None if the node isn't supported.
+        """
+        if isinstance(node, nodes.TemplateData):
+            text = node.data
+            return lambda data: text
+
+        # Constant values are rendered once.
+        if isinstance(node, nodes.Const):
+            text = str(node.value)
+            return lambda data: text
+
+        lookup = cls._compile_value(node)
+        if lookup is None:
+            return None
+
+        return lambda data: _to_str(lookup(data))
+
+    #-----------------------------------------------------------------------
+    @classmethod
+    def _compile_value(cls, node):
+        """Compile an expression node into a function returning it's value.
+
+        Args:
+          node:  The jinja expression node.
+
+        Returns:
+          Returns a function that takes the data dict and returns the value.
+          None if the node isn't supported.
+        """
+        # Names of jinja globals (range, dict, etc) aren't supported.
+        if isinstance(node, nodes.Name) and node.ctx == "load" and \
+           node.name not in DEFAULT_NAMESPACE:
+            name = node.name
+            return lambda data: data.get(name, _UNDEFINED)
+
+        if isinstance(node, nodes.Getattr):
+            lookup = cls._compile_value(node.node)
+            if lookup is None:
+                return None
+
+            attr = node.attr
+            return lambda data: _getattr(lookup(data), attr)
+
+        if isinstance(node, nodes.Filter):
+            func = cls.filters.get(node.name, None)
+            if func is None or node.node is None or _has_args(node):
+                return None
+
+            lookup = cls._compile_value(node.node)
+            if lookup is None:
+                return None
+
+            return lambda data: func(_to_str(lookup(data)))
+
+        if isinstance(node, nodes.Call):
+            if not isinstance(node.node, nodes.Getattr) or \
+               node.node.attr not in cls.methods or _has_args(node):
+                return None
+
+            lookup = cls._compile_value(node.node)
+            if lookup is None:
+                return None
+
+            return lambda data: _call(lookup(data))
+
+        return None
+
+    #-----------------------------------------------------------------------
+    def __init__(self, parts):
+        """Constructor
+
+        Args:
+          parts (list):  List of render functions.  See _compile().
+        """
+        self.parts = parts
+
+    #-----------------------------------------------------------------------
+    def render(self, data):
+        """Render the template.
+
+        Args:
+          data (dict):  The template variables.
+
+        Returns:
+          str:  Returns the rendered template.
+        """
+        return "".join([f(data) for f in self.parts])
+
+    #-----------------------------------------------------------------------
+
+
+#===========================================================================
+class _Undefined:
+    """Marker for undefined values (jinja2.Undefined)."""
+    def __str__(self):
+        return ""
+
+
+_UNDEFINED = _Undefined()
+
+
+def _to_str(value):
+    """Convert a value to a string the way jinja does."""
+    if isinstance(value, str):
+        return value
+
+    return str(value)
+
+
+def _getattr(obj, attr):
+    """Look up an attribute or item the way jinja does."""
+    if obj is _UNDEFINED:
+        raise jinja2.UndefinedError("'%s' is undefined" % attr)
+
+    try:
+        return getattr(obj, attr)
+    except AttributeError:
+        pass
+
+    try:
+        return obj[attr]
+    except (TypeError, LookupError):
+        return _UNDEFINED
+
+
+def _call(func):
+    """Call a method the way jinja does."""
+    if func is _UNDEFINED:
+        raise jinja2.UndefinedError("method is undefined")
+
+    return func()
+
+
+def _has_args(node):
+    """Return True if a filter or call node has any arguments."""
+    return node.args or node.kwargs or node.dyn_args or node.dyn_kwargs
+
+#===========================================================================
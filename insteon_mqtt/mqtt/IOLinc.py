@@ -27,6 +27,9 @@ class IOLinc:
         self.mqtt = mqtt
         self.device = device
 
+        # Cached (topic, handler) input subscriptions.  See subscriptions().
+        self._subscriptions = None
+
         # Output state change reporting template.
         self.msg_state = MsgTemplate(
             topic='insteon/{{address}}/state',
@@ -53,6 +56,9 @@ class IOLinc:
                  config is stored in config['io_linc'].
           qos (int):  The default quality of service level to use.
         """
+        # Input topics are rendered again with the new templates.
+        self._subscriptions = None
+
         data = config.get("io_linc", None)
         if not data:
             return
@@ -73,13 +79,8 @@ class IOLinc:
           link (network.Mqtt):  The MQTT network client to use.
           qos (int):  The quality of service to use.
         """
-        # On/off command messages.
-        topic = self.msg_on_off.render_topic(self.template_data())
-        link.subscribe(topic, qos, self._input_on_off)
-
-        # Scene triggering messages.
-        topic = self.msg_scene.render_topic(self.template_data())
-        link.subscribe(topic, qos, self._input_scene)
+        for topic, handler in self.subscriptions():
+            link.subscribe(topic, qos, handler)
 
     #-----------------------------------------------------------------------
     def unsubscribe(self, link):
@@ -88,11 +89,40 @@ class IOLinc:
         Args:
           link (network.Mqtt):  The MQTT network client to use.
         """
-        topic = self.msg_on_off.render_topic(self.template_data())
-        link.unsubscribe(topic)
+        for topic, _handler in self.subscriptions():
+            link.unsubscribe(topic)
+
+    #-----------------------------------------------------------------------
+    def subscriptions(self):
+        """Return the cached (topic, handler) input subscriptions.
+
+        See Switch.subscriptions() for details.
+        """
+        if self._subscriptions is None:
+            data = self.template_data()
+            topics = [
+                (self.msg_on_off.render_topic(data), self._input_on_off),
+                (self.msg_scene.render_topic(data), self._input_scene),
+                ]
+            self._subscriptions = [i for i in topics if i[0]]
+
+        return self._subscriptions
+
+    #-----------------------------------------------------------------------
+    def retained_states(self):
+        """Return the state topics to restore the sensor state from.
+
+        Returns:
+          list:  Returns a list of (topic, restore) tuples.  See
+          Switch.retained_states().
+        """
+        topic = self.msg_state.render_topic(self.template_data())
+        if not topic:
+            return []
 
-        topic = self.msg_scene.render_topic(self.template_data())
-        link.unsubscribe(topic)
+        states = [(self.template_data(i), i) for i in (True, False)]
+        return [(topic, util.state_restorer(self.msg_state, states,
+                                            self.device.restore_state))]
 
     #-----------------------------------------------------------------------
     def template_data(self, is_on=None):
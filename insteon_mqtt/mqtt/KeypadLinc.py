@@ -32,6 +32,9 @@ class KeypadLinc:
         self.mqtt = mqtt
         self.device = device
 
+        # Cached (topic, handler) input subscriptions.  See subscriptions().
+        self._subscriptions = None
+
         # Output on/off state change reporting template.
         self.msg_btn_state = MsgTemplate(
             topic='insteon/{{address}}/state/{{button}}',
@@ -79,6 +82,9 @@ class KeypadLinc:
                  config is stored in config['keypad_linc'].
           qos (int):  The default quality of service level to use.
         """
+        # Input topics are rendered again with the new templates.
+        self._subscriptions = None
+
         data = config.get("keypad_linc", None)
         if not data:
             return
@@ -109,6 +115,32 @@ class KeypadLinc:
           link (network.Mqtt):  The MQTT network client to use.
           qos (int):  The quality of service to use.
         """
+        for topic, handler in self.subscriptions():
+            link.subscribe(topic, qos, handler)
+
+    #-----------------------------------------------------------------------
+    def unsubscribe(self, link):
+        """Unsubscribe to any MQTT topics the object was subscribed to.
+
+        Args:
+          link (network.Mqtt):  The MQTT network client to use.
+        """
+        for topic, _handler in self.subscriptions():
+            link.unsubscribe(topic)
+
+    #-----------------------------------------------------------------------
+    def subscriptions(self):
+        """Return the cached button and dimmer input subscriptions.
+
+        Returns:
+          list:  Returns a list of (topic, handler) tuples.  See
+          Switch.subscriptions().
+        """
+        if self._subscriptions is not None:
+            return self._subscriptions
+
+        topics = []
+
         # For dimmers, the button 1 set can be either an on/off or a dimming
         # command.  And the dimmer topic might have the same topic as the
         # on/off command.
@@ -124,53 +156,58 @@ class KeypadLinc:
             # It's possible for these to be the same.  The btn1 handler will
             # try both payloads to accept either on/off or dimmer commands.
             if topic_switch == topic_dimmer:
-                link.subscribe(topic_switch, qos, self._input_btn1)
+                topics.append((topic_switch, self._input_btn1))
 
             # If they are different, we can pass directly to the right
             # handler for switch commands and dimmer commands.
             else:
                 handler = functools.partial(self._input_on_off, group=1)
-                link.subscribe(topic_switch, qos, handler)
-
-                link.subscribe(topic_dimmer, qos, self._input_set_level)
+                topics.append((topic_switch, handler))
+                topics.append((topic_dimmer, self._input_set_level))
 
             handler = functools.partial(self._input_scene, group=1)
-            topic = self.msg_btn_scene.render_topic(data)
-            link.subscribe(topic, qos, handler)
+            topics.append((self.msg_btn_scene.render_topic(data), handler))
 
         # We need to subscribe to each button topic so we know which one is
         # which.
         for group in range(start_group, 9):
-            handler = functools.partial(self._input_on_off, group=group)
             data = self.template_data(button=group)
 
-            topic = self.msg_btn_on_off.render_topic(data)
-            link.subscribe(topic, qos, handler)
+            handler = functools.partial(self._input_on_off, group=group)
+            topics.append((self.msg_btn_on_off.render_topic(data), handler))
 
             handler = functools.partial(self._input_scene, group=group)
-            topic = self.msg_btn_scene.render_topic(data)
-            link.subscribe(topic, qos, handler)
+            topics.append((self.msg_btn_scene.render_topic(data), handler))
+
+        self._subscriptions = [i for i in topics if i[0]]
+        return self._subscriptions
 
     #-----------------------------------------------------------------------
-    def unsubscribe(self, link):
-        """Unsubscribe to any MQTT topics the object was subscribed to.
+    def retained_states(self):
+        """Return the state topics to restore the button states from.
 
-        Args:
-          link (network.Mqtt):  The MQTT network client to use.
+        Returns:
+          list:  Returns a list of (topic, restore) tuples.  See
+          Switch.retained_states().
         """
+        restores = []
         for group in range(1, 9):
-            data = self.template_data(button=group)
-
-            topic = self.msg_btn_on_off.render_topic(data)
-            link.unsubscribe(topic)
-
-            topic = self.msg_btn_scene.render_topic(data)
-            link.unsubscribe(topic)
-
-        if self.device.is_dimmer:
-            data = self.template_data(button=1)
-            topic = self.msg_dimmer_level.render_topic(data)
-            link.unsubscribe(topic)
+            msg = self.msg_btn_state
+            levels = [0xff, 0x00]
+            if group == 1 and self.device.is_dimmer:
+                msg = self.msg_dimmer_state
+                levels = util.RESTORE_LEVELS
+
+            topic = msg.render_topic(self.template_data(button=group))
+            if not topic:
+                continue
+
+            states = [(self.template_data(group, i), i) for i in levels]
+            restore = functools.partial(self.device.restore_state, group)
+            restores.append((topic, util.state_restorer(msg, states,
+                                                        restore)))
+
+        return restores
 
     #-----------------------------------------------------------------------
     # pylint: disable=arguments-differ
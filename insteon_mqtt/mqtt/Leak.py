@@ -3,7 +3,7 @@
 # MQTT leak sensor device
 #
 #===========================================================================
-import time
+from .. import clock
 from .. import log
 from .MsgTemplate import MsgTemplate
 
@@ -79,6 +79,15 @@ class Leak:
         """
         pass
 
+    #-----------------------------------------------------------------------
+    def subscriptions(self):
+        """Return the (topic, handler) input subscriptions.
+
+        Returns:
+          list:  Returns an empty list since there are no inputs.
+        """
+        return []
+
     #-----------------------------------------------------------------------
     def template_data(self, is_wet=None, is_heartbeat=None):
         """Create the Jinja templating data variables.
@@ -109,7 +118,7 @@ class Leak:
         if is_heartbeat is not None:
             data["is_heartbeat"] = 1 if is_heartbeat else 0
             data["is_heartbeat_str"] = "on" if is_heartbeat else "off"
-            data["heartbeat_time"] = time.time() if is_heartbeat else 0
+            data["heartbeat_time"] = clock.time() if is_heartbeat else 0
 
         return data
 
@@ -3,6 +3,7 @@
 # MQTT PLM modem device
 #
 #===========================================================================
+import json
 from .. import log
 from .MsgTemplate import MsgTemplate
 from . import util
@@ -15,7 +16,8 @@ class Modem:
 
     This class connects to an insteon_mqtt.Modem object and allows input MQTT
     messages to be converted and sent to the modem to simulate scene
-    (activate modem scenes).
+    (activate modem scenes).  It also publishes the modem background task
+    queue (see Scheduler) when it changes.
     """
     def __init__(self, mqtt, modem):
         """Constructor
@@ -27,11 +29,23 @@ class Modem:
         self.mqtt = mqtt
         self.device = modem
 
+        # Cached (topic, handler) input subscriptions.  See subscriptions().
+        self._subscriptions = None
+
         # Input scene on/off command template.
         self.msg_scene = MsgTemplate(
             topic='insteon/modem/scene',
             payload='{{value}}')
 
+        # Output background task queue template.
+        self.msg_background = MsgTemplate(
+            topic='insteon/modem/background',
+            payload='{ "count" : {{count}}, "tasks" : {{tasks}} }',
+            dedup=True)
+
+        modem.protocol.background.signal_changed.connect(
+            self._background_changed)
+
     #-----------------------------------------------------------------------
     def load_config(self, config, qos=None):
         """Load values from a configuration data object.
@@ -41,11 +55,16 @@ class Modem:
                  config is stored in config['modem'].
           qos (int):  The default quality of service level to use.
         """
+        # Input topics are rendered again with the new templates.
+        self._subscriptions = None
+
         data = config.get("modem", None)
         if not data:
             return
 
         self.msg_scene.load_config(data, 'scene_topic', 'scene_payload', qos)
+        self.msg_background.load_config(data, 'background_topic',
+                                        'background_payload', qos)
 
     #-----------------------------------------------------------------------
     def subscribe(self, link, qos):
@@ -58,8 +77,8 @@ class Modem:
           link (network.Mqtt):  The MQTT network client to use.
           qos (int):  The quality of service to use.
         """
-        topic = self.msg_scene.render_topic(self.template_data())
-        link.subscribe(topic, qos, self._input_scene)
+        for topic, handler in self.subscriptions():
+            link.subscribe(topic, qos, handler)
 
     #-----------------------------------------------------------------------
     def unsubscribe(self, link):
@@ -68,8 +87,24 @@ class Modem:
         Args:
           link (network.Mqtt):  The MQTT network client to use.
         """
-        topic = self.msg_scene.render_topic(self.template_data())
-        link.unsubscribe(topic)
+        for topic, _handler in self.subscriptions():
+            link.unsubscribe(topic)
+
+    #-----------------------------------------------------------------------
+    def subscriptions(self):
+        """Return the cached scene command subscription.
+
+        Returns:
+          list:  Returns a list of (topic, handler) tuples.
+        """
+        if self._subscriptions is None:
+            data = self.template_data()
+            topics = [
+                (self.msg_scene.render_topic(data), self._input_scene),
+                ]
+            self._subscriptions = [i for i in topics if i[0]]
+
+        return self._subscriptions
 
     #-----------------------------------------------------------------------
     def template_data(self):
@@ -84,6 +119,25 @@ class Modem:
             }
         return data
 
+    #-----------------------------------------------------------------------
+    def _background_changed(self, scheduler):
+        """Background task queue changed callback.
+
+        This is triggered from the Scheduler when a task is added, started,
+        or finished.  The queue state is published to the background topic.
+
+        Args:
+          scheduler (Scheduler):  The modem background task scheduler.
+        """
+        status = scheduler.status()
+        running = [i['label'] for i in status if i['running']]
+
+        data = self.template_data()
+        data["count"] = len(status)
+        data["running"] = running[0] if running else ""
+        data["tasks"] = json.dumps(status)
+        self.msg_background.publish(self.mqtt, data)
+
     #-----------------------------------------------------------------------
     def _input_scene(self, client, data, message):
         """Handle an input simulate scene MQTT message.
@@ -6,6 +6,7 @@
 import functools
 import json
 import logging
+from .. import clock
 from .. import log
 from . import config
 from .MsgTemplate import MsgTemplate
@@ -53,6 +54,7 @@ class Mqtt:
         # modem.  We'll use it to create a corresponding MQTT device.
         self.modem = modem
         self.modem.signal_new_device.connect(self.handle_new_device)
+        self.modem.signal_remove_device.connect(self.handle_remove_device)
 
         # Callback for when we're connected to the broker so we can subscribe
         # to the various topics we need to monitor.
@@ -69,6 +71,36 @@ class Mqtt:
         self.qos = 1
         self.retain = True
 
+        # Retained messages with the same payload as the last message
+        # published to the topic are suppressed unless the last message is
+        # older than this (seconds).  0 disables suppression.
+        self.republish_interval = 3600
+
+        # Map of topic to (payload, time) for the last message published.
+        self._published = {}
+
+        # Publish statistics.
+        self.stats = {"published" : 0, "suppressed" : 0}
+
+        # If True, device input topics are subscribed with wildcards and
+        # routed to the device handlers by _route().  See
+        # _route_subscriptions().
+        self.wildcard_routing = False
+
+        # Map of device input topic to handler and the list of wildcard
+        # topics subscribed to when wildcard_routing is True.
+        self._routes = {}
+        self._route_topics = []
+
+        # Map of topic to handler for the current broker subscriptions.
+        # Used to only change the subscriptions that are different when the
+        # config is reloaded.
+        self._subscribed = {}
+
+        # Time in seconds to wait for retained state messages to restore the
+        # device states from at start up.  0 disables it.  See Bootstrap.
+        self.bootstrap_time_out = 0
+
         # Loaded config object.
         self._config = None
 
@@ -89,6 +121,21 @@ class Mqtt:
         - retain:      (bool) Retain sent messages (Default True)
         - cmd_topic:   (str) The MQTT topic prefix to subscribe to for
                        system commands.
+        - control_socket:  (str) Optional Unix socket file to accept local
+                           commands on (see network.Unix).  This is read by
+                           cmd_line.start.
+        - control_socket_mode:  (int) Control socket file permissions
+                                (Default 0600 - owner only).
+        - template_cache:  (str) Optional directory to store compiled
+                           template bytecode in.
+        - wildcard_routing:  (bool) Subscribe to the device input topics
+                             with wildcards (Default False).
+        - republish_interval:  (float) Time in seconds to suppress retained
+                               messages that don't change the topic payload
+                               (Default 3600).  0 to disable.
+        - bootstrap_time_out:  (float) Time in seconds to wait for retained
+                               state messages to restore the device states
+                               from at start up (Default 0 - disabled).
 
         Args:
           data (dict):  Configuration data to load.
@@ -97,24 +144,69 @@ class Mqtt:
         # connection to the broker.
         self.link.load_config(data)
 
+        self._load_settings(data)
+
+        # Subscribe to the new topics.
+        if self.link.connected:
+            self._subscribe()
+
+    #-----------------------------------------------------------------------
+    def reload_config(self, data):
+        """Reload the configuration after it changed.
+
+        This is the mqtt key in the configuration data.  The device topics
+        and templates are loaded again and only the broker subscriptions
+        that changed are updated.  The broker connection settings require a
+        restart and are ignored.
+
+        Args:
+          data (dict):  Configuration data to load.
+        """
+        self._load_settings(data)
+
+        for obj in self.devices.values():
+            obj.load_config(self._config, self.qos)
+
+        self._sync_subscriptions()
+
+    #-----------------------------------------------------------------------
+    def _load_settings(self, data):
+        """Load the non-connection settings from the configuration.
+
+        Args:
+          data (dict):  Configuration data to load.
+        """
         # Create a template for prcessing messages on the command topic.
         self._cmd_topic = MsgTemplate.clean_topic(data['cmd_topic'])
 
+        # Optional on disk cache for compiled templates.
+        if data.get('template_cache', None):
+            MsgTemplate.set_bytecode_cache(data['template_cache'])
+
         # MQTT message parameters.
         self.qos = data.get('qos', self.qos)
         self.retain = data.get('retain', self.retain)
+        self.wildcard_routing = data.get('wildcard_routing',
+                                         self.wildcard_routing)
+        self.republish_interval = data.get('republish_interval',
+                                           self.republish_interval)
+        self.bootstrap_time_out = data.get('bootstrap_time_out',
+                                           self.bootstrap_time_out)
 
         # Save the config for later passing to devices when they are created.
         self._config = data
 
-        # Subscribe to the new topics.
-        if self.link.connected:
-            self._subscribe()
-
     #-----------------------------------------------------------------------
-    def publish(self, topic, payload, qos=None, retain=None):
+    def publish(self, topic, payload, qos=None, retain=None, dedup=False):
         """Publish a message out.
 
+        Devices publish their state on every Insteon state signal even if
+        the state didn't change (refreshes, duplicate broadcasts, etc).  If
+        dedup is True and the message is retained (i.e. it's a state and not
+        a momentary event), the message is skipped if the payload is the
+        same as the last payload published to the topic less than
+        republish_interval seconds ago.
+
         Args:
           topic (str):  The MQTT topic to publish with.
           payload (str):  The MQTT payload to send.
@@ -122,10 +214,23 @@ class Mqtt:
               to use.
           retain (bool):  None to use the class retain flag.  Otherwise
                  the retain flag to use.
+          dedup (bool):  True to suppress the message if it doesn't change
+                the topic payload.
         """
         qos = self.qos if qos is None else qos
         retain = self.retain if retain is None else retain
 
+        t = clock.time()
+        last = self._published.get(topic, None)
+        if dedup and retain and last and last[0] == payload and \
+           t - last[1] < self.republish_interval:
+            self.stats["suppressed"] += 1
+            LOG.debug("MQTT publish suppressed %s %s", topic, payload)
+            return
+
+        self._published[topic] = (payload, t)
+        self.stats["published"] += 1
+
         # Pass the message to the network link.
         self.link.publish(topic, payload, qos, retain)
 
@@ -147,6 +252,9 @@ class Mqtt:
           connected (bool):  True if connected, False if disconnected.
         """
         if connected:
+            # The broker may have lost the retained messages so publish
+            # everything again.
+            self._published.clear()
             self._subscribe()
 
     #-----------------------------------------------------------------------
@@ -179,6 +287,19 @@ class Mqtt:
         # Save the MQTT device so we can find it again.
         self.devices[device.addr.id] = obj
 
+    #-----------------------------------------------------------------------
+    def handle_remove_device(self, modem, device):
+        """Insteon device removed callback.
+
+        This is called when a config reload removes a device from the modem.
+        The device topics are unsubscribed by the reload.
+
+        Args:
+          modem (Modem):  The Insteon modem device.
+          device (device.Base):  The Insteon device that was removed.
+        """
+        self.devices.pop(device.addr.id, None)
+
     #-----------------------------------------------------------------------
     def handle_cmd(self, client, userdata, message):
         """MQTT command message callback.
@@ -228,20 +349,149 @@ class Mqtt:
             # messages to the remote client with out changing any of the
             # code.
             reply_cb = functools.partial(self.handle_reply, topic=reply_topic)
-            LOG.set_ui_callback(reply_cb)
+            ui_handler = LOG.set_ui_callback(reply_cb)
 
-            # end_reply is called when the command is done and passes
-            # record=None to indicate the command is finished.
-            end_reply = functools.partial(self.handle_reply, None,
-                                          topic=reply_topic)
+            # end_reply is called with the command result when the command
+            # is done.  This removes only this session's UI callback so
+            # other commands that are still running keep theirs.
+            end_reply = functools.partial(self._end_session, ui_handler,
+                                          reply_cb)
 
         # Extract the device name/address from the topic and use it to find
         # the device object to handle the command.
         device_id = message.topic.split("/")[-1]
+        self._run_cmd(device_id, data, end_reply)
+
+    #-----------------------------------------------------------------------
+    def handle_local_cmd(self, link, line):
+        """Control socket command callback.
+
+        This is connected to network.Unix.signal_command.  The line is a
+        JSON command object like the command topic payload with the device
+        address or name in the 'address' key.  Reply messages are written
+        back to the client as JSON lines (see handle_local_reply()).  If
+        the command has a 'session' key, the replies are tagged with it so
+        a client can run more than one command at a time.
+
+        Args:
+          link (network.UnixClient):  The client that sent the command.
+          line (bytes):  The JSON command line.
+        """
+        LOG.info("Control socket command %s", line)
+
+        try:
+            data = json.loads(line.decode("utf-8"))
+        except ValueError:
+            data = None
+
+        session = None
+        if isinstance(data, dict):
+            session = data.pop("session", None)
+
+        reply_cb = functools.partial(self.handle_local_reply, link=link,
+                                     session=session)
+        ui_handler = LOG.set_ui_callback(reply_cb)
+        end_reply = functools.partial(self._end_session, ui_handler,
+                                      reply_cb)
+
+        try:
+            device_id = str(data.pop("address"))
+        except:
+            LOG.exception("Error decoding command: %s", line)
+            end_reply(False)
+            return
+
+        self._run_cmd(device_id, data, end_reply)
+
+    #-----------------------------------------------------------------------
+    def handle_reply(self, record, topic, success=True):
+        """: Session logging reply.
+
+        This is called by the LOG.ui() function to handling sending status
+        messages to the remote client.  The API is defined by the logging
+        system.
+
+        If record is None, that indicates the command is done (see
+        _end_session()).
+
+        Args:
+          record:  Logging record.  None if the command is finished.
+          topic (str):  The session topic to publish the log message to.
+          success (bool):  The command result if record is None.
+        """
+        # Publish the message to the remote client.
+        payload = self._reply(record, success).to_json()
+        self.link.publish(topic, payload)
+
+    #-----------------------------------------------------------------------
+    def handle_local_reply(self, record, link, session=None, success=True):
+        """Control socket logging reply.
+
+        This is the same as handle_reply() but the reply is written to the
+        control socket client as a JSON line.
+
+        Args:
+          record:  Logging record.  None if the command is finished.
+          link (network.UnixClient):  The client to write the reply to.
+          session (str):  Optional session ID to tag the reply with.
+          success (bool):  The command result if record is None.
+        """
+        reply = self._reply(record, success)
+        reply.session = session
+        link.write((reply.to_json() + "\n").encode("utf-8"))
+
+    #-----------------------------------------------------------------------
+    def _end_session(self, ui_handler, reply_cb, success=True):
+        """Finish a command session.
+
+        The session UI callback is removed and the END reply is sent.
+
+        Args:
+          ui_handler:  The handler returned by LOG.set_ui_callback().
+          reply_cb:  The session reply function.  It's called with a None
+                   record to send the END reply.
+          success (bool):  The command result.
+        """
+        LOG.del_ui_callback(ui_handler)
+        reply_cb(None, success=success)
+
+    #-----------------------------------------------------------------------
+    def _reply(self, record, success=True):
+        """Convert a session logging record to a reply.
+
+        Args:
+          record:  Logging record.  None if the command is finished.
+          success (bool):  The command result if record is None.
+
+        Returns:
+          Reply:  Returns the reply to send to the remote client.
+        """
+        # Command is finished.  Send an END reply with the result.
+        if record is None:
+            return Reply(Reply.Type.END, success)
+
+        # Normal reply.  Convert the logging object to a Reply object to send.
+        type = Reply.Type.MESSAGE
+        if record.levelno >= logging.ERROR:
+            type = Reply.Type.ERROR
+
+        return Reply(type, record.msg % record.args)
+
+    #-----------------------------------------------------------------------
+    def _run_cmd(self, device_id, data, end_reply):
+        """Run a command on a device.
+
+        Args:
+          device_id (str):  The device address or name.
+          data (dict):  The command data.  The 'cmd' key is the command
+               name and the rest are passed to the device command.
+          end_reply:  Function to call with the command result (True or
+                      False) when the command is finished.
+        """
         device = self.modem.find(device_id)
         if not device:
             LOG.error("Unknown Insteon device '%s'", device_id)
-            end_reply()
+            end_reply(False)
             return
 
         # Find the command string and map it to the method to use on the
@@ -249,7 +499,7 @@ class Mqtt:
         cmd = data.pop("cmd", None)
         if not cmd:
             LOG.error("Input command has no 'cmd' key: %s", cmd)
-            end_reply()
+            end_reply(False)
             return
 
         LOG.ui("Commanding %s device %s cmd=%s", device.type(), device.label,
@@ -261,7 +511,7 @@ class Mqtt:
             LOG.error("Unknown command '%s' for device type %s.  Valid "
                       "commands: %s", cmd, device.type(),
                       device.cmd_map.keys())
-            end_reply()
+            end_reply(False)
             return
 
         # Set up a callback to handle when finished.  This will send out the
@@ -272,7 +522,7 @@ class Mqtt:
                 LOG.ui(msg)
             else:
                 LOG.error(msg)
-            end_reply()
+            end_reply(success)
 
         try:
             # Pass the rest of the command arguments as keywords to the
@@ -281,66 +531,252 @@ class Mqtt:
         except:
             LOG.exception("Error running command %s on device %s", cmd,
                           device.label)
-            end_reply()
+            end_reply(False)
 
     #-----------------------------------------------------------------------
-    def handle_reply(self, record, topic):
-        """: Session logging reply.
+    def _subscribe(self):
+        """Subscribe to the command and set topics.
 
-        This is called by the LOG.ui() function to handling sending status
-        messages to the remote client.  The API is defined by the logging
-        system.
+        This will subscribe to the command topic and all the MQTT device
+        command topics.  The topics are sent to the broker in batches (see
+        network.Mqtt.subscribe_list()) to minimize the time before commands
+        work after connecting.
+        """
+        topics = self._topics()
+        self.link.subscribe_list([(topic, self.qos, handler)
+                                  for topic, handler in topics])
+        self._subscribed = dict(topics)
 
-        If record is None, that indicates the command is done.  We'll remove
-        ourselves as a callback on the logging system in that case.
+        LOG.info("MQTT templates: %d compiled (%d fast), %d shared",
+                 MsgTemplate.stats["compiled"], MsgTemplate.stats["fast"],
+                 MsgTemplate.stats["shared"])
 
-        Args:
-          record:  Logging record.  None if the command is finished.
-          topic (str):  The session topic to publish the log message to.
+    #-----------------------------------------------------------------------
+    def _unsubscribe(self):
+        """Unsubscribe to the command and set topics.
+
+        This will unsubscribe from all the topics.
         """
-        # Command is finished.  Cleanup and send an END reply.
-        if record is None:
-            LOG.del_ui_callback()
-            reply = Reply(Reply.Type.END)
+        self.link.unsubscribe_list(list(self._subscribed))
+        self._subscribed = {}
+        self._route_topics = []
 
-        # Normal reply.  Convert the logging object to a Reply object to send.
-        else:
-            type = Reply.Type.MESSAGE
-            if record.levelno >= logging.ERROR:
-                type = Reply.Type.ERROR
+    #-----------------------------------------------------------------------
+    def _sync_subscriptions(self):
+        """Update the subscriptions to match the current devices.
+
+        Topics that are no longer needed are unsubscribed and new topics or
+        topics with a new handler are subscribed.  Topics that haven't
+        changed are left alone so there is no gap where commands are
+        dropped.  Nothing is done if the broker isn't connected since
+        everything is subscribed when it connects.
+        """
+        if not self.link.connected:
+            return
 
-            reply = Reply(type, record.msg % record.args)
+        topics = dict(self._topics())
+        removed = [i for i in self._subscribed if i not in topics]
+        added = [(topic, self.qos, handler) for topic, handler in
+                 topics.items()
+                 if not _same_handler(self._subscribed.get(topic), handler)]
 
-        # Publish the message to the remote client.
-        payload = reply.to_json()
-        self.link.publish(topic, payload)
+        self.link.unsubscribe_list(removed)
+        self.link.subscribe_list(added)
+        self._subscribed = topics
+
+        LOG.info("MQTT subscriptions updated: %d added, %d removed",
+                 len(added), len(removed))
 
     #-----------------------------------------------------------------------
-    def _subscribe(self):
-        """Subscribe to the command and set topics.
+    def _topics(self):
+        """Return the topics to subscribe to.
 
-        This will subscribe to the command topic and tell all the MQTT
-        devices to subscribe to their command topics.
+        Returns:
+          list:  Returns a list of (topic, handler) tuples.
         """
+        topics = []
         if self._cmd_topic:
-            self.link.subscribe(self._cmd_topic + "/+", self.qos,
-                                self.handle_cmd)
+            topics.append((self._cmd_topic + "/+", self.handle_cmd))
+
+        if self.wildcard_routing:
+            topics.extend(self._route_subscriptions())
+        else:
+            for device in self.devices.values():
+                topics.extend(device.subscriptions())
+
+        return topics
 
+    #-----------------------------------------------------------------------
+    def _route_subscriptions(self):
+        """Build the wildcard routing subscriptions for the device topics.
+
+        Paho matches each inbound message against every topic that has a
+        callback so with one subscription per device topic, the cost of
+        every message grows with the number of devices.  Instead, this
+        groups the device topics into families by replacing the topic level
+        that is the device address or name with a '+' wildcard (e.g.
+        'insteon/+/set', see _route_topic()).  Each family is subscribed to
+        once and _route() looks up the handler for the message topic in a
+        dict.
+
+        The broker sends a message once for each subscription that matches
+        it so the subscribed topics can't overlap.  Otherwise the command
+        would run twice.  See _merge_families() for how overlapping
+        families are handled.
+
+        Returns:
+          list:  Returns a list of (topic, handler) tuples to subscribe to.
+        """
+        routes = {}
+        families = {}
         for device in self.devices.values():
-            device.subscribe(self.link, self.qos)
+            ids = [device.device.addr.hex]
+            if device.device.name:
+                ids.append(device.device.name.lower())
+
+            for topic, handler in device.subscriptions():
+                routes[topic] = handler
+                family = self._route_topic(topic, ids)
+                families.setdefault(family, []).append(topic)
+
+        topics = self._merge_families(families)
+
+        self._routes = routes
+        self._route_topics = sorted(topics)
+
+        LOG.info("MQTT routing %d device topics with %d subscriptions",
+                 len(routes), len(topics))
+        return [(topic, self._route) for topic in self._route_topics]
 
     #-----------------------------------------------------------------------
-    def _unsubscribe(self):
-        """Unsubscribe to the command and set topics.
+    def _route_topic(self, topic, ids):
+        """Return the wildcard topic to subscribe to for a device topic.
 
-        This will unsubscribe from all the topics.
+        Only one level is replaced so fixed levels that happen to match the
+        device name (e.g. 'insteon/aa.bb.cc/fan/set' for a device named
+        'fan') are left alone.
+
+        Args:
+          topic (str):  The device input topic.
+          ids (list):  Lower case device address and name to look for in
+              priority order.
+
+        Returns:
+          str:  Returns the topic with the device level replaced by '+'.  If
+          no level matches, the topic is returned unchanged.
         """
-        if self._cmd_topic:
-            self.link.unsubscribe(self._cmd_topic + "/+")
+        levels = topic.split("/")
+        lower = [i.lower() for i in levels]
+        for device_id in ids:
+            if device_id in lower:
+                levels[lower.index(device_id)] = "+"
+                return "/".join(levels)
 
-        for device in self.devices.values():
-            device.unsubscribe(self.link)
+        return topic
 
     #-----------------------------------------------------------------------
+    def _merge_families(self, families):
+        """Remove overlapping topics from the wildcard routing families.
+
+        Families with the most wildcards are kept first.  A family that
+        overlaps a kept family (i.e. some topic matches both) is replaced
+        by its device topics and the device topics that a kept family
+        already matches are dropped.  This way each device topic is
+        matched by exactly one subscription.
+
+        Args:
+          families (dict):  Map of wildcard topic to the list of device
+                   topics in that family.
+
+        Returns:
+          list:  Returns the sorted list of topics to subscribe to.
+        """
+        kept = []
+        dropped = []
+        for family in sorted(families, key=lambda x: (-x.count("+"), x)):
+            if any(_topics_overlap(family, i) for i in kept):
+                dropped.append(family)
+            else:
+                kept.append(family)
+
+        topics = set(kept)
+        for family in dropped:
+            topics.update(i for i in families[family]
+                          if not any(_topics_overlap(i, j) for j in kept))
+
+        return sorted(topics)
+
+    #-----------------------------------------------------------------------
+    def _route(self, client, data, message):
+        """MQTT wildcard device topic callback.
+
+        Passes the message to the device handler for the message topic.
+        See _route_subscriptions() for details.
+
+        Args:
+          client (paho.Client):  The paho mqtt client (self.link).
+          data:  Optional user data (unused).
+          message:  MQTT message - has attrs: topic, payload, qos, retain.
+        """
+        handler = self._routes.get(message.topic, None)
+        if handler is None:
+            LOG.debug("MQTT no device for topic %s", message.topic)
+            return
+
+        handler(client, data, message)
+
+    #-----------------------------------------------------------------------
+
+
+#===========================================================================
+def _topics_overlap(a, b):
+    """Return True if a topic can match both subscription topics.
+
+    Args:
+      a (str):  The first subscription topic.  May contain '+' and '#'
+        wildcards.
+      b (str):  The second subscription topic.
+
+    Returns:
+      bool:  Returns True if there is a topic that matches both a and b.
+    """
+    a = a.split("/")
+    b = b.split("/")
+    for x, y in zip(a, b):
+        if x == "#" or y == "#":
+            return True
+        if x != y and x != "+" and y != "+":
+            return False
+
+    if len(a) == len(b):
+        return True
+
+    # 'a/#' also matches 'a' so a longer topic ending with '#' overlaps.
+    longer = a if len(a) > len(b) else b
+    return len(longer) == min(len(a), len(b)) + 1 and longer[-1] == "#"
+
+
+#===========================================================================
+def _same_handler(a, b):
+    """Return True if two subscription handlers are the same.
+
+    Device handlers are bound methods or functools.partial objects which
+    are created each time the device subscriptions are built.  Partial
+    objects only compare equal if they're the same object so they're
+    compared by their function and arguments instead.
+
+    Args:
+      a:  The first handler or None.
+      b:  The second handler or None.
+
+    Returns:
+      bool:  Returns True if the handlers call the same function with the
+      same arguments.
+    """
+    if isinstance(a, functools.partial) and isinstance(b, functools.partial):
+        return (a.func == b.func and a.args == b.args and
+                a.keywords == b.keywords)
+
+    return a == b
 
 #===========================================================================
@@ -4,8 +4,10 @@
 #
 #===========================================================================
 import json
+import os
 import jinja2
 from .. import log
+from .FastTemplate import FastTemplate
 
 LOG = log.get_logger()
 
@@ -15,8 +17,82 @@ class MsgTemplate:
 
     This class stores a topic and payload jinja2 template for use in
     formatting and parsing MQTT messages.
+
+    Most devices use the same template strings so the compiled templates are
+    shared between all the MsgTemplate objects.  Each template string is
+    compiled once by a shared jinja2 Environment (see get_template()).
+    Simple substitution templates are rendered with a FastTemplate instead
+    of jinja.
     """
+    # Shared jinja environment.  The loader treats the template name as the
+    # template source which allows the optional bytecode cache to be used
+    # (see set_bytecode_cache()).  Templates are cached in MsgTemplate.cache
+    # so the environment cache is disabled.
+    env = jinja2.Environment(loader=jinja2.FunctionLoader(lambda name: name),
+                             cache_size=0)
+
+    # Compiled templates by template source string.
+    cache = {}
+
+    # Number of templates compiled vs templates shared from the cache.  Fast
+    # is the number of compiled templates that use FastTemplate.
+    stats = {"compiled" : 0, "shared" : 0, "fast" : 0}
+
+    #-----------------------------------------------------------------------
+    @classmethod
+    def get_template(cls, source):
+        """Return the compiled template for a template string.
+
+        If the template has already been compiled, the shared template
+        object is returned.
+
+        Args:
+          source (str):  The template string.
+
+        Returns:
+          Returns the compiled template (FastTemplate or jinja2.Template).
+          This is None if the input is None.
+        """
+        if source is None:
+            return None
+
+        template = cls.cache.get(source, None)
+        if template is not None:
+            cls.stats["shared"] += 1
+            return template
 
+        template = FastTemplate.from_source(cls.env, source)
+        if template is not None:
+            cls.stats["fast"] += 1
+        else:
+            template = cls.env.get_template(source)
+
+        cls.cache[source] = template
+        cls.stats["compiled"] += 1
+        return template
+
+    #-----------------------------------------------------------------------
+    @classmethod
+    def set_bytecode_cache(cls, path):
+        """Store compiled template bytecode on disk.
+
+        This speeds up compiling templates on the next start.  Only
+        templates compiled after this is called use the cache.
+
+        Args:
+          path (str):  Directory to store the cache files in.  This is
+               created if it doesn't exist.  None to turn off the cache.
+        """
+        if path is None:
+            cls.env.bytecode_cache = None
+            return
+
+        if not os.path.exists(path):
+            os.makedirs(path)
+
+        cls.env.bytecode_cache = jinja2.FileSystemBytecodeCache(path)
+
+    #-----------------------------------------------------------------------
     @staticmethod
     def clean_topic(topic):
         """Clean up input topics
@@ -37,7 +113,7 @@ class MsgTemplate:
         return topic.strip()
 
     #-----------------------------------------------------------------------
-    def __init__(self, topic, payload, qos=0, retain=None):
+    def __init__(self, topic, payload, qos=0, retain=None, dedup=False):
         """Constructor
 
         Args:
@@ -46,23 +122,30 @@ class MsgTemplate:
           qos (int):  Quality of service to use when publishing.
           retain (bool):  None to use the MQTT class retain flag.  Otherwise
                  the retain flag to use.
+          dedup (bool):  True to skip publishing retained messages that
+                don't change the topic payload.  Only use this for templates
+                that report states.  Button presses and other events must be
+                published every time.  See Mqtt.publish().
         """
         self.qos = qos
         self.retain = retain
+        self.dedup = dedup
 
         # Keep the original string around for better log and error messages.
         self.topic_str = topic
-        self.topic = None if topic is None else jinja2.Template(topic)
+        self.topic = self.get_template(topic)
 
         self.payload_str = payload
-        self.payload = None if payload is None else jinja2.Template(payload)
+        self.payload = self.get_template(payload)
 
     #-----------------------------------------------------------------------
     def load_config(self, config, topic, payload, qos=None):
         """Load templates from a configuration file.
 
         If the topic or payload doesn't exist in the config, the value from
-        the constructor is used.
+        the constructor is used.  The dedup flag is read from the topic field
+        name with '_topic' replaced by '_dedup' (e.g. state_topic ->
+        state_dedup).
 
         Args:
           config (dict):  The configuration dictionary to load from.
@@ -79,12 +162,17 @@ class MsgTemplate:
         template = config.get(topic, None)
         if template is not None:
             self.topic_str = template
-            self.topic = jinja2.Template(template)
+            self.topic = self.get_template(template)
 
         template = config.get(payload, None)
         if template is not None:
             self.payload_str = template
-            self.payload = jinja2.Template(template)
+            self.payload = self.get_template(template)
+
+        if topic and topic.endswith("_topic"):
+            dedup = config.get(topic[:-len("_topic")] + "_dedup", None)
+            if dedup is not None:
+                self.dedup = bool(dedup)
 
     #-----------------------------------------------------------------------
     def render_topic(self, data, silent=False):
@@ -134,7 +222,7 @@ class MsgTemplate:
         retain = retain if retain is not None else self.retain
 
         if topic and payload:
-            mqtt.publish(topic, payload, self.qos, retain)
+            mqtt.publish(topic, payload, self.qos, retain, self.dedup)
 
     #-----------------------------------------------------------------------
     def to_json(self, payload, silent=False):
@@ -186,7 +274,7 @@ class MsgTemplate:
 
         Args:
           raw (str):  Raw template string - used in logging errors.
-          template:  The Jinja template object to use.
+          template:  The template object to use.
           data (dict):  The data dictionary to pass to the template.
           silent (bool):  True to silence error logs.
 
@@ -32,6 +32,9 @@ class Outlet:
         self.mqtt = mqtt
         self.device = device
 
+        # Cached (topic, handler) input subscriptions.  See subscriptions().
+        self._subscriptions = None
+
         # Output state change reporting template.
         self.msg_state = MsgTemplate(
             topic='insteon/{{address}}/state/{{button}}',
@@ -58,6 +61,9 @@ class Outlet:
                  config is stored in config['outlet'].
           qos (int):  The default quality of service level to use.
         """
+        # Input topics are rendered again with the new templates.
+        self._subscriptions = None
+
         data = config.get("outlet", None)
         if not data:
             return
@@ -78,18 +84,7 @@ class Outlet:
           link (network.Mqtt):  The MQTT network client to use.
           qos (int):  The quality of service to use.
         """
-        # Connect input topics for groups 1 and 2 (top and bottom sockets).
-        # Create a function that will call the input callback with the right
-        # group number set for each socket.
-        for group in [1, 2]:
-            handler = functools.partial(self._input_on_off, group=group)
-            data = self.template_data(button=group)
-
-            topic = self.msg_on_off.render_topic(data)
-            link.subscribe(topic, qos, handler)
-
-            handler = functools.partial(self._input_scene, group=group)
-            topic = self.msg_scene.render_topic(data)
+        for topic, handler in self.subscriptions():
             link.subscribe(topic, qos, handler)
 
     #-----------------------------------------------------------------------
@@ -99,14 +94,56 @@ class Outlet:
         Args:
           link (network.Mqtt):  The MQTT network client to use.
         """
+        for topic, _handler in self.subscriptions():
+            link.unsubscribe(topic)
+
+    #-----------------------------------------------------------------------
+    def subscriptions(self):
+        """Return the cached on/off and scene subscriptions for each socket.
+
+        Returns:
+          list:  Returns a list of (topic, handler) tuples.  See
+          Switch.subscriptions().
+        """
+        if self._subscriptions is None:
+            # Input topics for groups 1 and 2 (top and bottom sockets).  The
+            # handlers are called with the right group number for each
+            # socket.
+            topics = []
+            for group in [1, 2]:
+                data = self.template_data(button=group)
+
+                handler = functools.partial(self._input_on_off, group=group)
+                topics.append((self.msg_on_off.render_topic(data), handler))
+
+                handler = functools.partial(self._input_scene, group=group)
+                topics.append((self.msg_scene.render_topic(data), handler))
+
+            self._subscriptions = [i for i in topics if i[0]]
+
+        return self._subscriptions
+
+    #-----------------------------------------------------------------------
+    def retained_states(self):
+        """Return the state topics to restore each socket state from.
+
+        Returns:
+          list:  Returns a list of (topic, restore) tuples.  See
+          Switch.retained_states().
+        """
+        restores = []
         for group in [1, 2]:
-            data = self.template_data(button=group)
+            topic = self.msg_state.render_topic(
+                self.template_data(button=group))
+            if not topic:
+                continue
 
-            topic = self.msg_on_off.render_topic(data)
-            link.unsubscribe(topic)
+            states = [(self.template_data(i, group), i) for i in (True, False)]
+            restore = functools.partial(self.device.restore_state, group)
+            restores.append((topic, util.state_restorer(self.msg_state,
+                                                        states, restore)))
 
-            topic = self.msg_scene.render_topic(data)
-            link.unsubscribe(topic)
+        return restores
 
     #-----------------------------------------------------------------------
     def template_data(self, is_on=None, button=None, mode=on_off.Mode.NORMAL):
@@ -28,6 +28,7 @@ class Remote:
         self.mqtt = mqtt
         self.device = device
 
+        # Output button press template.
         self.msg_state = MsgTemplate(
             topic='insteon/{{address}}/state/{{button}}',
             payload='{{on_str.lower()}}')
@@ -79,6 +80,15 @@ class Remote:
         """
         pass
 
+    #-----------------------------------------------------------------------
+    def subscriptions(self):
+        """Return the (topic, handler) input subscriptions.
+
+        Returns:
+          list:  Returns an empty list since there are no inputs.
+        """
+        return []
+
     #-----------------------------------------------------------------------
     def template_data(self, button, is_on=None, mode=on_off.Mode.NORMAL,
                       manual=None):
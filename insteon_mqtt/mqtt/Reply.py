@@ -32,20 +32,26 @@ class Reply:
           Reply:  Returns a created Reply object.
         """
         data = json.loads(msg)
-        return Reply(Reply.Type(data["type"]), data["data"])
+        return Reply(Reply.Type(data["type"]), data["data"],
+                     data.get("session", None))
 
     #-----------------------------------------------------------------------
-    def __init__(self, type, data=None):
+    def __init__(self, type, data=None, session=None):
         """Constructor
 
         Args:
           type (Type):  The type of reply to send.
-          data:  Addition data (usually a string) to send.
+          data:  Addition data (usually a string) to send.  For END
+                 replies, this is True or False for the command result.
+          session (str):  Optional command session ID.  The control socket
+                  uses this to match replies to the commands sent over a
+                  single connection.
         """
         assert isinstance(type, Reply.Type)
 
         self.type = type
         self.data = data
+        self.session = session
 
     #-----------------------------------------------------------------------
     def to_json(self):
@@ -55,6 +61,8 @@ class Reply:
           str:  Returns the JSON data converted to a string.
         """
         data = {"type" : self.type.value, "data" : self.data}
+        if self.session is not None:
+            data["session"] = self.session
         return json.dumps(data)
 
     #-----------------------------------------------------------------------
@@ -89,6 +89,15 @@ class SmokeBridge:
         """
         pass
 
+    #-----------------------------------------------------------------------
+    def subscriptions(self):
+        """Return the (topic, handler) input subscriptions.
+
+        Returns:
+          list:  Returns an empty list since there are no inputs.
+        """
+        return []
+
     #-----------------------------------------------------------------------
     # pylint: disable=arguments-differ
     def template_data(self, type, is_on):
@@ -31,6 +31,9 @@ class Switch:
         self.mqtt = mqtt
         self.device = device
 
+        # Cached (topic, handler) input subscriptions.  See subscriptions().
+        self._subscriptions = None
+
         # Output state change reporting template.
         self.msg_state = MsgTemplate(
             topic='insteon/{{address}}/state',
@@ -62,6 +65,9 @@ class Switch:
                  config is stored in config['switch'].
           qos (int):  The default quality of service level to use.
         """
+        # Input topics are rendered again with the new templates.
+        self._subscriptions = None
+
         data = config.get("switch", None)
         if not data:
             return
@@ -85,13 +91,8 @@ class Switch:
           link (network.Mqtt):  The MQTT network client to use.
           qos (int):  The quality of service to use.
         """
-        # On/off command messages.
-        topic = self.msg_on_off.render_topic(self.template_data())
-        link.subscribe(topic, qos, self._input_on_off)
-
-        # Scene triggering messages.
-        topic = self.msg_scene.render_topic(self.template_data())
-        link.subscribe(topic, qos, self._input_scene)
+        for topic, handler in self.subscriptions():
+            link.subscribe(topic, qos, handler)
 
     #-----------------------------------------------------------------------
     def unsubscribe(self, link):
@@ -100,11 +101,49 @@ class Switch:
         Args:
           link (network.Mqtt):  The MQTT network client to use.
         """
-        topic = self.msg_on_off.render_topic(self.template_data())
-        link.unsubscribe(topic)
+        for topic, _handler in self.subscriptions():
+            link.unsubscribe(topic)
+
+    #-----------------------------------------------------------------------
+    def subscriptions(self):
+        """Return the input topics and handlers for the object.
+
+        The topics are rendered the first time this is called and cached
+        until load_config() is called again.  The cache is used by
+        subscribe(), unsubscribe(), and the Mqtt topic routing.
+
+        Returns:
+          list:  Returns a list of (topic, handler) tuples.
+        """
+        if self._subscriptions is None:
+            data = self.template_data()
+            topics = [
+                (self.msg_on_off.render_topic(data), self._input_on_off),
+                (self.msg_scene.render_topic(data), self._input_scene),
+                ]
+            self._subscriptions = [i for i in topics if i[0]]
+
+        return self._subscriptions
+
+    #-----------------------------------------------------------------------
+    def retained_states(self):
+        """Return the state topics to restore the device state from.
+
+        At start up, the Bootstrap uses these to seed the device state from
+        the retained state messages on the broker.
+
+        Returns:
+          list:  Returns a list of (topic, restore) tuples where
+          restore(payload) sets the device state from a payload and returns
+          True if the payload was used.
+        """
+        topic = self.msg_state.render_topic(self.template_data())
+        if not topic:
+            return []
 
-        topic = self.msg_scene.render_topic(self.template_data())
-        link.unsubscribe(topic)
+        states = [(self.template_data(i), i) for i in (True, False)]
+        return [(topic, util.state_restorer(self.msg_state, states,
+                                            self.device.restore_state))]
 
     #-----------------------------------------------------------------------
     def template_data(self, is_on=None, mode=on_off.Mode.NORMAL,
@@ -26,35 +26,42 @@ class Thermostat:
         self.mqtt = mqtt
         self.device = device
 
+        # Cached (topic, handler) input subscriptions.  See subscriptions().
+        self._subscriptions = None
+
         # Set up the default templates for the MQTT messages and payloads.
-        # Templates for states
+        # Templates for states.  These only report changes so unchanged
+        # states aren't published again (see MsgTemplate dedup).
         self.ambient_temp = MsgTemplate(
             topic='insteon/{{address}}/ambient_temp',
-            payload='{"temp_f" : {{temp_f}}, "temp_c" : {{temp_c}}}')
+            payload='{"temp_f" : {{temp_f}}, "temp_c" : {{temp_c}}}',
+            dedup=True)
         self.fan_state = MsgTemplate(
             topic='insteon/{{address}}/fan_state',
-            payload='{{fan_mode}}')
+            payload='{{fan_mode}}', dedup=True)
         self.mode_state = MsgTemplate(
             topic='insteon/{{address}}/mode_state',
-            payload='{{mode}}')
+            payload='{{mode}}', dedup=True)
         self.cool_sp_state = MsgTemplate(
             topic='insteon/{{address}}/cool_sp_state',
-            payload='{"temp_f" : {{temp_f}}, "temp_c" : {{temp_c}}}')
+            payload='{"temp_f" : {{temp_f}}, "temp_c" : {{temp_c}}}',
+            dedup=True)
         self.heat_sp_state = MsgTemplate(
             topic='insteon/{{address}}/heat_sp_state',
-            payload='{"temp_f" : {{temp_f}}, "temp_c" : {{temp_c}}}')
+            payload='{"temp_f" : {{temp_f}}, "temp_c" : {{temp_c}}}',
+            dedup=True)
         self.humid_state = MsgTemplate(
             topic='insteon/{{address}}/humid_state',
-            payload='{{humid}}')
+            payload='{{humid}}', dedup=True)
         self.status_state = MsgTemplate(
             topic='insteon/{{address}}/status_state',
-            payload='{{status}}')
+            payload='{{status}}', dedup=True)
         self.hold_state = MsgTemplate(
             topic='insteon/{{address}}/hold_state',
-            payload='{{hold_str}}')
+            payload='{{hold_str}}', dedup=True)
         self.energy_state = MsgTemplate(
             topic='insteon/{{address}}/energy_state',
-            payload='{{energy_str}}')
+            payload='{{energy_str}}', dedup=True)
 
         # Templates for Commands
         self.mode_command = MsgTemplate(
@@ -92,6 +99,9 @@ class Thermostat:
                  config is stored in config['thermostat'].
           qos (int):  The default quality of service level to use.
         """
+        # Input topics are rendered again with the new templates.
+        self._subscriptions = None
+
         data = config.get("thermostat", None)
         if not data:
             return
@@ -135,17 +145,8 @@ class Thermostat:
           link (network.Mqtt):  The MQTT network client to use.
           qos (int):  The quality of service to use.
         """
-        topic = self.mode_command.render_topic(self.template_data())
-        link.subscribe(topic, qos, self._input_mode)
-
-        topic = self.fan_command.render_topic(self.template_data())
-        link.subscribe(topic, qos, self._input_fan)
-
-        topic = self.heat_sp_command.render_topic(self.template_data())
-        link.subscribe(topic, qos, self._input_heat_setpoint)
-
-        topic = self.cool_sp_command.render_topic(self.template_data())
-        link.subscribe(topic, qos, self._input_cool_setpoint)
+        for topic, handler in self.subscriptions():
+            link.subscribe(topic, qos, handler)
 
     #-----------------------------------------------------------------------
     def unsubscribe(self, link):
@@ -154,17 +155,30 @@ class Thermostat:
         Args:
           link (network.Mqtt):  The MQTT network client to use.
         """
-        topic = self.mode_command.render_topic(self.template_data())
-        link.unsubscribe(topic)
+        for topic, _handler in self.subscriptions():
+            link.unsubscribe(topic)
 
-        topic = self.fan_command.render_topic(self.template_data())
-        link.unsubscribe(topic)
-
-        topic = self.heat_sp_command.render_topic(self.template_data())
-        link.unsubscribe(topic)
+    #-----------------------------------------------------------------------
+    def subscriptions(self):
+        """Return the cached mode, fan, and set point command subscriptions.
 
-        topic = self.cool_sp_command.render_topic(self.template_data())
-        link.unsubscribe(topic)
+        Returns:
+          list:  Returns a list of (topic, handler) tuples.  See
+          Switch.subscriptions().
+        """
+        if self._subscriptions is None:
+            data = self.template_data()
+            topics = [
+                (self.mode_command.render_topic(data), self._input_mode),
+                (self.fan_command.render_topic(data), self._input_fan),
+                (self.heat_sp_command.render_topic(data),
+                 self._input_heat_setpoint),
+                (self.cool_sp_command.render_topic(data),
+                 self._input_cool_setpoint),
+                ]
+            self._subscriptions = [i for i in topics if i[0]]
+
+        return self._subscriptions
 
     #-----------------------------------------------------------------------
     def template_data(self):
@@ -17,21 +17,27 @@ MQTT messages.
 """
 
 #===========================================================================
+from ..util import lazy_import
 
-from .BatterySensor import BatterySensor
-from .Dimmer import Dimmer
-from .FanLinc import FanLinc
-from .IOLinc import IOLinc
-from .KeypadLinc import KeypadLinc
-from .Leak import Leak
-from .Modem import Modem
-from .Motion import Motion
-from .Mqtt import Mqtt
-from .MsgTemplate import MsgTemplate
-from .Outlet import Outlet
-from .Remote import Remote
-from .Reply import Reply
-from .SmokeBridge import SmokeBridge
-from .Switch import Switch
-from .Thermostat import Thermostat
-from . import util
+lazy_import(__name__, {
+    "BatterySensor" : "BatterySensor:BatterySensor",
+    "Bootstrap"     : "Bootstrap:Bootstrap",
+    "config"        : "config",
+    "Dimmer"        : "Dimmer:Dimmer",
+    "FanLinc"       : "FanLinc:FanLinc",
+    "FastTemplate"  : "FastTemplate:FastTemplate",
+    "IOLinc"        : "IOLinc:IOLinc",
+    "KeypadLinc"    : "KeypadLinc:KeypadLinc",
+    "Leak"          : "Leak:Leak",
+    "Modem"         : "Modem:Modem",
+    "Motion"        : "Motion:Motion",
+    "Mqtt"          : "Mqtt:Mqtt",
+    "MsgTemplate"   : "MsgTemplate:MsgTemplate",
+    "Outlet"        : "Outlet:Outlet",
+    "Remote"        : "Remote:Remote",
+    "Reply"         : "Reply:Reply",
+    "SmokeBridge"   : "SmokeBridge:SmokeBridge",
+    "Switch"        : "Switch:Switch",
+    "Thermostat"    : "Thermostat:Thermostat",
+    "util"          : "util",
+    })
@@ -11,37 +11,24 @@ with it.
 """
 
 #===========================================================================
-from .. import device
-from ..Modem import Modem
-from .BatterySensor import BatterySensor
-from .Dimmer import Dimmer
-from .FanLinc import FanLinc
-from .IOLinc import IOLinc
-from .KeypadLinc import KeypadLinc
-from .Leak import Leak
-from .Modem import Modem as MqttModem
-from .Motion import Motion
-from .Outlet import Outlet
-from .Remote import Remote
-from .SmokeBridge import SmokeBridge
-from .Switch import Switch
-from .Thermostat import Thermostat
-
-# Map Insteon device classes to MQTT classes.
+import importlib
+
+# Map Insteon device class names to the MQTT class names.  Each MQTT class
+# is in the module of the same name and is imported when it's first used.
 devices = {
-    Modem : MqttModem,
-    device.BatterySensor : BatterySensor,
-    device.Dimmer : Dimmer,
-    device.FanLinc : FanLinc,
-    device.IOLinc : IOLinc,
-    device.KeypadLinc : KeypadLinc,
-    device.Leak : Leak,
-    device.Motion : Motion,
-    device.Outlet : Outlet,
-    device.Remote : Remote,
-    device.SmokeBridge : SmokeBridge,
-    device.Switch : Switch,
-    device.Thermostat : Thermostat,
+    "Modem" : "Modem",
+    "BatterySensor" : "BatterySensor",
+    "Dimmer" : "Dimmer",
+    "FanLinc" : "FanLinc",
+    "IOLinc" : "IOLinc",
+    "KeypadLinc" : "KeypadLinc",
+    "Leak" : "Leak",
+    "Motion" : "Motion",
+    "Outlet" : "Outlet",
+    "Remote" : "Remote",
+    "SmokeBridge" : "SmokeBridge",
+    "Switch" : "Switch",
+    "Thermostat" : "Thermostat",
     }
 
 
@@ -55,8 +42,11 @@ def find(insteon_device):
     Returns:
       Returns the MQTT class to use for the input.
     """
-    cls = insteon_device.__class__
+    name = devices.get(insteon_device.__class__.__name__, None)
+    if name is None:
+        return None
 
-    return devices.get(cls, None)
+    module = importlib.import_module("." + name, __package__)
+    return getattr(module, name)
 
 #===========================================================================
@@ -51,4 +51,37 @@ def parse_on_off(data, have_mode=True):
 
     return is_on, mode
 
+
+#===========================================================================
+# Dimmer levels to try when restoring a level.  Full on is first so that
+# templates that only report on/off restore to full on.
+RESTORE_LEVELS = [0xff, 0x00] + list(range(0x01, 0xff))
+
+
+def state_restorer(msg, states, restore):
+    """Create a function to restore a device state from a state payload.
+
+    Templates can't be inverted in general so this renders the payload for
+    each possible state and uses the first state that matches the payload.
+
+    Args:
+      msg (MsgTemplate):  The state template used to publish the state.
+      states (list):  List of (data, state) tuples where data is the
+             template data for the state.
+      restore:  Function to call with the matching state.  Signature is
+                restore(state) and it returns True if the state was used.
+
+    Returns:
+      Returns a function restore(payload) that returns True if the payload
+      matched one of the states and was restored.
+    """
+    def func(payload):
+        for data, state in states:
+            if msg.render_payload(data, silent=True) == payload:
+                return restore(state)
+
+        return False
+
+    return func
+
 #===========================================================================
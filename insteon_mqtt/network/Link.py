@@ -46,6 +46,23 @@ class Link:
         """
         return None
 
+    #-----------------------------------------------------------------------
+    def poll_dt(self, t):
+        """Return the time in seconds until the link needs to be polled.
+
+        The manager polls links at a slow fixed rate.  Links that have
+        delayed work can return the time until poll() should be called
+        to do it.
+
+        Args:
+          t (float):  The current time.
+
+        Returns:
+          float:  Returns the time in seconds to call poll() by or None if
+          the link doesn't need to be polled sooner than normal.
+        """
+        return None
+
     #-----------------------------------------------------------------------
     def connect(self):
         """Connect the link to the device.
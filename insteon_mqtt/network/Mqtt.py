@@ -3,7 +3,11 @@
 # Network link to an MQTT client class
 #
 #===========================================================================
+import collections
+import json
+import os
 import paho.mqtt.client as paho
+from .. import clock
 from .. import log
 from ..Signal import Signal
 from .Link import Link
@@ -24,6 +28,21 @@ class Mqtt(Link):
     emitted so the message can be processed.  Message is the paho message
     class with attributes topic, payload, qos, and retain.
 
+    Published messages can optionally be passed through a pipeline instead
+    of being sent right away (see publish()).  The pipeline holds messages
+    for publish_window seconds so repeated retained messages to a topic
+    collapse to the newest payload and limits the publish rate with a token
+    bucket (publish_rate messages per second with bursts of up to
+    publish_burst messages).
+
+    If spool_size is set, messages published while the broker is
+    unavailable are stored in a bounded spool instead of the paho client
+    queue.  Only the newest payload for each retained (state) topic is kept
+    and up to spool_size non-retained (event) messages.  The spool is
+    optionally saved to spool_file so it survives restarts.  When the
+    connection is made, the spool is published through the pipeline at
+    spool_rate messages per second (unless publish_rate is set).
+
     Input fields can be set via the constructor or by loading a configuration
     file (see load_config for details).
     """
@@ -56,14 +75,66 @@ class Mqtt(Link):
         # time.
         self.keep_alive = 30
 
+        # Maximum number of topics to send in one subscribe or unsubscribe
+        # request.
+        self.batch_size = 100
+
+        # Publish pipeline settings.  If both the window and rate are zero,
+        # messages are published right away.
+        self.publish_window = 0  # seconds
+        self.publish_rate = 0  # messages per second
+        self.publish_burst = 20
+
+        # Offline spool settings.  The spool is disabled if the size is 0.
+        self.spool_size = 0
+        self.spool_file = None
+        self.spool_rate = 50  # messages per second
+
+        # Publish pipeline statistics.
+        self.stats = {"coalesced" : 0, "spooled" : 0, "spool_dropped" : 0}
+
+        # Time in seconds from the last connection until all the subscribe
+        # requests were acknowledged.  None until that happens.
+        self.ready_time = None
+
         self._reconnect_dt = reconnect_dt
         self._fd = None
 
+        # Time of the last connection and the message ID's of the subscribe
+        # requests that haven't been acknowledged yet.  Used to set
+        # ready_time.
+        self._connect_time = None
+        self._pending_subs = set()
+
+        # Queue of [topic, payload, qos, retain] messages waiting to be
+        # published and a map of topic to the newest queued message for
+        # that topic.
+        self._pending = collections.deque()
+        self._pending_topics = {}
+
+        # Time that the pending messages can be published.  None if there
+        # are no pending messages.
+        self._flush_time = None
+
+        # Token bucket for the publish rate.
+        self._tokens = self.publish_burst
+        self._token_time = clock.time()
+
+        # Offline spool.  Map of retained topic to (payload, qos) and list of
+        # (topic, payload, qos) event messages.  _spool_dirty is True if the
+        # spool file needs to be saved.  _draining is True while the spool
+        # is being published.
+        self._spool_states = collections.OrderedDict()
+        self._spool_events = collections.deque(maxlen=self.spool_size)
+        self._spool_dirty = False
+        self._draining = False
+
         # Create the MQTT client and set the callbacks to our methods.
         self.client = paho.Client(client_id=self.id, clean_session=False)
         self.client.on_connect = self._on_connect
         self.client.on_disconnect = self._on_disconnect
         self.client.on_message = self._on_message
+        self.client.on_subscribe = self._on_subscribe
         self.client.on_log = self._on_log
 
     #-----------------------------------------------------------------------
@@ -77,6 +148,17 @@ class Mqtt(Link):
         - port (int):  The broker port to connect to.
         - username (str):  Optional user name to log in with.
         - passord (str):  Optional password to log in with.
+        - subscribe_batch (int):  Maximum number of topics to send in one
+          subscribe or unsubscribe request.
+        - publish_window (float):  Time in seconds to hold published
+          messages for so retained messages to the same topic collapse.
+        - publish_rate (float):  Maximum messages per second to publish.
+        - publish_burst (int):  Number of messages that can be published at
+          once before publish_rate is applied.
+        - spool_size (int):  Maximum number of event messages to spool
+          while disconnected.  0 disables the spool.
+        - spool_file (str):  Optional file to save the spool to.
+        - spool_rate (float):  Messages per second to publish the spool at.
 
         Args:
           config (dict):  Configuration data to load.
@@ -86,6 +168,20 @@ class Mqtt(Link):
         self.host = config['broker']
         self.port = config['port']
         self.keep_alive = config.get("keep_alive", self.keep_alive)
+        self.batch_size = config.get("subscribe_batch", self.batch_size)
+        self.publish_window = config.get("publish_window",
+                                         self.publish_window)
+        self.publish_rate = config.get("publish_rate", self.publish_rate)
+        self.publish_burst = config.get("publish_burst", self.publish_burst)
+        self._tokens = self.publish_burst
+
+        self.spool_size = config.get("spool_size", self.spool_size)
+        self.spool_rate = config.get("spool_rate", self.spool_rate)
+        self.spool_file = config.get("spool_file", self.spool_file)
+        self._spool_events = collections.deque(self._spool_events,
+                                               maxlen=self.spool_size)
+        if self.spool_file:
+            self._load_spool()
 
         username = config.get('username', None)
         if username is not None:
@@ -96,16 +192,51 @@ class Mqtt(Link):
     def publish(self, topic, payload, qos=0, retain=False):
         """Publish an MQTT message.
 
+        If the publish pipeline is enabled, the message is queued and
+        published by a later poll() or write_to_link() call.  If the message
+        is retained and the newest queued message for the topic is also
+        retained with the same QOS, it's payload is replaced instead of
+        queuing another message.  Only the last retained state matters but
+        every event message (button presses, etc) is sent.  Messages are
+        only collapsed with the newest one for the topic so the order of the
+        messages for each topic is preserved.
+
         Arg:
           topic (str):  The topic to publish with.
           payload (str/bytes):  The payload to send for the message.
           qos (int): The MQTT QOS level to use (1, 2, or 3).
           retain (bool):  True to mark the message as retained.
         """
-        self.client.publish(topic, payload, qos, retain)
+        if self.spool_size and not self.connected:
+            self._spool(topic, payload, qos, retain)
+            return
+
+        if not self.publish_window and not self.publish_rate and \
+           not self._pending:
+            self.client.publish(topic, payload, qos, retain)
+            self.signal_needs_write.emit(self, True)
+            LOG.debug("MQTT publish %s %s qos=%s ret=%s", topic, payload,
+                      qos, retain)
+            return
+
+        msg = self._pending_topics.get(topic, None)
+        if retain and msg and msg[2] == qos and msg[3]:
+            msg[1] = payload
+            self.stats["coalesced"] += 1
+        else:
+            msg = [topic, payload, qos, retain]
+            self._pending.append(msg)
+            self._pending_topics[topic] = msg
+
+        t = clock.time()
+        if self._flush_time is None:
+            self._flush_time = t + self.publish_window
+
+        # Let the manager know we want to write.  write_to_link() will
+        # publish the queue once the window has passed.
         self.signal_needs_write.emit(self, True)
 
-        LOG.debug("MQTT publish %s %s qos=%s ret=%s", topic, payload, qos,
+        LOG.debug("MQTT queued %s %s qos=%s ret=%s", topic, payload, qos,
                   retain)
 
     #-----------------------------------------------------------------------
@@ -147,6 +278,54 @@ class Mqtt(Link):
 
         LOG.debug("MQTT unsubscribe %s", topic)
 
+    #-----------------------------------------------------------------------
+    def subscribe_list(self, topics):
+        """Subscribe the client to a list of topics.
+
+        This is the same as calling subscribe() for each topic but the topics
+        are sent to the broker in batches of up to batch_size topics per
+        request instead of one request per topic.
+
+        Args:
+          topics (list):  List of (topic, qos, callback) tuples.  The
+                 callback may be None.  See subscribe() for details.
+        """
+        for i in range(0, len(topics), self.batch_size):
+            batch = topics[i:i + self.batch_size]
+            result, mid = self.client.subscribe([(t, q) for t, q, _ in batch])
+            if result == paho.MQTT_ERR_SUCCESS:
+                self._pending_subs.add(mid)
+
+        for topic, _qos, callback in topics:
+            if callback:
+                self.client.message_callback_add(topic, callback)
+
+        if topics:
+            self.signal_needs_write.emit(self, True)
+
+        LOG.debug("MQTT subscribe %d topics in %d requests", len(topics),
+                  -(-len(topics) // self.batch_size))
+
+    #-----------------------------------------------------------------------
+    def unsubscribe_list(self, topics):
+        """Unsubscribe the client from a list of topics.
+
+        The topics are sent in batches like subscribe_list().
+
+        Args:
+          topics (list):  List of topics to unsubscribe from.
+        """
+        for i in range(0, len(topics), self.batch_size):
+            self.client.unsubscribe(topics[i:i + self.batch_size])
+
+        for topic in topics:
+            self.client.message_callback_remove(topic)
+
+        if topics:
+            self.signal_needs_write.emit(self, True)
+
+        LOG.debug("MQTT unsubscribe %d topics", len(topics))
+
     #-----------------------------------------------------------------------
     def fileno(self):
         """Return the file descriptor to watch for this link.
@@ -171,11 +350,40 @@ class Mqtt(Link):
         Args:
           t (float): The current time at which poll is being called.  This is
             passed in so that all clients receive the same "current" time
-            instead of each calling time.time() and getting a different value.
+            instead of each calling clock.time() and getting a different value.
         """
         # This is required to handle keepalive messages.
         self.client.loop_misc()
 
+        if self._flush(t):
+            self.signal_needs_write.emit(self, True)
+
+        if self._spool_dirty:
+            self._save_spool()
+
+    #-----------------------------------------------------------------------
+    def poll_dt(self, t):
+        """Return the time in seconds until the link needs to be polled.
+
+        This is the time until the queued messages can be published.
+
+        Args:
+          t (float):  The current time.
+
+        Returns:
+          float:  Returns the time in seconds to call poll() by or None if
+          there are no queued messages.
+        """
+        if self._flush_time is None:
+            return None
+
+        dt = self._flush_time - t
+        rate = self._rate()
+        if rate and self._tokens < 1:
+            dt = max(dt, (1 - self._tokens) / rate)
+
+        return max(dt, 0)
+
     #-----------------------------------------------------------------------
     def retry_connect_dt(self):
         """Return a positive integer (seconds) if the link should reconnect.
@@ -200,6 +408,8 @@ class Mqtt(Link):
             self.client.connect(self.host, self.port,
                                 keepalive=self.keep_alive)
             self._fd = self.client.socket().fileno()
+            self._connect_time = clock.time()
+            self._pending_subs.clear()
 
             LOG.info("MQTT device opened %s %s with keepalive=%s", self.host,
                      self.port, self.keep_alive)
@@ -242,11 +452,13 @@ class Mqtt(Link):
         link should call self.signal_needs_write.emit(False).
 
         Args:
-           t (float):  The current time (time.time).
+           t (float):  The current time (clock.time).
         """
         LOG.debug("MQTT writing")
 
-        # Tell the MQTT client that it can write.
+        # Pass any queued messages to the client and then tell the client
+        # that it can write.
+        self._flush(t)
         self.client.loop_write()
 
         # If there is no more data to write, remove us from the write
@@ -265,6 +477,166 @@ class Mqtt(Link):
         self.client.disconnect()
         self.signal_needs_write.emit(self, True)
 
+    #-----------------------------------------------------------------------
+    def _flush(self, t):
+        """Pass the queued messages to the client.
+
+        Nothing is done until the publish window has passed.  Then as many
+        messages as the token bucket allows are published in queue order.
+
+        Args:
+          t (float):  The current time.
+
+        Returns:
+          int:  Returns the number of messages published.
+        """
+        if self._flush_time is None or t < self._flush_time:
+            return 0
+
+        # Pending messages are moved to the spool if the connection drops
+        # so don't let paho queue them.
+        if self.spool_size and not self.connected:
+            return 0
+
+        # Without a rate, the bucket is refilled every time.
+        rate = self._rate()
+        refill = self.publish_burst
+        if rate:
+            refill = self._tokens + (t - self._token_time) * rate
+
+        self._tokens = min(self.publish_burst, refill)
+        self._token_time = t
+
+        num = 0
+        while self._pending and (not rate or self._tokens >= 1):
+            msg = self._pending.popleft()
+            if self._pending_topics.get(msg[0], None) is msg:
+                del self._pending_topics[msg[0]]
+
+            self.client.publish(*msg)
+            self._tokens -= 1
+            num += 1
+
+        # Any remaining messages are limited by the token bucket.  See
+        # poll_dt() for when they can be sent.
+        if not self._pending:
+            self._flush_time = None
+            if self._draining:
+                LOG.info("MQTT spool published")
+                self._draining = False
+
+        if num:
+            LOG.debug("MQTT published %d messages, %d queued", num,
+                      len(self._pending))
+
+        return num
+
+    #-----------------------------------------------------------------------
+    def _rate(self):
+        """Return the current publish rate limit.
+
+        Returns:
+          float:  Returns the messages per second to publish at or 0 for no
+          limit.
+        """
+        if self._draining and not self.publish_rate:
+            return self.spool_rate
+
+        return self.publish_rate
+
+    #-----------------------------------------------------------------------
+    def _spool(self, topic, payload, qos, retain):
+        """Store a message in the offline spool.
+
+        Args:
+          topic (str):  The topic to publish with.
+          payload (str):  The payload to send for the message.
+          qos (int): The MQTT QOS level to use.
+          retain (bool):  True if the message is retained.
+        """
+        self.stats["spooled"] += 1
+        if retain:
+            # Move the topic to the end so the newest states are last.
+            self._spool_states.pop(topic, None)
+            self._spool_states[topic] = (payload, qos)
+        else:
+            if len(self._spool_events) == self._spool_events.maxlen:
+                self.stats["spool_dropped"] += 1
+
+            self._spool_events.append((topic, payload, qos))
+
+        self._spool_dirty = bool(self.spool_file)
+
+    #-----------------------------------------------------------------------
+    def _drain_spool(self):
+        """Queue the spooled messages to be published.
+
+        Any messages in the pipeline are queued after the spool.  Events
+        are published before the states so the retained states are the
+        last message for each topic.
+        """
+        pending = list(self._pending)
+        self._pending.clear()
+        self._pending_topics.clear()
+
+        num = len(self._spool_events) + len(self._spool_states)
+        msgs = [[t, p, q, False] for t, p, q in self._spool_events] + \
+               [[t, p, q, True] for t, (p, q) in self._spool_states.items()]
+        for msg in msgs + pending:
+            self._pending.append(msg)
+            self._pending_topics[msg[0]] = msg
+
+        self._spool_events.clear()
+        self._spool_states.clear()
+        self._spool_dirty = bool(self.spool_file)
+
+        if self._pending:
+            self._flush_time = clock.time()
+            self.signal_needs_write.emit(self, True)
+
+        if num:
+            LOG.info("MQTT publishing %d spooled messages", num)
+            self._draining = True
+
+    #-----------------------------------------------------------------------
+    def _save_spool(self):
+        """Save the offline spool to the spool file.
+        """
+        data = {
+            "states" : [[t, p, q] for t, (p, q) in self._spool_states.items()],
+            "events" : list(self._spool_events),
+            }
+
+        try:
+            with open(self.spool_file, "w") as f:
+                json.dump(data, f)
+        except OSError:
+            LOG.exception("Error writing MQTT spool file %s", self.spool_file)
+
+        self._spool_dirty = False
+
+    #-----------------------------------------------------------------------
+    def _load_spool(self):
+        """Load the offline spool from the spool file.
+        """
+        if not os.path.exists(self.spool_file):
+            return
+
+        try:
+            with open(self.spool_file) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            LOG.exception("Error reading MQTT spool file %s", self.spool_file)
+            return
+
+        for topic, payload, qos in data.get("states", []):
+            self._spool_states[topic] = (payload, qos)
+
+        self._spool_events.extend(tuple(i) for i in data.get("events", []))
+        LOG.info("MQTT loaded %d spooled messages from %s",
+                 len(self._spool_states) + len(self._spool_events),
+                 self.spool_file)
+
     #-----------------------------------------------------------------------
     def _on_connect(self, client, data, flags, result):
         """MQTT connection callback.
@@ -281,6 +653,8 @@ class Mqtt(Link):
         """
         if result == 0:
             self.connected = True
+            if self.spool_size:
+                self._drain_spool()
         else:
             LOG.error("MQTT connection refused %s %s %s", self.host, self.port,
                       result)
@@ -301,8 +675,42 @@ class Mqtt(Link):
         LOG.info("MQTT disconnection %s %s", self.host, self.port)
 
         self.connected = False
+
+        # Anything not yet passed to the client is spooled.
+        if self.spool_size:
+            for topic, payload, qos, retain in self._pending:
+                self._spool(topic, payload, qos, retain)
+
+            self._pending.clear()
+            self._pending_topics.clear()
+            self._flush_time = None
+            self._draining = False
+
         self.signal_closing.emit(self)
 
+    #-----------------------------------------------------------------------
+    def _on_subscribe(self, client, data, mid, granted_qos):
+        """MQTT subscribe acknowledged callback.
+
+        When the last subscribe request sent after connecting is
+        acknowledged, the time since connecting is logged and stored in
+        ready_time.
+
+        Args:
+          client (paho.Client):  The paho mqtt client (self.client).
+          data:  Optional user data (unused).
+          mid (int):  The subscribe request message ID.
+          granted_qos (list):  The QOS level granted for each topic.
+        """
+        self._pending_subs.discard(mid)
+        if self._pending_subs or self._connect_time is None:
+            return
+
+        self.ready_time = clock.time() - self._connect_time
+        self._connect_time = None
+        LOG.info("MQTT ready %.3f sec after connecting to %s %s",
+                 self.ready_time, self.host, self.port)
+
     #-----------------------------------------------------------------------
     def _on_message(self, client, data, message):
         """MQTT message sent callback.
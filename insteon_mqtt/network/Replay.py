@@ -0,0 +1,297 @@
+#===========================================================================
+#
+# Network link that replays recorded PLM traffic.
+#
+#===========================================================================
+import os
+import urllib.parse
+from .. import log
+from .. import recorder
+from ..Signal import Signal
+from .Link import Link
+
+LOG = log.get_logger(__name__)
+
+
+class Replay(Link):
+    """PLM modem link that plays back a recorded file.
+
+    This replaces network.Serial to run the bridge against real traffic
+    without hardware.  The file is a recorder dump or capture file (see
+    the recorder module).  The data read from the modem in the file is
+    passed to signal_read like Serial does.  Data written to the link is
+    reported as written with signal_wrote but is otherwise ignored.
+
+    The recorded data is played at the recorded times scaled by the speed
+    input.  A speed of 0 plays the data as fast as possible.  When the
+    playback reaches a message that was written in the recording, it waits
+    until the bridge writes a message (or write_time_out seconds pass) so
+    the modem replies stay in order with the commands that caused them.
+    The playback clock is reset at each write so reply timing is relative
+    to the bridge's write.
+
+    To use this in the config file, set the insteon port to a replay URL:
+
+        port: 'replay:///path/to/capture.bin?speed=0'
+
+    When the end of the file is reached, signal_finished is emitted.
+    """
+    #-----------------------------------------------------------------------
+    def __init__(self, path=None, speed=1.0, write_time_out=5.0):
+        """Constructor.
+
+        The file isn't read until connect() is called.
+
+        Args:
+          path (str):  The recorded file to play.
+          speed (float):  Playback speed.  1 is real time.  0 plays the
+                data as fast as possible.
+          write_time_out (float):  Time in seconds to wait for the bridge to
+                         write a message that was written in the recording.
+        """
+        # Public signals to connect to for read/write notification.
+        self.signal_read = Signal()      # (Replay, bytes)
+        self.signal_wrote = Signal()     # (Replay, bytes)
+        self.signal_finished = Signal()  # (Replay)
+
+        super().__init__()
+
+        self.path = path
+        self.speed = speed
+        self.write_time_out = write_time_out
+
+        self.stats = {"read" : 0, "written" : 0, "write_time_out" : 0}
+        self.finished = False
+
+        self._records = []
+        self._pos = 0
+
+        # Live time and recorded time that the playback clock is aligned to.
+        self._live_t0 = None
+        self._rec_t0 = None
+
+        # Data written by the bridge that hasn't been reported yet.
+        self._write_buf = []
+
+        # Number of messages written by the bridge and the number of
+        # written messages in the recording that have been played.
+        self._num_written = 0
+        self._num_played = 0
+        self._wait_start = None
+
+        # The manager needs a file descriptor to watch so the read end of a
+        # pipe that is never written to is used.  The playback is done in
+        # poll().
+        self._pipe = None
+
+    #-----------------------------------------------------------------------
+    def load_config(self, config):
+        """Load a configuration dictionary.
+
+        The input configuration dictionary can contain:
+        - port (str):  replay://PATH[?speed=SPEED][&write_time_out=SEC]
+
+        Args:
+          config (dict):  Configuration data to load.
+        """
+        assert self._pipe is None
+
+        url = urllib.parse.urlsplit(config.get('port', ''))
+        if url.scheme != "replay":
+            return
+
+        self.path = url.netloc + url.path
+        query = urllib.parse.parse_qs(url.query)
+        if 'speed' in query:
+            self.speed = float(query['speed'][0])
+        if 'write_time_out' in query:
+            self.write_time_out = float(query['write_time_out'][0])
+
+    #-----------------------------------------------------------------------
+    def connect(self):
+        """Read the recorded file.
+
+        Returns:
+          bool:  Returns True if the file was read or False if it failed.
+        """
+        try:
+            records = recorder.read(self.path)
+        except (OSError, ValueError) as e:
+            LOG.error("Replay file error %s: %s", self.path, e)
+            return False
+
+        self._records = records
+        self._pos = 0
+        self._live_t0 = None
+        self.finished = False
+        self._pipe = os.pipe()
+
+        LOG.info("Replaying %d records from %s at speed %s", len(records),
+                 self.path, self.speed or "max")
+        return True
+
+    #-----------------------------------------------------------------------
+    def fileno(self):
+        """Return the file descriptor to watch for this link.
+
+        Returns:
+          int:  Returns the descriptor (obj.fileno() usually) to monitor.
+        """
+        assert self._pipe
+        return self._pipe[0]
+
+    #-----------------------------------------------------------------------
+    def write(self, data, after_time=None):
+        """Write data to the modem.
+
+        The data is reported as written the next time the link is polled.
+        The after_time is ignored.
+
+        Args:
+          data (bytes):  The data to write.
+          after_time (float):  Unused.
+        """
+        self._write_buf.append(data)
+
+    #-----------------------------------------------------------------------
+    def poll_dt(self, t):
+        """Return the time in seconds until the link needs to be polled.
+
+        Args:
+          t (float):  The current time.
+
+        Returns:
+          float:  Returns the time until the next record should be played
+          or None if there is nothing to do.
+        """
+        if self._write_buf:
+            return 0
+
+        if self.finished or not self._pipe:
+            return None
+        elif self._pos >= len(self._records):
+            return 0
+
+        rec_t, direction, _data = self._records[self._pos]
+        if direction == recorder.WRITE:
+            if self._wait_start is None:
+                return 0
+            return max(0, self._wait_start + self.write_time_out - t)
+
+        if not self.speed or self._live_t0 is None:
+            return 0
+
+        return max(0, self._due_time(rec_t) - t)
+
+    #-----------------------------------------------------------------------
+    def poll(self, t):
+        """Periodic poll callback.
+
+        Reports written data and plays any records that are due.
+
+        Args:
+           t (float):  Current Unix clock time tag.
+        """
+        while self._write_buf:
+            data = self._write_buf.pop(0)
+            self._num_written += 1
+            self.stats["written"] += 1
+            self.signal_wrote.emit(self, data)
+
+        if self.finished or not self._pipe:
+            return
+
+        if self._live_t0 is None and self._records:
+            self._live_t0 = t
+            self._rec_t0 = self._records[0][0]
+
+        while self._pos < len(self._records):
+            rec_t, direction, data = self._records[self._pos]
+
+            # Wait for the bridge to write the message that was written in
+            # the recording.
+            if direction == recorder.WRITE:
+                if self._num_written <= self._num_played:
+                    if self._wait_start is None:
+                        self._wait_start = t
+                    if t - self._wait_start < self.write_time_out:
+                        return
+
+                    self.stats["write_time_out"] += 1
+                    LOG.warning("Replay timed out waiting for write of %s",
+                                data.hex())
+
+                self._wait_start = None
+                self._num_played += 1
+                self._pos += 1
+                self._live_t0 = t
+                self._rec_t0 = rec_t
+                continue
+
+            if self.speed and t < self._due_time(rec_t):
+                return
+
+            self._pos += 1
+            self.stats["read"] += 1
+            self.signal_read.emit(self, data)
+
+        self.finished = True
+        LOG.info("Replay finished: %s", self.stats)
+        self.signal_finished.emit(self)
+
+    #-----------------------------------------------------------------------
+    def read_from_link(self):
+        """Read data from the link.
+
+        The pipe is never written to so this isn't called.
+
+        Returns:
+           int:  Returns 0 for success.
+        """
+        return 0
+
+    #-----------------------------------------------------------------------
+    def write_to_link(self, t):
+        """Write data from the link.
+
+        Writes are handled in poll() so this just removes the write flag.
+
+        Args:
+           t (float):  The current time (time.time).
+        """
+        self.signal_needs_write.emit(self, False)
+
+    #-----------------------------------------------------------------------
+    def close(self):
+        """Close the link.
+        """
+        if not self._pipe:
+            return
+
+        LOG.info("Replay closing %s", self.path)
+
+        # The manager needs the file descriptor to remove the link.
+        self.signal_closing.emit(self)
+
+        os.close(self._pipe[0])
+        os.close(self._pipe[1])
+        self._pipe = None
+        self._write_buf = []
+
+    #-----------------------------------------------------------------------
+    def _due_time(self, rec_t):
+        """Return the live time to play a record at.
+
+        Args:
+          rec_t (float):  The recorded time of the record.
+
+        Returns:
+          float:  Returns the live time.
+        """
+        return self._live_t0 + (rec_t - self._rec_t0) / self.speed
+
+    #-----------------------------------------------------------------------
+    def __str__(self):
+        return "Replay %s" % str(self.path)
+
+    #-----------------------------------------------------------------------
@@ -68,7 +68,7 @@ class Serial(Link):
         # connection call to do that.
         self.client = None
         if port:
-            self._open_client()
+            self.client = self._open_client()
 
         self.signal_connected.connect(self._connected)
 
@@ -162,6 +162,35 @@ class Serial(Link):
             LOG.exception("Serial connection error to %s", self.client.port)
             return False
 
+    #-----------------------------------------------------------------------
+    def poll_dt(self, t):
+        """Return the time in seconds until the next packet can be written.
+
+        Args:
+          t (float):  The current time.
+
+        Returns:
+          float:  Returns the time until the next write time or None if
+          there is nothing waiting to be written.
+        """
+        if not self._write_buf:
+            return None
+
+        return max(0, self._write_buf[0][1] - t)
+
+    #-----------------------------------------------------------------------
+    def poll(self, t):
+        """Periodic poll callback.
+
+        Turns write watching back on once the next packet's write time has
+        passed.
+
+        Args:
+           t (float):  Current Unix clock time tag.
+        """
+        if self._write_buf and t >= self._write_buf[0][1]:
+            self.signal_needs_write.emit(self, True)
+
     #-----------------------------------------------------------------------
     def read_from_link(self):
         """Read data from the link.
@@ -207,7 +236,10 @@ class Serial(Link):
         # enough time has elapsed to write the message.
         data, after_time = self._write_buf[0]
         if t < after_time:
-            #LOG.debug("Waiting to write %f < %f", t, after_time)
+            # Stop watching for writes until poll() sees the time has
+            # passed.  Otherwise the manager would spin since the port is
+            # always writable.
+            self.signal_needs_write.emit(self, False)
             return
 
         try:
@@ -230,7 +262,7 @@ class Serial(Link):
             elif num:
                 # Still data to write - remove the written data from the
                 # buffer.
-                self._write_buf[0] = data[num:]
+                self._write_buf[0] = (data[num:], after_time)
 
         except:
             LOG.exception("Serial write error from %s", self.client.port)
@@ -239,17 +271,19 @@ class Serial(Link):
     def close(self):
         """Close the link.
 
-        The link will call self.signal_closing.emit() after closing.
+        The link will call self.signal_closing.emit() before closing.
         """
         if not self._fd:
             return
 
         LOG.info("Serial device closing %s", self.client.port)
 
+        # The manager needs the file descriptor to remove the link.
+        self.signal_closing.emit(self)
+
         self.client.close()
         self._fd = None
         self._write_buf = []
-        self.signal_closing.emit(self)
 
     #-----------------------------------------------------------------------
     def _open_client(self):
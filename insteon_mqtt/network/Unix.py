@@ -0,0 +1,284 @@
+#===========================================================================
+#
+# Local Unix domain socket command links.
+#
+#===========================================================================
+import os
+import socket
+from .. import log
+from ..Signal import Signal
+from .Link import Link
+
+LOG = log.get_logger(__name__)
+
+
+class Unix(Link):
+    """Unix domain socket listener for local commands.
+
+    This lets the command line tool send commands to the server without
+    going through the MQTT broker.  The listener accepts connections and
+    creates a UnixClient link for each one.  The new client is emitted with
+    signal_new_client so it can be added to the network manager.
+
+    Each line a client sends is passed to signal_command(UnixClient, bytes).
+    The protocol is newline separated JSON in both directions: the client
+    sends a command object and the server writes mqtt.Reply objects back
+    (see mqtt.Mqtt.handle_local_cmd()).
+
+    Anyone that can connect to the socket can send device commands so the
+    socket file permissions are set to mode (owner only by default) before
+    it starts listening.
+    """
+    #-----------------------------------------------------------------------
+    def __init__(self, path, reconnect_dt=10, mode=0o600):
+        """Constructor.
+
+        The socket isn't created until connect() is called.
+
+        Args:
+          path (str):  The socket file to create.
+          reconnect_dt (int):  Time in seconds to try and create the socket
+                       again if it fails.
+          mode (int):  The socket file permissions.
+        """
+        # Emitted when a client connects.  signature: (UnixClient link)
+        self.signal_new_client = Signal()
+
+        # Emitted for each command line read from a client.  signature:
+        # (UnixClient link, bytes line)
+        self.signal_command = Signal()
+
+        super().__init__()
+
+        self.path = path
+        self.mode = mode
+        self._reconnect_dt = reconnect_dt
+        self._socket = None
+        self._fd = None
+
+    #-----------------------------------------------------------------------
+    def retry_connect_dt(self):
+        """Return a positive integer (seconds) if the link should reconnect.
+
+        Returns:
+          int:  The time in seconds to try creating the socket again.
+        """
+        return self._reconnect_dt
+
+    #-----------------------------------------------------------------------
+    def connect(self):
+        """Create the socket and start listening.
+
+        Any existing socket file is removed first since it's left over from
+        a previous run.  The file permissions are set before listening so
+        no one else can connect in between.
+
+        Returns:
+          bool:  Returns True if the socket was created or False if it
+          failed.
+        """
+        try:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.bind(self.path)
+            os.chmod(self.path, self.mode)
+            sock.listen(5)
+            sock.setblocking(False)
+        except OSError as e:
+            LOG.error("Control socket %s failed: %s", self.path, e)
+            return False
+
+        self._socket = sock
+        self._fd = sock.fileno()
+        LOG.info("Control socket listening on %s", self.path)
+        return True
+
+    #-----------------------------------------------------------------------
+    def fileno(self):
+        """Return the file descriptor to watch for this link.
+
+        Returns:
+          int:  Returns the descriptor (obj.fileno() usually) to monitor.
+        """
+        assert self._fd
+        return self._fd
+
+    #-----------------------------------------------------------------------
+    def read_from_link(self):
+        """Accept a client connection.
+
+        Returns:
+           int:  Return -1 if the link had an error.  Or any other integer
+           to indicate success.
+        """
+        try:
+            sock, _addr = self._socket.accept()
+        except OSError:
+            LOG.exception("Control socket accept error")
+            return -1
+
+        sock.setblocking(False)
+        LOG.debug("Control socket client connected")
+
+        client = UnixClient(self, sock)
+        self.signal_new_client.emit(client)
+        return 0
+
+    #-----------------------------------------------------------------------
+    def write_to_link(self, t):
+        """Write data from the link.
+
+        The listener never writes so this just removes the write flag.
+
+        Args:
+           t (float):  The current time (time.time).
+        """
+        self.signal_needs_write.emit(self, False)
+
+    #-----------------------------------------------------------------------
+    def close(self):
+        """Close the socket and remove the socket file.
+        """
+        if not self._fd:
+            return
+
+        LOG.info("Control socket closing %s", self.path)
+
+        # The manager needs the file descriptor to remove the link.
+        self.signal_closing.emit(self)
+
+        self._socket.close()
+        self._socket = None
+        self._fd = None
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    #-----------------------------------------------------------------------
+
+
+#===========================================================================
+class UnixClient(Link):
+    """A connected control socket client.
+
+    Input lines are passed to the listener's signal_command.  Replies are
+    written with write().  The link closes when the client disconnects.
+    """
+    read_buf_size = 4096
+
+    # Maximum length of an input line.  The client is dropped if it sends
+    # more than this without a newline.
+    max_line = 65536
+
+    #-----------------------------------------------------------------------
+    def __init__(self, server, sock):
+        """Constructor.
+
+        Args:
+          server (Unix):  The listener that accepted the connection.
+          sock (socket.socket):  The connected client socket.
+        """
+        super().__init__()
+
+        self.server = server
+        self._socket = sock
+        self._fd = sock.fileno()
+        self._read_buf = b""
+        self._write_buf = b""
+
+    #-----------------------------------------------------------------------
+    def fileno(self):
+        """Return the file descriptor to watch for this link.
+
+        Returns:
+          int:  Returns the descriptor (obj.fileno() usually) to monitor.
+        """
+        assert self._fd
+        return self._fd
+
+    #-----------------------------------------------------------------------
+    def write(self, data):
+        """Schedule data for writing to the client.
+
+        Args:
+          data (bytes):  The data to write.
+        """
+        if not self._fd:
+            return
+
+        self._write_buf += data
+        self.signal_needs_write.emit(self, True)
+
+    #-----------------------------------------------------------------------
+    def read_from_link(self):
+        """Read data from the client and emit any complete lines.
+
+        Returns:
+           int:  Return -1 if the link was closed.  Or any other integer to
+           indicate success.
+        """
+        try:
+            data = self._socket.recv(self.read_buf_size)
+        except BlockingIOError:
+            return 0
+        except OSError:
+            data = b""
+
+        if not data:
+            self.close()
+            return -1
+
+        self._read_buf += data
+        *lines, self._read_buf = self._read_buf.split(b"\n")
+        for line in lines:
+            if line.strip():
+                self.server.signal_command.emit(self, line)
+
+        if len(self._read_buf) > self.max_line:
+            LOG.error("Control socket input line is too long")
+            self.close()
+            return -1
+
+        return 0
+
+    #-----------------------------------------------------------------------
+    def write_to_link(self, t):
+        """Write queued data to the client.
+
+        Args:
+           t (float):  The current time (time.time).
+        """
+        if self._write_buf:
+            try:
+                num = self._socket.send(self._write_buf)
+                self._write_buf = self._write_buf[num:]
+            except BlockingIOError:
+                return
+            except OSError:
+                self.close()
+                return
+
+        if not self._write_buf:
+            self.signal_needs_write.emit(self, False)
+
+    #-----------------------------------------------------------------------
+    def close(self):
+        """Close the client connection.
+        """
+        if not self._fd:
+            return
+
+        LOG.debug("Control socket client closing")
+
+        # The manager needs the file descriptor to remove the link.
+        self.signal_closing.emit(self)
+
+        self._socket.close()
+        self._socket = None
+        self._fd = None
+        self._write_buf = b""
+
+    #-----------------------------------------------------------------------
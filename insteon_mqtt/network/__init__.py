@@ -18,13 +18,18 @@ for maximum robustness.
 
 #===========================================================================
 
-from .Link import Link
-from .Serial import Serial
-from .Mqtt import Mqtt
+import platform
+from ..util import lazy_import
 
-# Use Poll on non-windows systems - For windows we have to use select.
-import platform  # pylint: disable=wrong-import-order
-if platform.system() != 'Windows':
-    from .poll import Manager
-else:
-    from .select import Manager
+lazy_import(__name__, {
+    "Link"       : "Link:Link",
+    "Manager"    : ("poll:Manager" if platform.system() != 'Windows' else
+                    "select:Manager"),
+    "Mqtt"       : "Mqtt:Mqtt",
+    "Replay"     : "Replay:Replay",
+    "Serial"     : "Serial:Serial",
+    "Unix"       : "Unix:Unix",
+    "UnixClient" : "Unix:UnixClient",
+    "VirtualManager" : "virtual:Manager",
+    "AsyncioManager" : "aio_manager:Manager",
+    })
@@ -0,0 +1,288 @@
+#===========================================================================
+#
+# asyncio based network manager.
+#
+#===========================================================================
+import asyncio
+from .. import clock
+from .. import log
+
+LOG = log.get_logger(__name__)
+
+
+class Manager:
+    """asyncio based network event loop manager.
+
+    This class has the same interface as the poll.Manager but uses an
+    asyncio event loop to watch the Link file descriptors.  This allows the
+    Insteon and MQTT links to run in the same process as other asyncio code
+    (see the aio module for awaitable device commands).
+
+    Links are polled (Link.poll()) after any read or write activity and
+    every Manager.min_time_out seconds.  Unconnected links are retried at
+    the link retry interval.
+
+    Create the manager and the links in a coroutine, then run the loop.
+
+        async def main():
+            mgr = Manager()
+            mgr.add( MyLink(...) )
+            mgr.add( MyLink(...) )
+            await mgr.run()
+
+        asyncio.run(main())
+    """
+    # Minimum time out - used to poll links for reconnection and other random
+    # processing.
+    min_time_out = 3  # seconds
+
+    #-----------------------------------------------------------------------
+    def __init__(self, loop=None):
+        """Constructor.
+
+        Args:
+          loop:  The asyncio event loop to use.  If this is None, the
+                 running event loop is used.  If there is no running loop,
+                 a new loop is created and the caller must run it.
+        """
+        if loop is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                loop = asyncio.new_event_loop()
+
+        self.loop = loop
+
+        # Map of fileno to Link objects.
+        self.links = {}
+
+        # List of unconnected link tuples (Link, time) where time is the time
+        # is the next time to try reconnecting the linnk.
+        self.unconnected = []
+
+        # Time out to use when trying to reconnect links.
+        self.unconnected_time_out = 1.0  # sec
+
+        # Handle for the next scheduled poll call.
+        self._poll_handle = None
+        self._poll_time = None
+
+    #-----------------------------------------------------------------------
+    def active(self):
+        """Returns non-zero if the link has active links or unconnected links.
+        """
+        return len(self.links) + len(self.unconnected)
+
+    #-----------------------------------------------------------------------
+    def add(self, link, connected=True):
+        """Add a Link to the manager.
+
+        To remove a link, call link.close().
+
+        Args:
+          link (Link):  Link object to add to the manager.
+          connected (bool):  True if the link is already connected.  False
+                    if the manager should try and connect the link itself.
+        """
+        LOG.debug("Link added: %s", link)
+
+        # If the link is connected, we can get it's file descriptor and add
+        # it to the event loop.
+        if connected:
+            fd = link.fileno()
+            self.loop.add_reader(fd, self._read, link)
+
+            # Connect the link signals so we know when it closes or needs to
+            # write data.
+            link.signal_closing.connect(self.link_closing)
+            link.signal_needs_write.connect(self.link_needs_write)
+
+            self.links[fd] = link
+
+            # Now that the fd is registered, we can notify others that the
+            # links is ready to read or write.
+            link.signal_connected.emit(link, True)
+
+        # For unconnected links, store them for later checking.
+        else:
+            data = (link, clock.time())
+            self.unconnected.append(data)
+
+        self._schedule_poll(0)
+
+    #-----------------------------------------------------------------------
+    def remove(self, link):
+        """Remove a link from the manager.
+
+        To remove a link, call link.close() - this method should generally
+        not be used to remove the link.
+
+        Args:
+          link (Link):  The link to remove.  If the link isn't in the
+               manager, nothing is done.
+        """
+        # Links usually clear their file descriptor before emitting the
+        # closing signal so find it by searching for the link.
+        fds = [fd for fd, i in self.links.items() if i is link]
+        if not fds:
+            return
+
+        fd = fds[0]
+
+        link.signal_closing.disconnect(self.link_closing)
+        link.signal_needs_write.disconnect(self.link_needs_write)
+
+        self.loop.remove_reader(fd)
+        self.loop.remove_writer(fd)
+        self.links.pop(fd, None)
+
+        LOG.debug("Link removed %s", link)
+
+    #-----------------------------------------------------------------------
+    def close_all(self):
+        """Close all the links in the manager.
+
+        This wlil call Link.close() to shut the links down.
+        """
+        links = list(self.links.values())
+        for link in links:
+            link.close()
+
+    #-----------------------------------------------------------------------
+    async def run(self):
+        """Run the manager until there are no more links.
+
+        The links are driven by event loop callbacks so this just waits.
+        """
+        while self.active():
+            await asyncio.sleep(self.min_time_out)
+
+        if self._poll_handle:
+            self._poll_handle.cancel()
+            self._poll_handle = None
+
+    #-----------------------------------------------------------------------
+    def link_closing(self, link):
+        """Callback when a link is closing.
+
+        This is called when the Link.close() occurs.  It will remove the link
+        from the manager.  If the link.return_connect_dt() returns a time,
+        the link is added to the unconnected list for later re-connection.
+
+        Arg:
+          link (Link):  The link that is closing.
+        """
+        self.remove(link)
+
+        dt = link.retry_connect_dt()
+        if dt and dt > 0:
+            data = (link, clock.time() + dt)
+            self.unconnected.append(data)
+            self._schedule_poll(dt)
+
+        # Emit the connected signal to let anyone else know that the link is
+        # no longer connected.
+        link.signal_connected.emit(link, False)
+
+    #-----------------------------------------------------------------------
+    def link_needs_write(self, link, needs_write):
+        """Callback when a link write status changes state.
+
+        This is called when the link.signal_needs_write is emitted.  When the
+        link has data to write, the file descriptor is added to the event
+        loop writers and then removed when all the data has been written.
+
+        Arg:
+          link (Link):  The link changing state.
+          needs_write (bool):  True if the link has data to write.  False
+                      if the link no longer has data to write.
+        """
+        if needs_write:
+            self.loop.add_writer(link.fileno(), self._write, link)
+        else:
+            self.loop.remove_writer(link.fileno())
+
+    #-----------------------------------------------------------------------
+    def _read(self, link):
+        """Event loop callback when a link has data to read.
+
+        Args:
+          link (Link):  The link to read from.
+        """
+        link.read_from_link()
+        self._schedule_poll(0)
+
+    #-----------------------------------------------------------------------
+    def _write(self, link):
+        """Event loop callback when a link can be written to.
+
+        Args:
+          link (Link):  The link to write to.
+        """
+        link.write_to_link(clock.time())
+        self._schedule_poll(0)
+
+    #-----------------------------------------------------------------------
+    def _schedule_poll(self, dt):
+        """Schedule a call to _poll().
+
+        Only one poll call is scheduled at a time.  If a poll is already
+        scheduled before the requested time, nothing is done.
+
+        Args:
+          dt (float):  Time in seconds to poll after.
+        """
+        poll_time = self.loop.time() + dt
+        if self._poll_handle is not None:
+            if self._poll_time <= poll_time:
+                return
+
+            self._poll_handle.cancel()
+
+        self._poll_time = poll_time
+        self._poll_handle = self.loop.call_at(poll_time, self._poll)
+
+    #-----------------------------------------------------------------------
+    def _poll(self):
+        """Poll the links and retry any unconnected links.
+
+        This is the same processing that poll.Manager.select() does after
+        reading and writing.
+        """
+        self._poll_handle = None
+
+        # Handle any links that need to be connected.
+        t = clock.time()
+        for i in range(len(self.unconnected) - 1, -1, -1):
+            link, next_time = self.unconnected[i]
+
+            # If we're after the reconnect time, try and connect the linkn.
+            if t >= next_time:
+                LOG.debug("Link connection attempt %s", link)
+                if link.connect():
+                    # Connection success - add the link to the manager.
+                    LOG.debug("Link connection success %s", link)
+                    del self.unconnected[i]
+                    self.add(link)
+                else:
+                    LOG.debug("Link connection failed %s", link)
+                    self.unconnected[i] = (link, t + link.retry_connect_dt())
+
+        # Copy the links before iterating since closing the link mods the
+        # dict which isn't allowed.
+        for link in list(self.links.values()):
+            link.poll(t)
+
+        if self.active():
+            time_out = self.min_time_out
+            if self.unconnected:
+                time_out = min(time_out, self.unconnected_time_out)
+
+            for link in self.links.values():
+                dt = link.poll_dt(t)
+                if dt is not None:
+                    time_out = min(time_out, dt)
+
+            self._schedule_poll(time_out)
+
+    #-----------------------------------------------------------------------
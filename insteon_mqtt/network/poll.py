@@ -5,7 +5,7 @@
 #===========================================================================
 import errno
 import select
-import time
+from .. import clock
 from .. import log
 
 LOG = log.get_logger(__name__)
@@ -103,7 +103,7 @@ class Manager:
 
         # For unconnected links, store them for later checking.
         else:
-            data = (link, time.time())
+            data = (link, clock.time())
             self.unconnected.append(data)
 
     #-----------------------------------------------------------------------
@@ -161,24 +161,17 @@ class Manager:
         if self.unconnected:
             time_out = min(time_out, self.unconnected_time_out)
 
-        time_out *= 1000  # sec->msec
+        # Links with delayed work can request an earlier poll.
+        t = clock.time()
+        for link in self.links.values():
+            dt = link.poll_dt(t)
+            if dt is not None:
+                time_out = min(time_out, dt)
 
-        # Keep polling until we get a successfull call with events.
-        while True:
-            try:
-                # events = (fileno, bit flags) of the actions.
-                events = self.poll.poll(time_out)
-            except OSError as err:
-                # This error can occur sometimes when using a timeout.  It
-                # should be ignored and the poll retried.
-                if err.errno != errno.EINTR:
-                    raise
-            else:
-                # No error was thrown so break out of the while loop.
-                break
+        events = self._wait(time_out)
 
         # Handle any links that need to be connected.
-        t = time.time()
+        t = clock.time()
         for i in range(len(self.unconnected) - 1, -1, -1):
             link, next_time = self.unconnected[i]
 
@@ -226,6 +219,29 @@ class Manager:
         for link in list(self.links.values()):
             link.poll(t)
 
+    #-----------------------------------------------------------------------
+    def _wait(self, time_out):
+        """Wait for link events.
+
+        Args:
+          time_out (float):  Maximum time in seconds to wait.
+
+        Returns:
+          list:  Returns a list of (fileno, bit flags) events.
+        """
+        time_out *= 1000  # sec->msec
+
+        # Keep polling until we get a successfull call with events.
+        while True:
+            try:
+                # events = (fileno, bit flags) of the actions.
+                return self.poll.poll(time_out)
+            except OSError as err:
+                # This error can occur sometimes when using a timeout.  It
+                # should be ignored and the poll retried.
+                if err.errno != errno.EINTR:
+                    raise
+
     #-----------------------------------------------------------------------
     def link_closing(self, link):
         """Callback when a link is closing.
@@ -241,7 +257,7 @@ class Manager:
 
         dt = link.retry_connect_dt()
         if dt and dt > 0:
-            data = (link, time.time() + dt)
+            data = (link, clock.time() + dt)
             self.unconnected.append(data)
 
         # Emit the connected signal to let anyone else know that the link is
@@ -9,6 +9,7 @@
 import errno
 import select
 import time
+from .. import clock
 from .. import log
 
 LOG = log.get_logger(__name__)
@@ -101,7 +102,7 @@ class Manager:
 
         # For unconnected links, store them for later checking.
         else:
-            data = (link, time.time())
+            data = (link, clock.time())
             self.unconnected.append(data)
 
     #-----------------------------------------------------------------------
@@ -159,6 +160,13 @@ class Manager:
         if self.unconnected:
             time_out = min(time_out, self.unconnected_time_out)
 
+        # Links with delayed work can request an earlier poll.
+        t = clock.time()
+        for link in self.links.values():
+            dt = link.poll_dt(t)
+            if dt is not None:
+                time_out = min(time_out, dt)
+
         # If nothing is reading for checking, skip the select call.
         run = self.read or self.write or self.error
         if not run:
@@ -179,7 +187,7 @@ class Manager:
                 break
 
         # Handle any links that need to be connected.
-        t = time.time()
+        t = clock.time()
         for i in range(len(self.unconnected) - 1, -1, -1):
             link, next_time = self.unconnected[i]
 
@@ -235,7 +243,7 @@ class Manager:
 
         dt = link.retry_connect_dt()
         if dt and dt > 0:
-            data = (link, time.time() + dt)
+            data = (link, clock.time() + dt)
             self.unconnected.append(data)
 
         # Emit the connected signal to let anyone else know that the link is
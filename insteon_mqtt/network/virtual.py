@@ -0,0 +1,86 @@
+#===========================================================================
+#
+# Virtual time network manager.
+#
+#===========================================================================
+from .. import clock
+from .. import log
+from . import poll
+
+LOG = log.get_logger(__name__)
+
+
+class Manager(poll.Manager):
+    """Discrete event network manager that runs in virtual time.
+
+    This works like the poll manager except that it never waits.  Links are
+    checked for events without blocking and if nothing is ready, the virtual
+    clock is advanced straight to the next deadline (the earliest
+    Link.poll_dt() or the manager time out).  An hour of modem traffic with
+    retries and time outs runs in as long as it takes to process the
+    messages and the results are repeatable.
+
+    The active clock (see the clock module) must be a VirtualClock.  The
+    links should be in process (like sim.Direct) or otherwise report all of
+    their pending work through their file descriptors and poll_dt() since
+    real devices don't run in virtual time.
+
+        clock.set(clock.VirtualClock())
+        mgr = VirtualManager()
+        mgr.add(sim.Direct(plm))
+        mgr.run(until=clock.time() + 3600)
+    """
+    #-----------------------------------------------------------------------
+    def __init__(self):
+        """Constructor.
+        """
+        if not clock.get().is_virtual():
+            raise ValueError("VirtualManager requires a VirtualClock.  Use "
+                             "clock.set() to set one.")
+
+        super().__init__()
+
+    #-----------------------------------------------------------------------
+    def run(self, until=None, done=None):
+        """Run the event loop.
+
+        Args:
+          until (float):  Virtual time to stop at.  None to run until done
+                or until there are no links.
+          done:  Optional function to call after each event loop iteration.
+                 The loop stops when it returns True.
+
+        Returns:
+          float:  Returns the virtual time the loop stopped at.
+        """
+        while self.active():
+            if done and done():
+                break
+
+            t = clock.time()
+            if until is None:
+                self.select()
+            elif t >= until:
+                break
+            else:
+                self.select(min(self.min_time_out, until - t))
+
+        return clock.time()
+
+    #-----------------------------------------------------------------------
+    def _wait(self, time_out):
+        """Check for link events and advance the clock if there are none.
+
+        Args:
+          time_out (float):  Time in seconds to the next deadline.
+
+        Returns:
+          list:  Returns a list of (fileno, bit flags) events.
+        """
+        events = super()._wait(0)
+        if not events:
+            clock.get().advance(time_out)
+
+        return events
+
+    #-----------------------------------------------------------------------
@@ -0,0 +1,447 @@
+#===========================================================================
+#
+# PLM traffic flight recorder.
+#
+#===========================================================================
+import collections
+import glob
+import os
+import struct
+import time
+from . import clock
+from . import log
+from . import message as Msg
+
+LOG = log.get_logger()
+
+# Data direction codes.
+READ = 0   # modem -> host
+WRITE = 1  # host -> modem
+
+# File header: magic bytes and format version.
+MAGIC = b"IMQR"
+VERSION = 1
+
+# Record header: time (float64), direction (uint8), data length (uint16).
+# The data bytes follow the header.
+_HEADER = struct.Struct("<dBH")
+
+
+class Recorder:
+    """In memory ring buffer of the raw bytes read from and written to the
+    PLM modem.
+
+    Protocol adds every chunk of data read from the modem and every message
+    written to it.  Only the last size records are kept so this is cheap
+    enough to leave on all the time and lets the log level be raised in
+    production while still having the traffic from before a failure.
+
+    The buffer is written to a binary file with dump().  This is done by
+    the modem dump_recorder command and automatically when a message
+    handler times out.  Use read() and decode() (or the decode_recorder.py
+    script) to read the file and network.Replay to play it back.
+    """
+    def __init__(self, size=2000):
+        """Constructor
+
+        Args:
+          size (int):  The number of records to keep.  0 to disable the
+               recorder.
+        """
+        self._records = collections.deque(maxlen=size)
+
+        # Directory to write dumps to.  Set from the config.
+        self.dump_dir = None
+
+        # If True, auto_dump() writes the buffer.  Automatic dumps are done
+        # at most once every auto_dump_interval seconds and only the newest
+        # auto_dump_keep files are kept.
+        self.auto_dump_enabled = True
+        self.auto_dump_interval = 60
+        self.auto_dump_keep = 10
+        self._last_auto_dump = None
+
+    #-----------------------------------------------------------------------
+    def __len__(self):
+        return len(self._records)
+
+    #-----------------------------------------------------------------------
+    def load_config(self, config):
+        """Load a configuration dictionary.
+
+        This should be the insteon key in the configuration data.  Key inputs
+        are:
+
+        - recorder_size       Optional number of records to keep.  0 to
+                              disable the recorder.
+        - recorder_dir        Optional directory to write dumps to.  The
+                              default is the storage directory.
+        - recorder_auto_dump  Optional bool.  If True, the buffer is written
+                              when a message handler times out.
+        - recorder_auto_keep  Optional number of automatic dump files to
+                              keep.  Older ones are deleted.
+
+        Args:
+          config (dict): Configuration data to load.
+        """
+        size = config.get('recorder_size', self._records.maxlen)
+        if size != self._records.maxlen:
+            self._records = collections.deque(self._records, maxlen=size)
+
+        self.dump_dir = config.get('recorder_dir', config.get('storage',
+                                                              None))
+        self.auto_dump_enabled = config.get('recorder_auto_dump',
+                                            self.auto_dump_enabled)
+        self.auto_dump_keep = config.get('recorder_auto_keep',
+                                         self.auto_dump_keep)
+
+    #-----------------------------------------------------------------------
+    def add(self, direction, data):
+        """Add a record to the buffer.
+
+        Args:
+          direction (int):  READ or WRITE.
+          data (bytes):  The raw bytes.  This is stored as is so it must
+               not be changed after this call.
+        """
+        if self._records.maxlen:
+            self._records.append((clock.time(), direction, data))
+
+    #-----------------------------------------------------------------------
+    def clear(self):
+        """Remove all the records.
+        """
+        self._records.clear()
+
+    #-----------------------------------------------------------------------
+    def records(self):
+        """Return the records.
+
+        Returns:
+          list:  Returns a list of (time, direction, bytes) tuples from
+          oldest to newest.
+        """
+        return list(self._records)
+
+    #-----------------------------------------------------------------------
+    def dump(self, path=None, name=None):
+        """Write the records to a file.
+
+        Args:
+          path (str):  The file to write.  If this is None, the file is
+               written to dump_dir.
+          name (str):  The file name to use in dump_dir if path is None.
+               Only the base name is used so remote commands can't write
+               outside of dump_dir.  If this is None, a time stamped name
+               is used.
+
+        Raises:
+          ValueError if path is None and there is no dump_dir.
+          OSError if the file can't be written.
+
+        Returns:
+          str:  Returns the path to the file that was written.
+        """
+        if path is None:
+            if not self.dump_dir:
+                raise ValueError("No recorder dump directory is set")
+
+            name = os.path.basename(name) if name else None
+            if not name:
+                name = time.strftime("recorder-%Y%m%d-%H%M%S.bin")
+            path = os.path.join(self.dump_dir, name)
+
+        write(path, self.records())
+        LOG.info("Recorder wrote %d records to %s", len(self._records), path)
+        return path
+
+    #-----------------------------------------------------------------------
+    def auto_dump(self, t):
+        """Write the records after an error.
+
+        The buffer is only written if automatic dumps are enabled, there is
+        a dump directory, and the last automatic dump was more than
+        auto_dump_interval seconds ago.  Only the newest auto_dump_keep
+        automatic dump files are kept so a device that keeps timing out
+        can't fill the disk.  Errors are logged.
+
+        Args:
+          t (float):  The current time.
+
+        Returns:
+          str:  Returns the path to the file that was written or None.
+        """
+        if not self.auto_dump_enabled or not self.dump_dir or \
+           not self._records:
+            return None
+
+        if self._last_auto_dump is not None and \
+           t - self._last_auto_dump < self.auto_dump_interval:
+            return None
+
+        self._last_auto_dump = t
+        try:
+            path = self.dump(name=time.strftime(
+                "recorder-auto-%Y%m%d-%H%M%S.bin"))
+            self._prune_auto_dumps()
+        except OSError as e:
+            LOG.error("Recorder dump failed: %s", e)
+            return None
+
+        LOG.warning("PLM traffic written to %s", path)
+        return path
+
+    #-----------------------------------------------------------------------
+    def _prune_auto_dumps(self):
+        """Delete all but the newest auto_dump_keep automatic dump files.
+
+        The file names are time stamped so they sort oldest to newest.
+        """
+        pattern = os.path.join(glob.escape(self.dump_dir),
+                               "recorder-auto-*.bin")
+        paths = sorted(glob.glob(pattern))
+        for path in paths[:max(0, len(paths) - self.auto_dump_keep)]:
+            os.remove(path)
+
+    #-----------------------------------------------------------------------
+
+
+#===========================================================================
+class Capture:
+    """Writes all the data read from and written to a link to a file.
+
+    This is a tap on the serial link signals so it records what actually
+    went over the wire.  The file uses the same format as Recorder.dump()
+    so it can be printed with decode() or replayed with network.Replay.
+
+    Data read from the modem is buffered for up to flush_interval seconds.
+    The file is flushed whenever data is written to the modem and by poll()
+    so the traffic just before a hang or a kill is on the disk.
+    """
+    def __init__(self, path, flush_interval=1.0):
+        """Constructor
+
+        Args:
+          path (str):  The file to write.  Any existing file is replaced.
+          flush_interval (float):  Maximum time in seconds to buffer data.
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self._file = open(path, "wb")
+        self._file.write(MAGIC + bytes([VERSION]))
+        self._file.flush()
+        self._last_flush = clock.time()
+        self._dirty = False
+
+    #-----------------------------------------------------------------------
+    def attach(self, link):
+        """Record the data read and written by a link.
+
+        Args:
+          link:  The link to record.  This must have signal_read and
+               signal_wrote signals (see network.Serial).
+        """
+        link.signal_read.connect(self.handle_read)
+        link.signal_wrote.connect(self.handle_wrote)
+
+    #-----------------------------------------------------------------------
+    def handle_read(self, link, data):
+        """Link data read callback.
+
+        Args:
+          link:  The link that read the data.
+          data (bytes):  The data that was read.
+        """
+        self.add(READ, data)
+
+    #-----------------------------------------------------------------------
+    def handle_wrote(self, link, data):
+        """Link data written callback.
+
+        Args:
+          link:  The link that wrote the data.
+          data (bytes):  The data that was written.
+        """
+        self.add(WRITE, data)
+
+    #-----------------------------------------------------------------------
+    def add(self, direction, data):
+        """Write a record to the file.
+
+        Args:
+          direction (int):  READ or WRITE.
+          data (bytes):  The raw bytes.
+        """
+        if not self._file:
+            return
+
+        t = clock.time()
+        self._file.write(_HEADER.pack(t, direction, len(data)))
+        self._file.write(data)
+        self._dirty = True
+
+        if direction == WRITE or t - self._last_flush >= self.flush_interval:
+            self._flush(t)
+
+    #-----------------------------------------------------------------------
+    def poll(self, t):
+        """Periodic polling function.
+
+        This should be called from the main loop.  It flushes any data that
+        has been buffered for more than flush_interval seconds.
+
+        Args:
+          t (float):  The current time.
+        """
+        if self._dirty and t - self._last_flush >= self.flush_interval:
+            self._flush(t)
+
+    #-----------------------------------------------------------------------
+    def _flush(self, t):
+        """Write the buffered data to the file.
+
+        Args:
+          t (float):  The current time.
+        """
+        self._file.flush()
+        self._last_flush = t
+        self._dirty = False
+
+    #-----------------------------------------------------------------------
+    def close(self):
+        """Close the file.
+        """
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    #-----------------------------------------------------------------------
+
+
+#===========================================================================
+def write(path, records):
+    """Write records to a recorder file.
+
+    Args:
+      path (str):  The file to write.
+      records (list):  List of (time, direction, bytes) tuples.
+    """
+    with open(path, "wb") as f:
+        f.write(MAGIC + bytes([VERSION]))
+        for t, direction, data in records:
+            f.write(_HEADER.pack(t, direction, len(data)))
+            f.write(data)
+
+
+#===========================================================================
+def read(path):
+    """Read a recorder file.
+
+    Args:
+      path (str):  The file to read.
+
+    Raises:
+      ValueError if the file isn't a recorder file.
+
+    Returns:
+      list:  Returns a list of (time, direction, bytes) tuples.
+    """
+    with open(path, "rb") as f:
+        raw = f.read()
+
+    if raw[:len(MAGIC)] != MAGIC or len(raw) <= len(MAGIC):
+        raise ValueError("%s is not a recorder file" % path)
+
+    version = raw[len(MAGIC)]
+    if version != VERSION:
+        raise ValueError("Unsupported recorder file version %d" % version)
+
+    records = []
+    pos = len(MAGIC) + 1
+    while pos + _HEADER.size <= len(raw):
+        t, direction, size = _HEADER.unpack_from(raw, pos)
+        pos += _HEADER.size
+        records.append((t, direction, raw[pos:pos + size]))
+        pos += size
+
+    return records
+
+
+#===========================================================================
+def decode(records):
+    """Split recorded data into PLM messages.
+
+    Data read from the modem is split into messages the same way Protocol
+    does it.  Written data is always one message per record.
+
+    Args:
+      records (list):  List of (time, direction, bytes) tuples.
+
+    Returns:
+      Yields (time, direction, bytes, msg) tuples.  The msg is the message
+      object or None if it couldn't be decoded.
+    """
+    buf = bytearray()
+    for t, direction, data in records:
+        if direction == WRITE:
+            yield t, direction, data, _decode_write(data)
+            continue
+
+        buf.extend(data)
+        while len(buf) > 1:
+            start = buf.find(0x02)
+            if start == -1:
+                yield t, direction, bytes(buf), None
+                buf = bytearray()
+                break
+
+            if start:
+                yield t, direction, bytes(buf[:start]), None
+                buf = buf[start:]
+                if len(buf) < 2:
+                    break
+
+            msg_class = Msg.types.get(buf[1], None)
+            if not msg_class:
+                yield t, direction, bytes(buf[:2]), None
+                buf = buf[2:]
+                continue
+
+            msg_size = msg_class.msg_size(buf)
+            if len(buf) < msg_size:
+                break
+
+            try:
+                msg = msg_class.from_bytes(buf)
+            except Exception:
+                yield t, direction, bytes(buf[:1]), None
+                buf = buf[1:]
+                continue
+
+            yield t, direction, bytes(buf[:msg_size]), msg
+            buf = buf[msg_size:]
+
+
+#===========================================================================
+def _decode_write(data):
+    """Decode a message written to the modem.
+
+    Output message classes read the modem echo which has an extra ACK byte
+    at the end so one is added before reading the message.
+
+    Args:
+      data (bytes):  The written bytes.
+
+    Returns:
+      Returns the message object or None if it couldn't be decoded.
+    """
+    msg_class = Msg.types.get(data[1], None) if len(data) > 1 else None
+    if not msg_class:
+        return None
+
+    try:
+        return msg_class.from_bytes(bytes(data) + b"\x06")
+    except Exception:
+        return None
+
+#===========================================================================
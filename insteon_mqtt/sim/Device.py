@@ -0,0 +1,346 @@
+#===========================================================================
+#
+# Simulated Insteon device base class.
+#
+#===========================================================================
+import random
+from ..Address import Address
+from ..message import Flags
+
+# Insteon engine versions.
+I1 = 0x00
+I2 = 0x01
+I2CS = 0x02
+
+
+class Device:
+    """Simulated Insteon device.
+
+    The simulated PLM (sim.Plm) passes each direct command sent to the
+    device to handle() which returns the messages the device sends back.
+    Messages are returned as raw PLM bytes (0x50/0x51 input messages) with a
+    delay in seconds from the time the command was sent.
+
+    The base class handles the commands every device supports: ACK'ing
+    commands, status, engine version, ID request, and reading the all link
+    database (i2 extended reads or i1 peeks).  Derived classes add their own
+    commands and unsolicited traffic (see activity()).
+
+    Each device has a number of hops to the modem which is reflected in the
+    message flags and the reply latency and a drop rate to simulate
+    messages that never arrive.
+    """
+    # Device category and sub-category.
+    cat = 0x00
+    sub_cat = 0x00
+
+    # Config file device type for the bridge (see config.devices).
+    config_type = None
+
+    def __init__(self, addr, engine=I2CS, hops=0, latency=0.05,
+                 drop_rate=0.0, activity=0, rng=None):
+        """Constructor
+
+        Args:
+          addr:  The device address.  See Address for inputs.
+          engine (int):  The engine version (I1, I2, or I2CS).
+          hops (int):  The number of hops (0-3) messages take to reach the
+               modem.
+          latency (float):  Time in seconds per hop for replies.
+          drop_rate (float):  Probability [0,1] that a reply is lost.
+          activity (float):  Mean time in seconds between unsolicited
+                   events (button presses, motion, etc).  0 for none.
+          rng (random.Random):  Random number generator to use.
+        """
+        self.addr = Address(addr)
+        self.engine = engine
+        self.hops = max(0, min(3, hops))
+        self.latency = latency
+        self.drop_rate = drop_rate
+        self.activity_time = activity
+        self.rng = rng or random.Random()
+
+        # Modem address.  Set by the Plm when the device is added.
+        self.modem_addr = None
+
+        # On level (0-255).
+        self.level = 0
+
+        # All link database as a list of (flags, group, Address, data)
+        # tuples and the database delta which changes when it's modified.
+        self.db = []
+        self.db_delta = 1
+
+        # i1 database read address.
+        self._peek_msb = 0
+
+        self.stats = {"received" : 0, "sent" : 0, "dropped" : 0}
+
+    #-----------------------------------------------------------------------
+    def add_link(self, addr, group, is_controller, data=None):
+        """Add an all link database record.
+
+        Args:
+          addr:  The address of the other device.
+          group (int):  The group number.
+          is_controller (bool):  True if this device is the controller.
+          data (bytes):  3 bytes of link data.
+        """
+        flags = 0xe2 if is_controller else 0xa2
+        data = data or bytes([self.level, 0x1f, group])
+        self.db.append((flags, group, Address(addr), bytes(data)))
+        self.db_delta = (self.db_delta + 1) & 0xff
+
+    #-----------------------------------------------------------------------
+    def handle(self, flags, cmd1, cmd2, data):
+        """Process a direct command sent to the device.
+
+        Args:
+          flags (int):  The message flags byte.
+          cmd1 (int):  The command byte 1.
+          cmd2 (int):  The command byte 2.
+          data (bytes):  The extended message data or None.
+
+        Returns:
+          list:  Returns a list of (delay, bytes) messages to send to the
+          modem.
+        """
+        self.stats["received"] += 1
+        if self.rng.random() < self.drop_rate:
+            self.stats["dropped"] += 1
+            return []
+
+        # i1 devices don't understand extended messages.
+        if data is not None and self.engine == I1:
+            return []
+
+        replies = self.command(cmd1, cmd2, data)
+        self.stats["sent"] += len(replies)
+
+        dt = self.reply_time()
+        return [(dt * (i + 1), msg) for i, msg in enumerate(replies)]
+
+    #-----------------------------------------------------------------------
+    def command(self, cmd1, cmd2, data):
+        """Return the replies to a command.
+
+        Derived classes should override this to handle their own commands
+        and call the base class for everything else.
+
+        Args:
+          cmd1 (int):  The command byte 1.
+          cmd2 (int):  The command byte 2.
+          data (bytes):  The extended message data or None.
+
+        Returns:
+          list:  Returns a list of message bytes to send in order.
+        """
+        # ID request: ACK and then a set button pressed broadcast with the
+        # device category in the to address.
+        if cmd1 == 0x10:
+            return [self.ack(cmd1, cmd2),
+                    self.msg(bytes([self.cat, self.sub_cat, 0x00]),
+                             Flags.Type.BROADCAST, 0x01, 0x00)]
+
+        # Engine version.
+        elif cmd1 == 0x0d:
+            return [self.ack(cmd1, self.engine)]
+
+        # Status request: db delta and level.
+        elif cmd1 == 0x19:
+            return [self.ack(self.db_delta, self.level)]
+
+        # On/off.
+        elif cmd1 in (0x11, 0x12):
+            self.level = cmd2
+            return [self.ack(cmd1, cmd2)]
+
+        elif cmd1 in (0x13, 0x14):
+            self.level = 0
+            return [self.ack(cmd1, 0x00)]
+
+        # i1 database read: set the address MSB and then peek bytes.
+        elif cmd1 == 0x28 and self.engine == I1:
+            self._peek_msb = cmd2
+            return [self.ack(cmd1, cmd2)]
+
+        elif cmd1 == 0x2b and self.engine == I1:
+            return [self.ack(cmd1, self.peek((self._peek_msb << 8) + cmd2))]
+
+        # i2 database read: ACK and then send the requested records.  A
+        # zero address starts at the first record and a zero count sends
+        # every record.
+        elif cmd1 == 0x2f and data is not None:
+            if data[1] != 0x00:
+                return [self.ack(cmd1, cmd2)]
+
+            mem_loc = (data[2] << 8) + data[3]
+            start = (0x0fff - mem_loc) // 8 if mem_loc else 0
+            end = len(self.db) + 1
+            if data[4]:
+                end = min(end, start + data[4])
+
+            return [self.ack(cmd1, cmd2)] + [
+                self.ext_msg(self.modem_addr, Flags.Type.DIRECT, 0x2f, 0x00,
+                             self.db_record(i))
+                for i in range(start, end)]
+
+        # Everything else is ACK'ed.
+        return [self.ack(cmd1, cmd2)]
+
+    #-----------------------------------------------------------------------
+    def next_activity(self, t):
+        """Return the time of the next unsolicited event.
+
+        Args:
+          t (float):  The current time.
+
+        Returns:
+          float:  Returns the time of the next event or None if the device
+          doesn't send events.
+        """
+        if not self.activity_time:
+            return None
+
+        return t + self.rng.expovariate(1.0 / self.activity_time)
+
+    #-----------------------------------------------------------------------
+    def activity(self):
+        """Generate an unsolicited event.
+
+        The default is to toggle the device as if the button was pressed.
+
+        Returns:
+          list:  Returns a list of (delay, bytes) messages to send to the
+          modem.
+        """
+        is_on = not self.level
+        self.level = 0xff if is_on else 0x00
+        return self.group_cmd(1, 0x11 if is_on else 0x13)
+
+    #-----------------------------------------------------------------------
+    def group_cmd(self, group, cmd1, cmd2=0x00):
+        """Return the messages for a group command.
+
+        This is an all link broadcast followed by an all link cleanup sent
+        directly to the modem like a real device does.
+
+        Args:
+          group (int):  The group number.
+          cmd1 (int):  The command byte 1.
+          cmd2 (int):  The command byte 2.
+
+        Returns:
+          list:  Returns a list of (delay, bytes) messages.
+        """
+        dt = self.reply_time()
+        msgs = [(0.0, self.msg(bytes([0x00, 0x00, group]),
+                               Flags.Type.ALL_LINK_BROADCAST, cmd1, cmd2))]
+        if self.rng.random() >= self.drop_rate:
+            msgs.append((dt, self.msg(self.modem_addr,
+                                      Flags.Type.ALL_LINK_CLEANUP, cmd1,
+                                      group)))
+        return msgs
+
+    #-----------------------------------------------------------------------
+    def reply_time(self):
+        """Return the time in seconds for a message to reach the modem.
+
+        Returns:
+          float:  Returns the message time.
+        """
+        return self.latency * (self.hops + 1)
+
+    #-----------------------------------------------------------------------
+    def ack(self, cmd1, cmd2):
+        """Return a direct ACK message to the modem.
+
+        Args:
+          cmd1 (int):  The command byte 1.
+          cmd2 (int):  The command byte 2.
+
+        Returns:
+          bytes:  Returns the message bytes.
+        """
+        return self.msg(self.modem_addr, Flags.Type.DIRECT_ACK, cmd1, cmd2)
+
+    #-----------------------------------------------------------------------
+    def msg(self, to_addr, type, cmd1, cmd2):
+        """Return a standard message from the device.
+
+        Args:
+          to_addr:  The Address or 3 bytes for the to address.
+          type (Flags.Type):  The message type.
+          cmd1 (int):  The command byte 1.
+          cmd2 (int):  The command byte 2.
+
+        Returns:
+          bytes:  Returns the PLM 0x50 message bytes.
+        """
+        flags = Flags(type, False, 3 - self.hops, 3)
+        return (bytes([0x02, 0x50]) + self.addr.to_bytes() +
+                bytes(to_addr.to_bytes() if isinstance(to_addr, Address)
+                      else to_addr) +
+                flags.to_bytes() + bytes([cmd1, cmd2]))
+
+    #-----------------------------------------------------------------------
+    def ext_msg(self, to_addr, type, cmd1, cmd2, data):
+        """Return an extended message from the device.
+
+        Args:
+          to_addr (Address):  The to address.
+          type (Flags.Type):  The message type.
+          cmd1 (int):  The command byte 1.
+          cmd2 (int):  The command byte 2.
+          data (bytes):  The 14 data bytes.
+
+        Returns:
+          bytes:  Returns the PLM 0x51 message bytes.
+        """
+        flags = Flags(type, True, 3 - self.hops, 3)
+        return (bytes([0x02, 0x51]) + self.addr.to_bytes() +
+                to_addr.to_bytes() + flags.to_bytes() +
+                bytes([cmd1, cmd2]) + bytes(data))
+
+    #-----------------------------------------------------------------------
+    def db_record(self, index):
+        """Return the extended data for an i2 database read reply.
+
+        Args:
+          index (int):  The record index.  The record after the last one is
+                the empty end of database record.
+
+        Returns:
+          bytes:  Returns the 14 data bytes.
+        """
+        mem_loc = 0x0fff - 8 * index
+        if index < len(self.db):
+            flags, group, addr, data = self.db[index]
+        else:
+            flags, group, addr, data = 0x00, 0x00, Address(0), bytes(3)
+
+        return (bytes([0x00, 0x01, mem_loc >> 8, mem_loc & 0xff, 0x00,
+                       flags, group]) + addr.to_bytes() + data +
+                bytes([0x00]))
+
+    #-----------------------------------------------------------------------
+    def peek(self, mem_loc):
+        """Return a byte from the i1 database memory.
+
+        Records are stored down from 0x0fff in 8 byte blocks.
+
+        Args:
+          mem_loc (int):  The memory address.
+
+        Returns:
+          int:  Returns the byte value.
+        """
+        index, offset = divmod(0x0fff - mem_loc, 8)
+        if index >= len(self.db):
+            return 0x00
+
+        flags, group, addr, data = self.db[index]
+        record = bytes([flags, group]) + addr.to_bytes() + data
+        return record[7 - offset]
+
+    #-----------------------------------------------------------------------
@@ -0,0 +1,47 @@
+#===========================================================================
+#
+# Simulated dimmer device.
+#
+#===========================================================================
+from .Device import Device
+
+
+class Dimmer(Device):
+    """Simulated dimmer switch.
+
+    Handles the on/off, ramp, and step commands and reports the level in
+    the status reply.  Activity toggles the light like a paddle press.
+    """
+    cat = 0x01
+    sub_cat = 0x20
+    config_type = "dimmer"
+
+    #-----------------------------------------------------------------------
+    def command(self, cmd1, cmd2, data):
+        """Return the replies to a command.
+
+        Args:
+          cmd1 (int):  The command byte 1.
+          cmd2 (int):  The command byte 2.
+          data (bytes):  The extended message data or None.
+
+        Returns:
+          list:  Returns a list of message bytes to send in order.
+        """
+        # Ramp on/off: cmd2 is the level in the high nibble.
+        if cmd1 in (0x2e, 0x2f) and data is None:
+            self.level = (cmd2 & 0xf0) | 0x0f if cmd1 == 0x2e else 0x00
+            return [self.ack(cmd1, cmd2)]
+
+        # Brighten/dim one step.
+        elif cmd1 == 0x15:
+            self.level = min(0xff, self.level + 0x08)
+            return [self.ack(cmd1, cmd2)]
+
+        elif cmd1 == 0x16:
+            self.level = max(0x00, self.level - 0x08)
+            return [self.ack(cmd1, cmd2)]
+
+        return super().command(cmd1, cmd2, data)
+
+    #-----------------------------------------------------------------------
@@ -0,0 +1,73 @@
+#===========================================================================
+#
+# Simulated KeypadLinc device.
+#
+#===========================================================================
+from .Dimmer import Dimmer
+
+
+class KeypadLinc(Dimmer):
+    """Simulated 8 button KeypadLinc dimmer.
+
+    Button 1 is the load.  Buttons 2-8 only have LEDs which are reported in
+    the 0x19 0x01 status reply and set with the extended 0x2e 0x09 command.
+    Activity presses a random button which sends that group's broadcast.
+    """
+    cat = 0x01
+    sub_cat = 0x41
+    config_type = "keypad_linc"
+
+    #-----------------------------------------------------------------------
+    def __init__(self, addr, **kwargs):
+        """Constructor
+
+        Args:
+          addr:  The device address.  See Address for inputs.
+          kwargs:  Device constructor arguments.
+        """
+        super().__init__(addr, **kwargs)
+
+        # LED on/off flags for each button.  Bit 0 is button 1.
+        self.led_bits = 0x00
+
+    #-----------------------------------------------------------------------
+    def command(self, cmd1, cmd2, data):
+        """Return the replies to a command.
+
+        Args:
+          cmd1 (int):  The command byte 1.
+          cmd2 (int):  The command byte 2.
+          data (bytes):  The extended message data or None.
+
+        Returns:
+          list:  Returns a list of message bytes to send in order.
+        """
+        # LED status request.
+        if cmd1 == 0x19 and cmd2 == 0x01:
+            return [self.ack(self.db_delta, self.led_bits)]
+
+        # Set the LED flags.
+        elif cmd1 == 0x2e and data is not None and data[1] == 0x09:
+            self.led_bits = data[2]
+            return [self.ack(cmd1, cmd2)]
+
+        return super().command(cmd1, cmd2, data)
+
+    #-----------------------------------------------------------------------
+    def activity(self):
+        """Press a random button.
+
+        Returns:
+          list:  Returns a list of (delay, bytes) messages to send to the
+          modem.
+        """
+        group = self.rng.randint(1, 8)
+        bit = 1 << (group - 1)
+        is_on = not self.led_bits & bit
+        self.led_bits ^= bit
+        if group == 1:
+            self.level = 0xff if is_on else 0x00
+
+        return self.group_cmd(group, 0x11 if is_on else 0x13)
+
+    #-----------------------------------------------------------------------
@@ -0,0 +1,588 @@
+#===========================================================================
+#
+# Network links that connect the simulated PLM to the bridge.
+#
+#===========================================================================
+import os
+import socket
+from .. import clock
+from .. import log
+from ..network.Link import Link
+from ..Signal import Signal
+
+LOG = log.get_logger(__name__)
+
+
+class PlmLink(Link):
+    """Base class for a link that carries the simulated PLM traffic.
+
+    Bytes read from the link are passed to the Plm.  The link tells the
+    network manager when the next Plm output is due with poll_dt() and
+    writes it in poll().  Derived classes open the file descriptor and
+    implement _read() and _write().
+    """
+    read_buf_size = 4096
+
+    #-----------------------------------------------------------------------
+    def __init__(self, plm):
+        """Constructor
+
+        Args:
+          plm (sim.Plm):  The simulated modem.
+        """
+        super().__init__()
+        self.plm = plm
+        self._fd = None
+        self._write_buf = bytes()
+
+    #-----------------------------------------------------------------------
+    def fileno(self):
+        """Return the file descriptor to watch for this link.
+
+        Returns:
+          int:  Returns the descriptor (obj.fileno() usually) to monitor.
+        """
+        assert self._fd is not None
+        return self._fd
+
+    #-----------------------------------------------------------------------
+    def poll_dt(self, t):
+        """Return the time in seconds until the next Plm output is due.
+
+        Args:
+          t (float):  The current time.
+
+        Returns:
+          float:  Returns the time in seconds to call poll() by or None if
+          nothing is scheduled.
+        """
+        next_t = self.plm.next_time()
+        return None if next_t is None else max(0, next_t - t)
+
+    #-----------------------------------------------------------------------
+    def poll(self, t):
+        """Write any Plm output that is due.
+
+        Args:
+           t (float):  Current Unix clock time tag.
+        """
+        data = self.plm.pop_due(t)
+        if data:
+            self._write_buf += data
+            self.signal_needs_write.emit(self, True)
+
+    #-----------------------------------------------------------------------
+    def read_from_link(self):
+        """Read data from the link and pass it to the Plm.
+
+        Returns:
+           int:  Return -1 if the link was closed.  Or any other integer to
+           indicate success.
+        """
+        try:
+            data = self._read()
+        except BlockingIOError:
+            return 0
+        except OSError:
+            data = b""
+
+        if not data:
+            self.close()
+            return -1
+
+        self.plm.feed(data, clock.time())
+        return 0
+
+    #-----------------------------------------------------------------------
+    def write_to_link(self, t):
+        """Write queued Plm output to the link.
+
+        Args:
+           t (float):  The current time (time.time).
+        """
+        if self._write_buf:
+            try:
+                num = self._write(self._write_buf)
+                self._write_buf = self._write_buf[num:]
+            except BlockingIOError:
+                return
+            except OSError:
+                self.close()
+                return
+
+        if not self._write_buf:
+            self.signal_needs_write.emit(self, False)
+
+    #-----------------------------------------------------------------------
+    def _read(self):
+        """Read bytes from the file descriptor.
+
+        Returns:
+          bytes:  Returns the data that was read.
+        """
+        raise NotImplementedError("%s._read() not implemented" %
+                                  self.__class__)
+
+    #-----------------------------------------------------------------------
+    def _write(self, data):
+        """Write bytes to the file descriptor.
+
+        Args:
+          data (bytes):  The data to write.
+
+        Returns:
+          int:  Returns the number of bytes written.
+        """
+        raise NotImplementedError("%s._write() not implemented" %
+                                  self.__class__)
+
+    #-----------------------------------------------------------------------
+
+
+#===========================================================================
+class Pty(PlmLink):
+    """Pseudo terminal link.
+
+    connect() creates a pty and the bridge uses the slave device (see the
+    path attribute) as the serial port.  The simulator keeps the slave open
+    as well so the link stays up when the bridge restarts.
+    """
+    #-----------------------------------------------------------------------
+    def __init__(self, plm):
+        """Constructor
+
+        Args:
+          plm (sim.Plm):  The simulated modem.
+        """
+        super().__init__(plm)
+        self.path = None
+        self._slave = None
+
+    #-----------------------------------------------------------------------
+    def connect(self):
+        """Create the pty.
+
+        Returns:
+          bool:  Returns True if the pty was created.
+        """
+        import tty
+
+        master, slave = os.openpty()
+        tty.setraw(slave)
+        os.set_blocking(master, False)
+
+        self._fd = master
+        self._slave = slave
+        self.path = os.ttyname(slave)
+        LOG.info("Simulated PLM on %s", self.path)
+        return True
+
+    #-----------------------------------------------------------------------
+    def close(self):
+        """Close the pty.
+        """
+        if self._fd is None:
+            return
+
+        # The manager needs the file descriptor to remove the link.
+        self.signal_closing.emit(self)
+
+        os.close(self._fd)
+        os.close(self._slave)
+        self._fd = self._slave = None
+        self._write_buf = bytes()
+
+    #-----------------------------------------------------------------------
+    def _read(self):
+        """Read bytes from the pty.
+
+        Returns:
+          bytes:  Returns the data that was read.
+        """
+        return os.read(self._fd, self.read_buf_size)
+
+    #-----------------------------------------------------------------------
+    def _write(self, data):
+        """Write bytes to the pty.
+
+        Args:
+          data (bytes):  The data to write.
+
+        Returns:
+          int:  Returns the number of bytes written.
+        """
+        return os.write(self._fd, data)
+
+    #-----------------------------------------------------------------------
+    def __str__(self):
+        return "Sim Pty %s" % self.path
+
+    #-----------------------------------------------------------------------
+
+
+#===========================================================================
+class Tcp(Link):
+    """TCP socket listener.
+
+    The bridge connects with a socket://HOST:PORT serial port.  Each
+    accepted connection is a TcpClient emitted with signal_new_client so it
+    can be added to the network manager.  Only one client talks to the Plm
+    at a time so an existing client is closed when a new one connects.
+    """
+    #-----------------------------------------------------------------------
+    def __init__(self, plm, host="127.0.0.1", port=9761):
+        """Constructor
+
+        Args:
+          plm (sim.Plm):  The simulated modem.
+          host (str):  The address to listen on.
+          port (int):  The port to listen on.  0 picks a free port.
+        """
+        # Emitted when a client connects.  signature: (TcpClient link)
+        self.signal_new_client = Signal()
+
+        super().__init__()
+
+        self.plm = plm
+        self.host = host
+        self.port = port
+        self.client = None
+        self._socket = None
+        self._fd = None
+
+    #-----------------------------------------------------------------------
+    def connect(self):
+        """Create the socket and start listening.
+
+        Returns:
+          bool:  Returns True if the socket was created or False if it
+          failed.
+        """
+        try:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.bind((self.host, self.port))
+            sock.listen(1)
+            sock.setblocking(False)
+        except OSError as e:
+            LOG.error("Simulated PLM socket %s:%s failed: %s", self.host,
+                      self.port, e)
+            return False
+
+        self._socket = sock
+        self._fd = sock.fileno()
+        self.port = sock.getsockname()[1]
+        LOG.info("Simulated PLM on socket://%s:%s", self.host, self.port)
+        return True
+
+    #-----------------------------------------------------------------------
+    def fileno(self):
+        """Return the file descriptor to watch for this link.
+
+        Returns:
+          int:  Returns the descriptor (obj.fileno() usually) to monitor.
+        """
+        assert self._fd
+        return self._fd
+
+    #-----------------------------------------------------------------------
+    def read_from_link(self):
+        """Accept a client connection.
+
+        Returns:
+           int:  Return -1 if the link had an error.  Or any other integer
+           to indicate success.
+        """
+        try:
+            sock, addr = self._socket.accept()
+        except OSError:
+            LOG.exception("Simulated PLM accept error")
+            return -1
+
+        sock.setblocking(False)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        LOG.info("Simulated PLM client connected from %s:%s", *addr)
+
+        if self.client:
+            self.client.close()
+
+        self.client = TcpClient(self.plm, sock)
+        self.signal_new_client.emit(self.client)
+        return 0
+
+    #-----------------------------------------------------------------------
+    def poll_dt(self, t):
+        """Return the time in seconds until the next Plm output is due.
+
+        Args:
+          t (float):  The current time.
+
+        Returns:
+          float:  Returns the time in seconds to call poll() by or None if
+          a client is handling the output.
+        """
+        if self._has_client():
+            return None
+
+        next_t = self.plm.next_time()
+        return None if next_t is None else max(0, next_t - t)
+
+    #-----------------------------------------------------------------------
+    def poll(self, t):
+        """Discard the Plm output when there is no client.
+
+        Device activity keeps running while the bridge is disconnected but
+        the messages are lost like they would be with a real modem.
+
+        Args:
+           t (float):  Current Unix clock time tag.
+        """
+        if not self._has_client():
+            self.plm.pop_due(t)
+
+    #-----------------------------------------------------------------------
+    def _has_client(self):
+        """Return True if a client is connected.
+        """
+        return self.client is not None and self.client._fd is not None
+
+    #-----------------------------------------------------------------------
+    def write_to_link(self, t):
+        """Write data from the link.
+
+        The listener never writes so this just removes the write flag.
+
+        Args:
+           t (float):  The current time (time.time).
+        """
+        self.signal_needs_write.emit(self, False)
+
+    #-----------------------------------------------------------------------
+    def close(self):
+        """Close the socket and any connected client.
+        """
+        if not self._fd:
+            return
+
+        if self.client:
+            self.client.close()
+            self.client = None
+
+        # The manager needs the file descriptor to remove the link.
+        self.signal_closing.emit(self)
+
+        self._socket.close()
+        self._socket = None
+        self._fd = None
+
+    #-----------------------------------------------------------------------
+
+
+#===========================================================================
+class TcpClient(PlmLink):
+    """A bridge connected to the Tcp listener.
+    """
+    #-----------------------------------------------------------------------
+    def __init__(self, plm, sock):
+        """Constructor
+
+        Args:
+          plm (sim.Plm):  The simulated modem.
+          sock (socket.socket):  The connected client socket.
+        """
+        super().__init__(plm)
+        self._socket = sock
+        self._fd = sock.fileno()
+
+    #-----------------------------------------------------------------------
+    def close(self):
+        """Close the client connection.
+        """
+        if self._fd is None:
+            return
+
+        LOG.info("Simulated PLM client closing")
+
+        # The manager needs the file descriptor to remove the link.
+        self.signal_closing.emit(self)
+
+        self._socket.close()
+        self._socket = None
+        self._fd = None
+        self._write_buf = bytes()
+
+    #-----------------------------------------------------------------------
+    def _read(self):
+        """Read bytes from the socket.
+
+        Returns:
+          bytes:  Returns the data that was read.
+        """
+        return self._socket.recv(self.read_buf_size)
+
+    #-----------------------------------------------------------------------
+    def _write(self, data):
+        """Write bytes to the socket.
+
+        Args:
+          data (bytes):  The data to write.
+
+        Returns:
+          int:  Returns the number of bytes written.
+        """
+        return self._socket.send(data)
+
+    #-----------------------------------------------------------------------
+
+
+#===========================================================================
+class Direct(Link):
+    """In process link between the bridge and the simulated PLM.
+
+    This replaces network.Serial so the Protocol talks to the Plm without a
+    pty or socket.  Writes are passed to the Plm when they're due and the
+    Plm output is emitted with signal_read when it's due.  All the timing
+    is reported with poll_dt() so this works with network.VirtualManager to
+    run simulations in virtual time.
+
+    The manager needs a file descriptor to watch so the read end of a pipe
+    that is never written to is used.  All the work is done in poll().
+    """
+    #-----------------------------------------------------------------------
+    def __init__(self, plm):
+        """Constructor
+
+        Args:
+          plm (sim.Plm):  The simulated modem.
+        """
+        # Public signals to connect to for read/write notification.
+        self.signal_read = Signal()   # (Direct, bytes)
+        self.signal_wrote = Signal()  # (Direct, bytes)
+
+        super().__init__()
+
+        self.plm = plm
+        self._pipe = None
+
+        # List of (bytes, time) packets to write.  Each is written after
+        # the time like network.Serial does.
+        self._write_buf = []
+
+    #-----------------------------------------------------------------------
+    def load_config(self, config):
+        """Load a configuration dictionary.
+
+        The port and other serial settings aren't used.
+
+        Args:
+          config (dict):  Configuration data to load.
+        """
+        pass
+
+    #-----------------------------------------------------------------------
+    def connect(self):
+        """Connect the link.
+
+        Returns:
+          bool:  Returns True.
+        """
+        self._pipe = os.pipe()
+        return True
+
+    #-----------------------------------------------------------------------
+    def fileno(self):
+        """Return the file descriptor to watch for this link.
+
+        Returns:
+          int:  Returns the descriptor (obj.fileno() usually) to monitor.
+        """
+        assert self._pipe
+        return self._pipe[0]
+
+    #-----------------------------------------------------------------------
+    def write(self, data, after_time=None):
+        """Schedule data for writing to the Plm.
+
+        Args:
+          data (bytes):  The data to write.
+          after_time (float):  Time after which to write the data.  If None,
+                     the data is written on the next poll.
+        """
+        self._write_buf.append((data, after_time or 0))
+
+    #-----------------------------------------------------------------------
+    def poll_dt(self, t):
+        """Return the time in seconds until the next write or Plm output.
+
+        Args:
+          t (float):  The current time.
+
+        Returns:
+          float:  Returns the time in seconds to call poll() by or None if
+          nothing is scheduled.
+        """
+        times = [self.plm.next_time()]
+        if self._write_buf:
+            times.append(self._write_buf[0][1])
+
+        times = [i for i in times if i is not None]
+        return max(0, min(times) - t) if times else None
+
+    #-----------------------------------------------------------------------
+    def poll(self, t):
+        """Write the data that is due and emit the Plm output that is due.
+
+        Args:
+           t (float):  Current Unix clock time tag.
+        """
+        while self._write_buf and t >= self._write_buf[0][1]:
+            data = self._write_buf.pop(0)[0]
+            self.plm.feed(data, t)
+            self.signal_wrote.emit(self, data)
+
+        data = self.plm.pop_due(t)
+        if data:
+            self.signal_read.emit(self, data)
+
+    #-----------------------------------------------------------------------
+    def read_from_link(self):
+        """Read data from the link.
+
+        The pipe is never written to so this isn't called.
+
+        Returns:
+           int:  Returns 0 for success.
+        """
+        return 0
+
+    #-----------------------------------------------------------------------
+    def write_to_link(self, t):
+        """Write data from the link.
+
+        Writes are handled in poll() so this just removes the write flag.
+
+        Args:
+           t (float):  The current time (time.time).
+        """
+        self.signal_needs_write.emit(self, False)
+
+    #-----------------------------------------------------------------------
+    def close(self):
+        """Close the link.
+        """
+        if not self._pipe:
+            return
+
+        # The manager needs the file descriptor to remove the link.
+        self.signal_closing.emit(self)
+
+        os.close(self._pipe[0])
+        os.close(self._pipe[1])
+        self._pipe = None
+        self._write_buf = []
+
+    #-----------------------------------------------------------------------
+    def __str__(self):
+        return "Sim Direct %s" % self.plm.addr
+
+    #-----------------------------------------------------------------------
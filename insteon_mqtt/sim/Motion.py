@@ -0,0 +1,52 @@
+#===========================================================================
+#
+# Simulated motion sensor device.
+#
+#===========================================================================
+from .Device import Device
+
+
+class Motion(Device):
+    """Simulated battery powered motion sensor.
+
+    The sensor is asleep so it never replies to direct commands.  Activity
+    sends motion on (group 1) and then motion off a while later.
+    """
+    cat = 0x10
+    sub_cat = 0x01
+    config_type = "motion"
+
+    # Time in seconds between motion on and off.
+    off_delay = 30.0
+
+    #-----------------------------------------------------------------------
+    def handle(self, flags, cmd1, cmd2, data):
+        """Process a direct command sent to the device.
+
+        Battery devices are asleep so the command is ignored.
+
+        Args:
+          flags (int):  The message flags byte.
+          cmd1 (int):  The command byte 1.
+          cmd2 (int):  The command byte 2.
+          data (bytes):  The extended message data or None.
+
+        Returns:
+          list:  Returns an empty list.
+        """
+        self.stats["received"] += 1
+        return []
+
+    #-----------------------------------------------------------------------
+    def activity(self):
+        """Send a motion on and off pair.
+
+        Returns:
+          list:  Returns a list of (delay, bytes) messages to send to the
+          modem.
+        """
+        on = self.group_cmd(1, 0x11)
+        off = self.group_cmd(1, 0x13)
+        return on + [(dt + self.off_delay, msg) for dt, msg in off]
+
+    #-----------------------------------------------------------------------
@@ -0,0 +1,386 @@
+#===========================================================================
+#
+# Simulated PLM modem.
+#
+#===========================================================================
+import heapq
+import random
+from .. import log
+from .. import message as Msg
+from ..Address import Address
+
+LOG = log.get_logger(__name__)
+
+# PLM ACK and NAK bytes.
+ACK = 0x06
+NAK = 0x15
+
+
+class Plm:
+    """Simulated PLM modem and Insteon network.
+
+    This emulates the serial protocol of an Insteon PLM with a population
+    of simulated devices (see sim.Device) behind it.  It doesn't do any I/O.
+    Bytes written by the host are passed to feed() and the bytes the modem
+    sends back are scheduled in an output queue.  The caller reads the
+    output that is due with pop_due() and uses next_time() to know when to
+    check again.  See sim.Link for the serial port and socket links that
+    connect this to the bridge.
+
+    Each host message is echoed with an ACK (or a NAK at the input rate so
+    the bridge has to resend it).  Messages sent to devices are passed to
+    the device and its replies are queued with the device latency.
+    Messages to addresses that aren't in the population are never answered
+    like a device that is unplugged.
+
+    Device activity (button presses, motion, etc) is scheduled once start()
+    is called.  All random choices use a single generator so a run with the
+    same seed and the same input is repeatable.
+    """
+    #-----------------------------------------------------------------------
+    def __init__(self, addr="44.85.11", nak_rate=0.0, echo_time=0.005,
+                 seed=None):
+        """Constructor
+
+        Args:
+          addr:  The modem address.  See Address for inputs.
+          nak_rate (float):  Probability [0,1] that a host message is NAK'ed.
+          echo_time (float):  Time in seconds for the modem to echo a host
+                    message.
+          seed:  Random number generator seed.  None to use a random seed.
+        """
+        self.addr = Address(addr)
+        self.nak_rate = nak_rate
+        self.echo_time = echo_time
+        self.rng = random.Random(seed)
+
+        # Modem identification for the get info (0x60) reply.
+        self.cat = 0x03
+        self.sub_cat = 0x15
+        self.firmware = 0x9e
+
+        # Address id -> Device.
+        self.devices = {}
+
+        # Modem all link database as a list of (flags, group, Address, data)
+        # tuples and the index of the next record for the 0x6a command.
+        self.db = []
+        self._db_pos = 0
+
+        # Output queue of (time, seq, bytes) and activity queue of (time,
+        # seq, Device).  seq keeps the ordering stable for equal times.
+        self._output = []
+        self._activity = []
+        self._seq = 0
+
+        # Bytes written by the host that haven't been parsed yet.
+        self._buf = bytes()
+
+        self.stats = {"received" : 0, "sent" : 0, "nak" : 0, "unknown" : 0,
+                      "activity" : 0}
+
+    #-----------------------------------------------------------------------
+    def add(self, device, link=True):
+        """Add a device to the network.
+
+        Args:
+          device (sim.Device):  The device to add.
+          link (bool):  If True, the device and modem are linked like
+               'join' and 'pair' would do so the bridge can read the
+               databases and receive the device broadcasts.
+        """
+        device.modem_addr = self.addr
+        self.devices[device.addr.id] = device
+        if link:
+            self.db.append((0xe2, 0x00, device.addr,
+                            bytes([device.cat, device.sub_cat, 0x00])))
+            self.db.append((0xa2, 0x01, device.addr, bytes(3)))
+            device.add_link(self.addr, 0x00, False)
+            device.add_link(self.addr, 0x01, True)
+
+    #-----------------------------------------------------------------------
+    def start(self, t):
+        """Start the device activity.
+
+        Args:
+          t (float):  The current time.
+        """
+        for device in self.devices.values():
+            self._schedule_activity(device, t)
+
+    #-----------------------------------------------------------------------
+    def feed(self, data, t):
+        """Process bytes written by the host.
+
+        Args:
+          data (bytes):  The bytes that were written.
+          t (float):  The current time.
+        """
+        self._buf += data
+        while self._buf:
+            # Skip anything before the start of message byte.
+            start = self._buf.find(0x02)
+            if start == -1:
+                self._buf = bytes()
+                return
+            self._buf = self._buf[start:]
+
+            size = self._msg_size(self._buf)
+            if size is None:
+                # Unknown message code.  Drop the start byte and NAK it.
+                self.stats["unknown"] += 1
+                self._buf = self._buf[1:]
+                self._send(t + self.echo_time, bytes([NAK]))
+                continue
+
+            elif len(self._buf) < size:
+                return
+
+            raw, self._buf = self._buf[:size], self._buf[size:]
+            self.stats["received"] += 1
+            self._handle(raw, t)
+
+    #-----------------------------------------------------------------------
+    def next_time(self):
+        """Return the time of the next scheduled output.
+
+        Returns:
+          float:  Returns the time the next output or activity is due or
+          None if nothing is scheduled.
+        """
+        times = [q[0][0] for q in (self._output, self._activity) if q]
+        return min(times) if times else None
+
+    #-----------------------------------------------------------------------
+    def pop_due(self, t):
+        """Return all the output that is due.
+
+        Args:
+          t (float):  The current time.
+
+        Returns:
+          bytes:  Returns the bytes the modem sends to the host.  This is
+          empty if nothing is due.
+        """
+        while self._activity and self._activity[0][0] <= t:
+            act_t, _seq, device = heapq.heappop(self._activity)
+            self.stats["activity"] += 1
+            for dt, msg in device.activity():
+                self._send(act_t + dt, msg)
+
+            self._schedule_activity(device, act_t)
+
+        out = []
+        while self._output and self._output[0][0] <= t:
+            out.append(heapq.heappop(self._output)[2])
+
+        self.stats["sent"] += len(out)
+        return b"".join(out)
+
+    #-----------------------------------------------------------------------
+    def _msg_size(self, raw):
+        """Return the size of a host message.
+
+        Args:
+          raw (bytes):  The input bytes starting with 0x02.
+
+        Returns:
+          int:  Returns the number of bytes in the message or None if the
+          message code is unknown.
+        """
+        if len(raw) < 2:
+            return 2
+
+        # Get IM info.
+        if raw[1] == 0x60:
+            return 2
+
+        msg_class = Msg.types.get(raw[1], None)
+        if msg_class is None or raw[1] < 0x60:
+            return None
+
+        # Send standard or extended.  The size depends on the flags byte.
+        # The message class can't be used here because it only reads the
+        # flags once there is a full standard message with the ACK byte.
+        if raw[1] == 0x62:
+            if len(raw) < 6:
+                return 6
+
+            is_ext = Msg.Flags.from_bytes(raw, 5).is_ext
+            out_class = Msg.OutExtended if is_ext else Msg.OutStandard
+            return out_class.fixed_msg_size - 1
+
+        # The message class size includes the ACK byte the modem adds.
+        return msg_class.msg_size(raw) - 1
+
+    #-----------------------------------------------------------------------
+    def _handle(self, raw, t):
+        """Process a host message.
+
+        Args:
+          raw (bytes):  The complete message.
+          t (float):  The time the message was written.
+        """
+        t_echo = t + self.echo_time
+        if self.rng.random() < self.nak_rate:
+            self.stats["nak"] += 1
+            self._send(t_echo, raw + bytes([NAK]))
+            return
+
+        code = raw[1]
+        if code == 0x60:
+            self._send(t_echo, raw + self.addr.to_bytes() +
+                       bytes([self.cat, self.sub_cat, self.firmware, ACK]))
+
+        elif code == 0x62:
+            self._send(t_echo, raw + bytes([ACK]))
+            self._handle_send(raw, t_echo)
+
+        elif code == 0x61:
+            self._send(t_echo, raw + bytes([ACK]))
+            self._handle_scene(raw, t_echo)
+
+        elif code == 0x69:
+            self._db_pos = 0
+            self._send_db_record(raw, t_echo)
+
+        elif code == 0x6a:
+            self._send_db_record(raw, t_echo)
+
+        elif code == 0x6f:
+            self._send(t_echo, raw + bytes([self._update_db(raw)]))
+
+        elif code == 0x67:
+            self.db = []
+            self._send(t_echo, raw + bytes([ACK]))
+
+        # Linking mode and cancel.  Nothing ever links so these are just
+        # ACK'ed.
+        else:
+            self._send(t_echo, raw + bytes([ACK]))
+
+    #-----------------------------------------------------------------------
+    def _handle_send(self, raw, t):
+        """Pass a standard or extended message to the device.
+
+        Args:
+          raw (bytes):  The 0x62 message.
+          t (float):  The time the message was sent.
+        """
+        device = self.devices.get(Address.from_bytes(raw, 2).id, None)
+        if device is None:
+            return
+
+        flags = raw[5]
+        data = raw[8:22] if len(raw) > 8 else None
+        for dt, msg in device.handle(flags, raw[6], raw[7], data):
+            self._send(t + dt, msg)
+
+    #-----------------------------------------------------------------------
+    def _handle_scene(self, raw, t):
+        """Send a modem scene to the responders.
+
+        Each responder ACKs the cleanup message and then the modem reports
+        the cleanup status.
+
+        Args:
+          raw (bytes):  The 0x61 message.
+          t (float):  The time the message was sent.
+        """
+        group, cmd1, cmd2 = raw[2], raw[3], raw[4]
+        for flags, db_group, addr, _data in self.db:
+            device = self.devices.get(addr.id, None)
+            if device is None or db_group != group or not flags & 0x40:
+                continue
+
+            t += device.reply_time()
+            if self.rng.random() < device.drop_rate:
+                continue
+
+            device.level = 0xff if cmd1 in (0x11, 0x12) else 0x00
+            self._send(t, device.msg(self.addr, Msg.Flags.Type.CLEANUP_ACK,
+                                     cmd1, cmd2))
+
+        self._send(t + self.echo_time, bytes([0x02, 0x58, ACK]))
+
+    #-----------------------------------------------------------------------
+    def _send_db_record(self, raw, t):
+        """Reply to a get first/next database record message.
+
+        Args:
+          raw (bytes):  The 0x69 or 0x6a message.
+          t (float):  The time the message was sent.
+        """
+        if self._db_pos >= len(self.db):
+            self._send(t, raw + bytes([NAK]))
+            return
+
+        flags, group, addr, data = self.db[self._db_pos]
+        self._db_pos += 1
+        self._send(t, raw + bytes([ACK]))
+        self._send(t + self.echo_time, bytes([0x02, 0x57, flags, group]) +
+                   addr.to_bytes() + data)
+
+    #-----------------------------------------------------------------------
+    def _update_db(self, raw):
+        """Change the modem database.
+
+        Args:
+          raw (bytes):  The 0x6f message.
+
+        Returns:
+          int:  Returns the ACK or NAK byte for the reply.
+        """
+        cmd, flags, group = raw[2], raw[3], raw[4]
+        addr, data = Address.from_bytes(raw, 5), raw[8:11]
+        Cmd = Msg.OutAllLinkUpdate.Cmd
+
+        def matches(entry):
+            return (entry[2] == addr and entry[1] == group and
+                    entry[0] & 0x40 == flags & 0x40)
+
+        index = next((i for i, e in enumerate(self.db) if matches(e)), None)
+        if cmd in (Cmd.ADD_CONTROLLER, Cmd.ADD_RESPONDER):
+            flags = 0xe2 if cmd == Cmd.ADD_CONTROLLER else 0xa2
+            entry = (flags, group, addr, data)
+            if index is None:
+                self.db.append(entry)
+            else:
+                self.db[index] = entry
+
+        elif index is None:
+            return NAK
+
+        elif cmd == Cmd.UPDATE:
+            self.db[index] = (flags, group, addr, data)
+
+        elif cmd == Cmd.DELETE:
+            del self.db[index]
+
+        return ACK
+
+    #-----------------------------------------------------------------------
+    def _schedule_activity(self, device, t):
+        """Schedule the next activity for a device.
+
+        Args:
+          device (sim.Device):  The device to schedule.
+          t (float):  The current time.
+        """
+        act_t = device.next_activity(t)
+        if act_t is not None:
+            self._seq += 1
+            heapq.heappush(self._activity, (act_t, self._seq, device))
+
+    #-----------------------------------------------------------------------
+    def _send(self, t, data):
+        """Schedule bytes to send to the host.
+
+        Args:
+          t (float):  The time to send the bytes.
+          data (bytes):  The bytes to send.
+        """
+        self._seq += 1
+        heapq.heappush(self._output, (t, self._seq, data))
+
+    #-----------------------------------------------------------------------
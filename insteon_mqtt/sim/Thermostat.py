@@ -0,0 +1,120 @@
+#===========================================================================
+#
+# Simulated thermostat device.
+#
+#===========================================================================
+from ..message import Flags
+from .Device import Device
+
+
+class Thermostat(Device):
+    """Simulated thermostat.
+
+    Replies to the extended status request (0x2e 0x02) with the ambient
+    temperature, humidity, mode, and set points.  Activity drifts the
+    temperature and sends the heating or cooling group broadcasts when the
+    temperature crosses a set point.
+    """
+    cat = 0x05
+    sub_cat = 0x0b
+    config_type = "thermostat"
+
+    # Group numbers for heating and cooling broadcasts.
+    COOLING = 0x01
+    HEATING = 0x02
+
+    #-----------------------------------------------------------------------
+    def __init__(self, addr, **kwargs):
+        """Constructor
+
+        Args:
+          addr:  The device address.  See Address for inputs.
+          kwargs:  Device constructor arguments.
+        """
+        super().__init__(addr, **kwargs)
+
+        # Temperatures are in Celsius.
+        self.temp = 21.0
+        self.humidity = 40
+        self.heat_sp = 20
+        self.cool_sp = 24
+
+        # Mode is auto (0x01) with fan auto.
+        self.mode = 0x01
+        self.hvac = None
+
+    #-----------------------------------------------------------------------
+    def command(self, cmd1, cmd2, data):
+        """Return the replies to a command.
+
+        Args:
+          cmd1 (int):  The command byte 1.
+          cmd2 (int):  The command byte 2.
+          data (bytes):  The extended message data or None.
+
+        Returns:
+          list:  Returns a list of message bytes to send in order.
+        """
+        if cmd1 == 0x2e and cmd2 == 0x02:
+            return [self.ack(cmd1, cmd2),
+                    self.ext_msg(self.modem_addr, Flags.Type.DIRECT, cmd1,
+                                 cmd2, self.status_data())]
+
+        # Set the heat or cool set point (cmd2 is 2x the temperature).
+        elif cmd1 in (0x6c, 0x6d):
+            if cmd1 == 0x6c:
+                self.cool_sp = cmd2 // 2
+            else:
+                self.heat_sp = cmd2 // 2
+            return [self.ack(cmd1, cmd2)]
+
+        return super().command(cmd1, cmd2, data)
+
+    #-----------------------------------------------------------------------
+    def status_data(self):
+        """Return the extended status reply data.
+
+        Returns:
+          bytes:  Returns the 14 data bytes.
+        """
+        temp = int(self.temp * 10)
+        return bytes([
+            0x01, 0x00, 0x00, 0x00, 0x00,  # D1-D5 day and time.
+            self.mode << 4,                # D6 mode and fan.
+            self.cool_sp,                  # D7
+            self.humidity,                 # D8
+            temp >> 8, temp & 0xff,        # D9-D10 temp * 10
+            0x08,                          # D11 status flag: Celsius.
+            self.heat_sp,                  # D12
+            0x00, 0x00])
+
+    #-----------------------------------------------------------------------
+    def activity(self):
+        """Change the temperature and send any heating/cooling changes.
+
+        Returns:
+          list:  Returns a list of (delay, bytes) messages to send to the
+          modem.
+        """
+        self.temp = round(self.temp + self.rng.uniform(-0.5, 0.5), 1)
+        if self.temp < self.heat_sp:
+            hvac = self.HEATING
+        elif self.temp > self.cool_sp:
+            hvac = self.COOLING
+        else:
+            hvac = None
+
+        if hvac == self.hvac:
+            return []
+
+        msgs = []
+        if self.hvac is not None:
+            msgs.extend(self.group_cmd(self.hvac, 0x13))
+
+        self.hvac = hvac
+        if hvac is not None:
+            msgs.extend(self.group_cmd(hvac, 0x11))
+
+        return msgs
+
+    #-----------------------------------------------------------------------
@@ -0,0 +1,33 @@
+#===========================================================================
+#
+# Simulated PLM modem and devices
+#
+#===========================================================================
+# flake8: noqa
+
+__doc__ = """Simulated PLM modem and device package
+
+This package emulates a PLM modem and a population of Insteon devices so the
+bridge can be run and load tested without hardware.  The simulated modem is
+served on a pty or TCP socket which network.Serial connects to like a real
+modem.  Run it with:
+
+   python -m insteon_mqtt.sim [spec.yaml] [--port PORT]
+"""
+
+#===========================================================================
+from ..util import lazy_import
+
+lazy_import(__name__, {
+    "Device"     : "Device:Device",
+    "Dimmer"     : "Dimmer:Dimmer",
+    "Direct"     : "Link:Direct",
+    "KeypadLinc" : "KeypadLinc:KeypadLinc",
+    "Motion"     : "Motion:Motion",
+    "Plm"        : "Plm:Plm",
+    "Pty"        : "Link:Pty",
+    "Tcp"        : "Link:Tcp",
+    "Thermostat" : "Thermostat:Thermostat",
+    "population" : "population",
+    "run"        : "run",
+    })
@@ -0,0 +1,8 @@
+#===========================================================================
+#
+# Run the simulated PLM: python -m insteon_mqtt.sim
+#
+#===========================================================================
+from .run import main
+
+main()
@@ -0,0 +1,138 @@
+#===========================================================================
+#
+# Simulated device population.
+#
+#===========================================================================
+import yaml
+from ..Address import Address
+from .Device import I1, I2CS
+from .Dimmer import Dimmer
+from .KeypadLinc import KeypadLinc
+from .Motion import Motion
+from .Plm import Plm
+from .Thermostat import Thermostat
+
+# Population spec key -> simulated device class.
+device_types = {
+    'dimmer' : Dimmer,
+    'keypad_linc' : KeypadLinc,
+    'motion' : Motion,
+    'thermostat' : Thermostat,
+    }
+
+# Default population spec.  Activity is the mean time in seconds between
+# events for each device type.  hops and db_size are [min, max] ranges.
+DEFAULTS = {
+    'seed' : None,
+    'modem' : '44.85.11',
+    'nak_rate' : 0.0,
+    'echo_time' : 0.005,
+    'devices' : {'dimmer' : 10, 'keypad_linc' : 2, 'motion' : 2,
+                 'thermostat' : 1},
+    'activity' : {'dimmer' : 0, 'keypad_linc' : 600, 'motion' : 300,
+                  'thermostat' : 900},
+    'hops' : [0, 3],
+    'latency' : 0.05,
+    'drop_rate' : 0.0,
+    'i1_fraction' : 0.0,
+    'db_size' : [0, 10],
+    }
+
+
+#===========================================================================
+def load(path):
+    """Load a population spec file and build the simulated modem.
+
+    Args:
+      path (str):  The YAML spec file to read.  See DEFAULTS for the keys.
+
+    Returns:
+      sim.Plm:  Returns the simulated modem with the devices added.
+    """
+    with open(path, "r") as f:
+        spec = yaml.safe_load(f) or {}
+
+    return build(spec)
+
+
+#===========================================================================
+def build(spec=None):
+    """Build a simulated modem and device population.
+
+    Device addresses are assigned in order starting at 10.00.01 so the same
+    spec always creates the same addresses.  Each device is linked to the
+    modem and gets a random number of extra database records (db_size) to
+    make database downloads realistic.
+
+    Args:
+      spec (dict):  The population spec.  Missing keys use DEFAULTS.
+
+    Returns:
+      sim.Plm:  Returns the simulated modem with the devices added.
+    """
+    spec = dict(DEFAULTS, **(spec or {}))
+    counts = spec['devices']
+    activity = dict(DEFAULTS['activity'], **spec.get('activity', {}))
+
+    plm = Plm(spec['modem'], nak_rate=spec['nak_rate'],
+              echo_time=spec['echo_time'], seed=spec['seed'])
+    rng = plm.rng
+
+    addr_id = 0x100000
+    for name, count in counts.items():
+        dev_class = device_types.get(name, None)
+        if dev_class is None:
+            raise ValueError("Unknown simulated device type '%s'.  Valid "
+                             "types are: %s" % (name, list(device_types)))
+
+        for i in range(count or 0):
+            addr_id += 1
+            engine = I1 if rng.random() < spec['i1_fraction'] else I2CS
+            device = dev_class(addr_id, engine=engine,
+                               hops=rng.randint(*spec['hops']),
+                               latency=spec['latency'],
+                               drop_rate=spec['drop_rate'],
+                               activity=activity.get(name, 0), rng=rng)
+            plm.add(device)
+
+            for j in range(rng.randint(*spec['db_size'])):
+                other = Address(0x100001 + rng.randrange(addr_id - 0xfffff))
+                device.add_link(other, rng.randint(1, 8), rng.random() < 0.5)
+
+    return plm
+
+
+#===========================================================================
+def devices_config(plm):
+    """Return the bridge config devices section for a simulated modem.
+
+    Args:
+      plm (sim.Plm):  The simulated modem.
+
+    Returns:
+      dict:  Returns the devices config with a list of addresses for each
+      device type.  The modem address isn't included.
+    """
+    config = {}
+    for device in plm.devices.values():
+        config.setdefault(device.config_type, []).append(str(device.addr))
+
+    return config
+
+
+#===========================================================================
+def write_config(plm, path):
+    """Write the bridge config devices section to a file.
+
+    The file can be used in the bridge config with:
+
+       devices: !include devices.yaml
+
+    Args:
+      plm (sim.Plm):  The simulated modem.
+      path (str):  The file to write.
+    """
+    with open(path, "w") as f:
+        yaml.safe_dump(devices_config(plm), f, default_flow_style=False)
+
+#===========================================================================
@@ -0,0 +1,101 @@
+#===========================================================================
+#
+# Simulated PLM server.
+#
+#===========================================================================
+import argparse
+import signal
+import yaml
+from .. import clock
+from .. import log
+from .. import network
+from . import population
+from .Link import Pty, Tcp
+
+LOG = log.get_logger(__name__)
+
+
+def main(args=None):
+    """Run the simulated PLM server.
+
+    This never returns until the process is interrupted.
+
+    Args:
+      args ([str]):  The command line arguments.  None to use sys.argv.
+    """
+    p = argparse.ArgumentParser(
+        prog="python -m insteon_mqtt.sim",
+        description="Simulated Insteon PLM and devices for testing the "
+        "bridge without a modem.  Set the bridge insteon port to the pty "
+        "path or to socket://HOST:PORT.")
+    p.add_argument("spec", nargs="?", help="Population spec YAML file.  See "
+                   "insteon_mqtt.sim.population.DEFAULTS for the keys.")
+    p.add_argument("--port", type=int, default=None, help="Listen on this "
+                   "TCP port instead of creating a pty.")
+    p.add_argument("--host", default="127.0.0.1", help="Address to listen "
+                   "on with --port.")
+    p.add_argument("--seed", type=int, default=None, help="Random number "
+                   "seed.  Overrides the spec file.")
+    p.add_argument("--devices", metavar="FILE", help="Write the bridge "
+                   "config devices section to this file.")
+    p.add_argument("--level", default="INFO", help="Logging level.")
+    args = p.parse_args(args)
+
+    log.initialize(level=args.level, screen=True)
+
+    if args.spec:
+        with open(args.spec, "r") as f:
+            spec = yaml.safe_load(f) or {}
+    else:
+        spec = {}
+
+    if args.seed is not None:
+        spec['seed'] = args.seed
+
+    plm = population.build(spec)
+    LOG.info("Simulating %d devices behind modem %s", len(plm.devices),
+             plm.addr)
+
+    if args.devices:
+        population.write_config(plm, args.devices)
+        LOG.info("Wrote devices config to %s", args.devices)
+
+    run(plm, args.port, args.host)
+
+
+#===========================================================================
+def run(plm, port=None, host="127.0.0.1"):
+    """Serve the simulated modem until the process is interrupted.
+
+    Args:
+      plm (sim.Plm):  The simulated modem.
+      port (int):  TCP port to listen on.  None to create a pty.
+      host (str):  The address to listen on for TCP.
+    """
+    loop = network.Manager()
+    if port is None:
+        link = Pty(plm)
+    else:
+        link = Tcp(plm, host, port)
+        link.signal_new_client.connect(loop.add)
+
+    if not link.connect():
+        return
+
+    loop.add(link)
+    plm.start(clock.time())
+
+    def stop(signum, frame):
+        raise KeyboardInterrupt()
+
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        while loop.active():
+            loop.select()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        LOG.info("Simulated PLM stats: %s", plm.stats)
+        loop.close_all()
+
+#===========================================================================
@@ -4,7 +4,10 @@
 #
 #===========================================================================
 import binascii
+import importlib
 import io
+import sys
+import types
 
 
 def to_hex(data, num=None, space=' '):
@@ -280,3 +283,81 @@ def input_byte(inputs, field):
     except ValueError:
         msg = "Invalid %s input.  Valid inputs are 0-255" % input
         raise ValueError(msg)
+
+
+#===========================================================================
+def lazy_import(package, attrs):
+    """Import package attributes the first time they're used.
+
+    This is called from a package __init__ to replace the usual 'from .Foo
+    import Foo' imports so importing the package doesn't import every
+    module in it.  Each attribute is imported from it's module the first
+    time it's accessed.
+
+        util.lazy_import(__name__, {
+            "Dimmer" : "Dimmer:Dimmer",   # class Dimmer in module Dimmer
+            "util" : "util",              # module util
+            })
+
+    Args:
+      package (str):  The package module name (__name__).
+      attrs (dict):  Map of attribute name to 'module' or 'module:attr'.
+            Module names are relative to the package.
+    """
+    module = sys.modules[package]
+    module.__class__ = LazyPackage
+    module._lazy_attrs = attrs
+
+
+class LazyPackage(types.ModuleType):
+    """Package module with attributes that are imported when used.
+
+    See lazy_import() for details.
+    """
+    def __getattr__(self, name):
+        """Import an attribute that hasn't been used yet.
+
+        Args:
+          name (str):  The attribute name.
+
+        Returns:
+          Returns the module or module attribute.
+        """
+        target = self.__dict__.get("_lazy_attrs", {}).get(name, None)
+        if target is None:
+            raise AttributeError("module '%s' has no attribute '%s'" %
+                                 (self.__name__, name))
+
+        mod_name, _, attr = target.partition(":")
+        value = importlib.import_module("." + mod_name, self.__name__)
+        if attr:
+            value = getattr(value, attr)
+
+        super().__setattr__(name, value)
+        return value
+
+    #-----------------------------------------------------------------------
+    def __setattr__(self, name, value):
+        """Set an attribute.
+
+        Importing a submodule sets the package attribute with the same name
+        to the module.  That's skipped for class attributes with the same
+        name as their module (Dimmer:Dimmer) so the class is still used.
+
+        Args:
+          name (str):  The attribute name.
+          value:  The attribute value.
+        """
+        target = self.__dict__.get("_lazy_attrs", {}).get(name, "")
+        if ":" in target and isinstance(value, types.ModuleType):
+            return
+
+        super().__setattr__(name, value)
+
+    #-----------------------------------------------------------------------
+    def __dir__(self):
+        """Return the package attributes including unused lazy ones.
+        """
+        return sorted(set(super().__dir__()) | set(self._lazy_attrs))
+
+#===========================================================================
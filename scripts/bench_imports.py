@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+#===========================================================================
+#
+# Benchmark the package import time.
+#
+# Runs 'python -X importtime' for the command line tool and the server
+# modules several times and prints the median total import time and the
+# slowest modules.  If a maximum time is given, the exit status is 1 if the
+# command line import is slower than that so this can be used as a
+# regression check.
+#
+# Usage: bench_imports.py [num_runs] [max_cli_ms]
+#
+#===========================================================================
+import statistics
+import subprocess
+import sys
+
+# Modules to import.  The first is the command line tool.
+TARGETS = [
+    "insteon_mqtt.cmd_line.main",
+    "insteon_mqtt.cmd_line.start",
+    ]
+
+# Modules the command line tool should not import.  These are only needed
+# by the server.
+CLI_EXCLUDE = ["paho", "jinja2", "serial", "insteon_mqtt.Modem",
+               "insteon_mqtt.Protocol", "insteon_mqtt.mqtt.Mqtt"]
+
+
+def import_times(module):
+    """Return a dict of module name to (self, cumulative) import time in us.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c",
+                             "import " + module], stderr=subprocess.PIPE,
+                            universal_newlines=True, check=True)
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+
+        self_us, cumulative_us, name = line[12:].split("|")
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+
+    return times
+
+
+def main(num=5, max_ms=None):
+    status = 0
+    for module in TARGETS:
+        runs = [import_times(module) for i in range(num)]
+        total = statistics.median(i[module][1] for i in runs) / 1000.0
+        print("%-30s %7.1f ms  %d modules" % (module, total, len(runs[0])))
+
+        slowest = sorted(runs[-1].items(), key=lambda i: -i[1][0])[:5]
+        for name, (self_us, _) in slowest:
+            print("    %7.1f ms  %s" % (self_us / 1000.0, name))
+
+        if module == TARGETS[0]:
+            found = [i for i in CLI_EXCLUDE if i in runs[0]]
+            if found:
+                print("ERROR: command line imports %s" % ", ".join(found))
+                status = 1
+
+            if max_ms is not None and total > max_ms:
+                print("ERROR: command line import is slower than %.1f ms" %
+                      max_ms)
+                status = 1
+
+    return status
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    sys.exit(main(int(args[0]) if args else 5,
+                  float(args[1]) if len(args) > 1 else None))
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+#===========================================================================
+#
+# Benchmark the bridge against the simulated PLM.
+#
+# Builds a simulated device population, connects the modem protocol to it
+# over a pty, and sends a command to every device.  Prints the total time,
+# the command throughput, and the latency from sending each command to its
+# completion callback.  With -r the devices are refreshed (status and
+# database download) instead of turned on.
+#
+# Usage: bench_sim.py [-r] [num_devices] [seed]
+#
+#===========================================================================
+import statistics
+import sys
+import tempfile
+import time
+import insteon_mqtt as IM
+from insteon_mqtt.sim import population
+
+
+def main(args):
+    refresh = "-r" in args
+    args = [i for i in args if i != "-r"]
+    num = int(args[0]) if args else 500
+    seed = int(args[1]) if len(args) > 1 else 1
+
+    spec = {'seed' : seed, 'activity' : {'keypad_linc' : 0, 'motion' : 0,
+                                         'thermostat' : 0},
+            'devices' : {'dimmer' : num * 7 // 10,
+                         'keypad_linc' : num - num * 7 // 10}}
+    plm = population.build(spec)
+
+    loop = IM.network.Manager()
+    pty = IM.sim.Pty(plm)
+    pty.connect()
+    loop.add(pty)
+
+    serial = IM.network.Serial()
+    protocol = IM.Protocol(serial)
+    modem = IM.Modem(protocol)
+    modem.load_config({'port' : pty.path, 'address' : str(plm.addr),
+                       'storage' : tempfile.mkdtemp(),
+                       'devices' : population.devices_config(plm)})
+    loop.add(serial, connected=False)
+
+    latency = []
+    failed = []
+
+    def callback(t0):
+        def on_done(success, msg, data):
+            latency.append(time.time() - t0)
+            if not success:
+                failed.append(msg)
+        return on_done
+
+    t_start = time.time()
+    devices = [i for i in modem.devices.values() if i is not modem]
+    for device in devices:
+        if refresh:
+            device.refresh(force=True, on_done=callback(time.time()))
+        else:
+            device.on(on_done=callback(time.time()))
+
+    while len(latency) < len(devices):
+        loop.select()
+
+    total = time.time() - t_start
+    print("%d devices  %.1f s  %.1f cmd/s  %d failed" %
+          (len(devices), total, len(devices) / total, len(failed)))
+    print("latency s: median %.2f  p90 %.2f  max %.2f" %
+          (statistics.median(latency),
+           sorted(latency)[int(0.9 * len(latency))], max(latency)))
+    print("plm: %s" % plm.stats)
+
+    loop.close_all()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
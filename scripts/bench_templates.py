@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+#===========================================================================
+#
+# Benchmark the MQTT template renderers.
+#
+# Renders each topic and payload template from the mqtt section of a config
+# file with jinja and with the MsgTemplate renderer (which uses FastTemplate
+# when it can) and prints the time per render.
+#
+# Usage: bench_templates.py [config.yaml] [num_renders]
+#
+#===========================================================================
+import sys
+import timeit
+import insteon_mqtt as IM
+from insteon_mqtt.mqtt import FastTemplate, MsgTemplate
+
+# Sample template variables.  Anything missing renders as an empty string.
+DATA = {
+    "address" : "aa.bb.cc", "name" : "kitchen", "button" : 3, "group" : 1,
+    "on" : 1, "on_str" : "on", "level_255" : 128, "level_100" : 50,
+    "level_str" : "on", "mode" : "normal", "fast" : 0, "instant" : 0,
+    "manual_str" : "up", "manual" : 1, "value" : "ON", "count" : 0,
+    "tasks" : "[]", "json" : {"state" : "ON", "brightness" : 128},
+    "temp_f" : 70, "temp_c" : 21, "humid" : 40, "status" : "off",
+    "fan_mode" : "auto", "hold_str" : "off", "energy_str" : "off",
+    "is_wet_str" : "off", "is_low_str" : "off", "is_dawn_str" : "off",
+    "heartbeat_time" : 0,
+    }
+
+
+def templates(config):
+    """Return a sorted list of the unique template strings in a config."""
+    found = set()
+    for section in config["mqtt"].values():
+        if not isinstance(section, dict):
+            continue
+
+        for key, value in section.items():
+            if isinstance(value, str) and (key.endswith("_topic") or
+                                           key.endswith("_payload")):
+                found.add(value)
+
+    return sorted(found)
+
+
+def main(path="config.yaml", num=10000):
+    config = IM.config.load(path)
+    env = MsgTemplate.env
+
+    total_jinja = total_fast = 0.0
+    num_fast = 0
+    for source in templates(config):
+        jinja = env.from_string(source)
+        templ = MsgTemplate.get_template(source)
+        is_fast = isinstance(templ, FastTemplate)
+        num_fast += is_fast
+
+        t_jinja = timeit.timeit(lambda: jinja.render(DATA), number=num)
+        t_fast = timeit.timeit(lambda: templ.render(DATA), number=num)
+        total_jinja += t_jinja
+        total_fast += t_fast
+
+        print("%-4s %7.2f us %7.2f us  %r" % (
+            "fast" if is_fast else "", 1e6 * t_jinja / num,
+            1e6 * t_fast / num, source[:50]))
+
+    print("\n%d templates, %d fast" % (len(templates(config)), num_fast))
+    print("jinja:       %.2f us per render" % (1e6 * total_jinja /
+                                               num / len(templates(config))))
+    print("MsgTemplate: %.2f us per render" % (1e6 * total_fast /
+                                               num / len(templates(config))))
+
+
+if __name__ == "__main__":
+    main(*[int(i) if i.isdigit() else i for i in sys.argv[1:]])
@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+#===========================================================================
+#
+# Print a PLM traffic recorder file.
+#
+# Reads a file written by the modem dump_recorder command (or an automatic
+# dump after a message time out) and prints one line per message with the
+# time, direction, raw bytes, and the decoded message.  Times are relative
+# to the first record unless -a is used.
+#
+# Usage: decode_recorder.py [-a] file.bin
+#
+#===========================================================================
+import datetime
+import sys
+from insteon_mqtt import recorder, util
+
+
+def main(args):
+    absolute = "-a" in args
+    files = [i for i in args if i != "-a"]
+    if len(files) != 1:
+        print("Usage: decode_recorder.py [-a] file.bin")
+        return 1
+
+    records = recorder.read(files[0])
+    if not records:
+        return 0
+
+    t0 = records[0][0]
+    for t, direction, data, msg in recorder.decode(records):
+        if absolute:
+            stamp = datetime.datetime.fromtimestamp(t).strftime(
+                "%Y-%m-%d %H:%M:%S.%f")[:-3]
+        else:
+            stamp = "%10.3f" % (t - t0)
+
+        arrow = "<-" if direction == recorder.READ else "->"
+        text = str(msg) if msg is not None else "(unknown)"
+        print("%s %s %s  %s" % (stamp, arrow, util.to_hex(data), text))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
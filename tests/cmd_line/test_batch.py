@@ -0,0 +1,132 @@
+#===========================================================================
+#
+# Tests for: insteont_mqtt/cmd_line/batch.py
+#
+#===========================================================================
+import io
+import json
+import socket
+import insteon_mqtt as IM
+
+
+class Test_batch:
+    def test_batch(self):
+        client = MockClient()
+        out = io.StringIO()
+        batch = IM.cmd_line.batch.Batch(client, "cmd", jobs=2, out=out)
+
+        batch.load([
+            '{"address" : "aa.bb.cc", "cmd" : "on", "level" : 128}\n',
+            '\n',
+            '# comment\n',
+            '{"address" : "modem", "cmd" : "get_devices"}\n',
+            '{"cmd" : "off"}\n',
+            '{"address" : "kitchen", "cmd" : "off"}\n',
+            ])
+
+        # Bad lines are reported right away.
+        result = json.loads(out.getvalue())
+        assert result["line"] == 5
+        assert result["status"] == "error"
+
+        # Commands are sent up to the job limit.
+        batch._send()
+        assert [i[0] for i in client.pub] == ["cmd/aa.bb.cc", "cmd/modem"]
+        payload = json.loads(client.pub[0][1])
+        assert payload == {"cmd" : "on", "level" : 128,
+                           "session" : batch.id + "/1"}
+
+        reply(batch, "cmd/modem", 4, IM.mqtt.Reply.Type.MESSAGE, "devices")
+        reply(batch, "cmd/modem", 4, IM.mqtt.Reply.Type.END, None)
+        batch._send()
+        assert client.pub[2][0] == "cmd/kitchen"
+
+        reply(batch, "cmd/aa.bb.cc", 1, IM.mqtt.Reply.Type.ERROR, "failed")
+        reply(batch, "cmd/aa.bb.cc", 1, IM.mqtt.Reply.Type.END, None)
+
+        # The last command times out.
+        batch._check_time_out(batch._active[6]["end_time"])
+        assert not batch._active
+
+        results = [json.loads(i) for i in out.getvalue().splitlines()]
+        assert [(i["line"], i["status"]) for i in results] == [
+            (5, "error"), (4, "ok"), (1, "error"), (6, "timeout")]
+        assert results[1]["messages"] == ["devices"]
+        assert results[2]["errors"] == ["failed"]
+        assert batch.num_failed == 3
+
+    #-----------------------------------------------------------------------
+    def test_end_result(self):
+        client = MockClient()
+        out = io.StringIO()
+        batch = IM.cmd_line.batch.Batch(client, "cmd", jobs=2, out=out)
+        batch.load([
+            '{"address" : "aa.bb.cc", "cmd" : "on"}\n',
+            '{"address" : "kitchen", "cmd" : "off"}\n',
+            ])
+        batch._send()
+
+        # Errors logged by another running command don't fail this one.
+        # The END reply result is used instead.
+        reply(batch, "cmd/aa.bb.cc", 1, IM.mqtt.Reply.Type.ERROR, "failed")
+        reply(batch, "cmd/kitchen", 2, IM.mqtt.Reply.Type.ERROR, "failed")
+        reply(batch, "cmd/aa.bb.cc", 1, IM.mqtt.Reply.Type.END, True)
+        reply(batch, "cmd/kitchen", 2, IM.mqtt.Reply.Type.END, False)
+
+        results = [json.loads(i) for i in out.getvalue().splitlines()]
+        assert [(i["line"], i["status"]) for i in results] == [
+            (1, "ok"), (2, "error")]
+
+    #-----------------------------------------------------------------------
+    def test_local_client(self):
+        sock, server = socket.socketpair()
+        client = IM.cmd_line.util.LocalClient(sock)
+        out = io.StringIO()
+        batch = IM.cmd_line.batch.Batch(client, "cmd", jobs=2, out=out)
+        batch.load([
+            '{"address" : "aa.bb.cc", "cmd" : "on"}\n',
+            '{"address" : "kitchen", "cmd" : "off"}\n',
+            ])
+        client.message_callback_add(None, batch.handle_reply)
+        batch._send()
+
+        # Commands are written as lines with the address and session.
+        lines = server.recv(4096).splitlines()
+        cmds = [json.loads(i) for i in lines]
+        assert [i["address"] for i in cmds] == ["aa.bb.cc", "kitchen"]
+        assert cmds[1]["session"] == batch.id + "/2"
+
+        # Replies are matched by the session.
+        for session, result in ((cmds[1]["session"], False),
+                                (cmds[0]["session"], True)):
+            msg = IM.mqtt.Reply(IM.mqtt.Reply.Type.END, result, session)
+            server.sendall(msg.to_json().encode() + b"\n")
+
+        client.loop(timeout=1)
+        results = [json.loads(i) for i in out.getvalue().splitlines()]
+        assert [(i["line"], i["status"]) for i in results] == [
+            (2, "error"), (1, "ok")]
+
+        client.disconnect()
+        server.close()
+
+
+#===========================================================================
+def reply(batch, topic, num, type, data):
+    topic = "%s/session/%s/%d" % (topic, batch.id, num)
+    msg = IM.mqtt.Reply(type, data).to_json()
+    batch.handle_reply(None, None, MockMessage(topic, msg))
+
+
+class MockClient:
+    def __init__(self):
+        self.pub = []
+
+    def publish(self, topic, payload, qos=0):
+        self.pub.append((topic, payload))
+
+
+class MockMessage:
+    def __init__(self, topic, msg):
+        self.topic = topic
+        self.payload = msg.encode("utf-8")
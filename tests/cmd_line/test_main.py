@@ -0,0 +1,25 @@
+#===========================================================================
+#
+# Tests for: insteont_mqtt/cmd_line/main.py
+#
+#===========================================================================
+import os
+import subprocess
+import sys
+import insteon_mqtt as IM
+
+
+class Test_main:
+    def test_imports(self):
+        # The command line tool shouldn't import the server modules.
+        code = ("import sys, insteon_mqtt.cmd_line.main; "
+                "print(' '.join(sys.modules))")
+        root = os.path.dirname(os.path.dirname(IM.__file__))
+        result = subprocess.run([sys.executable, "-c", code], check=True,
+                                cwd=root, stdout=subprocess.PIPE,
+                                universal_newlines=True)
+        modules = result.stdout.split()
+        assert "insteon_mqtt.cmd_line.main" in modules
+        for name in ["paho", "jinja2", "serial", "insteon_mqtt.Modem",
+                     "insteon_mqtt.Protocol", "insteon_mqtt.mqtt.Mqtt"]:
+            assert name not in modules
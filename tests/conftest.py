@@ -37,4 +37,21 @@ def mock_paho_mqtt():
     # original state.
     paho.mqtt.client.Client = save
 
+
+#===========================================================================
+@pytest.fixture
+def virtual_clock():
+    """Use a virtual clock.
+
+    Use this as a test fixture to set an insteon_mqtt.clock.VirtualClock as
+    the active clock.  The clock is passed to the test and the wall clock is
+    restored when the test is done.
+    """
+    from insteon_mqtt import clock
+    virtual = clock.VirtualClock(1000.0)
+    save = clock.set(virtual)
+    yield virtual
+
+    clock.set(save)
+
 #===========================================================================
@@ -138,7 +138,8 @@ class MockProto:
     def __init__(self):
         self.msgs = []
 
-    def send(self, msg, handler, high_priority=False, after=None):
+    def send(self, msg, handler, high_priority=False, after=None,
+             deadline=None):
         self.msgs.append(msg)
 
 
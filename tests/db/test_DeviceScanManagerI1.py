@@ -170,6 +170,26 @@ class Test_Device:
         manager.handle_get_lsb(msg, callback)
         assert calls[0] == "Database received"
 
+    #-----------------------------------------------------------------------
+    def test_yield_step(self):
+        # Each message is passed to the yield function instead of sent.
+        device = MockDevice()
+        device_db = IM.db.Device(IM.Address(0x01, 0x02, 0x03))
+        steps = []
+
+        def yield_step(func, *args):
+            steps.append((func, args))
+
+        manager = IM.db.DeviceScanManagerI1(device, device_db,
+                                            yield_step=yield_step)
+        manager.start_scan()
+        assert device.msgs == []
+        assert len(steps) == 1
+
+        func, args = steps[0]
+        func(*args)
+        assert device.msgs[0].cmd1 == 0x28
+
 
 #===========================================================================
 
@@ -178,5 +198,6 @@ class MockDevice:
     def __init__(self):
         self.msgs = []
 
-    def send(self, msg, handler, high_priority=False, after=None):
+    def send(self, msg, handler, high_priority=False, after=None,
+             deadline=None):
         self.msgs.append(msg)
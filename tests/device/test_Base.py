@@ -0,0 +1,249 @@
+#===========================================================================
+#
+# Tests for: insteont_mqtt/device/Base.py
+#
+# pylint: disable=protected-access
+#===========================================================================
+import insteon_mqtt as IM
+import insteon_mqtt.message as Msg
+import helpers as H
+
+
+class Test_Base:
+    #-----------------------------------------------------------------------
+    def test_refresh_window(self, tmpdir):
+        proto = H.main.MockProtocol()
+        modem = H.main.MockModem(tmpdir)
+        addr = IM.Address(0x01, 0x02, 0x03)
+        dev = IM.device.Dimmer(proto, modem, addr)
+
+        # No window - always refresh even if the state is known.
+        dev.confirm_state()
+        dev.refresh()
+        assert len(proto.sent) == 1
+        proto.clear()
+
+        # Inside the window - refresh is skipped unless forced.
+        dev.refresh_window = 60
+        done = []
+        dev.refresh(on_done=lambda *x: done.append(x))
+        assert len(proto.sent) == 0
+        assert done == [(True, "Device state is current", None)]
+
+        dev.refresh(force=True)
+        assert len(proto.sent) == 1
+        proto.clear()
+
+        # Outside the window.
+        dev._state_times[1] -= 120
+        dev.refresh()
+        assert len(proto.sent) == 1
+        proto.clear()
+
+    #-----------------------------------------------------------------------
+    def test_track_state(self, tmpdir):
+        proto = H.main.MockProtocol()
+        modem = H.main.MockModem(tmpdir)
+        addr = IM.Address(0x01, 0x02, 0x03)
+        dev = IM.device.Dimmer(proto, modem, addr)
+        dev.refresh_window = 60
+        assert not dev.is_state_current()
+
+        # Group 1 broadcast on confirms the state.
+        flags = Msg.Flags(Msg.Flags.Type.ALL_LINK_BROADCAST, False)
+        msg = Msg.InpStandard(addr, IM.Address(0, 0, 1), flags, 0x11, 0x00)
+        dev.handle_received(msg)
+        assert dev.is_state_current()
+
+        # Other groups don't change anything.
+        dev.clear_state()
+        msg = Msg.InpStandard(addr, IM.Address(0, 0, 2), flags, 0x11, 0x00)
+        dev.handle_received(msg)
+        assert not dev.is_state_current()
+
+        # Manual mode start clears the confirmation.
+        dev.confirm_state()
+        msg = Msg.InpStandard(addr, IM.Address(0, 0, 1), flags, 0x17, 0x01)
+        dev.handle_received(msg)
+        assert not dev.is_state_current()
+
+        # ACK of an on/off command confirms the state.
+        flags = Msg.Flags(Msg.Flags.Type.DIRECT_ACK, False)
+        msg = Msg.InpStandard(addr, modem.addr, flags, 0x11, 0x80)
+        dev.handle_ack(msg, on_done=lambda *x: None)
+        assert dev.is_state_current()
+
+        # Group commands from a scene confirm it as well.
+        dev.clear_state()
+        flags = Msg.Flags(Msg.Flags.Type.ALL_LINK_BROADCAST, False)
+        msg = Msg.InpStandard(modem.addr, IM.Address(0, 0, 1), flags, 0x13,
+                              0x00)
+        dev.track_state(msg, dev.responder_group(msg))
+        assert dev.is_state_current()
+
+    #-----------------------------------------------------------------------
+    def test_state_groups(self, tmpdir):
+        proto = H.main.MockProtocol()
+        modem = H.main.MockModem(tmpdir)
+        addr = IM.Address(0x01, 0x02, 0x03)
+        ack = Msg.Flags(Msg.Flags.Type.DIRECT_ACK, False)
+        bcast = Msg.Flags(Msg.Flags.Type.ALL_LINK_BROADCAST, False)
+
+        # FanLinc: the light doesn't confirm the fan speed.
+        fan = IM.device.FanLinc(proto, modem, addr)
+        fan.refresh_window = 60
+        msg = Msg.InpStandard(addr, modem.addr, ack, 0x11, 0xff)
+        fan.handle_ack(msg, on_done=lambda *x: None)
+        msg = Msg.InpStandard(addr, IM.Address(0, 0, 1), bcast, 0x11, 0x00)
+        fan.handle_received(msg)
+        assert not fan.is_state_current()
+
+        fan.refresh()
+        assert len(proto.sent) == 1
+        proto.clear()
+
+        msg = Msg.InpStandard(addr, modem.addr, ack, 0x11, 0x02)
+        fan.handle_speed(msg)
+        assert fan.is_state_current()
+
+        # Scenes to the fan group confirm it.
+        fan.clear_state()
+        fan.confirm_state(0x01)
+        msg = Msg.InpStandard(modem.addr, IM.Address(0, 0, 5), bcast, 0x13,
+                              0x00)
+        fan.track_state(msg, fan.responder_group(msg))
+        assert fan.is_state_current()
+
+        # Outlet: both outlets must be confirmed.
+        outlet = IM.device.Outlet(proto, modem, addr)
+        outlet.refresh_window = 60
+        msg = Msg.InpStandard(addr, IM.Address(0, 0, 1), bcast, 0x11, 0x00)
+        outlet.handle_received(msg)
+        assert not outlet.is_state_current()
+
+        msg = Msg.InpStandard(addr, IM.Address(0, 0, 2), bcast, 0x13, 0x00)
+        outlet.handle_received(msg)
+        assert outlet.is_state_current()
+
+        # KeypadLinc: the load doesn't confirm the LED's.  Only a refresh
+        # does that.
+        kpl = IM.device.KeypadLinc(proto, modem, addr, 'kpl')
+        kpl.refresh_window = 60
+        msg = Msg.InpStandard(addr, modem.addr, ack, 0x11, 0xff)
+        kpl.handle_set_load(msg, on_done=lambda *x: None)
+        msg = Msg.InpStandard(addr, IM.Address(0, 0, 3), bcast, 0x11, 0x00)
+        kpl.handle_received(msg)
+        assert not kpl.is_state_current()
+
+        kpl.confirm_state()
+        assert kpl.is_state_current()
+
+    #-----------------------------------------------------------------------
+    def test_db_current(self, tmpdir):
+        proto = H.main.MockProtocol()
+        modem = H.main.MockModem(tmpdir)
+        addr = IM.Address(0x01, 0x02, 0x03)
+        dev = IM.device.Dimmer(proto, modem, addr)
+        dev.refresh_window = 60
+        dev.db.set_delta(0x05)
+        assert not dev.is_db_current()
+
+        # Passive traffic doesn't check the db delta.
+        dev.confirm_state()
+        assert not dev.is_db_current()
+
+        # The refresh reply does.
+        dev.refresh(force=True)
+        flags = Msg.Flags(Msg.Flags.Type.DIRECT_ACK, False)
+        msg = Msg.InpStandard(addr, modem.addr, flags, 0x05, 0x00)
+        proto.sent[0].handler.msg_received(proto, msg)
+        assert dev.is_db_current()
+
+    #-----------------------------------------------------------------------
+    def test_db_update_refresh(self, tmpdir):
+        proto = H.main.MockProtocol()
+        modem = H.main.MockModem(tmpdir)
+        modem.find = lambda addr: None
+        addr = IM.Address(0x01, 0x02, 0x03)
+        dev = IM.device.Dimmer(proto, modem, addr)
+        dev.refresh_window = 60
+        dev.confirm_state()
+
+        # Database changes always ping the device to get the db delta.
+        dev.db_add_ctrl_of(0x01, IM.Address(0x05, 0x06, 0x07), 0x01,
+                           two_way=False)
+        assert len(proto.sent) == 1
+        assert proto.sent[0].msg.cmd1 == 0x19
+
+    #-----------------------------------------------------------------------
+    def test_deferred_db(self, tmpdir):
+        proto = H.main.MockProtocol()
+        modem = H.main.MockModem(tmpdir)
+        addr = IM.Address(0x01, 0x02, 0x03)
+        dev = IM.device.Dimmer(proto, modem, addr)
+        dev.db.set_delta(0x05)
+
+        # During a sweep, the download is deferred.
+        dev.refresh_sweep = True
+        done = []
+        dev.download_db(0x07, on_done=lambda *x: done.append(x))
+        assert len(proto.sent) == 0
+        assert done == [(True, "Database download deferred", None)]
+        assert dev.has_deferred_db()
+
+        # The deferred download runs as a background task step and reads
+        # one record per message.
+        dev.refresh_sweep = False
+        done = []
+        task = proto.background.add("download", lambda *x: done.append(x))
+        task.add(dev.download_deferred_db)
+        proto.background.poll(0)
+        assert not dev.has_deferred_db()
+        assert len(proto.sent) == 0
+
+        proto.background.poll(0)
+        assert len(proto.sent) == 1
+        assert proto.sent[0].msg.cmd1 == 0x2f
+        assert proto.sent[0].msg.data[2:5] == bytes([0x0f, 0xff, 0x01])
+
+        # Each record is read once the modem is idle again.
+        reply_record(proto.sent[0], 0x0fff, 0xe2)
+        assert len(proto.sent) == 1
+        proto.background.poll(0)
+        assert len(proto.sent) == 2
+        assert proto.sent[1].msg.data[2:5] == bytes([0x0f, 0xf7, 0x01])
+
+        reply_record(proto.sent[1], 0x0ff7, 0x00)
+        assert len(proto.sent) == 2
+        assert len(dev.db) == 1
+        assert dev.db.delta == 0x07
+        assert done[0][:2] == (True, "download")
+
+    #-----------------------------------------------------------------------
+    def test_model_background(self, tmpdir):
+        proto = H.main.MockProtocol()
+        modem = H.main.MockModem(tmpdir)
+        addr = IM.Address(0x01, 0x02, 0x03)
+        dev = IM.device.Dimmer(proto, modem, addr)
+
+        # The model query is queued as a background task once.
+        dev.refresh()
+        dev.refresh()
+        assert len(proto.sent) == 2
+        assert len(proto.background) == 1
+
+        proto.background.poll(0)
+        assert len(proto.sent) == 3
+        assert proto.sent[2].msg.cmd1 == 0x10
+
+    #-----------------------------------------------------------------------
+
+
+#===========================================================================
+def reply_record(sent, mem_loc, flags):
+    addr = sent.msg.to_addr
+    data = bytes([0x00, 0x01, mem_loc >> 8, mem_loc & 0xff, 0x00, flags,
+                  0x01, 0x05, 0x06, 0x07, 0xff, 0x1f, 0x01, 0x00])
+    msg_flags = Msg.Flags(Msg.Flags.Type.DIRECT, True)
+    msg = Msg.InpExtended(addr, addr, msg_flags, 0x2f, 0x00, data)
+    sent.handler.msg_received(None, msg)
@@ -300,9 +300,11 @@ class MockModem:
 class MockProto:
     def __init__(self):
         self.msgs = []
+        self.background = IM.Scheduler(self)
 
     def add_handler(self, *args):
         pass
 
-    def send(self, msg, msg_handler, high_priority=False, after=None):
+    def send(self, msg, msg_handler, high_priority=False, after=None,
+             deadline=None):
         self.msgs.append(msg)
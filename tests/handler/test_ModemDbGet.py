@@ -65,7 +65,8 @@ class Test_ModemDbGet:
 
 
 class MockProtocol:
-    def send(self, msg, handler, high_priority=False, after=None):
+    def send(self, msg, handler, high_priority=False, after=None,
+             deadline=None):
         self.sent = msg
         self.handler = handler
 
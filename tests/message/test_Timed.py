@@ -23,6 +23,7 @@ class Test_Timed:
         msg = mock.Mock()
         msg.to_bytes.return_value = "123"
         handler = mock.Mock()
+        handler.max_queue_time = None
         obj = IM.message.Timed(msg, handler, False, t0)
 
         link = mock.Mock()
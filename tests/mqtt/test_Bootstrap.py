@@ -0,0 +1,146 @@
+#===========================================================================
+#
+# Tests for: insteont_mqtt/mqtt/Bootstrap.py
+#
+# pylint: disable=redefined-outer-name
+#===========================================================================
+import pytest
+import insteon_mqtt as IM
+import helpers as H
+
+
+@pytest.fixture
+def setup(mock_paho_mqtt, tmpdir):
+    proto = H.main.MockProtocol()
+    modem = IM.Modem(proto)
+    modem.name = "modem"
+    modem.addr = IM.Address(0x20, 0x30, 0x40)
+
+    link = IM.network.Mqtt()
+    mqtt = IM.mqtt.Mqtt(link, modem)
+    mqtt.load_config({'broker' : '127.0.0.1', 'port' : 1883,
+                      'cmd_topic' : 'insteon/command',
+                      'bootstrap_time_out' : 5})
+
+    mock_modem = H.main.MockModem(tmpdir)
+    devices = [
+        IM.device.Switch(proto, mock_modem, IM.Address(1, 2, 3), "sw"),
+        IM.device.Dimmer(proto, mock_modem, IM.Address(1, 2, 5), "dim"),
+        IM.device.Outlet(proto, mock_modem, IM.Address(1, 2, 7), "outlet"),
+        IM.device.FanLinc(proto, mock_modem, IM.Address(1, 2, 8), "fan"),
+        IM.device.Leak(proto, mock_modem, IM.Address(1, 2, 9), "leak"),
+        ]
+    for dev in devices:
+        mqtt.handle_new_device(modem, dev)
+
+    link.connected = True
+    boot = IM.mqtt.Bootstrap(mqtt, mqtt.bootstrap_time_out)
+    done = []
+
+    def on_done(success, msg, data):
+        done.append(msg)
+
+    boot.start(on_done)
+    devs = {i.name : i for i in devices}
+    return H.Data(boot=boot, link=link, devs=devs, done=done)
+
+
+def send(boot, topic, payload, retain=True):
+    msg = H.Data(topic=topic, payload=payload.encode(), retain=retain)
+    boot.handle_state(None, None, msg)
+
+
+#===========================================================================
+class Test_Bootstrap:
+    #-----------------------------------------------------------------------
+    def test_restore(self, setup):
+        boot, link, devs, done = setup.getAll(['boot', 'link', 'devs',
+                                               'done'])
+        topics = [i.topic for i in link.client.sub]
+        assert 'insteon/01.02.03/state' in topics
+        assert 'insteon/01.02.08/fan/state' in topics
+        assert 'insteon/01.02.03/set' not in topics
+
+        send(boot, 'insteon/01.02.03/state', 'on')
+        send(boot, 'insteon/01.02.05/state',
+             '{ "state" : "on", "brightness" : 128 }')
+        send(boot, 'insteon/01.02.07/state/2', 'on')
+        send(boot, 'insteon/01.02.08/fan/state', 'high')
+        assert devs["sw"]._is_on is True
+        assert devs["dim"]._level == 128
+        assert devs["outlet"]._is_on == [False, True]
+        assert devs["fan"]._fan_speed == IM.device.FanLinc.Speed.HIGH
+
+        # States aren't published again.
+        assert link.client.pub == []
+        assert boot.stats["restored"] == 4
+        assert not done
+
+        # Unknown payloads are skipped.
+        send(boot, 'insteon/01.02.07/state/1', 'BAD')
+        assert devs["outlet"]._is_on == [False, True]
+
+        # Finished once every topic has been seen.
+        send(boot, 'insteon/01.02.07/state/1', 'off')
+        send(boot, 'insteon/01.02.08/state', 'off')
+        assert len(done) == 1
+        assert sorted(i.topic for i in link.client.unsub) == sorted(topics)
+
+        # Later messages are ignored.
+        send(boot, 'insteon/01.02.03/state', 'off')
+        assert devs["sw"]._is_on is True
+
+    #-----------------------------------------------------------------------
+    def test_insteon_wins(self, setup):
+        boot, devs = setup.getAll(['boot', 'devs'])
+
+        devs["sw"].confirm_state()
+        send(boot, 'insteon/01.02.03/state', 'on')
+        assert devs["sw"]._is_on is False
+        assert boot.stats["restored"] == 0
+
+    #-----------------------------------------------------------------------
+    def test_time_out(self, setup):
+        boot, done = setup.getAll(['boot', 'done'])
+
+        boot.poll(boot._end_time - 1)
+        assert not done
+
+        boot.poll(boot._end_time)
+        assert len(done) == 1
+        assert "0 of 6" in done[0]
+
+    #-----------------------------------------------------------------------
+    def test_not_retained(self, setup):
+        boot, devs = setup.getAll(['boot', 'devs'])
+
+        send(boot, 'insteon/01.02.03/state', 'on', retain=False)
+        assert devs["sw"]._is_on is False
+        assert boot.stats["restored"] == 0
+
+    #-----------------------------------------------------------------------
+    def test_never_connected(self, mock_paho_mqtt, tmpdir):
+        proto = H.main.MockProtocol()
+        modem = IM.Modem(proto)
+        link = IM.network.Mqtt()
+        mqtt = IM.mqtt.Mqtt(link, modem)
+        mqtt.handle_new_device(modem, IM.device.Switch(
+            proto, H.main.MockModem(tmpdir), IM.Address(1, 2, 3), "sw"))
+
+        boot = IM.mqtt.Bootstrap(mqtt, 5)
+        done = []
+
+        def on_done(success, msg, data):
+            done.append(success)
+
+        boot.start(on_done)
+        assert boot._end_time is not None
+
+        boot.poll(boot._end_time - 1)
+        assert not done
+        assert link.client.sub == []
+
+        boot.poll(boot._end_time)
+        assert done == [True]
+
+    #-----------------------------------------------------------------------
@@ -60,9 +60,7 @@ class Test_KeypadLinc:
         for i in range(len(topics)):
             assert link.client.sub[i] == dict(topic=topics[i], qos=2)
 
-        # Unsub in keypad is slightly different order.
-        topics.append(topics.pop(1))
-
+        # Unsub uses the same topics as sub.
         mdev.unsubscribe(link)
         assert len(link.client.unsub) == len(topics)
         for i in range(len(topics)):
@@ -93,10 +91,7 @@ class Test_KeypadLinc:
         for i in range(len(topics)):
             assert link.client.sub[i] == dict(topic=topics[i], qos=2)
 
-        # Unsub when same still unsubs from the level even though it's not
-        # needed.
-        topics.append(topics[0])
-
+        # Unsub doesn't repeat the shared on/off and level topic.
         mdev.unsubscribe(link)
         assert len(link.client.unsub) == len(topics)
         for i in range(len(topics)):
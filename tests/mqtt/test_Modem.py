@@ -94,5 +94,23 @@ class Test_Modem:
         # test error payload
         link.publish(topic, b'asdf', qos, False)
 
+    #-----------------------------------------------------------------------
+    def test_background(self, setup):
+        mdev, link, proto = setup.getAll(['mdev', 'link', 'proto'])
+
+        config = {'modem' : {
+            'background_topic' : 'foo/bg',
+            'background_payload' : '{{count}} {{running}}'}}
+        mdev.load_config(config, qos=1)
+
+        task = proto.background.add("db")
+        task.add(lambda on_done: None)
+        proto.background.poll(0)
+        assert len(link.client.pub) == 2
+        assert link.client.pub[0] == dict(
+            topic='foo/bg', payload='1 ', qos=1, retain=True)
+        assert link.client.pub[1] == dict(
+            topic='foo/bg', payload='1 db', qos=1, retain=True)
+
 
 #===========================================================================
@@ -0,0 +1,348 @@
+#===========================================================================
+#
+# Tests for: insteont_mqtt/mqtt/Mqtt.py
+#
+# pylint: disable=redefined-outer-name
+#===========================================================================
+import paho.mqtt.client as paho
+import pytest
+import insteon_mqtt as IM
+from insteon_mqtt.mqtt.Mqtt import _topics_overlap as topics_overlap
+import helpers as H
+
+
+# Create the MQTT interface with a few different device types and a mocked
+# MQTT client to subscribe with.
+@pytest.fixture
+def setup(mock_paho_mqtt, tmpdir):
+    proto = H.main.MockProtocol()
+    modem = IM.Modem(proto)
+    modem.name = "modem"
+    modem.addr = IM.Address(0x20, 0x30, 0x40)
+
+    link = IM.network.Mqtt()
+    mqtt = IM.mqtt.Mqtt(link, modem)
+    mqtt.load_config({'broker' : '127.0.0.1', 'port' : 1883,
+                      'cmd_topic' : 'insteon/command',
+                      'keypad_linc' : {
+                          'dimmer_level_topic' : 'kpl/{{name}}/level'}})
+
+    mock_modem = H.main.MockModem(tmpdir)
+    devices = [
+        IM.device.Switch(proto, mock_modem, IM.Address(1, 2, 3), "sw1"),
+        IM.device.Switch(proto, mock_modem, IM.Address(1, 2, 4), "sw2"),
+        IM.device.Dimmer(proto, mock_modem, IM.Address(1, 2, 5), "dim"),
+        IM.device.KeypadLinc(proto, mock_modem, IM.Address(1, 2, 6), "den",
+                             dimmer=True),
+        IM.device.Outlet(proto, mock_modem, IM.Address(1, 2, 7), "outlet"),
+        IM.device.FanLinc(proto, mock_modem, IM.Address(1, 2, 8), "fan"),
+        IM.device.Leak(proto, mock_modem, IM.Address(1, 2, 9), "leak"),
+        ]
+    for dev in [modem] + devices:
+        mqtt.handle_new_device(modem, dev)
+
+    return H.Data(mqtt=mqtt, link=link, proto=proto)
+
+
+#===========================================================================
+class Test_Mqtt:
+    #-----------------------------------------------------------------------
+    def test_wildcard_routing(self, setup):
+        mqtt, link, proto = setup.getAll(['mqtt', 'link', 'proto'])
+        cmd_topic = 'insteon/command/+'
+
+        # Per topic subscriptions.
+        mqtt._subscribe()
+        callbacks = dict(link.client.cb)
+        assert callbacks.pop(cmd_topic) == mqtt.handle_cmd
+        assert len(callbacks) > 30
+
+        link.client.sub = []
+        link.client.cb = {}
+        mqtt.wildcard_routing = True
+        mqtt._subscribe()
+
+        # One subscription per topic family.
+        topics = [i.topic for i in link.client.sub]
+        assert cmd_topic in topics
+        assert 'insteon/+/set' in topics
+        assert 'kpl/+/level' in topics
+        assert 'insteon/+/fan/set' in topics
+        assert len(topics) < 25
+        for topic in topics:
+            if topic != cmd_topic:
+                assert link.client.cb[topic] == mqtt._route
+
+        # Every device topic is routed to the same handler.
+        assert set(mqtt._routes.keys()) == set(callbacks.keys())
+        for topic, handler in callbacks.items():
+            assert mqtt._routes[topic] is handler
+            assert any(paho.topic_matches_sub(i, topic) for i in topics)
+
+        msg = H.Data(topic='insteon/01.02.04/set', payload=b'ON')
+        mqtt._route(link.client, None, msg)
+        assert len(proto.sent) == 1
+        assert proto.sent[0].msg.to_addr == IM.Address(1, 2, 4)
+
+        # Unknown topics are ignored.
+        msg = H.Data(topic='insteon/01.02.99/set', payload=b'ON')
+        mqtt._route(link.client, None, msg)
+        assert len(proto.sent) == 1
+
+        mqtt._unsubscribe()
+        assert sorted(i.topic for i in link.client.unsub) == sorted(topics)
+
+    #-----------------------------------------------------------------------
+    def test_wildcard_overlap(self, setup):
+        mqtt, link, proto = setup.getAll(['mqtt', 'link', 'proto'])
+        mqtt.wildcard_routing = True
+
+        # A device topic without an address or name level that's also
+        # matched by another family is only subscribed to by the family.
+        dev = mqtt.devices[IM.Address(1, 2, 4).id]
+        dev._subscriptions = [('insteon/all/set', dev._input_on_off)]
+        mqtt._subscribe()
+
+        topics = [i.topic for i in link.client.sub]
+        assert 'insteon/+/set' in topics
+        assert 'insteon/all/set' not in topics
+
+        msg = H.Data(topic='insteon/all/set', payload=b'ON')
+        mqtt._route(link.client, None, msg)
+        assert len(proto.sent) == 1
+
+        # Families that partly overlap ('insteon/set/set' matches both)
+        # would make the broker send the message twice.  One of them is
+        # subscribed with the device topics instead.
+        link.client.sub = []
+        dev._subscriptions = [('insteon/set/01.02.04', dev._input_on_off)]
+        mqtt._subscribe()
+
+        topics = [i.topic for i in link.client.sub]
+        assert 'insteon/+/set' in topics
+        assert 'insteon/set/+' not in topics
+        assert 'insteon/set/01.02.04' in topics
+        for topic in mqtt._route_topics:
+            assert not [i for i in mqtt._route_topics if i != topic and
+                        topics_overlap(topic, i)]
+
+    #-----------------------------------------------------------------------
+    def test_topics_overlap(self):
+        assert topics_overlap('insteon/+/set', 'insteon/set/+')
+        assert topics_overlap('insteon/+/set', 'insteon/aa.bb.cc/set')
+        assert topics_overlap('insteon/#', 'insteon')
+        assert topics_overlap('insteon/#', 'insteon/a/b')
+        assert not topics_overlap('insteon/+/set', 'insteon/+/level')
+        assert not topics_overlap('insteon/+/set', 'insteon/+/fan/set')
+        assert not topics_overlap('insteon/+', 'insteon')
+
+    #-----------------------------------------------------------------------
+    def test_batch_subscribe(self, setup):
+        mqtt, link = setup.getAll(['mqtt', 'link'])
+        link.load_config({'broker' : '127.0.0.1', 'port' : 1883,
+                          'subscribe_batch' : 10})
+        link._connect_time = 0
+
+        mqtt._subscribe()
+        num = len(link.client.sub)
+        assert num > 30
+        assert len(link.client.requests) == (num + 9) // 10
+        assert max(len(i) for i in link.client.requests) == 10
+        assert link.client.cb['insteon/01.02.03/set'] is not None
+
+        # Ready once every subscribe request is acknowledged.
+        for mid in range(1, len(link.client.requests)):
+            link._on_subscribe(link.client, None, mid, [1])
+            assert link.ready_time is None
+
+        link._on_subscribe(link.client, None, len(link.client.requests), [1])
+        assert link.ready_time > 0
+
+        link.client.requests = []
+        mqtt._unsubscribe()
+        assert len(link.client.unsub) == num
+        assert len(link.client.requests) == (num + 9) // 10
+
+    #-----------------------------------------------------------------------
+    def test_reload(self, mock_paho_mqtt, tmpdir):
+        proto = H.main.MockProtocol()
+        modem = IM.Modem(proto)
+        modem.addr = IM.Address(0x20, 0x30, 0x40)
+        modem.save_path = str(tmpdir)
+
+        link = IM.network.Mqtt()
+        mqtt = IM.mqtt.Mqtt(link, modem)
+        mqtt_cfg = {'broker' : '127.0.0.1', 'port' : 1883,
+                    'cmd_topic' : 'insteon/command'}
+        mqtt.load_config(mqtt_cfg)
+        modem._load_devices({
+            'switch' : [{'aa.bb.01' : 'sw1'}, 'aa.bb.02'],
+            'dimmer' : ['aa.bb.03'],
+            'keypad_linc' : ['aa.bb.05'],
+            'fan_linc' : ['aa.bb.06'],
+            })
+
+        link.connected = True
+        mqtt._subscribe()
+        sw1 = modem.find(IM.Address('aa.bb.01'))
+        link.client.sub = []
+
+        # Remove aa.bb.02, change aa.bb.03 to a switch, and add aa.bb.04.
+        cfg = {
+            'mqtt' : dict(mqtt_cfg, switch={'state_topic' : 'sw/{{name}}'}),
+            'insteon' : {
+                'address' : '20.30.40',
+                'devices' : {
+                    'switch' : [{'aa.bb.01' : 'sw1'}, 'aa.bb.03',
+                                'aa.bb.04'],
+                    'keypad_linc' : ['aa.bb.05'],
+                    'fan_linc' : ['aa.bb.06'],
+                    }},
+            }
+        IM.config.reload(cfg, mqtt, modem)
+
+        assert sorted(modem.devices) == sorted(
+            IM.Address(i).id for i in ['aa.bb.01', 'aa.bb.03', 'aa.bb.04',
+                                       'aa.bb.05', 'aa.bb.06'])
+        assert sorted(mqtt.devices) == sorted(
+            list(modem.devices) + [modem.addr.id])
+        assert modem.find(IM.Address('aa.bb.01')) is sw1
+        assert isinstance(modem.find(IM.Address('aa.bb.03')),
+                          IM.device.Switch)
+        sw1.signal_on_off.emit(sw1, True)
+        assert link.client.pub[-1].topic == 'sw/sw1'
+
+        # Only the changed topics are sent to the broker.
+        sub = [i.topic for i in link.client.sub]
+        assert 'insteon/aa.bb.04/set' in sub
+        assert 'insteon/aa.bb.03/set' in sub
+        assert 'insteon/aa.bb.01/set' not in sub
+        assert 'insteon/command/+' not in sub
+
+        # Handlers built with functools.partial are compared by value so
+        # unchanged keypad and fan topics aren't subscribed again.
+        assert not [i for i in sub if 'aa.bb.05' in i or 'aa.bb.06' in i]
+        unsub = [i.topic for i in link.client.unsub]
+        assert 'insteon/aa.bb.02/set' in unsub
+        assert 'insteon/aa.bb.03/level' in unsub
+        assert 'insteon/aa.bb.02/set' not in link.client.cb
+        assert sorted(mqtt._subscribed) == sorted(link.client.cb)
+
+    #-----------------------------------------------------------------------
+    def test_dedup(self, setup, mocker):
+        mqtt, link = setup.getAll(['mqtt', 'link'])
+        dev = mqtt.devices[IM.Address(1, 2, 3).id].device
+        t = 1000.0
+        mocker.patch('time.time', side_effect=lambda: t)
+
+        # Switch states are also button presses so they're always published
+        # unless the config turns on dedup for the topic.
+        dev.signal_on_off.emit(dev, True)
+        dev.signal_on_off.emit(dev, True)
+        assert len(link.client.pub) == 2
+        del link.client.pub[:]
+        mqtt._published.clear()
+        mqtt.stats.update(published=0)
+
+        mdev = mqtt.devices[IM.Address(1, 2, 3).id]
+        mdev.load_config({'switch' : {'state_dedup' : True}})
+        assert mdev.msg_state.dedup is True
+
+        # Repeated states are only published once.
+        dev.signal_on_off.emit(dev, True)
+        dev.signal_on_off.emit(dev, True)
+        assert len(link.client.pub) == 1
+        assert mqtt.stats == {"published" : 1, "suppressed" : 1}
+
+        # Changes and momentary events are always published.
+        dev.signal_on_off.emit(dev, False)
+        dev.signal_on_off.emit(dev, True, IM.on_off.Mode.MANUAL)
+        dev.signal_on_off.emit(dev, True, IM.on_off.Mode.MANUAL)
+        assert len(link.client.pub) == 4
+
+        # Direct publishes aren't suppressed.
+        mqtt.publish('foo/bar', 'on')
+        mqtt.publish('foo/bar', 'on')
+        assert len(link.client.pub) == 6
+
+        # The state is republished after the interval.
+        dev.signal_on_off.emit(dev, True)
+        assert len(link.client.pub) == 6
+        t += mqtt.republish_interval
+        dev.signal_on_off.emit(dev, True)
+        assert len(link.client.pub) == 7
+
+        # And after reconnecting.
+        mqtt.handle_connected(link, True)
+        dev.signal_on_off.emit(dev, True)
+        assert len(link.client.pub) == 8
+
+    #-----------------------------------------------------------------------
+    def test_local_cmd(self, setup):
+        mqtt, proto = setup.getAll(['mqtt', 'proto'])
+        link = MockClientLink()
+        dev = mqtt.devices[IM.Address(1, 2, 4).id].device
+        mqtt.modem.device_names["sw2"] = dev
+
+        mqtt.handle_local_cmd(link, b'{"address" : "sw2", "cmd" : "on"}')
+        assert len(proto.sent) == 1
+        assert proto.sent[0].msg.to_addr == IM.Address(1, 2, 4)
+
+        # Errors and the end of the command are written to the client.
+        link.data = []
+        mqtt.handle_local_cmd(link, b'{"address" : "foo", "cmd" : "on"}')
+        replies = [IM.mqtt.Reply.from_json(i) for i in link.data]
+        assert replies[0].type == IM.mqtt.Reply.Type.ERROR
+        assert replies[-1].type == IM.mqtt.Reply.Type.END
+
+        link.data = []
+        mqtt.handle_local_cmd(link, b'bad json')
+        reply = IM.mqtt.Reply.from_json(link.data[-1])
+        assert reply.type == IM.mqtt.Reply.Type.END
+        assert reply.data is False
+
+    #-----------------------------------------------------------------------
+    def test_local_sessions(self, setup):
+        mqtt, proto = setup.getAll(['mqtt', 'proto'])
+        link = MockClientLink()
+        dev = mqtt.devices[IM.Address(1, 2, 4).id].device
+        mqtt.modem.device_names["sw2"] = dev
+
+        # Two commands at the same time.  Replies are tagged by session.
+        mqtt.handle_local_cmd(
+            link, b'{"address" : "sw2", "cmd" : "on", "session" : "a"}')
+        mqtt.handle_local_cmd(
+            link, b'{"address" : "foo", "cmd" : "on", "session" : "b"}')
+        replies = [IM.mqtt.Reply.from_json(i) for i in link.data]
+        assert replies[-1].type == IM.mqtt.Reply.Type.END
+        assert replies[-1].session == "b"
+        assert replies[-1].data is False
+
+        # Ending the second command doesn't remove the first one's UI
+        # callback.
+        link.data = []
+        IM.log.get_logger().error("still running")
+        replies = [IM.mqtt.Reply.from_json(i) for i in link.data]
+        assert [(i.session, i.data) for i in replies] == [
+            ("a", "still running")]
+
+        # The first command finishes when the device ACK's.
+        flags = IM.message.Flags(IM.message.Flags.Type.DIRECT_ACK, False)
+        ack = IM.message.InpStandard(dev.addr, mqtt.modem.addr, flags, 0x11,
+                                     0xff)
+        proto.sent[0].handler.msg_received(proto, ack)
+        reply = IM.mqtt.Reply.from_json(link.data[-1])
+        assert reply.type == IM.mqtt.Reply.Type.END
+        assert (reply.session, reply.data) == ("a", True)
+
+    #-----------------------------------------------------------------------
+
+
+#===========================================================================
+class MockClientLink:
+    def __init__(self):
+        self.data = []
+
+    def write(self, data):
+        assert data.endswith(b"\n")
+        self.data.append(data.decode())
@@ -3,6 +3,7 @@
 # Tests for: insteont_mqtt/mqtt/MsgTemplate.py
 #
 #===========================================================================
+import pytest
 import helpers as H
 import insteon_mqtt as IM
 from insteon_mqtt.mqtt import MsgTemplate
@@ -71,6 +72,23 @@ class Test_MsgTemplate:
         assert call.qos == qos
         assert call.retain == retain
 
+    #-----------------------------------------------------------------------
+    def test_load_dedup(self):
+        msg = MsgTemplate('foo', 'bar')
+        assert msg.dedup is False
+
+        msg.load_config({'state_dedup' : 1}, 'state_topic', 'state_payload')
+        assert msg.dedup is True
+
+        # Missing keys keep the current value.
+        msg.load_config({}, 'state_topic', 'state_payload')
+        assert msg.dedup is True
+
+        msg = MsgTemplate('foo', 'bar', dedup=True)
+        msg.load_config({'state_dedup' : False}, 'state_topic',
+                        'state_payload')
+        assert msg.dedup is False
+
     #-----------------------------------------------------------------------
     def test_load(self):
         config = {
@@ -114,4 +132,74 @@ class Test_MsgTemplate:
             assert rec.levelname == "ERROR"
         assert jdata is None
 
+    #-----------------------------------------------------------------------
+    def test_shared(self):
+        compiled = MsgTemplate.stats["compiled"]
+        shared = MsgTemplate.stats["shared"]
+
+        msg1 = MsgTemplate('shared/{{address}}', '{{on_str}} shared')
+        msg2 = MsgTemplate('shared/{{address}}', None)
+        msg2.load_config({'payload' : '{{on_str}} shared'}, 'topic',
+                         'payload')
+        assert msg1.topic is msg2.topic
+        assert msg1.payload is msg2.payload
+        assert MsgTemplate.stats["compiled"] == compiled + 2
+        assert MsgTemplate.stats["shared"] == shared + 2
+
+        data = {"address" : "aa.bb.cc", "on_str" : "on"}
+        assert msg2.render_topic(data) == "shared/aa.bb.cc"
+        assert msg2.render_payload(data) == "on shared"
+
+    #-----------------------------------------------------------------------
+    def test_bytecode_cache(self, tmpdir):
+        path = str(tmpdir.join("templates"))
+        MsgTemplate.set_bytecode_cache(path)
+        try:
+            msg = MsgTemplate('{% if a %}cached/{{a}}{% endif %}', None)
+            assert msg.render_topic({"a" : "b"}) == "cached/b"
+            assert len(tmpdir.join("templates").listdir()) == 1
+        finally:
+            MsgTemplate.set_bytecode_cache(None)
+
+    #-----------------------------------------------------------------------
+    def test_fast(self):
+        env = MsgTemplate.env
+        data = {"address" : "aa.bb.cc", "on_str" : "on", "level" : 128,
+                "none" : None, "json" : {"state" : "ON", "a" : {"b" : 1}}}
+
+        # Templates that use the fast path - output must match jinja.
+        fast = ['insteon/{{address}}/state', '{{on_str.upper()}}',
+                '{{ on_str | upper }} {{level}}', '{{json.state.lower()}}',
+                '{{json.a.b}} {{json.missing}} {{missing}}', '{{none}}',
+                '{{ "const" }} {{ 5 }}', 'no vars', '', 'x\n',
+                '{{missing|lower}}', '{{ address -}}  /  {{- level }}']
+        for source in fast:
+            templ = IM.mqtt.FastTemplate.from_source(env, source)
+            assert templ is not None, source
+            assert templ.render(data) == env.from_string(source).render(data)
+
+        # Errors match as well.
+        for source in ['{{missing.lower()}}', '{{level.lower()}}',
+                       '{{missing.a}}']:
+            templ = IM.mqtt.FastTemplate.from_source(env, source)
+            assert templ is not None
+            with pytest.raises(Exception):
+                env.from_string(source).render(data)
+            with pytest.raises(Exception):
+                templ.render(data)
+
+        # Templates that need jinja.
+        slow = ['{% if level %}{{level}}{% endif %}', '{{level + 1}}',
+                '{{on_str.replace("o", "a")}}', '{{on_str|title}}',
+                '{{range(3)}}', '{{json["state"]}}', '{{ bad']
+        for source in slow:
+            assert IM.mqtt.FastTemplate.from_source(env, source) is None
+
+        # MsgTemplate uses the fast path when it can.
+        msg = MsgTemplate('fast/{{address}}', '{% if 1 %}slow{% endif %}')
+        assert isinstance(msg.topic, IM.mqtt.FastTemplate)
+        assert not isinstance(msg.payload, IM.mqtt.FastTemplate)
+        assert msg.render_topic(data) == "fast/aa.bb.cc"
+        assert msg.render_payload(data) == "slow"
+
 #===========================================================================
@@ -58,6 +58,26 @@ class Test_Switch:
         assert link.client.unsub[1] == dict(
             topic='insteon/%s/scene' % addr.hex)
 
+    #-----------------------------------------------------------------------
+    def test_subscriptions(self, setup, mocker):
+        mdev, addr = setup.getAll(['mdev', 'addr'])
+        mocker.spy(mdev, "template_data")
+
+        # Topics are rendered once and reused.
+        subs = mdev.subscriptions()
+        assert [i[0] for i in subs] == ['insteon/%s/set' % addr.hex,
+                                        'insteon/%s/scene' % addr.hex]
+        assert mdev.subscriptions() is subs
+        assert mdev.template_data.call_count == 1
+
+        # Loading a config renders the new topics.
+        config = {'switch' : {'on_off_topic' : 'foo/{{address}}',
+                              'scene_topic' : ''}}
+        mdev.load_config(config, 1)
+        subs = mdev.subscriptions()
+        assert subs == [('foo/%s' % addr.hex, mdev._input_on_off)]
+        assert mdev.template_data.call_count == 2
+
     #-----------------------------------------------------------------------
     def test_template(self, setup):
         mdev, addr, name = setup.getAll(['mdev', 'addr', 'name'])
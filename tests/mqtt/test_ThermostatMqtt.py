@@ -179,7 +179,7 @@ class MockMqtt:
         self.last_topic = None
         self.mode_command = None
 
-    def publish(self, topic, payload, qos=None, retain=None):
+    def publish(self, topic, payload, qos=None, retain=None, dedup=False):
         self.last_topic = topic
         self.last_payload = payload
 
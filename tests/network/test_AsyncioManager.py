@@ -0,0 +1,65 @@
+#===========================================================================
+#
+# Tests for: insteont_mqtt/network/aio_manager.py
+#
+#===========================================================================
+import asyncio
+import os
+import insteon_mqtt as IM
+from insteon_mqtt.network.aio_manager import Manager
+
+
+class Test_AsyncioManager:
+    def test_loop(self):
+        # Without a running loop, the manager creates it's own.
+        mgr = Manager()
+        assert not mgr.loop.is_running()
+        mgr.loop.close()
+
+    #-----------------------------------------------------------------------
+    def test_run(self):
+        links = []
+
+        async def main():
+            mgr = Manager()
+            assert mgr.loop is asyncio.get_running_loop()
+            mgr.min_time_out = 0.01
+
+            link = PipeLink()
+            links.append(link)
+            mgr.add(link)
+
+            # Data written to the pipe is read by the event loop.
+            os.write(link.pipe[1], b"\x02")
+            while not link.data:
+                await asyncio.sleep(0.01)
+
+            link.close()
+            await mgr.run()
+
+        asyncio.run(main())
+        assert links[0].data == [b"\x02"]
+
+    #-----------------------------------------------------------------------
+
+
+#===========================================================================
+class PipeLink(IM.network.Link):
+    def __init__(self):
+        super().__init__()
+        self.pipe = os.pipe()
+        self.data = []
+
+    def fileno(self):
+        return self.pipe[0]
+
+    def poll_dt(self, t):
+        return None
+
+    def read_from_link(self):
+        self.data.append(os.read(self.pipe[0], 100))
+
+    def close(self):
+        self.signal_closing.emit(self)
+        os.close(self.pipe[0])
+        os.close(self.pipe[1])
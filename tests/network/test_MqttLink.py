@@ -0,0 +1,141 @@
+#===========================================================================
+#
+# Tests for: insteont_mqtt/network/Mqtt.py
+#
+# pylint: disable=redefined-outer-name
+#===========================================================================
+import pytest
+import insteon_mqtt as IM
+
+
+@pytest.fixture
+def setup(mock_paho_mqtt, mocker):
+    # Time is stored in a list so the tests can change it.
+    now = [1000.0]
+    mocker.patch('time.time', side_effect=lambda: now[0])
+
+    link = IM.network.Mqtt()
+    return link, now
+
+
+#===========================================================================
+class Test_Mqtt:
+    #-----------------------------------------------------------------------
+    def test_publish(self, setup):
+        link, now = setup
+
+        # No pipeline by default.
+        link.publish('a', '1')
+        assert len(link.client.pub) == 1
+        assert link.poll_dt(now[0]) is None
+
+    #-----------------------------------------------------------------------
+    def test_coalesce(self, setup):
+        link, now = setup
+        link.load_config({'broker' : '127.0.0.1', 'port' : 1883,
+                          'publish_window' : 0.1})
+
+        link.publish('a', '1')
+        link.publish('b', '1')
+        link.publish('a', '2')
+        link.publish('a', '3', retain=True)
+        link.publish('a', '4', retain=True)
+        assert link.stats["coalesced"] == 1
+
+        # Nothing is sent until the window passes.
+        link.write_to_link(now[0])
+        assert len(link.client.pub) == 0
+        assert link.poll_dt(now[0]) == pytest.approx(0.1)
+
+        now[0] += 0.1
+        link.write_to_link(now[0])
+        pub = [(i.topic, i.payload, i.retain) for i in link.client.pub]
+        assert pub == [('a', '1', False), ('b', '1', False), ('a', '2', False),
+                       ('a', '4', True)]
+        assert link.poll_dt(now[0]) is None
+
+    #-----------------------------------------------------------------------
+    def test_coalesce_events(self, setup):
+        link, now = setup
+        link.load_config({'broker' : '127.0.0.1', 'port' : 1883,
+                          'publish_window' : 0.1})
+
+        # Button press events on the same topic are all sent.
+        link.publish('remote/btn1', 'on')
+        link.publish('remote/btn1', 'on')
+        assert link.stats["coalesced"] == 0
+
+        now[0] += 0.1
+        link.write_to_link(now[0])
+        pub = [(i.topic, i.payload) for i in link.client.pub]
+        assert pub == [('remote/btn1', 'on'), ('remote/btn1', 'on')]
+
+    #-----------------------------------------------------------------------
+    def test_rate(self, setup):
+        link, now = setup
+        link.load_config({'broker' : '127.0.0.1', 'port' : 1883,
+                          'publish_rate' : 10, 'publish_burst' : 2})
+
+        for i in range(5):
+            link.publish('topic/%d' % i, 'on')
+
+        # Burst is sent then one message every 1/rate seconds.
+        link.write_to_link(now[0])
+        assert len(link.client.pub) == 2
+        assert link.poll_dt(now[0]) == pytest.approx(0.1)
+
+        now[0] += 0.1
+        link.poll(now[0])
+        assert len(link.client.pub) == 3
+
+        now[0] += 1
+        link.poll(now[0])
+        assert [i.topic for i in link.client.pub] == \
+            ['topic/%d' % i for i in range(5)]
+        assert link.poll_dt(now[0]) is None
+
+    #-----------------------------------------------------------------------
+    def test_spool(self, setup, tmpdir):
+        link, now = setup
+        config = {'broker' : '127.0.0.1', 'port' : 1883, 'spool_size' : 3,
+                  'spool_file' : str(tmpdir.join("spool.json")),
+                  'spool_rate' : 10, 'publish_burst' : 2}
+        link.load_config(config)
+
+        # Only the newest state and the last spool_size events are kept.
+        for i in range(3):
+            link.publish('state/a', 'a%d' % i, 1, retain=True)
+        link.publish('state/b', 'b', 1, retain=True)
+        for i in range(5):
+            link.publish('event', 'e%d' % i, 0)
+
+        assert len(link.client.pub) == 0
+        assert link.stats["spool_dropped"] == 2
+
+        # Saved by poll() and loaded by a new link.
+        link.poll(now[0])
+        link = IM.network.Mqtt()
+        link.load_config(config)
+
+        # Connecting publishes the spool at the spool rate.
+        link._on_connect(link.client, None, {}, 0)
+        link.write_to_link(now[0])
+        assert len(link.client.pub) == 2
+
+        # Limited to the burst size on each pass.
+        now[0] += 1
+        link.write_to_link(now[0])
+        assert len(link.client.pub) == 4
+
+        now[0] += 0.1
+        link.write_to_link(now[0])
+        pub = [(i.topic, i.payload, i.retain) for i in link.client.pub]
+        assert pub == [('event', 'e2', False), ('event', 'e3', False),
+                       ('event', 'e4', False), ('state/a', 'a2', True),
+                       ('state/b', 'b', True)]
+
+        # Back to publishing right away.
+        link.publish('event', 'e5', 0)
+        assert len(link.client.pub) == 6
+
+    #-----------------------------------------------------------------------
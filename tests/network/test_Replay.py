@@ -0,0 +1,122 @@
+#===========================================================================
+#
+# Tests for: insteont_mqtt/network/Replay.py
+#
+# pylint: disable=protected-access
+#===========================================================================
+import insteon_mqtt as IM
+import insteon_mqtt.message as Msg
+
+ADDR = IM.Address('0a.12.33')
+OUT = Msg.OutStandard.direct(ADDR, 0x11, 0xff).to_bytes()
+ACK = bytes([0x02, 0x50, 0x0a, 0x12, 0x33, 0x44, 0x85, 0x11, 0x20, 0x11,
+             0xff])
+
+
+def make_file(tmpdir, records):
+    path = str(tmpdir.join("replay.bin"))
+    IM.recorder.write(path, records)
+    return path
+
+
+class Test_Replay:
+    #-----------------------------------------------------------------------
+    def test_config(self):
+        link = IM.network.Replay()
+        link.load_config({'port' : 'replay:///tmp/a.bin?speed=0'
+                                   '&write_time_out=2'})
+        assert link.path == '/tmp/a.bin'
+        assert link.speed == 0
+        assert link.write_time_out == 2
+
+        link.load_config({'port' : 'replay://data/a.bin'})
+        assert link.path == 'data/a.bin'
+
+        assert not IM.network.Replay('/does/not/exist').connect()
+
+    #-----------------------------------------------------------------------
+    def test_replay(self, tmpdir):
+        # Broadcast, command, echo, and the device ACK.
+        path = make_file(tmpdir, [
+            (9.0, IM.recorder.READ, ACK[:5]),
+            (9.5, IM.recorder.READ, ACK[5:]),
+            (10.0, IM.recorder.WRITE, OUT),
+            (10.1, IM.recorder.READ, OUT + b"\x06"),
+            (10.2, IM.recorder.READ, ACK),
+            ])
+        link = IM.network.Replay(path)
+        assert link.connect()
+        proto = IM.Protocol(link)
+
+        read = []
+
+        def received(msg):
+            read.append(msg)
+
+        proto.signal_received.connect(received)
+        done = []
+
+        def callback(msg, on_done):
+            done.append(msg)
+
+        # Records are played at the recorded times.
+        link.poll(100)
+        assert len(read) == 0
+        assert link.poll_dt(100) == 0.5
+        link.poll(100.5)
+        assert len(read) == 1
+
+        # Waits for the command to be written.
+        link.poll(101)
+        link.poll(103)
+        assert len(read) == 1
+        msg = Msg.OutStandard.direct(ADDR, 0x11, 0xff)
+        proto.send(msg, IM.handler.StandardCmd(msg, callback))
+        assert link.poll_dt(103) == 0
+
+        # The clock is reset to the write.
+        link.poll(104)
+        assert link.stats["written"] == 1
+        assert abs(link.poll_dt(104) - 0.1) < 1e-6
+        link.poll(104.2)
+        assert len(read) == 3
+        assert len(done) == 1
+        assert link.finished
+        assert link.stats == {"read" : 4, "written" : 1,
+                              "write_time_out" : 0}
+
+    #-----------------------------------------------------------------------
+    def test_fast(self, tmpdir):
+        path = make_file(tmpdir, [
+            (10.0, IM.recorder.READ, ACK),
+            (20.0, IM.recorder.WRITE, OUT),
+            (30.0, IM.recorder.READ, ACK),
+            ])
+        link = IM.network.Replay(path, speed=0, write_time_out=2)
+        assert link.connect()
+
+        finished = []
+
+        def on_finished(link):
+            finished.append(link)
+
+        link.signal_finished.connect(on_finished)
+
+        read = []
+
+        def on_read(link, data):
+            read.append(data)
+
+        link.signal_read.connect(on_read)
+
+        # Plays until the write and then times out waiting for it.
+        link.poll(100)
+        assert read == [ACK]
+        assert link.poll_dt(101) == 1
+        link.poll(102)
+        assert read == [ACK, ACK]
+        assert link.stats["write_time_out"] == 1
+        assert finished == [link]
+        assert link.poll_dt(103) is None
+
+        link.close()
@@ -0,0 +1,74 @@
+#===========================================================================
+#
+# Tests for: insteont_mqtt/network/Unix.py
+#
+#===========================================================================
+import os
+import socket
+import stat
+import insteon_mqtt as IM
+
+
+class Test_Unix:
+    def test_command(self, tmpdir):
+        path = str(tmpdir.join("ctl.sock"))
+        server = IM.network.Unix(path)
+        assert server.connect()
+
+        clients = []
+        commands = []
+
+        def new_client(link):
+            clients.append(link)
+
+        def command(link, line):
+            commands.append((link, line))
+
+        server.signal_new_client.connect(new_client)
+        server.signal_command.connect(command)
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(path)
+        server.read_from_link()
+        assert len(clients) == 1
+        client = clients[0]
+
+        # Commands are split into lines.
+        sock.sendall(b'{"a" : 1}\n{"b"')
+        client.read_from_link()
+        sock.sendall(b' : 2}\n')
+        client.read_from_link()
+        assert commands == [(client, b'{"a" : 1}'), (client, b'{"b" : 2}')]
+
+        client.write(b'reply\n')
+        client.write_to_link(0)
+        assert sock.recv(100) == b'reply\n'
+
+        # The client link closes when the socket closes.
+        closed = []
+
+        def closing(link):
+            closed.append(link)
+
+        client.signal_closing.connect(closing)
+        sock.close()
+        assert client.read_from_link() == -1
+        assert closed == [client]
+
+        server.close()
+        assert not tmpdir.join("ctl.sock").exists()
+
+    #-----------------------------------------------------------------------
+    def test_mode(self, tmpdir):
+        path = str(tmpdir.join("ctl.sock"))
+        server = IM.network.Unix(path)
+        assert server.connect()
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+        server.close()
+
+        server = IM.network.Unix(path, mode=0o660)
+        assert server.connect()
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o660
+        server.close()
+
+    #-----------------------------------------------------------------------
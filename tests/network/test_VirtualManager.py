@@ -0,0 +1,101 @@
+#===========================================================================
+#
+# Tests for: insteont_mqtt/network/virtual.py
+#
+#===========================================================================
+import os
+import socket
+import pytest
+import insteon_mqtt as IM
+from insteon_mqtt.network import VirtualManager
+
+
+class Test_VirtualManager:
+    def test_wall_clock(self):
+        with pytest.raises(ValueError):
+            VirtualManager()
+
+    #-----------------------------------------------------------------------
+    def test_deadlines(self, virtual_clock):
+        mgr = VirtualManager()
+        link = TimerLink([1005.0, 1012.5])
+        mgr.add(link)
+
+        # Time jumps to each deadline and then in min_time_out steps.
+        t = mgr.run(until=1020.0)
+        assert t == 1020.0
+        assert link.fired == [1005.0, 1012.5]
+        assert 1003.0 in link.polled
+        assert 1015.5 in link.polled
+
+        link.close()
+        assert not mgr.active()
+
+    #-----------------------------------------------------------------------
+    def test_done(self, virtual_clock):
+        mgr = VirtualManager()
+        link = TimerLink([1100.0])
+        mgr.add(link)
+
+        t = mgr.run(done=lambda: link.fired)
+        assert t == 1100.0
+        link.close()
+
+    #-----------------------------------------------------------------------
+    def test_mqtt_publish(self, virtual_clock, mock_paho_mqtt):
+        mgr = VirtualManager()
+        link = IM.network.Mqtt()
+        link.load_config({'broker' : '127.0.0.1', 'port' : 1883,
+                          'publish_window' : 0.5, 'publish_rate' : 1,
+                          'publish_burst' : 1})
+
+        # The mock client has no socket so use one that's always writable.
+        sock, other = socket.socketpair()
+        link._fd = sock.fileno()
+        mgr.add(link)
+
+        for i in range(3):
+            link.publish('topic/%d' % i, 'on')
+
+        # The window and the rate are both in virtual time.
+        times = []
+
+        def published():
+            if len(link.client.pub) > len(times):
+                times.append(IM.clock.time())
+            return len(times) == 3
+
+        mgr.run(done=published)
+        assert times == [1000.5, 1001.5, 1002.5]
+
+        mgr.remove(link)
+        sock.close()
+        other.close()
+
+    #-----------------------------------------------------------------------
+
+
+#===========================================================================
+class TimerLink(IM.network.Link):
+    def __init__(self, times):
+        super().__init__()
+        self.times = times
+        self.fired = []
+        self.polled = []
+        self._pipe = os.pipe()
+
+    def fileno(self):
+        return self._pipe[0]
+
+    def poll_dt(self, t):
+        return self.times[0] - t if self.times else None
+
+    def poll(self, t):
+        self.polled.append(t)
+        if self.times and t >= self.times[0]:
+            self.fired.append(self.times.pop(0))
+
+    def close(self):
+        self.signal_closing.emit(self)
+        os.close(self._pipe[0])
+        os.close(self._pipe[1])
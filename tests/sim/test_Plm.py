@@ -0,0 +1,165 @@
+#===========================================================================
+#
+# Tests for: insteont_mqtt/sim/Plm.py
+#
+# pylint: disable=protected-access
+#===========================================================================
+import insteon_mqtt as IM
+import insteon_mqtt.message as Msg
+import insteon_mqtt.sim as Sim
+
+
+class Test_Plm:
+    def test_get_info(self):
+        plm = Sim.Plm("44.85.11", echo_time=0.01)
+        plm.feed(bytes([0x02, 0x60]), 1.0)
+
+        assert plm.next_time() == 1.01
+        assert plm.pop_due(1.0) == b""
+        assert plm.pop_due(1.01) == bytes([0x02, 0x60, 0x44, 0x85, 0x11,
+                                           0x03, 0x15, 0x9e, 0x06])
+        assert plm.next_time() is None
+
+    #-----------------------------------------------------------------------
+    def test_direct(self):
+        plm = Sim.Plm(echo_time=0.01)
+        dev = Sim.Dimmer("10.00.01", hops=1, latency=0.1)
+        plm.add(dev, link=False)
+
+        out = Msg.OutStandard.direct(dev.addr, 0x11, 0x80).to_bytes()
+
+        # Partial writes are buffered until the message is complete.
+        plm.feed(out[:4], 1.0)
+        assert plm.next_time() is None
+        plm.feed(out[4:], 1.0)
+
+        echo = plm.pop_due(1.01)
+        assert echo == out + bytes([0x06])
+
+        # Reply is after the hop latency.
+        assert plm.pop_due(1.1) == b""
+        raw = plm.pop_due(1.22)
+        msg = Msg.InpStandard.from_bytes(raw)
+        assert msg.from_addr == dev.addr
+        assert msg.to_addr == plm.addr
+        assert msg.flags.type == Msg.Flags.Type.DIRECT_ACK
+        assert msg.flags.hops_left == 2
+        assert msg.cmd1 == 0x11
+        assert dev.level == 0x80
+
+    #-----------------------------------------------------------------------
+    def test_split_extended(self):
+        plm = Sim.Plm(echo_time=0)
+        dev = Sim.Thermostat("10.00.01", latency=0.1)
+        plm.add(dev, link=False)
+
+        out = Msg.OutExtended.direct(dev.addr, 0x2e, 0x02,
+                                     bytes(14)).to_bytes()
+
+        # The flags decide the size so a split before the flags or after
+        # the standard message size waits for the rest.
+        plm.feed(out[:3], 1.0)
+        plm.feed(out[3:8], 1.0)
+        assert plm.stats["received"] == 0
+
+        plm.feed(out[8:], 1.0)
+        assert plm.stats["received"] == 1
+        assert plm.pop_due(1.0) == out + bytes([0x06])
+
+    #-----------------------------------------------------------------------
+    def test_unknown_device(self):
+        plm = Sim.Plm(echo_time=0)
+        out = Msg.OutStandard.direct(IM.Address("01.02.03"), 0x19,
+                                     0x00).to_bytes()
+        plm.feed(out, 1.0)
+        assert plm.pop_due(1.0) == out + bytes([0x06])
+        assert plm.next_time() is None
+
+    #-----------------------------------------------------------------------
+    def test_nak(self):
+        plm = Sim.Plm(nak_rate=1.0, echo_time=0)
+        plm.add(Sim.Dimmer("10.00.01"))
+        out = Msg.OutStandard.direct(IM.Address("10.00.01"), 0x19,
+                                     0x00).to_bytes()
+        plm.feed(b"\x00\x01" + out, 1.0)
+        assert plm.pop_due(5.0) == out + bytes([0x15])
+        assert plm.stats["nak"] == 1
+
+        # Unknown message codes are NAK'ed.
+        plm.feed(bytes([0x02, 0x30]), 1.0)
+        assert plm.pop_due(5.0) == bytes([0x15])
+        assert plm.stats["unknown"] == 1
+
+    #-----------------------------------------------------------------------
+    def test_db(self):
+        plm = Sim.Plm(echo_time=0)
+        plm.add(Sim.Dimmer("10.00.01"))
+        assert len(plm.db) == 2
+
+        recs = []
+        plm.feed(Msg.OutAllLinkGetFirst().to_bytes(), 1.0)
+        for i in range(3):
+            raw = plm.pop_due(1.0)
+            if raw[-1] == 0x15:
+                break
+
+            assert raw[:3] == bytes([0x02, 0x69 if i == 0 else 0x6a, 0x06])
+            recs.append(Msg.InpAllLinkRec.from_bytes(raw[3:]))
+            plm.feed(Msg.OutAllLinkGetNext().to_bytes(), 1.0)
+
+        assert len(recs) == 2
+        assert recs[0].addr == IM.Address("10.00.01")
+        assert recs[0].db_flags.is_controller
+
+        # Delete a record.
+        db_flags = Msg.DbFlags(in_use=True, is_controller=True,
+                               is_last_rec=False)
+        msg = Msg.OutAllLinkUpdate(Msg.OutAllLinkUpdate.Cmd.DELETE,
+                                   db_flags, 0x00, IM.Address("10.00.01"),
+                                   bytes(3))
+        plm.feed(msg.to_bytes(), 1.0)
+        assert plm.pop_due(1.0)[-1] == 0x06
+        assert len(plm.db) == 1
+
+        plm.feed(msg.to_bytes(), 1.0)
+        assert plm.pop_due(1.0)[-1] == 0x15
+
+    #-----------------------------------------------------------------------
+    def test_scene(self):
+        plm = Sim.Plm(echo_time=0)
+        dev = Sim.Dimmer("10.00.01", latency=0.1)
+        plm.add(dev, link=False)
+        plm.db.append((0xe2, 0x05, dev.addr, bytes(3)))
+
+        out = Msg.OutModemScene(0x05, 0x11, 0x00).to_bytes()
+        plm.feed(out, 1.0)
+        assert plm.pop_due(1.0) == out + bytes([0x06])
+
+        raw = plm.pop_due(2.0)
+        msg = Msg.InpStandard.from_bytes(raw)
+        assert msg.flags.type == Msg.Flags.Type.CLEANUP_ACK
+        assert raw[11:] == bytes([0x02, 0x58, 0x06])
+        assert dev.level == 0xff
+
+    #-----------------------------------------------------------------------
+    def test_activity(self):
+        plm = Sim.Plm(seed=5)
+        dev = Sim.Motion("10.00.01", activity=10, rng=plm.rng)
+        plm.add(dev)
+        plm.start(0.0)
+
+        t = plm.next_time()
+        assert t > 0
+        raw = plm.pop_due(t)
+        msg = Msg.InpStandard.from_bytes(raw)
+        assert msg.flags.type == Msg.Flags.Type.ALL_LINK_BROADCAST
+        assert msg.group == 1
+        assert msg.cmd1 == 0x11
+
+        # Cleanup follows the broadcast.
+        raw = plm.pop_due(plm.next_time())
+        msg = Msg.InpStandard.from_bytes(raw)
+        assert msg.flags.type == Msg.Flags.Type.ALL_LINK_CLEANUP
+        assert plm.stats["activity"] == 1
+
+    #-----------------------------------------------------------------------
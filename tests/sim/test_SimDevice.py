@@ -0,0 +1,130 @@
+#===========================================================================
+#
+# Tests for: insteont_mqtt/sim/Device.py and derived devices.
+#
+# pylint: disable=protected-access
+#===========================================================================
+import insteon_mqtt as IM
+import insteon_mqtt.message as Msg
+import insteon_mqtt.sim as Sim
+from insteon_mqtt.sim.Device import I1
+
+MODEM = IM.Address("44.85.11")
+
+
+def build(cls, **kwargs):
+    dev = cls("10.00.01", **kwargs)
+    dev.modem_addr = MODEM
+    return dev
+
+
+class Test_Device:
+    def test_i2_db(self):
+        dev = build(Sim.Dimmer)
+        dev.add_link("20.00.01", 0x03, True, bytes([0xff, 0x1f, 0x03]))
+        dev.add_link("20.00.02", 0x04, False)
+
+        data = bytes(14)
+        replies = dev.handle(0x1f, 0x2f, 0x00, data)
+        assert len(replies) == 4
+
+        msgs = [Msg.InpStandard.from_bytes(raw) for dt, raw in replies[:1]]
+        msgs += [Msg.InpExtended.from_bytes(raw) for dt, raw in replies[1:]]
+        assert msgs[0].flags.type == Msg.Flags.Type.DIRECT_ACK
+
+        entry = IM.db.DeviceEntry.from_bytes(msgs[1].data)
+        assert entry.addr == IM.Address("20.00.01")
+        assert entry.group == 0x03
+        assert entry.mem_loc == 0x0fff
+        assert entry.db_flags.is_controller
+
+        entry = IM.db.DeviceEntry.from_bytes(msgs[2].data)
+        assert entry.mem_loc == 0x0ff7
+        assert not entry.db_flags.is_controller
+
+        # Last record is the end of the database.
+        entry = IM.db.DeviceEntry.from_bytes(msgs[3].data)
+        assert not entry.db_flags.in_use
+
+        # Replies are spaced by the latency.
+        assert [dt for dt, raw in replies] == sorted(dt for dt, raw in
+                                                     replies)
+
+    #-----------------------------------------------------------------------
+    def test_i2_db_record(self):
+        dev = build(Sim.Dimmer)
+        dev.add_link("20.00.01", 0x03, True, bytes([0xff, 0x1f, 0x03]))
+        dev.add_link("20.00.02", 0x04, False)
+
+        # Read a single record by memory location.
+        data = bytes([0x00, 0x00, 0x0f, 0xf7, 0x01]) + bytes(9)
+        replies = dev.handle(0x1f, 0x2f, 0x00, data)
+        assert len(replies) == 2
+
+        entry = IM.db.DeviceEntry.from_bytes(
+            Msg.InpExtended.from_bytes(replies[1][1]).data)
+        assert entry.mem_loc == 0x0ff7
+        assert entry.addr == IM.Address("20.00.02")
+
+    #-----------------------------------------------------------------------
+    def test_i1_db(self):
+        dev = build(Sim.Dimmer, engine=I1)
+        dev.add_link("20.00.01", 0x03, True, bytes([0xff, 0x1f, 0x03]))
+
+        # Extended messages are ignored.
+        assert dev.handle(0x1f, 0x2f, 0x00, bytes(14)) == []
+
+        dev.handle(0x0f, 0x28, 0x0f, None)
+        record = []
+        for lsb in range(0xf8, 0x100):
+            dt, raw = dev.handle(0x0f, 0x2b, lsb, None)[0]
+            record.append(Msg.InpStandard.from_bytes(raw).cmd2)
+
+        assert record == [0xe2, 0x03, 0x20, 0x00, 0x01, 0xff, 0x1f, 0x03]
+
+    #-----------------------------------------------------------------------
+    def test_drop(self):
+        dev = build(Sim.Dimmer, drop_rate=1.0)
+        assert dev.handle(0x0f, 0x19, 0x00, None) == []
+        assert dev.stats["dropped"] == 1
+
+    #-----------------------------------------------------------------------
+    def test_keypad_led(self):
+        dev = build(Sim.KeypadLinc)
+        data = bytes([0x01, 0x09, 0x05] + [0x00] * 11)
+        dev.handle(0x1f, 0x2e, 0x00, data)
+
+        dt, raw = dev.handle(0x0f, 0x19, 0x01, None)[0]
+        assert Msg.InpStandard.from_bytes(raw).cmd2 == 0x05
+
+    #-----------------------------------------------------------------------
+    def test_motion(self):
+        dev = build(Sim.Motion)
+        assert dev.handle(0x0f, 0x19, 0x00, None) == []
+
+        msgs = dev.activity()
+        cmds = [Msg.InpStandard.from_bytes(raw).cmd1 for dt, raw in msgs]
+        assert cmds == [0x11, 0x11, 0x13, 0x13]
+        assert msgs[-1][0] > dev.off_delay
+
+    #-----------------------------------------------------------------------
+    def test_thermostat(self):
+        dev = build(Sim.Thermostat)
+        dev.temp = 22.5
+        replies = dev.handle(0x1f, 0x2e, 0x02, bytes(14))
+        assert len(replies) == 2
+
+        msg = Msg.InpExtended.from_bytes(replies[1][1])
+        assert msg.cmd1 == 0x2e
+        assert int.from_bytes(msg.data[8:10], byteorder='big') == 225
+        assert msg.data[6] == dev.cool_sp
+        assert msg.data[11] == dev.heat_sp
+
+        # Temperature below the heat set point starts heating.
+        dev.temp = dev.heat_sp - 5
+        msgs = dev.activity()
+        msg = Msg.InpStandard.from_bytes(msgs[0][1])
+        assert msg.group == Sim.Thermostat.HEATING
+        assert msg.cmd1 == 0x11
+
+    #-----------------------------------------------------------------------
@@ -0,0 +1,113 @@
+#===========================================================================
+#
+# Tests for: insteont_mqtt/sim/Link.py
+#
+#===========================================================================
+import socket
+import time
+import insteon_mqtt as IM
+import insteon_mqtt.network as Net
+import insteon_mqtt.sim as Sim
+
+
+class Test_Link:
+    def test_pty(self, tmpdir):
+        plm = Sim.Plm(echo_time=0)
+        sim_dev = Sim.Dimmer("10.00.01", latency=0.01)
+        plm.add(sim_dev)
+
+        loop = Net.Manager()
+        pty = Sim.Pty(plm)
+        assert pty.connect()
+        loop.add(pty)
+
+        # The bridge connects to the pty like a serial port.
+        serial = Net.Serial(pty.path)
+        loop.add(serial, connected=False)
+        protocol = IM.Protocol(serial)
+        modem = IM.Modem(protocol)
+        modem.addr = plm.addr
+        modem.save_path = str(tmpdir)
+
+        device = IM.device.Dimmer(protocol, modem, sim_dev.addr, "test")
+        results = []
+
+        def on_done(success, msg, data):
+            results.append(success)
+
+        device.on(level=0x80, on_done=on_done)
+        end = time.time() + 10
+        while not results and time.time() < end:
+            loop.select(0.05)
+
+        assert results == [True]
+        assert sim_dev.level == 0x80
+        assert device._level == 0x80
+
+        loop.close_all()
+
+    #-----------------------------------------------------------------------
+    def test_tcp(self):
+        plm = Sim.Plm(echo_time=0)
+        loop = Net.Manager()
+        listener = Sim.Tcp(plm, port=0)
+        listener.signal_new_client.connect(loop.add)
+        assert listener.connect()
+        loop.add(listener)
+
+        sock = socket.create_connection(("127.0.0.1", listener.port))
+        sock.settimeout(0.05)
+        sock.sendall(bytes([0x02, 0x60]))
+
+        data = b""
+        end = time.time() + 5
+        while len(data) < 9 and time.time() < end:
+            loop.select(0.05)
+            try:
+                data += sock.recv(100)
+            except socket.timeout:
+                pass
+
+        assert data[:5] == bytes([0x02, 0x60, 0x44, 0x85, 0x11])
+        sock.close()
+        loop.close_all()
+
+    #-----------------------------------------------------------------------
+    def test_direct(self, virtual_clock, tmpdir):
+        plm = Sim.Plm(echo_time=0.01)
+        sim_dev = Sim.Dimmer("10.00.01", latency=0.1)
+        plm.add(sim_dev)
+
+        loop = Net.VirtualManager()
+        link = Sim.Direct(plm)
+        protocol = IM.Protocol(link)
+        modem = IM.Modem(protocol)
+        modem.addr = plm.addr
+        modem.save_path = str(tmpdir)
+        loop.add(link, connected=False)
+
+        device = IM.device.Dimmer(protocol, modem, sim_dev.addr, "test")
+        results = []
+
+        def on_done(success, msg, data):
+            results.append((success, IM.clock.time()))
+
+        # The first reply is dropped so the command times out and is
+        # retried.  That takes seconds in virtual time.
+        sim_dev.drop_rate = 1.0
+        device.on(level=0x80, on_done=on_done)
+        loop.run(until=1001.0)
+        assert not results
+        sim_dev.drop_rate = 0.0
+
+        loop.run(done=lambda: results)
+        success, t = results[0]
+        assert success
+        assert t > 1001.0
+        assert sim_dev.level == 0x80
+        assert sim_dev.stats["received"] == 2
+        assert sim_dev.stats["dropped"] == 1
+
+        link.close()
+
+    #-----------------------------------------------------------------------
@@ -0,0 +1,47 @@
+#===========================================================================
+#
+# Tests for: insteont_mqtt/sim/population.py
+#
+#===========================================================================
+import pytest
+import yaml
+from insteon_mqtt.sim import population
+
+
+class Test_population:
+    def test_build(self):
+        spec = {'seed' : 3, 'devices' : {'dimmer' : 5, 'motion' : 2},
+                'i1_fraction' : 0.5, 'hops' : [1, 2]}
+        plm = population.build(spec)
+        assert len(plm.devices) == 7
+        assert all(1 <= i.hops <= 2 for i in plm.devices.values())
+
+        # Same seed builds the same population.
+        plm2 = population.build(spec)
+        assert ([(i.addr, i.engine, i.hops, i.db) for i in
+                 plm.devices.values()] ==
+                [(i.addr, i.engine, i.hops, i.db) for i in
+                 plm2.devices.values()])
+
+        config = population.devices_config(plm)
+        assert config['dimmer'][0] == "10.00.01"
+        assert len(config['motion']) == 2
+
+    #-----------------------------------------------------------------------
+    def test_bad_type(self):
+        with pytest.raises(ValueError):
+            population.build({'devices' : {'foo' : 1}})
+
+    #-----------------------------------------------------------------------
+    def test_files(self, tmpdir):
+        spec = tmpdir.join("spec.yaml")
+        spec.write("devices:\n  thermostat: 2\n")
+        plm = population.load(str(spec))
+        assert len(plm.devices) == 2
+
+        path = tmpdir.join("devices.yaml")
+        population.write_config(plm, str(path))
+        assert yaml.safe_load(path.read()) == {
+            'thermostat' : ["10.00.01", "10.00.02"]}
+
+    #-----------------------------------------------------------------------
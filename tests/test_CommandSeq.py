@@ -0,0 +1,128 @@
+#===========================================================================
+#
+# Tests for: insteont_mqtt/CommandSeq.py
+#
+# pylint: disable=protected-access
+#===========================================================================
+import sys
+import insteon_mqtt as IM
+import helpers as H
+
+
+class Test_CommandSeq:
+    #-----------------------------------------------------------------------
+    def test_long(self):
+        proto = H.main.MockProtocol()
+
+        # Each step finishes before returning.  This would overflow the stack
+        # if the steps were called recursively.
+        calls = []
+
+        def step(i, on_done):
+            calls.append(i)
+            on_done(True, None, None)
+
+        num = 10000
+        assert num > sys.getrecursionlimit()
+
+        done = []
+        seq = IM.CommandSeq(proto, "Done", lambda *x: done.append(x))
+        for i in range(num):
+            seq.add(step, i)
+
+        seq.run()
+        assert calls == list(range(num))
+        assert done == [(True, "Done", None)]
+
+    #-----------------------------------------------------------------------
+    def test_async(self):
+        proto = H.main.MockProtocol()
+
+        # Steps finish later from the event loop.
+        waiting = []
+        progress = []
+        done = []
+        seq = IM.CommandSeq(proto, "Done", lambda *x: done.append(x),
+                            on_progress=lambda *x: progress.append(x))
+        seq.add(lambda on_done: waiting.append(on_done))
+        seq.add(lambda on_done: waiting.append(on_done))
+
+        seq.run()
+        assert len(waiting) == 1
+        waiting[0](True, None, None)
+        assert len(waiting) == 2
+        assert progress == [(1, 2)]
+
+        # Error stops the sequence.
+        waiting[1](False, "Error", 5)
+        assert progress == [(1, 2), (2, 2)]
+        assert done == [(False, "Error", 5)]
+
+    #-----------------------------------------------------------------------
+    def test_cancel(self):
+        proto = H.main.MockProtocol()
+
+        waiting = []
+        done = []
+        seq = IM.CommandSeq(proto, "Done", lambda *x: done.append(x))
+        seq.add(lambda on_done: waiting.append(on_done))
+        seq.add(lambda on_done: waiting.append(on_done))
+
+        seq.run()
+        seq.cancel()
+        assert done == [(False, "Command sequence cancelled", None)]
+
+        # Late results are ignored.
+        waiting[0](True, None, None)
+        assert len(waiting) == 1
+        assert len(done) == 1
+
+    #-----------------------------------------------------------------------
+    def test_time_out(self, mocker):
+        proto = H.main.MockProtocol()
+        mocker.patch('time.time', return_value=100)
+
+        waiting = []
+        done = []
+        seq = IM.CommandSeq(proto, "Done", lambda *x: done.append(x),
+                            error_stop=False, time_out=5)
+        seq.add(lambda on_done: waiting.append(on_done))
+        seq.add(lambda on_done: waiting.append(on_done))
+
+        seq.run()
+        proto.signal_poll.emit(104)
+        assert len(waiting) == 1
+
+        # Step times out - the next one starts.
+        proto.signal_poll.emit(106)
+        assert len(waiting) == 2
+
+        # Late result from the first step is ignored.
+        waiting[0](True, None, None)
+        assert len(waiting) == 2
+        assert len(done) == 0
+
+        waiting[1](True, None, None)
+        assert done == [(True, "Done", None)]
+        assert len(proto.signal_poll.slots) == 0
+
+    #-----------------------------------------------------------------------
+    def test_time_out_device(self, tmpdir, mocker):
+        proto = H.main.MockProtocol()
+        modem = H.main.MockModem(tmpdir)
+        device = IM.device.Switch(proto, modem, IM.Address(1, 2, 3))
+        mocker.patch('time.time', return_value=100)
+
+        # Devices can be used as the protocol.  Their protocol is polled.
+        done = []
+        seq = IM.CommandSeq(device, "Done", lambda *x: done.append(x),
+                            time_out=5)
+        seq.add(lambda on_done: None)
+        seq.run()
+        assert len(proto.signal_poll.slots) == 1
+
+        proto.signal_poll.emit(106)
+        assert done == [(False, "Command timed out", None)]
+        assert len(proto.signal_poll.slots) == 0
+
+    #-----------------------------------------------------------------------
@@ -0,0 +1,204 @@
+#===========================================================================
+#
+# Tests for: insteont_mqtt/Modem.py
+#
+# pylint: disable=protected-access
+#===========================================================================
+import insteon_mqtt as IM
+import insteon_mqtt.message as Msg
+import helpers as H
+
+
+class Test_Modem:
+    #-----------------------------------------------------------------------
+    def test_reload_config(self, tmpdir):
+        proto = H.main.MockProtocol()
+        modem = IM.Modem(proto)
+        modem.addr = IM.Address(0x20, 0x30, 0x40)
+        modem.save_path = str(tmpdir)
+        modem._load_devices({
+            'switch' : [{'aa.bb.01' : 'sw1'}, 'aa.bb.02'],
+            'dimmer' : [{'aa.bb.03' : 'dim'}, {'aa.bb.04' : 'old'}],
+            })
+
+        added = []
+        removed = []
+
+        def new_device(modem, device):
+            added.append(device)
+
+        def remove_device(modem, device):
+            removed.append(device)
+
+        modem.signal_new_device.connect(new_device)
+        modem.signal_remove_device.connect(remove_device)
+
+        sw1 = modem.find(IM.Address('aa.bb.01'))
+        sw2 = modem.find(IM.Address('aa.bb.02'))
+        dim = modem.find(IM.Address('aa.bb.03'))
+        old = modem.find(IM.Address('aa.bb.04'))
+
+        # Remove aa.bb.02, change aa.bb.03 to a switch, rename aa.bb.04, and
+        # add aa.bb.05.
+        modem.reload_config({
+            'address' : '20.30.40',
+            'refresh_window' : 30,
+            'devices' : {
+                'switch' : [{'aa.bb.01' : 'sw1'}, {'aa.bb.03' : 'dim'},
+                            'aa.bb.05'],
+                'dimmer' : [{'aa.bb.04' : 'new'}],
+                },
+            })
+
+        # Unchanged devices are kept.
+        assert modem.find(IM.Address('aa.bb.01')) is sw1
+        assert sw1.refresh_window == 30
+
+        assert modem.find(IM.Address('aa.bb.02')) is None
+        assert modem.find('sw1') is sw1
+        assert 'old' not in modem.device_names
+
+        new_dim = modem.find(IM.Address('aa.bb.03'))
+        assert isinstance(new_dim, IM.device.Switch)
+        assert modem.find('dim') is new_dim
+
+        new = modem.find(IM.Address('aa.bb.04'))
+        assert new is not old
+        assert new.name == "new"
+        assert modem.find('new') is new
+
+        assert isinstance(modem.find(IM.Address('aa.bb.05')),
+                          IM.device.Switch)
+
+        assert sorted(i.addr.hex for i in removed) == [
+            'aa.bb.02', 'aa.bb.03', 'aa.bb.04']
+        assert set(removed) == set([sw2, dim, old])
+        assert sorted(i.addr.hex for i in added) == [
+            'aa.bb.03', 'aa.bb.04', 'aa.bb.05']
+
+        # Reloading the same config doesn't change anything.
+        del added[:]
+        del removed[:]
+        modem.reload_config({
+            'address' : '20.30.40',
+            'devices' : {
+                'switch' : [{'aa.bb.01' : 'sw1'}, {'aa.bb.03' : 'dim'},
+                            'aa.bb.05'],
+                'dimmer' : [{'aa.bb.04' : 'new'}],
+                },
+            })
+        assert added == []
+        assert removed == []
+        assert modem.find(IM.Address('aa.bb.03')) is new_dim
+
+    #-----------------------------------------------------------------------
+    def test_refresh_all(self, tmpdir, virtual_clock):
+        proto = H.main.MockProtocol()
+        modem = IM.Modem(proto)
+        modem.addr = IM.Address(0x20, 0x30, 0x40)
+        modem.save_path = str(tmpdir)
+        modem._load_devices({
+            'dimmer' : ['aa.bb.01', 'aa.bb.02', 'aa.bb.03'],
+            })
+
+        devs = [modem.find(IM.Address(0xaa, 0xbb, i)) for i in (1, 2, 3)]
+        for dev in devs:
+            dev.db.set_delta(0x05)
+            dev.db.set_dev_cat(0x01)
+            dev.db.set_sub_cat(0x20)
+            dev.db.set_firmware(0x41)
+
+        # Devices with a recently confirmed state and db delta aren't
+        # pinged.  A confirmed state alone still needs the db delta check.
+        devs[1].refresh_window = 60
+        devs[1].confirm_state()
+        devs[2].refresh_window = 60
+        devs[2].confirm_state()
+        devs[2].confirm_db()
+
+        done = []
+        modem.refresh_all(on_done=lambda *x: done.append(x))
+
+        # Phase one: each device is pinged with the short sweep time out.
+        assert len(proto.sent) == 1
+        assert proto.sent[0].msg.to_addr == devs[0].addr
+        assert proto.sent[0].msg.cmd1 == 0x19
+        assert devs[0].refresh_sweep is True
+        assert proto.sent[0].handler._time_out == \
+            IM.handler.DeviceRefresh.sweep_time_out
+
+        # The first device database is out of date.  The download is
+        # deferred until all the states are known.
+        virtual_clock.advance(1.0)
+        reply(proto, proto.sent[0], modem, 0x09)
+        assert devs[0].refresh_sweep is False
+        assert devs[0].has_deferred_db()
+        assert len(proto.sent) == 2
+        assert proto.sent[1].msg.to_addr == devs[1].addr
+
+        virtual_clock.advance(1.0)
+        reply(proto, proto.sent[1], modem, 0x05)
+        assert not devs[1].has_deferred_db()
+
+        # Phase two runs as a background task: the modem database and then
+        # the out of date device database.
+        assert len(proto.sent) == 2
+        assert len(proto.background) == 1
+
+        virtual_clock.advance(1.0)
+        proto.background.poll(virtual_clock.time())
+        assert isinstance(proto.sent[2].msg, Msg.OutAllLinkGetFirst)
+        proto.sent[2].handler.on_done(True, "Database loaded", None)
+
+        # The download yields to interactive commands before each record
+        # request.
+        virtual_clock.advance(1.0)
+        proto.background.poll(virtual_clock.time())
+        assert len(proto.sent) == 3
+        proto.background.poll(virtual_clock.time())
+        assert proto.sent[3].msg.to_addr == devs[0].addr
+        assert proto.sent[3].msg.cmd1 == 0x2f
+        assert not done
+
+        # Empty record is the end of the database.
+        virtual_clock.advance(1.0)
+        flags = Msg.Flags(Msg.Flags.Type.DIRECT, True)
+        data = bytes([0x00, 0x01, 0x0f, 0xff] + [0x00] * 10)
+        msg = Msg.InpExtended(devs[0].addr, modem.addr, flags, 0x2f, 0x00,
+                              data)
+        proto.sent[3].handler.msg_received(proto, msg)
+        assert len(proto.sent) == 4
+        assert not devs[0].has_deferred_db()
+        assert devs[0].db.delta == 0x09
+
+        assert done == [(True, "Refresh all complete",
+                         {"states_time" : 2.0, "total_time" : 5.0})]
+
+    #-----------------------------------------------------------------------
+    def test_refresh_all_step_time_out(self, tmpdir, virtual_clock):
+        proto = H.main.MockProtocol()
+        modem = IM.Modem(proto)
+        modem.addr = IM.Address(0x20, 0x30, 0x40)
+        modem.save_path = str(tmpdir)
+        modem._load_devices({
+            'dimmer' : ['aa.bb.01', 'aa.bb.02'],
+            })
+
+        done = []
+        modem.refresh_all(on_done=lambda *x: done.append(x))
+        assert len(proto.sent) == 1
+
+        # A device that never finishes doesn't stop the sweep.
+        virtual_clock.advance(modem.sweep_step_time_out + 1)
+        proto.signal_poll.emit(virtual_clock.time())
+        assert len(proto.sent) == 2
+        assert proto.sent[1].msg.to_addr == IM.Address('aa.bb.02')
+
+    #-----------------------------------------------------------------------
+
+
+#===========================================================================
+def reply(proto, sent, modem, delta):
+    flags = Msg.Flags(Msg.Flags.Type.DIRECT_ACK, False)
+    msg = Msg.InpStandard(sent.msg.to_addr, modem.addr, flags, delta, 0x00)
+    sent.handler.msg_received(proto, msg)
@@ -7,6 +7,7 @@
 import time
 import insteon_mqtt as IM
 import insteon_mqtt.message as Msg
+from insteon_mqtt.Protocol import WriteStatus
 
 
 class Test_Protocol:
@@ -56,6 +57,160 @@ class Test_Protocol:
         assert proto._read_history[0] == msg_keep
 
     #-----------------------------------------------------------------------
+    def test_idle_time(self):
+        link = MockSerial()
+        proto = IM.Protocol(link)
+        assert proto.idle_time(100) == 100
+
+        proto._last_activity = 90
+        assert proto.idle_time(100) == 10
+
+        # Waiting for a read message to expire.
+        proto._next_write_time = 101
+        assert proto.idle_time(100) == 0
+        proto._next_write_time = 0
+
+        proto._write_queue.append(None)
+        assert proto.idle_time(100) == 0
+
+    #-----------------------------------------------------------------------
+    def test_deadline(self):
+        link = MockSerial()
+        proto = IM.Protocol(link)
+        addr = IM.Address('0a.12.33')
+
+        done = []
+        msg = Msg.OutStandard.direct(addr, 0x11, 0xff)
+        proto.send(msg, IM.handler.StandardCmd(msg, None))
+        assert len(link.written) == 1
+
+        # Second message waits behind the first one.
+        handler = IM.handler.StandardCmd(msg, None,
+                                         on_done=lambda *x: done.append(x))
+        out = proto.send(msg, handler)
+        assert out.deadline is not None
+
+        # Expired messages are dropped.  The message being sent is kept.
+        link.signal_wrote.emit(link, None)
+        proto._remove_expired_write(out.deadline + 1)
+        assert len(proto._write_queue) == 1
+        assert done == [(False, "Command expired", None)]
+        assert proto.stats["expired"] == 1
+
+        # Explicit deadline - dropped before it's written.
+        out = proto.send(msg, handler, deadline=1)
+        proto._write_finished()
+        assert len(link.written) == 1
+        assert len(proto._write_queue) == 0
+        assert proto.stats["expired"] == 2
+
+    #-----------------------------------------------------------------------
+    def test_cancel(self):
+        link = MockSerial()
+        proto = IM.Protocol(link)
+        addr = IM.Address('0a.12.33')
+
+        done = []
+        msg = Msg.OutStandard.direct(addr, 0x11, 0xff)
+        handler = IM.handler.StandardCmd(msg, None,
+                                         on_done=lambda *x: done.append(x))
+        out1 = proto.send(msg, handler)
+        out2 = proto.send(msg, handler)
+        timed = proto.send(msg, handler, after=10)
+
+        # Message being written can't be cancelled.
+        assert proto.cancel(out1) is False
+        assert proto.cancel(out2) is True
+        assert proto.cancel(out2) is False
+        assert proto.cancel(timed) is True
+        assert len(proto._write_queue) == 1
+        assert len(proto._timed_messages) == 0
+        assert done == [(False, "Command cancelled", None)] * 2
+        assert proto.stats["cancelled"] == 2
+
+    #-----------------------------------------------------------------------
+    def test_cancel_timed(self, virtual_clock):
+        link = MockSerial()
+        proto = IM.Protocol(link)
+        addr = IM.Address('0a.12.33')
+
+        done = []
+        msg = Msg.OutStandard.direct(addr, 0x11, 0xff)
+        handler = IM.handler.StandardCmd(msg, None,
+                                         on_done=lambda *x: done.append(x))
+        proto.send(msg, handler)
+        timed = proto.send(msg, handler, after=1010.0)
+
+        # The timed message moves to the write queue behind the first one
+        # and the same handle still cancels it.
+        link.poll(1011.0)
+        assert len(proto._timed_messages) == 0
+        assert len(proto._write_queue) == 2
+        assert proto.cancel(timed) is True
+        assert len(proto._write_queue) == 1
+        assert done == [(False, "Command cancelled", None)]
+
+    #-----------------------------------------------------------------------
+    def test_poll_dt(self, virtual_clock):
+        link = MockSerial()
+        proto = IM.Protocol(link)
+        addr = IM.Address('0a.12.33')
+        assert link.poll_dt(1000.0) is None
+
+        msg = Msg.OutStandard.direct(addr, 0x11, 0xff)
+        handler = IM.handler.StandardCmd(msg, None)
+        proto.send(msg, handler, after=1050.0)
+        assert link.poll_dt(1000.0) == 50.0
+
+        # Queued behind the message being written so the deadline is the
+        # next event.
+        proto.send(msg, handler)
+        assert proto._write_status == WriteStatus.PENDING_WRITE
+        proto.send(msg, handler, deadline=1010.0)
+        assert link.poll_dt(1000.0) == 10.0
+
+    #-----------------------------------------------------------------------
+    def test_poll_dt_in_flight(self, virtual_clock):
+        link = MockSerial()
+        proto = IM.Protocol(link)
+        addr = IM.Address('0a.12.33')
+
+        # The message being written is past it's deadline but it's not
+        # dropped so only the handler time out counts.
+        msg = Msg.OutStandard.direct(addr, 0x11, 0xff)
+        handler = IM.handler.StandardCmd(msg, None)
+        proto.send(msg, handler, deadline=1001.0)
+        link.signal_wrote.emit(link, None)
+        assert proto._write_status == WriteStatus.WAIT_FOR_REPLY
+
+        t = 1002.0
+        assert link.poll_dt(t) == handler.poll_dt(t)
+        assert link.poll_dt(t) > 0
+
+    #-----------------------------------------------------------------------
+    def test_recorder(self, tmpdir):
+        link = MockSerial()
+        proto = IM.Protocol(link)
+        proto.load_config({'storage' : str(tmpdir)})
+        addr = IM.Address('0a.12.33')
+
+        msg = Msg.OutStandard.direct(addr, 0x11, 0xff)
+        proto.send(msg, IM.handler.StandardCmd(msg, None))
+        link.signal_wrote.emit(link, None)
+        link.signal_read.emit(link, bytes([0x02, 0x62]))
+
+        records = proto.recorder.records()
+        assert [(i[1], i[2]) for i in records] == [
+            (IM.recorder.WRITE, msg.to_bytes()),
+            (IM.recorder.READ, bytes([0x02, 0x62]))]
+
+        # The buffer is written when the handler times out.
+        proto._poll(time.time() + 60)
+        files = tmpdir.listdir()
+        assert len(files) == 1
+        assert IM.recorder.read(str(files[0])) == records
+
+    #-----------------------------------------------------------------------
 
 #===========================================================================
 
@@ -65,9 +220,16 @@ class MockSerial:
         self.signal_read = IM.Signal()
         self.signal_wrote = IM.Signal()
         self.config = None
+        self.written = []
 
-    def poll(self):
+    def poll(self, t=None):
         pass
 
+    def poll_dt(self, t):
+        return None
+
+    def write(self, data, next_write_time=0):
+        self.written.append(data)
+
     def load_config(self, config):
         self.config = config
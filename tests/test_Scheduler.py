@@ -0,0 +1,173 @@
+#===========================================================================
+#
+# Tests for: insteont_mqtt/Scheduler.py
+#
+# pylint: disable=protected-access
+#===========================================================================
+import insteon_mqtt as IM
+import helpers as H
+
+
+class Test_Scheduler:
+    #-----------------------------------------------------------------------
+    def test_idle(self):
+        proto = H.main.MockProtocol()
+        sched = IM.Scheduler(proto, idle_time=1.0)
+
+        calls = []
+        done = []
+        task = sched.add("task", on_done=lambda *x: done.append(x))
+        task.add(lambda on_done: calls.append(on_done))
+        task.add(lambda on_done: calls.append(on_done))
+        assert len(sched) == 1
+
+        # Modem busy - nothing runs.
+        proto.idle = 0.5
+        sched.poll(0)
+        assert len(calls) == 0
+
+        # Idle - one step runs.  Polls while it's running do nothing.
+        proto.idle = 2
+        sched.poll(0)
+        sched.poll(0)
+        assert len(calls) == 1
+        assert sched.status() == [{"label" : "task", "step" : 1,
+                                   "total" : 2, "running" : True}]
+
+        # Step finishes - the next step waits for another idle poll.
+        calls[0](True, "done", None)
+        assert len(calls) == 1
+        proto.idle = 0
+        sched.poll(0)
+        assert len(calls) == 1
+        proto.idle = 2
+        sched.poll(0)
+        assert len(calls) == 2
+
+        calls[1](True, "done", None)
+        assert len(sched) == 0
+        assert done == [(True, "task", None)]
+
+    #-----------------------------------------------------------------------
+    def test_cancel(self):
+        proto = H.main.MockProtocol()
+        sched = IM.Scheduler(proto)
+
+        calls = []
+        done = []
+        task1 = sched.add("task1", on_done=lambda *x: done.append(x))
+        task1.add(lambda on_done: calls.append(on_done))
+        task1.add(lambda on_done: calls.append(on_done))
+        task2 = sched.add("task2", on_done=lambda *x: done.append(x))
+        task2.add(lambda on_done: calls.append(on_done))
+
+        # Queued task is removed right away.
+        sched.cancel(task2)
+        assert len(sched) == 1
+        assert done == [(False, "Task cancelled", None)]
+
+        # Running task finishes the current step.
+        sched.poll(0)
+        sched.cancel(task1)
+        assert len(sched) == 1
+        calls[0](True, "done", None)
+        assert len(sched) == 0
+        assert len(calls) == 1
+        assert done[1] == (False, "Task cancelled", None)
+
+    #-----------------------------------------------------------------------
+    def test_signal(self):
+        proto = H.main.MockProtocol()
+        sched = IM.Scheduler(proto)
+
+        changes = []
+
+        def changed(sched):
+            changes.append(len(sched))
+
+        sched.signal_changed.connect(changed)
+        task = sched.add("task")
+        task.add(lambda on_done: on_done(False, "error", None))
+        sched.poll(0)
+
+        # Queued, started, finished.
+        assert changes == [1, 1, 0]
+
+    #-----------------------------------------------------------------------
+    def test_step_error(self):
+        proto = H.main.MockProtocol()
+        sched = IM.Scheduler(proto)
+
+        done = []
+        calls = []
+
+        def bad(on_done):
+            raise ValueError("bad step")
+
+        task = sched.add("task", on_done=lambda *x: done.append(x))
+        task.add(bad)
+        task.add(lambda on_done: calls.append(on_done))
+
+        # The step fails and the scheduler keeps running later steps.
+        sched.poll(0)
+        assert sched._running is False
+        sched.poll(0)
+        assert len(calls) == 1
+
+        calls[0](True, "ok", None)
+        assert done == [(True, "task", None)]
+
+    #-----------------------------------------------------------------------
+    def test_yield_step(self):
+        proto = H.main.MockProtocol()
+        sched = IM.Scheduler(proto, idle_time=1.0)
+
+        sent = []
+        done = []
+
+        def send(count, on_done):
+            sent.append(count)
+            if count == 2:
+                on_done(True, "sent", None)
+            else:
+                sched.yield_step(send, count + 1, on_done)
+
+        task = sched.add("task", on_done=lambda *x: done.append(x))
+        task.add(send, 0)
+
+        # The step runs and yields after the first message.
+        sched.poll(0)
+        assert sent == [0]
+        assert sched.status()[0]["running"] is False
+        assert sched.poll_dt(0) == 0
+
+        # The continuation waits for the modem to be idle.
+        proto.idle = 0.5
+        sched.poll(0)
+        assert sent == [0]
+
+        proto.idle = 2
+        sched.poll(0)
+        sched.poll(0)
+        assert sent == [0, 1, 2]
+        assert done == [(True, "task", None)]
+        assert len(sched) == 0
+
+    #-----------------------------------------------------------------------
+    def test_yield_cancel(self):
+        proto = H.main.MockProtocol()
+        sched = IM.Scheduler(proto)
+
+        calls = []
+        done = []
+        task = sched.add("task", on_done=lambda *x: done.append(x))
+        task.add(lambda on_done: sched.yield_step(calls.append, on_done))
+
+        # Cancelling a paused task drops the continuation.
+        sched.poll(0)
+        sched.cancel(task)
+        assert done == [(False, "Task cancelled", None)]
+        sched.poll(0)
+        assert calls == []
+
+    #-----------------------------------------------------------------------
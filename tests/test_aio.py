@@ -0,0 +1,95 @@
+#===========================================================================
+#
+# Tests for: insteont_mqtt/aio.py
+#
+# pylint: disable=protected-access
+#===========================================================================
+import asyncio
+import pytest
+import insteon_mqtt as IM
+import insteon_mqtt.message as Msg
+import helpers as H
+
+
+class Test_aio:
+    #-----------------------------------------------------------------------
+    def test_call(self):
+        calls = []
+
+        def func(a, b=None, on_done=None):
+            calls.append((a, b))
+            on_done(True, "done", a)
+            on_done(False, "ignored", None)
+
+        def fail(on_done=None):
+            on_done(False, "error", None)
+
+        async def run():
+            r1 = await IM.aio.call(func, 1, b=2)
+            r2 = await IM.aio.wrap(Obj(func)).func(3)
+            r3 = await IM.aio.call(fail)
+            with pytest.raises(IM.aio.CommandError):
+                await IM.aio.wrap(Obj(fail), check=True).func()
+            return r1, r2, r3
+
+        r1, r2, r3 = asyncio.run(run())
+        assert calls == [(1, 2), (3, None)]
+        assert r1 == (True, "done", 1)
+        assert r2.data == 3
+        assert r3.success is False
+
+    #-----------------------------------------------------------------------
+    def test_gather(self, tmpdir):
+        link = MockSerial()
+        proto = IM.Protocol(link)
+        modem = H.main.MockModem(tmpdir)
+        devices = [IM.device.Dimmer(proto, modem, IM.Address(0x01, 0x02, i))
+                   for i in range(3)]
+
+        async def reply():
+            # All the commands are queued before any of them finish.
+            await asyncio.sleep(0)
+            assert len(proto._write_queue) == 3
+            assert len(link.written) == 1
+
+            for dev in devices:
+                out = proto._write_queue[0].msg
+                link.signal_wrote.emit(link, link.written[-1])
+
+                out.is_ack = True
+                proto._process_msg(out)
+                flags = Msg.Flags(Msg.Flags.Type.DIRECT_ACK, False)
+                proto._process_msg(Msg.InpStandard(dev.addr, modem.addr,
+                                                   flags, 0x11, 0xff))
+
+        async def run():
+            cmds = [IM.aio.wrap(i).on() for i in devices]
+            return await asyncio.gather(reply(), *cmds)
+
+        results = asyncio.run(run())
+        assert [i.success for i in results[1:]] == [True, True, True]
+        assert len(link.written) == 3
+        assert all(i._level == 0xff for i in devices)
+
+
+#===========================================================================
+class Obj:
+    def __init__(self, func):
+        self.func = func
+        self.value = 5
+
+
+class MockSerial:
+    def __init__(self):
+        self.signal_read = IM.Signal()
+        self.signal_wrote = IM.Signal()
+        self.written = []
+
+    def poll(self, t):
+        pass
+
+    def poll_dt(self, t):
+        return None
+
+    def write(self, data, next_write_time=0):
+        self.written.append(data)
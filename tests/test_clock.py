@@ -0,0 +1,40 @@
+#===========================================================================
+#
+# Tests for: insteont_mqtt/clock.py
+#
+#===========================================================================
+import time
+from insteon_mqtt import clock
+
+
+class Test_clock:
+    def test_wall(self):
+        assert not clock.get().is_virtual()
+        assert abs(clock.time() - time.time()) < 1
+
+    #-----------------------------------------------------------------------
+    def test_virtual(self):
+        virtual = clock.VirtualClock(10.0)
+        save = clock.set(virtual)
+        try:
+            assert clock.get() is virtual
+            assert clock.time() == 10.0
+
+            virtual.advance(2.5)
+            assert clock.time() == 12.5
+
+            # Time never goes backwards.
+            virtual.advance(-1)
+            assert clock.time() == 12.5
+        finally:
+            assert clock.set(save) is virtual
+
+        assert clock.get() is save
+
+    #-----------------------------------------------------------------------
+    def test_default(self, virtual_clock):
+        assert clock.time() == 1000.0
+        clock.set()
+        assert not clock.get().is_virtual()
+
+    #-----------------------------------------------------------------------
@@ -63,6 +63,80 @@ class Test_config:
         with pytest.raises(Exception):
             IM.config.load(file)
 
+    #-----------------------------------------------------------------------
+    def test_section(self, tmpdir):
+        # Includes in other sections aren't read.
+        tmpdir.join("main.yaml").write(
+            "insteon: !include missing.yaml\n"
+            "mqtt: !include mqtt.yaml\n")
+        tmpdir.join("mqtt.yaml").write("broker: host\n")
+
+        file = str(tmpdir.join("main.yaml"))
+        cfg = IM.config.load(file, section="mqtt")
+        assert cfg == {"mqtt" : {"broker" : "host"}}
+
+        assert IM.config.load(file, section="logging") == {}
+
+    #-----------------------------------------------------------------------
+    def test_cache(self, tmpdir, mocker):
+        tmpdir.join("main.yaml").write("mqtt: !include mqtt.yaml\n")
+        tmpdir.join("mqtt.yaml").write("broker: host\n")
+        file = str(tmpdir.join("main.yaml"))
+        cache = str(tmpdir.join("cache"))
+
+        cfg = IM.config.load(file, cache=cache)
+        assert cfg == {"mqtt" : {"broker" : "host"}}
+        assert len(os.listdir(cache)) == 1
+
+        # Cached loads don't parse the files.
+        spy = mocker.spy(IM.config.Loader, "get_single_data")
+        assert IM.config.load(file, cache=cache) == cfg
+        assert IM.config.load(file, section="mqtt", cache=cache) == cfg
+        assert spy.call_count == 0
+
+        # Touching a file without changing it keeps the cache.
+        path = str(tmpdir.join("mqtt.yaml"))
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        assert IM.config.load(file, cache=cache) == cfg
+        assert spy.call_count == 0
+
+        # Changing an included file reloads it.
+        tmpdir.join("mqtt.yaml").write("broker: other\n")
+        cfg = IM.config.load(file, cache=cache)
+        assert cfg == {"mqtt" : {"broker" : "other"}}
+        assert spy.call_count == 2
+
+    #-----------------------------------------------------------------------
+    def test_cache_read_only(self, tmpdir, mocker):
+        tmpdir.join("main.yaml").write("mqtt:\n  broker: host\n")
+        file = str(tmpdir.join("main.yaml"))
+        cache = str(tmpdir.join("cache"))
+
+        # A cache directory that can't be written to is skipped.
+        mocker.patch("os.access", return_value=False)
+        cfg = IM.config.load(file, cache=cache)
+        assert cfg == {"mqtt" : {"broker" : "host"}}
+        assert os.listdir(cache) == []
+
+        # So is one that can't be created.
+        mocker.stopall()
+        tmpdir.join("file").write("")
+        cfg = IM.config.load(file, cache=str(tmpdir.join("file", "cache")))
+        assert cfg == {"mqtt" : {"broker" : "host"}}
+
+    #-----------------------------------------------------------------------
+    def test_validate(self, tmpdir):
+        IM.config.validate({"insteon" : {"devices" : {"Switch" : []}}})
+        IM.config.validate({"insteon" : {"devices" : None}})
+
+        with pytest.raises(Exception):
+            IM.config.validate(["mqtt"])
+
+        tmpdir.join("main.yaml").write("insteon:\n  devices:\n    foo: []\n")
+        with pytest.raises(Exception):
+            IM.config.load(str(tmpdir.join("main.yaml")))
+
 
 #===========================================================================
 class MockManager:
@@ -0,0 +1,113 @@
+#===========================================================================
+#
+# Tests for: insteont_mqtt/log.py
+#
+#===========================================================================
+import logging
+import queue
+import sys
+import insteon_mqtt as IM
+
+
+class Test_log:
+    #-----------------------------------------------------------------------
+    def test_drop(self):
+        log_queue = queue.Queue(2)
+        handler = IM.log.DropQueueHandler(log_queue)
+
+        args = [1, 2]
+        records = [record("msg %s", args) for i in range(4)]
+        for r in records:
+            handler.emit(r)
+
+        # Records are formatted when they're queued so later changes to
+        # the arguments aren't logged.
+        args.append(3)
+        assert handler.dropped == 2
+        queued = log_queue.get_nowait()
+        assert queued.msg == "msg [1, 2]"
+        assert queued.args is None
+        assert queued.getMessage() == "msg [1, 2]"
+        assert records[0].msg == "msg %s"
+
+        # The dropped count is reported when there is room.
+        log_queue.get_nowait()
+        handler.emit(records[2])
+        warning = log_queue.get_nowait()
+        assert warning.levelno == logging.WARNING
+        assert warning.getMessage() == "Logging queue full: 2 messages dropped"
+        assert log_queue.get_nowait().msg == "msg [1, 2, 3]"
+
+        handler.emit(records[3])
+        assert log_queue.get_nowait().msg == "msg [1, 2, 3]"
+
+    #-----------------------------------------------------------------------
+    def test_ui_callbacks(self):
+        log_obj = IM.log.get_logger()
+        ui1 = []
+        ui2 = []
+        h1 = log_obj.set_ui_callback(ui1.append)
+        h2 = log_obj.set_ui_callback(ui2.append)
+        try:
+            # Each callback gets the messages.  Removing one leaves the
+            # other in place.
+            log_obj.error("msg 1")
+            log_obj.del_ui_callback(h1)
+            log_obj.error("msg 2")
+            assert [i.getMessage() for i in ui1] == ["msg 1"]
+            assert [i.getMessage() for i in ui2] == ["msg 1", "msg 2"]
+        finally:
+            log_obj.del_ui_callback(h1)
+            log_obj.del_ui_callback(h2)
+
+        assert h2 not in log_obj.handlers
+
+    #-----------------------------------------------------------------------
+    def test_exception(self):
+        log_queue = queue.Queue()
+        handler = IM.log.DropQueueHandler(log_queue)
+
+        try:
+            raise ValueError("bad value")
+        except ValueError:
+            r = record("failed")
+            r.exc_info = sys.exc_info()
+
+        handler.emit(r)
+        queued = log_queue.get_nowait()
+        assert queued.exc_info is None
+        assert "ValueError: bad value" in queued.exc_text
+
+    #-----------------------------------------------------------------------
+    def test_thread(self, tmpdir):
+        log_obj = IM.log.get_logger()
+        save = log_obj.handlers[:], log_obj.level
+        path = str(tmpdir.join("test.log"))
+        try:
+            IM.log.initialize(logging.INFO, False, path)
+            handler = log_obj.handlers[-1]
+            assert isinstance(handler, IM.log.DropQueueHandler)
+
+            # UI messages are still sent synchronously.
+            ui = []
+            log_obj.set_ui_callback(ui.append)
+            log_obj.ui("ui %d", 1)
+            assert [i.getMessage() for i in ui] == ["ui 1"]
+            log_obj.del_ui_callback()
+
+            log_obj.info("test %s", "message")
+            IM.log.shutdown()
+
+            lines = open(path).read().splitlines()
+            assert lines[0].endswith("ui 1")
+            assert lines[1].endswith("test message")
+        finally:
+            IM.log.shutdown()
+            log_obj.handlers[:], level = save
+            log_obj.setLevel(level)
+
+
+#===========================================================================
+def record(msg, *args):
+    return logging.LogRecord("test", logging.INFO, __file__, 1, msg, args,
+                             None)
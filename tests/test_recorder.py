@@ -0,0 +1,158 @@
+#===========================================================================
+#
+# Tests for: insteont_mqtt/recorder.py
+#
+#===========================================================================
+import pytest
+import insteon_mqtt as IM
+import insteon_mqtt.message as Msg
+
+
+class Test_recorder:
+    #-----------------------------------------------------------------------
+    def test_ring(self):
+        rec = IM.recorder.Recorder(3)
+        for i in range(5):
+            rec.add(IM.recorder.READ, bytes([i]))
+
+        assert [i[2] for i in rec.records()] == [b"\x02", b"\x03", b"\x04"]
+
+        rec.load_config({'recorder_size' : 2})
+        assert [i[2] for i in rec.records()] == [b"\x03", b"\x04"]
+
+        # Size 0 disables the recorder.
+        rec.load_config({'recorder_size' : 0})
+        rec.add(IM.recorder.READ, b"\x05")
+        assert len(rec) == 0
+
+    #-----------------------------------------------------------------------
+    def test_file(self, tmpdir):
+        rec = IM.recorder.Recorder()
+        with pytest.raises(ValueError):
+            rec.dump()
+
+        rec.add(IM.recorder.WRITE, b"\x02\x60")
+        rec.add(IM.recorder.READ, b"")
+        rec.add(IM.recorder.READ, bytes(range(256)) * 2)
+
+        path = rec.dump(str(tmpdir.join("test.bin")))
+        assert IM.recorder.read(path) == rec.records()
+
+        tmpdir.join("bad.bin").write("bad")
+        with pytest.raises(ValueError):
+            IM.recorder.read(str(tmpdir.join("bad.bin")))
+
+    #-----------------------------------------------------------------------
+    def test_auto_dump(self, tmpdir):
+        rec = IM.recorder.Recorder()
+        rec.load_config({'storage' : str(tmpdir)})
+
+        # Nothing is written if the buffer is empty.
+        assert rec.auto_dump(100) is None
+
+        rec.add(IM.recorder.READ, b"\x02")
+        assert rec.auto_dump(100) is not None
+        assert rec.auto_dump(100 + rec.auto_dump_interval - 1) is None
+
+        rec.load_config({'storage' : str(tmpdir),
+                         'recorder_auto_dump' : False})
+        assert rec.auto_dump(1000) is None
+
+    #-----------------------------------------------------------------------
+    def test_auto_dump_keep(self, tmpdir):
+        rec = IM.recorder.Recorder()
+        rec.load_config({'storage' : str(tmpdir), 'recorder_auto_keep' : 2})
+        rec.add(IM.recorder.READ, b"\x02")
+
+        for i in range(4):
+            tmpdir.join("recorder-auto-2000010%d-000000.bin" % i).write("")
+        tmpdir.join("other.bin").write("")
+
+        path = rec.auto_dump(100)
+        names = sorted(i.basename for i in tmpdir.listdir())
+        assert names == ["other.bin", "recorder-auto-20000103-000000.bin",
+                         path.split("/")[-1]]
+
+    #-----------------------------------------------------------------------
+    def test_dump_name(self, tmpdir):
+        rec = IM.recorder.Recorder()
+        rec.load_config({'storage' : str(tmpdir.join("rec"))})
+        tmpdir.join("rec").mkdir()
+        rec.add(IM.recorder.READ, b"\x02")
+
+        # Directories in the name are ignored.
+        path = rec.dump(name="../../etc/test.bin")
+        assert path == str(tmpdir.join("rec", "test.bin"))
+        assert tmpdir.join("rec", "test.bin").check()
+
+    #-----------------------------------------------------------------------
+    def test_decode(self):
+        addr = IM.Address('0a.12.33')
+        out = Msg.OutStandard.direct(addr, 0x11, 0xff)
+        inp = bytes([0x02, 0x50, 0x0a, 0x12, 0x33, 0x44, 0x85, 0x11, 0x20,
+                     0x11, 0xff])
+
+        # Input messages split over reads with junk bytes between them.
+        records = [
+            (1.0, IM.recorder.WRITE, out.to_bytes()),
+            (2.0, IM.recorder.READ, b"\x15" + inp[:4]),
+            (3.0, IM.recorder.READ, inp[4:] + b"\x02\x01" + inp),
+            ]
+        result = list(IM.recorder.decode(records))
+
+        assert [(i[0], i[2]) for i in result] == [
+            (1.0, out.to_bytes()), (2.0, b"\x15"), (3.0, inp),
+            (3.0, b"\x02\x01"), (3.0, inp)]
+        assert isinstance(result[0][3], Msg.OutStandard)
+        assert result[0][3].cmd1 == 0x11
+        assert result[1][3] is None
+        assert isinstance(result[2][3], Msg.InpStandard)
+        assert result[3][3] is None
+
+    #-----------------------------------------------------------------------
+    def test_capture(self, tmpdir):
+        path = str(tmpdir.join("capture.bin"))
+        link = MockLink()
+        capture = IM.recorder.Capture(path)
+        capture.attach(link)
+
+        link.signal_wrote.emit(link, b"\x02\x60")
+        link.signal_read.emit(link, b"\x02\x60\x06")
+        capture.close()
+        link.signal_read.emit(link, b"\x02")
+
+        records = IM.recorder.read(path)
+        assert [(i[1], i[2]) for i in records] == [
+            (IM.recorder.WRITE, b"\x02\x60"),
+            (IM.recorder.READ, b"\x02\x60\x06")]
+
+    #-----------------------------------------------------------------------
+    def test_capture_flush(self, tmpdir, virtual_clock):
+        path = str(tmpdir.join("capture.bin"))
+        link = MockLink()
+        capture = IM.recorder.Capture(path)
+        capture.attach(link)
+
+        def on_disk():
+            return [i[2] for i in IM.recorder.read(path)]
+
+        # Reads are buffered until the flush interval passes.
+        link.signal_read.emit(link, b"\x02\x60\x06")
+        capture.poll(virtual_clock.time())
+        assert on_disk() == []
+
+        virtual_clock.advance(capture.flush_interval)
+        capture.poll(virtual_clock.time())
+        assert on_disk() == [b"\x02\x60\x06"]
+
+        # Writes are flushed right away.
+        link.signal_wrote.emit(link, b"\x02\x60")
+        assert on_disk() == [b"\x02\x60\x06", b"\x02\x60"]
+        capture.close()
+
+
+#===========================================================================
+class MockLink:
+    def __init__(self):
+        self.signal_read = IM.Signal()
+        self.signal_wrote = IM.Signal()
@@ -27,16 +27,22 @@ class MockProtocol:
     """
     def __init__(self):
         self.signal_received = IM.Signal()
+        self.signal_poll = IM.Signal()
         self.sent = []
+        self.idle = 1000
+        self.background = IM.Scheduler(self)
 
     def clear(self):
         self.sent = []
 
-    def send(self, msg, handler, priority=None, after=None):
+    def send(self, msg, handler, priority=None, after=None, deadline=None):
         self.sent.append(Data(msg=msg, handler=handler))
 
     def add_handler(self, handler):
         pass
 
+    def idle_time(self, t):
+        return self.idle
+
 
 #===========================================================================
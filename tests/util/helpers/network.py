@@ -16,7 +16,7 @@ class MockMqtt:
         self.pub = []
         self.sub = []
 
-    def publish(self, topic, payload, qos=None, retain=None):
+    def publish(self, topic, payload, qos=None, retain=None, dedup=False):
         self.pub.append(Data(topic=topic, payload=payload, qos=qos,
                              retain=retain))
 
@@ -39,6 +39,7 @@ class MockMqttClient:
         self.sub = []
         self.unsub = []
         self.cb = {}
+        self.requests = []
 
     def clear(self):
         self.pub = []
@@ -49,15 +50,38 @@ class MockMqttClient:
         if topic in self.cb:
             self.cb[topic](self, None, data)
 
-    def subscribe(self, topic, qos):
-        self.sub.append(Data(topic=topic, qos=qos))
+    def subscribe(self, topic, qos=0):
+        # Paho also accepts a list of (topic, qos) tuples.
+        topics = topic if isinstance(topic, list) else [(topic, qos)]
+        for t, q in topics:
+            self.sub.append(Data(topic=t, qos=q))
+
+        self.requests.append(topics)
+        return (0, len(self.requests))
 
     def unsubscribe(self, topic):
-        self.unsub.append(Data(topic=topic))
-        self.cb.pop(topic, None)
+        topics = topic if isinstance(topic, list) else [topic]
+        for t in topics:
+            self.unsub.append(Data(topic=t))
+            self.cb.pop(t, None)
+
+        self.requests.append(topics)
+        return (0, len(self.requests))
 
     def message_callback_add(self, topic, callback):
         self.cb[topic] = callback
 
+    def message_callback_remove(self, topic):
+        self.cb.pop(topic, None)
+
+    def loop_write(self):
+        pass
+
+    def loop_misc(self):
+        pass
+
+    def want_write(self):
+        return False
+
 
 #===========================================================================